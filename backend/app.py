@@ -48,7 +48,7 @@ def start_cpolar_service():
             if platform.system() == 'Windows' or os.access(cpolar_path, os.X_OK):
                 # 启动cpolar服务，使用正确的命令：cpolar http 5000
                 # 在独立窗口中运行
-                subprocess.Popen(
+                process = subprocess.Popen(
                     [cpolar_path, 'http', '5000'],
                     stdout=None,
                     stderr=None,
@@ -56,6 +56,9 @@ def start_cpolar_service():
                     creationflags=subprocess.CREATE_NEW_CONSOLE if platform.system() == 'Windows' else 0,
                     cwd=str(current_dir)
                 )
+                # 通知隧道监视器：立即开始快速查询新隧道的地址
+                from services.tunnel_monitor import tunnel_monitor
+                tunnel_monitor.notify_restart(process)
                 print(f"[CPolar] 已在独立窗口中启动cpolar服务")
                 print(f"[CPolar] 使用路径：{cpolar_path}")
                 print(f"[CPolar] 启动命令：cpolar http 5000")
@@ -73,6 +76,10 @@ def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
     
+    # 配置日志（队列化写出，敏感信息脱敏）
+    from utils.logging_setup import setup_logging
+    setup_logging(app.config)
+    
     # 确保instance目录存在
     os.makedirs(app.instance_path, exist_ok=True)
     
@@ -90,6 +97,7 @@ def create_app(config_class=Config):
     from routes.settings import settings_bp
     from routes.reminders import reminders_bp
     from routes.spoc import spoc_bp
+    from routes.sync import sync_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(courses_bp, url_prefix='/api/courses')
@@ -100,15 +108,65 @@ def create_app(config_class=Config):
     app.register_blueprint(settings_bp, url_prefix='/api/settings')
     app.register_blueprint(reminders_bp, url_prefix='/api/reminders')
     app.register_blueprint(spoc_bp, url_prefix='/api/spoc')
+    app.register_blueprint(sync_bp, url_prefix='/api/sync')
+    
+    # 请求指标：延迟直方图、状态码、数据库查询和外部服务耗时
+    if app.config.get('METRICS_ENABLED'):
+        from services.metrics import init_metrics
+        from routes.metrics import metrics_bp
+        init_metrics(app)
+        app.register_blueprint(metrics_bp, url_prefix='/api/metrics')
+    
+    # 查询检查：N+1查询和慢查询
+    if app.config.get('QUERY_INSPECTOR_ENABLED'):
+        from services.query_inspector import query_inspector
+        query_inspector.init_app(app)
+    
+    # 性能分析：按请求采样分析和全线程采样接口
+    if app.config.get('PROFILING_ENABLED'):
+        from services.profiler import init_profiling
+        from routes.debug import debug_bp
+        init_profiling(app)
+        app.register_blueprint(debug_bp, url_prefix='/api/debug')
+    
+    # 响应压缩：按 Accept-Encoding 压缩较大的JSON等文本响应
+    if app.config.get('COMPRESSION_ENABLED'):
+        from services.compression import init_compression
+        init_compression(app)
     
     # 确保instance目录存在
     instance_dir = os.path.join(app.root_path, 'instance')
     if not os.path.exists(instance_dir):
         os.makedirs(instance_dir)
     
-    # 创建数据库表
+    # 创建数据库表，并为已有的表补充新增的列和索引
     with app.app_context():
         db.create_all()
+        from utils.schema import upgrade_schema
+        upgrade_schema(db)
+    
+    # 多用户数据隔离：按登录令牌确定当前用户，查询自动按用户过滤（升级前的数据归属默认用户）
+    from services.user_scope import user_scope
+    user_scope.init_app(app)
+    
+    # 按用户分库：属于用户的表按当前用户路由到各自的SQLite文件，启动时迁移已有的分库
+    if app.config.get('USER_SHARDING_ENABLED'):
+        from services.user_shards import user_shards
+        user_shards.init_app(app)
+    
+    with app.app_context():
+        # 升级后首次启动时，用已有的专注记录生成统计汇总
+        from services.focus_stats import focus_stats_service
+        focus_stats_service.backfill()
+        # 新条目的id不能与归档中的条目重复（entries表升级为AUTOINCREMENT后序列值只等于原表的最大id）
+        from services.archive import archive_service
+        archive_service.ensure_id_floor()
+    
+    # 后台维护任务：过期任务清理、专注记录清理、数据库整理（多进程时只有取得文件锁的进程执行）
+    if app.config.get('SCHEDULER_ENABLED'):
+        from services.scheduler import maintenance_scheduler, register_maintenance_jobs
+        register_maintenance_jobs(maintenance_scheduler, app.config)
+        maintenance_scheduler.start(app)
     
     # 启动cpolar服务（异步，不阻塞其他初始化）
     import threading
@@ -116,7 +174,7 @@ def create_app(config_class=Config):
     cpolar_thread.daemon = True
     cpolar_thread.start()
     
-    # 立即启动cpolar域名自动刷新线程（它会自己处理延迟）
+    # 启动cpolar隧道监视器（隧道出现前快速重试，之后低频检查）
     from utils.qr_code import QRCodeGenerator
     QRCodeGenerator.start_cpolar_refresh()
     
@@ -133,20 +191,32 @@ def create_app(config_class=Config):
         frontend_dist = current_dir.parent / 'frontend' / 'dist'
         public_path = current_dir.parent / 'frontend' / 'public'
     
+    # 静态文件（内存缓存、预压缩，带哈希的构建产物永久缓存）
+    from utils.static_files import static_file_cache, IMMUTABLE_CACHE_CONTROL, NO_CACHE_CONTROL
+    public_cache_control = f"public, max-age={app.config.get('STATIC_MAX_AGE', 86400)}"
+    threading.Thread(target=static_file_cache.warm, args=(str(frontend_dist),), daemon=True).start()
+    
     # 静态文件路由
     @app.route('/assets/<path:filename>')
     def serve_assets(filename):
-        return send_from_directory(str(frontend_dist / 'assets'), filename)
+        return static_file_cache.serve(str(frontend_dist / 'assets'), filename, IMMUTABLE_CACHE_CONTROL)
     
-    # 声音文件路由
+    # 声音文件路由（支持Range请求）
     @app.route('/sound/<path:filename>')
     def serve_sounds(filename):
-        return send_from_directory(str(public_path / 'sound'), filename)
+        return static_file_cache.serve(str(public_path / 'sound'), filename, public_cache_control)
     
     # SVG文件路由
     @app.route('/svg/<path:filename>')
     def serve_svgs(filename):
-        return send_from_directory(str(public_path / 'svg'), filename)
+        return static_file_cache.serve(str(public_path / 'svg'), filename, public_cache_control)
+    
+    def serve_index():
+        # index.html 保存在内存中，文件修改后自动重新加载
+        index_path = frontend_dist / 'index.html'
+        if index_path.exists():
+            return static_file_cache.serve_file(str(index_path), NO_CACHE_CONTROL)
+        return 'Frontend not built', 500
     
     # 主页面路由
     @app.route('/')
@@ -156,37 +226,84 @@ def create_app(config_class=Config):
         if path.startswith('api/'):
             return {'error': 'Not Found'}, 404
         
-        # 读取并返回index.html
-        index_path = frontend_dist / 'index.html'
-        if index_path.exists():
-            with open(index_path, 'r', encoding='utf-8') as f:
-                return f.read()
-        return 'Frontend not built', 500
+        return serve_index()
     
     # 手机端路由
     @app.route('/mobile')
     @app.route('/mobile/<path:path>')
     def serve_mobile(path=''):
-        # 读取并返回移动端index.html
-        index_path = frontend_dist / 'index.html'
-        if index_path.exists():
-            with open(index_path, 'r', encoding='utf-8') as f:
-                return f.read()
-        return 'Frontend not built', 500
+        return serve_index()
     
     # 服务发现API - 返回手机访问信息
     @app.route('/api/mobile/info')
     def mobile_info():
+        from flask import request
         from utils.qr_code import QRCodeGenerator
         
-        # 获取手机访问信息
+        # 获取手机访问信息（按访问地址缓存）
         access_info = QRCodeGenerator.get_mobile_access_info(port=5000)
         
+        # include_qr=0 时不返回base64二维码，由前端通过 qr_code_url 加载图片
+        if request.args.get('include_qr') == '0':
+            access_info = {key: value for key, value in access_info.items() if key != 'qr_code'}
+        
         return {
             'success': True,
             'data': access_info
         }, 200
     
+    # 手机访问地址的二维码图片（PNG/SVG），带版本号 v 的请求可永久缓存
+    @app.route('/api/mobile/qr.<string:image_format>')
+    def mobile_qr_code(image_format):
+        from flask import request
+        from utils.qr_code import QRCodeGenerator
+        
+        if image_format not in ('png', 'svg'):
+            return {'success': False, 'message': '不支持的图片格式'}, 404
+        
+        mobile_url, _, _ = QRCodeGenerator.get_mobile_url(port=5000)
+        if image_format == 'png':
+            response = app.response_class(QRCodeGenerator.get_qr_png(mobile_url), mimetype='image/png')
+        else:
+            response = app.response_class(QRCodeGenerator.get_qr_svg(mobile_url), mimetype='image/svg+xml')
+        
+        etag = QRCodeGenerator.qr_etag(mobile_url)
+        response.set_etag(etag)
+        if request.args.get('v') == etag:
+            response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        else:
+            response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
+    
+    # 手机访问地址变化的事件流（SSE），隧道地址变化时推送 tunnel 事件
+    @app.route('/api/mobile/events')
+    def mobile_events():
+        from flask import Response
+        import json
+        import queue
+        from services.tunnel_monitor import tunnel_monitor
+        
+        events = tunnel_monitor.open_stream()
+        
+        def generate():
+            try:
+                yield f"event: tunnel\ndata: {json.dumps({'cpolar_url': tunnel_monitor.current_url})}\n\n"
+                while True:
+                    try:
+                        url = events.get(timeout=15)
+                    except queue.Empty:
+                        # 心跳，防止隧道或代理断开空闲连接
+                        yield ': keepalive\n\n'
+                        continue
+                    yield f"event: tunnel\ndata: {json.dumps({'cpolar_url': url})}\n\n"
+            finally:
+                tunnel_monitor.close_stream(events)
+        
+        response = Response(generate(), mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+    
     # 设置CPolar authtoken的API端点
     @app.route('/api/mobile/set_cpolar_authtoken', methods=['POST'])
     def set_cpolar_authtoken():
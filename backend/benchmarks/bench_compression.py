@@ -0,0 +1,139 @@
+"""
+响应压缩基准：取一次典型周视图加载的JSON响应（本周条目、任务列表、即将到来的提醒），
+比较各编码和压缩等级下的传输字节数、压缩CPU耗时，以及在给定带宽（如cpolar隧道）下的估算传输时间
+
+用法: python benchmarks/bench_compression.py [--entries 10000] [--tasks 1000] [--repeat 50]
+      [--levels 1,6,9] [--bandwidth-kbps 1000] [--output result.json]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def week_view_payloads(app, week_start):
+    """
+    按前端周视图的加载顺序请求接口，返回未压缩的响应体
+    :return: {接口: 响应体}
+    """
+    client = app.test_client()
+    requests_ = {
+        'GET /api/entries/range': lambda: client.get('/api/entries/range', query_string={
+            'start_date': week_start.strftime('%Y-%m-%d'),
+            'end_date': (week_start + timedelta(days=6)).strftime('%Y-%m-%d')
+        }),
+        'GET /api/tasks/': lambda: client.get('/api/tasks/'),
+        'POST /api/reminders/upcoming': lambda: client.post('/api/reminders/upcoming', json={
+            'settings': {'course': 30, 'exam': [14, 60]}
+        }),
+    }
+    payloads = {}
+    for name, send in requests_.items():
+        response = send()
+        if response.status_code != 200:
+            raise RuntimeError(f"{name} 返回 {response.status_code}")
+        payloads[name] = response.get_data()
+    return payloads
+
+
+def measure(data, encoding, level, repeat):
+    """
+    :return: (压缩后字节数, 每次压缩的CPU耗时毫秒)
+    """
+    from services.compression import compress
+    
+    compressed = compress(data, encoding, level)
+    started = time.process_time()
+    for _ in range(repeat):
+        compress(data, encoding, level)
+    return len(compressed), (time.process_time() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='响应压缩基准')
+    parser.add_argument('--entries', type=int, default=10000, help='预先生成的日程条目数量')
+    parser.add_argument('--tasks', type=int, default=1000, help='预先生成的任务数量')
+    parser.add_argument('--repeat', type=int, default=50, help='每种组合的压缩次数')
+    parser.add_argument('--levels', default='1,6,9', help='逗号分隔的压缩等级')
+    parser.add_argument('--bandwidth-kbps', type=float, default=1000, help='估算传输时间使用的带宽（千比特每秒）')
+    parser.add_argument('--output', help='结果JSON的保存路径，默认输出到标准输出')
+    args = parser.parse_args()
+    
+    data_dir = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(data_dir, 'bench.db')}"
+    os.environ['ARCHIVE_DATABASE_URL'] = f"sqlite:///{os.path.join(data_dir, 'archive.db')}"
+    os.environ['METRICS_ENABLED'] = 'false'
+    from bench_scenarios import make_app
+    from datagen import populate
+    from extensions import db
+    from services.compression import available_encodings
+    
+    app = make_app()
+    data_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=30)
+    with app.app_context():
+        populate(db, args.entries, args.tasks, start=data_start)
+    week_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    week_start -= timedelta(days=week_start.weekday())
+    payloads = week_view_payloads(app, week_start)
+    
+    levels = [int(level) for level in args.levels.split(',') if level.strip()]
+    bytes_per_second = args.bandwidth_kbps * 1000 / 8
+    results = {}
+    for name, data in payloads.items():
+        rows = [{
+            'encoding': 'identity',
+            'level': None,
+            'bytes': len(data),
+            'ratio': 1.0,
+            'cpu_ms': 0.0,
+            'transfer_ms': round(len(data) / bytes_per_second * 1000, 1)
+        }]
+        for encoding in available_encodings():
+            for level in levels:
+                size, cpu_ms = measure(data, encoding, level, args.repeat)
+                rows.append({
+                    'encoding': encoding,
+                    'level': level,
+                    'bytes': size,
+                    'ratio': round(size / len(data), 4),
+                    'cpu_ms': round(cpu_ms, 3),
+                    'transfer_ms': round(size / bytes_per_second * 1000, 1)
+                })
+        results[name] = rows
+    
+    # 整个周视图的合计（每种编码/等级）
+    totals = {}
+    for rows in results.values():
+        for row in rows:
+            key = row['encoding'] if row['level'] is None else f"{row['encoding']}-{row['level']}"
+            total = totals.setdefault(key, {'bytes': 0, 'cpu_ms': 0.0, 'transfer_ms': 0.0})
+            total['bytes'] += row['bytes']
+            total['cpu_ms'] = round(total['cpu_ms'] + row['cpu_ms'], 3)
+            total['transfer_ms'] = round(total['transfer_ms'] + row['transfer_ms'], 1)
+    
+    report = {
+        'meta': {
+            'entries': args.entries,
+            'tasks': args.tasks,
+            'week_start': week_start.strftime('%Y-%m-%d'),
+            'bandwidth_kbps': args.bandwidth_kbps,
+            'encodings': available_encodings()
+        },
+        'endpoints': results,
+        'week_view_total': totals
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+请求指标记录器的热路径开销基准：单次记录的耗时，以及开启指标前后一个简单路由的请求耗时
+用法: python benchmarks/bench_metrics.py [--repeat 100000] [--requests 5000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, jsonify
+
+from services.metrics import MetricsRecorder, init_metrics, metrics_recorder
+
+
+def bench(label, func, repeat):
+    """运行repeat次并返回每次调用的平均耗时（微秒）"""
+    func()  # 预热
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    elapsed_us = (time.perf_counter() - start) * 1_000_000 / repeat
+    print(f"{label:<40} {elapsed_us:8.3f} us")
+    return elapsed_us
+
+
+def make_app(with_metrics):
+    """只有一个路由的Flask应用，用于比较请求钩子的开销"""
+    app = Flask(__name__)
+    
+    @app.route('/api/ping')
+    def ping():
+        return jsonify({'status': 'ok'})
+    
+    if with_metrics:
+        init_metrics(app)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description='请求指标记录器热路径基准')
+    parser.add_argument('--repeat', type=int, default=100000, help='单项记录的重复次数')
+    parser.add_argument('--requests', type=int, default=5000, help='模拟请求次数')
+    args = parser.parse_args()
+    
+    recorder = MetricsRecorder()
+    
+    def request_cycle():
+        recorder.start_request()
+        recorder.finish_request('courses', '/api/courses/<date>', 'GET', 200)
+    
+    request_us = bench('start_request + finish_request', request_cycle, args.repeat)
+    query_us = bench('record_query', lambda: recorder.record_query(0.0004), args.repeat)
+    outbound_us = bench('record_outbound', lambda: recorder.record_outbound('buaa', 0.12, 200), args.repeat)
+    bench('render_prometheus', recorder.render_prometheus, 1000)
+    
+    print()
+    plain_client = make_app(False).test_client()
+    metrics_client = make_app(True).test_client()
+    plain_us = bench('GET /api/ping without metrics', lambda: plain_client.get('/api/ping'), args.requests)
+    metrics_us = bench('GET /api/ping with metrics', lambda: metrics_client.get('/api/ping'), args.requests)
+    assert metrics_recorder.request_latency
+    
+    print()
+    print(f"per-request recording: {request_us:.2f} us, per query: {query_us:.2f} us, per outbound call: {outbound_us:.2f} us, "
+          f"request overhead: {metrics_us - plain_us:.2f} us ({(metrics_us - plain_us) / plain_us * 100:.1f}%)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+"""
+多用户隔离基准：逐步增加用户数量（每个用户的数据量相同），
+在每个规模下用随机用户的登录令牌请求一周的 GET /api/entries/range，
+比较延迟是否随总用户数（即表的总行数）增长；同时输出按用户过滤后的查询计划
+
+用法: python benchmarks/bench_multiuser.py [--users 10,100,1000,3000] [--entries-per-user 200]
+      [--requests 300] [--without-index] [--output result.json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stats import summarize
+
+# 生成数据的时间跨度（天）
+DATA_DAYS = 180
+
+
+def make_app():
+    """创建只包含登录和日程条目接口的应用，启用用户隔离"""
+    from flask import Flask
+    from config import Config
+    from extensions import db
+    import models  # noqa: F401  注册所有模型
+    from routes.auth import auth_bp
+    from routes.entries import entries_bp
+    from services.user_scope import user_scope
+    
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config['MULTI_USER_ENABLED'] = True
+    db.init_app(app)
+    app.register_blueprint(auth_bp, url_prefix='/api/auth')
+    app.register_blueprint(entries_bp, url_prefix='/api/entries')
+    with app.app_context():
+        db.create_all()
+    user_scope.init_app(app)
+    return app
+
+
+def add_users(db, first_id, last_id, entries_per_user, data_start):
+    """
+    创建 [first_id, last_id] 的用户并为每个用户生成日程条目
+    :return: 写入耗时（秒）
+    """
+    from datagen import generate_entries
+    from models.user import User
+    
+    started = time.perf_counter()
+    db.session.execute(User.__table__.insert(), [
+        {'id': user_id, 'username': f"user{user_id}", 'created_at': data_start, 'updated_at': data_start}
+        for user_id in range(first_id, last_id + 1)
+    ])
+    db.session.commit()
+    for user_id in range(first_id, last_id + 1):
+        generate_entries(db, entries_per_user, data_start, days=DATA_DAYS, seed=user_id, user_id=user_id)
+    return time.perf_counter() - started
+
+
+def query_plan(db, user_id, week_start):
+    """按用户过滤的范围查询的SQLite查询计划"""
+    from sqlalchemy import text
+    
+    rows = db.session.execute(text(
+        'EXPLAIN QUERY PLAN SELECT * FROM entries WHERE user_id = :user_id AND start_time >= :start AND start_time <= :end'
+    ), {'user_id': user_id, 'start': week_start, 'end': week_start + timedelta(days=7)}).all()
+    return [row[-1] for row in rows]
+
+
+def measure(app, user_ids, tokens, data_start, requests_count, seed):
+    """
+    用随机用户的令牌请求随机一周的条目
+    :return: 延迟统计和平均每次返回的条目数
+    """
+    rng = random.Random(seed)
+    client = app.test_client()
+    latencies = []
+    errors = 0
+    returned = 0
+    started = time.perf_counter()
+    for _ in range(requests_count):
+        user_id = rng.choice(user_ids)
+        week_start = data_start + timedelta(days=rng.randrange(0, DATA_DAYS - 7))
+        call_started = time.perf_counter()
+        response = client.get('/api/entries/range', headers={'Authorization': f"Bearer {tokens[user_id]}"}, query_string={
+            'start_date': week_start.strftime('%Y-%m-%d'),
+            'end_date': (week_start + timedelta(days=6)).strftime('%Y-%m-%d')
+        })
+        latencies.append(time.perf_counter() - call_started)
+        if response.status_code != 200:
+            errors += 1
+            continue
+        returned += len(response.get_json()['entries'])
+    summary = summarize(latencies, time.perf_counter() - started, errors)
+    summary['entries_per_response'] = round(returned / max(requests_count - errors, 1), 1)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='多用户隔离基准')
+    parser.add_argument('--users', default='10,100,1000,3000', help='逗号分隔的用户数量（递增）')
+    parser.add_argument('--entries-per-user', type=int, default=200, help='每个用户的日程条目数量')
+    parser.add_argument('--requests', type=int, default=300, help='每个规模下的请求次数')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    parser.add_argument('--without-index', action='store_true', help='删除 (user_id, start_time) 复合索引作为对照')
+    parser.add_argument('--output', help='结果JSON的保存路径，默认输出到标准输出')
+    args = parser.parse_args()
+    
+    data_dir = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(data_dir, 'bench.db')}"
+    os.environ['ARCHIVE_DATABASE_URL'] = f"sqlite:///{os.path.join(data_dir, 'archive.db')}"
+    os.environ.setdefault('SECRET_KEY', 'bench-secret-key')
+    from extensions import db
+    from services.user_scope import user_scope
+    
+    levels = sorted({int(level) for level in args.users.split(',') if level.strip()})
+    data_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=DATA_DAYS // 2)
+    app = make_app()
+    with app.app_context():
+        if args.without_index:
+            db.session.execute(db.text('DROP INDEX IF EXISTS ix_entries_user_start'))
+            db.session.commit()
+        # 启动时创建的默认用户不参与测试
+        default_id = user_scope.default_user_id()
+    
+    results = []
+    tokens = {}
+    next_id = default_id + 1
+    for level in levels:
+        last_id = default_id + level
+        with app.app_context():
+            insert_seconds = add_users(db, next_id, last_id, args.entries_per_user, data_start)
+            user_ids = list(range(default_id + 1, last_id + 1))
+            for user_id in user_ids:
+                tokens.setdefault(user_id, user_scope.issue_token(user_id))
+            db.session.execute(db.text('ANALYZE'))
+            db.session.commit()
+            plan = query_plan(db, user_ids[0], data_start)
+            total_rows = db.session.execute(db.text('SELECT COUNT(*) FROM entries')).scalar()
+        next_id = last_id + 1
+        summary = measure(app, user_ids, tokens, data_start, args.requests, args.seed)
+        summary.update({
+            'users': level,
+            'total_entries': total_rows,
+            'insert_seconds': round(insert_seconds, 2),
+            'query_plan': plan
+        })
+        results.append(summary)
+    
+    report = {
+        'meta': {
+            'entries_per_user': args.entries_per_user,
+            'requests': args.requests,
+            'data_days': DATA_DAYS,
+            'composite_index': not args.without_index
+        },
+        'levels': results
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
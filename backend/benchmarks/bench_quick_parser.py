@@ -0,0 +1,154 @@
+"""
+规则快速解析器基准：用标注语料（quick_parser_corpus.jsonl，相对日期以 2026-10-19 10:00 周一为基准）
+统计在不同置信度阈值下规则解析的覆盖率（能直接返回、不调用大模型的比例）、直接返回结果的准确率、
+应交给大模型的输入被误接收的比例，以及每次解析的耗时
+
+标注中 expect 为 null 表示应交给大模型；日程的 end 为 null 表示原文没有给出结束时间，不比较结束时间；
+标注了 title 时同时比较标题
+
+用法: python benchmarks/bench_quick_parser.py [--min-confidence 0.8] [--thresholds 0.6,0.7,0.8,0.9]
+      [--repeat 200] [--show-errors] [--output result.json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stats import summarize
+
+# 语料标注所用的基准时间（周一）
+REFERENCE_NOW = datetime(2026, 10, 19, 10, 0)
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'quick_parser_corpus.jsonl')
+
+
+def load_corpus(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def check(result, expect):
+    """
+    比较解析结果和标注
+    :return: 不一致的字段列表，完全一致时为空
+    """
+    if expect['kind'] == 'task':
+        if len(result.tasks) != 1 or result.entries:
+            return ['kind']
+        task = result.tasks[0]
+        mismatches = [] if task['deadline'] == expect['deadline'] else ['deadline']
+        if expect.get('title') and task['name'] != expect['title']:
+            mismatches.append('title')
+        return mismatches
+    
+    if len(result.entries) != 1 or result.tasks:
+        return ['kind']
+    entry = result.entries[0]
+    mismatches = []
+    if expect.get('title') and entry['title'] != expect['title']:
+        mismatches.append('title')
+    if entry['start_time'] != expect['start']:
+        mismatches.append('start')
+    if expect.get('end') and entry['end_time'] != expect['end']:
+        mismatches.append('end')
+    if expect.get('entry_type') and entry['entry_type'] != expect['entry_type']:
+        mismatches.append('entry_type')
+    return mismatches
+
+
+def evaluate(parser, corpus, min_confidence):
+    """
+    统计一个阈值下的覆盖率和准确率
+    :return: 统计结果和错误明细
+    """
+    parsable = [item for item in corpus if item['expect']]
+    accepted = correct = time_correct = false_accepts = 0
+    errors = []
+    for item in corpus:
+        result = parser.parse_confident(item['text'], REFERENCE_NOW, min_confidence)
+        if result is None:
+            continue
+        if not item['expect']:
+            false_accepts += 1
+            errors.append({'text': item['text'], 'confidence': result.confidence, 'error': '应交给大模型',
+                           'result': result.to_dict()})
+            continue
+        accepted += 1
+        mismatches = check(result, item['expect'])
+        if not mismatches:
+            correct += 1
+        else:
+            errors.append({'text': item['text'], 'confidence': result.confidence, 'error': mismatches,
+                           'result': result.to_dict()})
+        if not set(mismatches) & {'kind', 'start', 'end', 'deadline'}:
+            time_correct += 1
+    
+    fallthrough = len(corpus) - len(parsable)
+    return {
+        'min_confidence': min_confidence,
+        'coverage': round(accepted / len(parsable), 3) if parsable else 0.0,
+        'accuracy': round(correct / accepted, 3) if accepted else 0.0,
+        'time_accuracy': round(time_correct / accepted, 3) if accepted else 0.0,
+        'false_accept_rate': round(false_accepts / fallthrough, 3) if fallthrough else 0.0,
+        'accepted': accepted,
+        'correct': correct,
+        'false_accepts': false_accepts
+    }, errors
+
+
+def measure_latency(parser, corpus, repeat):
+    """每条语料重复解析repeat次，返回单次解析耗时的统计"""
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for item in corpus:
+            call_started = time.perf_counter()
+            parser.parse(item['text'], REFERENCE_NOW)
+            latencies.append(time.perf_counter() - call_started)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def main():
+    from services.quick_parser import DEFAULT_MIN_CONFIDENCE, QuickParser
+    
+    parser = argparse.ArgumentParser(description='规则快速解析器基准')
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS, help='标注语料路径（JSONL）')
+    parser.add_argument('--min-confidence', type=float, default=DEFAULT_MIN_CONFIDENCE, help='输出错误明细时使用的阈值')
+    parser.add_argument('--thresholds', default='0.5,0.6,0.7,0.8,0.9', help='逗号分隔的对比阈值')
+    parser.add_argument('--repeat', type=int, default=200, help='测量耗时时每条语料的解析次数')
+    parser.add_argument('--show-errors', action='store_true', help='输出 --min-confidence 阈值下的错误明细')
+    parser.add_argument('--output', help='结果JSON的保存路径，默认输出到标准输出')
+    args = parser.parse_args()
+    
+    corpus = load_corpus(args.corpus)
+    quick = QuickParser()
+    thresholds = sorted({float(value) for value in args.thresholds.split(',') if value.strip()} | {args.min_confidence})
+    sweeps = [evaluate(quick, corpus, threshold)[0] for threshold in thresholds]
+    summary, errors = evaluate(quick, corpus, args.min_confidence)
+    
+    report = {
+        'meta': {
+            'corpus': os.path.basename(args.corpus),
+            'samples': len(corpus),
+            'parsable': sum(1 for item in corpus if item['expect']),
+            'reference_now': REFERENCE_NOW.strftime('%Y-%m-%d %H:%M')
+        },
+        'summary': summary,
+        'thresholds': sweeps,
+        'latency': measure_latency(quick, corpus, args.repeat)
+    }
+    if args.show_errors:
+        report['errors'] = errors
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+"""
+端到端场景基准：在临时SQLite数据库和本地模拟的北航/SPOC/DashScope服务上运行典型场景，
+输出每个场景的延迟百分位数和吞吐量（JSON），用于在不同提交之间比较
+
+场景:
+- full_sync: POST /api/sync/all，包含统一认证登录、学期课表（模拟服务的学期课表为空，回退到7天课表）、考试和SPOC作业（复用已缓存的SPOC会话）
+- calendar_range: 按周翻页 GET /api/entries/range
+- reminder_polling: 前端每分钟一次的 GET /api/reminders/upcoming
+- llm_batch: 为新作业逐个调用大模型生成日程（schedule_homework_tasks）
+
+用法: python benchmarks/bench_scenarios.py [--entries 10000] [--scenarios full_sync,calendar_range]
+      [--byxt-latency 0.05] [--spoc-latency 0.05] [--dashscope-latency 0.5] [--output result.json]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fakes import FakeUpstream
+from stats import summarize
+
+
+SCENARIOS = ('full_sync', 'calendar_range', 'reminder_polling', 'llm_batch')
+
+
+def make_app():
+    """
+    创建只包含被测蓝图的应用（LLM解析路由依赖easyocr，基准中直接调用服务层）
+    需要在设置好模拟服务的环境变量之后调用
+    """
+    from flask import Flask
+    from config import Config
+    from extensions import db
+    from utils.schema import upgrade_schema
+    import models  # noqa: F401  注册所有模型
+    from routes.courses import courses_bp
+    from routes.entries import entries_bp
+    from routes.reminders import reminders_bp
+    from routes.sync import sync_bp
+    from routes.tasks import tasks_bp
+    
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    db.init_app(app)
+    app.register_blueprint(courses_bp, url_prefix='/api/courses')
+    app.register_blueprint(entries_bp, url_prefix='/api/entries')
+    app.register_blueprint(reminders_bp, url_prefix='/api/reminders')
+    app.register_blueprint(sync_bp, url_prefix='/api/sync')
+    app.register_blueprint(tasks_bp, url_prefix='/api/tasks')
+    with app.app_context():
+        db.create_all()
+        upgrade_schema(db)
+    return app
+
+
+def timed(func, iterations):
+    """
+    依次执行iterations次，func返回False时计为失败
+    :return: (每次耗时列表, 失败次数, 总耗时)
+    """
+    latencies = []
+    errors = 0
+    started = time.perf_counter()
+    for index in range(iterations):
+        call_started = time.perf_counter()
+        ok = func(index)
+        latencies.append(time.perf_counter() - call_started)
+        if ok is False:
+            errors += 1
+    return latencies, errors, time.perf_counter() - started
+
+
+def seed_spoc_session(upstream, username, password):
+    """预先放入已登录的SPOC会话，模拟会话缓存命中的常见情况（真实的SPOC登录依赖统一认证的多次跳转）"""
+    import requests
+    from services.buaa_api import spoc_api_client
+    
+    now = datetime.now()
+    spoc_api_client.session_cache[username] = {
+        'session': requests.Session(),
+        'token': None,
+        'init_data_props': 'bench',
+        'referer': f"{upstream.base_url}/spocnew/jxkj2?initData_props=bench",
+        'sqlid': 'bench-sqlid',
+        'password_digest': spoc_api_client._password_digest(username, password),
+        'created_at': now,
+        'last_used': now
+    }
+
+
+def run_full_sync(app, upstream, iterations):
+    client = app.test_client()
+    
+    def sync(index):
+        # 每次使用新的学号，包含完整的统一认证登录
+        username = f"bench{index}"
+        seed_spoc_session(upstream, username, 'bench')
+        response = client.post('/api/sync/all', json={'buaa_id': username, 'password': 'bench'})
+        return response.status_code == 200 and response.get_json().get('status') == 'success'
+    
+    return timed(sync, iterations)
+
+
+def run_calendar_range(app, iterations, start):
+    client = app.test_client()
+    
+    def page(index):
+        week_start = start + timedelta(weeks=index % 52)
+        response = client.get('/api/entries/range', query_string={
+            'start_date': week_start.strftime('%Y-%m-%d'),
+            'end_date': (week_start + timedelta(days=6)).strftime('%Y-%m-%d')
+        })
+        return response.status_code == 200
+    
+    return timed(page, iterations)
+
+
+def run_reminder_polling(app, iterations):
+    client = app.test_client()
+    return timed(lambda index: client.get('/api/reminders/upcoming').status_code == 200, iterations)
+
+
+def run_llm_batch(app, iterations):
+    from extensions import db
+    from models.task import Task
+    from services.homework_sync import schedule_homework_tasks
+    
+    with app.app_context():
+        tasks = [
+            Task(title=f"批量作业{index}", task_type='homework', deadline=datetime.now() + timedelta(days=7))
+            for index in range(iterations)
+        ]
+        db.session.add_all(tasks)
+        db.session.commit()
+        return timed(lambda index: len(schedule_homework_tasks([tasks[index]])) > 0, iterations)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='端到端场景基准')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help=f"逗号分隔的场景: {', '.join(SCENARIOS)}")
+    parser.add_argument('--entries', type=int, default=10000, help='预先生成的日程条目数量（1万到100万）')
+    parser.add_argument('--tasks', type=int, default=1000, help='预先生成的任务数量')
+    parser.add_argument('--iterations', type=int, default=50, help='每个场景的迭代次数（llm_batch为任务数）')
+    parser.add_argument('--byxt-latency', type=float, default=0.05, help='模拟教务系统每个请求的延迟（秒）')
+    parser.add_argument('--spoc-latency', type=float, default=0.05, help='模拟SPOC每个请求的延迟（秒）')
+    parser.add_argument('--dashscope-latency', type=float, default=0.5, help='模拟大模型每次调用的延迟（秒）')
+    parser.add_argument('--database', help='数据库URI，默认使用临时SQLite文件')
+    parser.add_argument('--output', help='结果JSON的保存路径，默认输出到标准输出')
+    args = parser.parse_args()
+    
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"未知场景: {', '.join(sorted(unknown))}")
+    
+    latency = {'byxt': args.byxt_latency, 'spoc': args.spoc_latency, 'dashscope': args.dashscope_latency}
+    with FakeUpstream(latency=latency) as upstream:
+        # 配置在导入时读取，必须先设置环境变量再创建应用
+        os.environ.update(upstream.environ())
+        data_dir = tempfile.mkdtemp()
+        os.environ['DATABASE_URL'] = args.database or f"sqlite:///{os.path.join(data_dir, 'bench.db')}"
+        os.environ.setdefault('ARCHIVE_DATABASE_URL', f"sqlite:///{os.path.join(data_dir, 'archive.db')}")
+        os.environ.setdefault('METRICS_ENABLED', 'false')
+        app = make_app()
+        
+        from extensions import db
+        from datagen import populate
+        data_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=30)
+        with app.app_context():
+            populated = populate(db, args.entries, args.tasks, start=data_start)
+        
+        results = {}
+        for name in scenarios:
+            counts_before = dict(upstream.request_counts)
+            if name == 'full_sync':
+                latencies, errors, elapsed = run_full_sync(app, upstream, args.iterations)
+            elif name == 'calendar_range':
+                latencies, errors, elapsed = run_calendar_range(app, args.iterations, data_start)
+            elif name == 'reminder_polling':
+                latencies, errors, elapsed = run_reminder_polling(app, args.iterations)
+            else:
+                latencies, errors, elapsed = run_llm_batch(app, args.iterations)
+            results[name] = summarize(latencies, elapsed, errors)
+            results[name]['upstream_requests'] = {
+                key: count - counts_before.get(key, 0)
+                for key, count in upstream.request_counts.items()
+                if count != counts_before.get(key, 0)
+            }
+    
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'iterations': args.iterations,
+            'latency_s': latency,
+            'data': populated
+        },
+        'scenarios': results
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+SPOC载荷编解码微基准：对比先解码为字符串再解析JSON的旧实现与SPOCPayloadCodec（两者都使用标准AES-CBC）
+用法: python benchmarks/bench_spoc_codec.py [--homeworks 500] [--repeat 200]
+"""
+import argparse
+import base64
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Crypto.Cipher import AES
+from Crypto.Util.Padding import pad, unpad
+
+from services.spoc_codec import SPOCPayloadCodec
+
+
+AES_KEY = b'inco12345678ocni'
+AES_IV = b'ocni12345678inco'
+
+
+def legacy_encrypt(data):
+    """旧实现：每次调用新建CBC密码对象"""
+    data_str = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+    cipher = AES.new(AES_KEY, AES.MODE_CBC, AES_IV)
+    return base64.b64encode(cipher.encrypt(pad(data_str.encode('utf-8'), AES.block_size, style='pkcs7'))).decode('utf-8')
+
+
+def legacy_decrypt(base64_str):
+    """旧实现：每次调用新建CBC密码对象，先解码为str再解析JSON"""
+    cipher = AES.new(AES_KEY, AES.MODE_CBC, AES_IV)
+    decrypted = unpad(cipher.decrypt(base64.b64decode(base64_str)), AES.block_size, style='pkcs7')
+    return json.loads(decrypted.decode('utf-8'))
+
+
+def make_homework_payload(count):
+    """生成与queryListByPage响应结构相同的作业列表"""
+    return {
+        'total': count,
+        'list': [
+            {
+                'id': f'8a8a8a8a{index:024d}',
+                'kcmc': f'课程{index % 12}',
+                'zymc': f'第{index}次作业',
+                'zyjzsj': '2025-12-31 23:59:00',
+                'zyxq': '完成教材习题并提交实验报告，注意格式要求。' * 3,
+                'tjzt': '1'
+            }
+            for index in range(count)
+        ]
+    }
+
+
+def bench(label, func, repeat):
+    """运行repeat次并返回每次调用的平均耗时（毫秒）"""
+    func()  # 预热
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    elapsed_ms = (time.perf_counter() - start) * 1000 / repeat
+    print(f"{label:<40} {elapsed_ms:8.3f} ms")
+    return elapsed_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SPOC载荷编解码微基准')
+    parser.add_argument('--homeworks', type=int, default=500, help='作业数量')
+    parser.add_argument('--repeat', type=int, default=200, help='重复次数')
+    args = parser.parse_args()
+    
+    codec = SPOCPayloadCodec(AES_KEY, AES_IV)
+    payload = make_homework_payload(args.homeworks)
+    encrypted = legacy_encrypt(payload)
+    assert codec.decrypt(encrypted) == payload
+    assert codec.encrypt(payload) == encrypted
+    
+    print(f"payload: {args.homeworks}条作业, 密文{len(encrypted)}字节\n")
+    
+    legacy_dec = bench('legacy decrypt', lambda: legacy_decrypt(encrypted), args.repeat)
+    codec_dec = bench('codec decrypt', lambda: codec.decrypt(encrypted), args.repeat)
+    legacy_enc = bench('legacy encrypt', lambda: legacy_encrypt(payload), args.repeat)
+    codec_enc = bench('codec encrypt', lambda: codec.encrypt(payload), args.repeat)
+    
+    # 单页作业响应（20条）
+    page_encrypted = legacy_encrypt(make_homework_payload(20))
+    print()
+    legacy_page = bench('legacy decrypt (20 homeworks)', lambda: legacy_decrypt(page_encrypted), args.repeat * 10)
+    codec_page = bench('codec decrypt (20 homeworks)', lambda: codec.decrypt(page_encrypted), args.repeat * 10)
+    
+    print()
+    print(f"decrypt speedup: {legacy_dec / codec_dec:.2f}x, page decrypt speedup: {legacy_page / codec_page:.2f}x, "
+          f"encrypt speedup: {legacy_enc / codec_enc:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
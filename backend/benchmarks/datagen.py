@@ -0,0 +1,122 @@
+"""
+合成数据生成器：向数据库批量写入日程条目和任务，用于在1万到100万条数据规模下测量接口性能
+用法: python benchmarks/datagen.py --database sqlite:////tmp/bench.db --entries 100000 [--tasks 2000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+ENTRY_TYPES = ['course', 'meeting', 'study', 'sports', 'lecture', 'exam', 'other']
+TASK_TYPES = ['homework', 'exam', 'lecture', 'other']
+COLORS = ['#4a90e2', '#50e3c2', '#f5a623', '#d0021b', '#7ed321']
+# 单次批量插入的行数
+CHUNK_SIZE = 10000
+
+
+def generate_entries(db, count, start, days=365, seed=0, user_id=None):
+    """
+    在 [start, start + days) 内均匀生成日程条目，每条时长30分钟到3小时
+    :param db: SQLAlchemy实例
+    :param count: 条目数量
+    :param start: 起始时间
+    :param days: 时间跨度（天）
+    :param seed: 随机种子
+    :param user_id: 条目所属的用户，None表示未归属
+    :return: 写入耗时（秒）
+    """
+    from models.entry import Entry
+    
+    rng = random.Random(seed)
+    span_minutes = days * 24 * 60
+    started = time.perf_counter()
+    for offset in range(0, count, CHUNK_SIZE):
+        rows = []
+        for index in range(offset, min(offset + CHUNK_SIZE, count)):
+            start_time = start + timedelta(minutes=rng.randrange(0, span_minutes, 15))
+            rows.append({
+                'title': f"日程{index}",
+                'description': '',
+                'entry_type': rng.choice(ENTRY_TYPES),
+                'start_time': start_time,
+                'end_time': start_time + timedelta(minutes=rng.choice((30, 45, 90, 120, 180))),
+                'color': rng.choice(COLORS),
+                'created_at': start,
+                'updated_at': start,
+                'user_id': user_id
+            })
+        db.session.execute(Entry.__table__.insert(), rows)
+        db.session.commit()
+    return time.perf_counter() - started
+
+
+def generate_tasks(db, count, start, days=120, seed=0):
+    """
+    生成截止时间分布在 [start, start + days) 内的任务，约10%已完成
+    :return: 写入耗时（秒）
+    """
+    from models.task import Task
+    
+    rng = random.Random(seed + 1)
+    started = time.perf_counter()
+    for offset in range(0, count, CHUNK_SIZE):
+        rows = []
+        for index in range(offset, min(offset + CHUNK_SIZE, count)):
+            rows.append({
+                'title': f"任务{index}",
+                'description': '',
+                'task_type': rng.choice(TASK_TYPES),
+                'deadline': start + timedelta(minutes=rng.randrange(0, days * 24 * 60)),
+                'priority': rng.randint(0, 100),
+                'urgency': rng.uniform(0, 100),
+                'completed': rng.random() < 0.1,
+                'created_at': start,
+                'updated_at': start
+            })
+        db.session.execute(Task.__table__.insert(), rows)
+        db.session.commit()
+    return time.perf_counter() - started
+
+
+def populate(db, entries, tasks, start=None, seed=0):
+    """
+    生成条目和任务
+    :return: {entries, tasks, entries_seconds, tasks_seconds}
+    """
+    start = start or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=30)
+    return {
+        'entries': entries,
+        'tasks': tasks,
+        'entries_seconds': round(generate_entries(db, entries, start, seed=seed), 3),
+        'tasks_seconds': round(generate_tasks(db, tasks, start + timedelta(days=30), seed=seed), 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成合成的日程条目和任务')
+    parser.add_argument('--database', required=True, help='数据库URI，如 sqlite:////tmp/bench.db')
+    parser.add_argument('--entries', type=int, default=10000, help='日程条目数量（1万到100万）')
+    parser.add_argument('--tasks', type=int, default=1000, help='任务数量')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    args = parser.parse_args()
+    
+    from flask import Flask
+    from extensions import db
+    import models  # noqa: F401  注册所有模型
+    
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = args.database
+    db.init_app(app)
+    with app.app_context():
+        # 只创建主库的表（归档库的表在应用启动时创建）
+        db.create_all(bind_key=None)
+        print(populate(db, args.entries, args.tasks, seed=args.seed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,282 @@
+"""
+基准测试用的本地模拟服务：按真实接口的返回格式回放北航教务（byxt）、SPOC和DashScope的响应
+
+- 统一认证: 未登录时重定向到登录页，提交表单后下发CASTGC
+- byxt: teachingSchedule/detail.do（按天课表）、student/exams.do（考试）、getMyScheduleDetail.do（学期课表）
+- SPOC: 登录检查接口和AES加密的queryListByPage（分页作业列表）
+- DashScope: 与Generation.call兼容的text-generation接口，返回固定的日程JSON
+
+每个接口可以配置固定延迟，用于模拟校园网和大模型接口的响应时间
+"""
+import base64
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from Crypto.Cipher import AES
+from Crypto.Util.Padding import pad, unpad
+
+
+SPOC_AES_KEY = b'inco12345678ocni'
+SPOC_AES_IV = b'ocni12345678inco'
+
+COURSE_NAMES = ['高等数学', '大学物理', '离散数学', '数据结构', '计算机组成', '操作系统', '英语', '体育']
+BUILDINGS = ['主楼', '新主楼', '教一楼', '教三楼', '实验楼']
+# 统一认证登录成功后下发的核心认证Cookie（perform_sso_login检查CASTGC）
+SSO_COOKIE = 'CASTGC'
+# 与BUAA_SECTION_TIMES一致的上课时间段
+COURSE_SLOTS = [('08:00', '09:35'), ('09:50', '12:15'), ('14:00', '15:35'), ('15:50', '18:15'), ('19:00', '20:35')]
+
+
+def spoc_encrypt(data: Any) -> str:
+    """按SPOC的方式加密响应数据"""
+    plaintext = json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    cipher = AES.new(SPOC_AES_KEY, AES.MODE_CBC, SPOC_AES_IV)
+    return base64.b64encode(cipher.encrypt(pad(plaintext, AES.block_size))).decode('ascii')
+
+
+def spoc_decrypt(base64_str: str) -> Dict[str, Any]:
+    """解密SPOC请求载荷"""
+    cipher = AES.new(SPOC_AES_KEY, AES.MODE_CBC, SPOC_AES_IV)
+    return json.loads(unpad(cipher.decrypt(base64.b64decode(base64_str)), AES.block_size))
+
+
+def day_courses(date_str: str, seed: int = 0) -> List[Dict[str, Any]]:
+    """生成某一天的课程，格式与teachingSchedule/detail.do的datas相同；同一日期每次返回相同的数据"""
+    rng = random.Random(f"{seed}-{date_str}")
+    if datetime.strptime(date_str, '%Y-%m-%d').weekday() >= 5:
+        return []
+    courses = []
+    for start, end in rng.sample(COURSE_SLOTS, rng.randint(2, 4)):
+        courses.append({
+            'bizName': f"{rng.choice(COURSE_NAMES)}({rng.choice(['张老师', '李老师', '王老师'])})",
+            'time': f"{start}-{end}",
+            'place': f"{rng.choice(BUILDINGS)}({rng.randint(1, 5)}{rng.randint(0, 2)}{rng.randint(1, 9)})"
+        })
+    return courses
+
+
+def term_exams(count: int = 8, seed: int = 0) -> List[Dict[str, Any]]:
+    """生成一个学期的考试，格式与student/exams.do的datas相同"""
+    rng = random.Random(seed)
+    start = datetime(2026, 1, 5)
+    exams = []
+    for index in range(count):
+        day = start + timedelta(days=index)
+        exams.append({
+            'kcmc': COURSE_NAMES[index % len(COURSE_NAMES)],
+            'ksrq': day.strftime('%Y-%m-%d'),
+            'kssj': '09:00',
+            'jssj': '11:00',
+            'ksdd': f"{rng.choice(BUILDINGS)}{rng.randint(101, 520)}",
+            'ksxz': '期末',
+            'kh': f"B{index:04d}",
+            'kch': f"B3I{index:05d}",
+            'xf': '3',
+            'cj': '',
+            'khfsmc': '考试'
+        })
+    return exams
+
+
+def spoc_homeworks(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """生成未完成的作业列表，格式与queryListByPage返回的list相同"""
+    rng = random.Random(seed)
+    deadline = datetime(2026, 12, 31, 23, 59)
+    return [
+        {
+            'zyid': f"8a8a{index:028d}",
+            'kcmc': COURSE_NAMES[index % len(COURSE_NAMES)],
+            'zymc': f"第{index + 1}次作业",
+            'zyjzsj': (deadline - timedelta(days=rng.randint(0, 60))).strftime('%Y-%m-%d %H:%M:%S'),
+            'zyxq': '完成教材习题并提交实验报告',
+            'tjzt': '1'
+        }
+        for index in range(count)
+    ]
+
+
+def llm_entries(task_title: str, count: int = 2) -> Dict[str, Any]:
+    """大模型为任务生成的日程安排（generate_entries_from_task的输出格式）"""
+    start = datetime(2026, 12, 1, 19, 0)
+    return {
+        'entries': [
+            {
+                'title': f"{task_title} 第{index + 1}部分",
+                'start_time': (start + timedelta(days=index)).strftime('%Y-%m-%d %H:%M'),
+                'end_time': (start + timedelta(days=index, hours=1)).strftime('%Y-%m-%d %H:%M'),
+                'entry_type': 'study'
+            }
+            for index in range(count)
+        ]
+    }
+
+
+class FakeUpstream:
+    """
+    在本地端口上运行的模拟上游服务，所有模拟接口共用一个服务器（按路径区分）
+    :param latency: 各接口的固定延迟（秒），键为 byxt、spoc、dashscope
+    :param homework_count: SPOC返回的作业数量
+    :param seed: 生成数据的随机种子
+    """
+    
+    def __init__(self, latency: Optional[Dict[str, float]] = None, homework_count: int = 47, seed: int = 0):
+        self.latency = {'byxt': 0.0, 'spoc': 0.0, 'dashscope': 0.0}
+        self.latency.update(latency or {})
+        self.seed = seed
+        self.homeworks = spoc_homeworks(homework_count, seed)
+        self.exams = term_exams(seed=seed)
+        self.request_counts: Dict[str, int] = {}
+        # cpolar本地API（/api/tunnels）返回的隧道地址，为None时模拟隧道尚未建立
+        self.tunnel_url: Optional[str] = None
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+    
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def environ(self) -> Dict[str, str]:
+        """把应用指向模拟服务所需的环境变量，需要在导入config之前设置"""
+        return {
+            'BUAA_API_BASE_URL': f"{self.base_url}/jwapp/sys",
+            'SPOC_BASE_URL': self.base_url,
+            'DASHSCOPE_BASE_URL': f"{self.base_url}/api/v1",
+            'DASHSCOPE_API_KEY': 'benchmark',
+            'CPOLAR_API': f"{self.base_url}/api/tunnels"
+        }
+    
+    def start(self) -> 'FakeUpstream':
+        upstream = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            
+            def log_message(self, *args):
+                pass
+            
+            def do_GET(self):
+                upstream._dispatch(self, 'GET')
+            
+            def do_POST(self):
+                upstream._dispatch(self, 'POST')
+        
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name='fake-upstream', daemon=True).start()
+        return self
+    
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+    
+    def __enter__(self) -> 'FakeUpstream':
+        return self.start()
+    
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+    
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.request_counts[name] = self.request_counts.get(name, 0) + 1
+    
+    def _dispatch(self, handler: BaseHTTPRequestHandler, method: str) -> None:
+        url = urlsplit(handler.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        body = b''
+        if method == 'POST':
+            body = handler.rfile.read(int(handler.headers.get('Content-Length') or 0))
+        logged_in = SSO_COOKIE in (handler.headers.get('Cookie') or '')
+        headers: Dict[str, str] = {}
+        
+        path = url.path
+        if path.startswith('/jwapp/') and path.endswith('.do') and not logged_in:
+            # 未登录时与教务系统一致：302重定向到统一认证
+            status, payload = 302, ''
+            headers['Location'] = f"{self.base_url}/authserver/login?service={self.base_url}/jwapp/sys/homeapp/home/index.html"
+        elif path.endswith('/teachingSchedule/detail.do'):
+            status, payload = self._byxt('teaching_schedule', {'datas': day_courses(query.get('rq', '2026-01-01'), self.seed), 'code': '0', 'msg': None})
+        elif path.endswith('/student/exams.do'):
+            status, payload = self._byxt('exams', {'datas': self.exams, 'code': '0', 'msg': None})
+        elif path.endswith('/getMyScheduleDetail.do'):
+            status, payload = self._byxt('term_schedule', {'datas': {'arrangedList': []}, 'code': '0', 'msg': None})
+        elif path == '/authserver/login' and method == 'GET':
+            status, payload = self._byxt('sso_page', '<form><input type="hidden" name="execution" value="bench-execution"/></form>')
+        elif path == '/authserver/login':
+            # 登录成功：下发认证Cookie并重定向回教务系统
+            status, payload = self._byxt('sso_login', '')
+            status = 302
+            headers['Location'] = query.get('service') or f"{self.base_url}/jwapp/sys/homeapp/home/index.html"
+            headers['Set-Cookie'] = f"{SSO_COOKIE}=bench-{time.monotonic_ns()}; Path=/"
+        elif path.endswith('/home/index.html'):
+            status, payload = self._byxt('index', '<html></html>')
+        elif path == '/spocnew/common/zycskzy':
+            status, payload = self._spoc('login_check', {'code': 200})
+        elif path == '/spocnewht/inco/ht/queryListByPage':
+            status, payload = self._spoc_homework_page(body)
+        elif path == '/api/tunnels':
+            self._count('cpolar_tunnels')
+            tunnels = [{'name': 'calendar', 'proto': 'http', 'url': self.tunnel_url}] if self.tunnel_url else []
+            status, payload = 200, {'tunnels': tunnels, 'total': len(tunnels)}
+        elif path.endswith('/services/aigc/text-generation/generation'):
+            status, payload = self._dashscope(body)
+        else:
+            status, payload = 404, {'message': 'not found'}
+        
+        if isinstance(payload, str):
+            data = payload.encode('utf-8')
+            content_type = 'text/html;charset=UTF-8'
+        else:
+            data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            content_type = 'application/json;charset=UTF-8'
+        handler.send_response(status)
+        handler.send_header('Content-Type', content_type)
+        handler.send_header('Content-Length', str(len(data)))
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(data)
+    
+    def _byxt(self, name: str, payload: Any):
+        self._count(f"byxt.{name}")
+        time.sleep(self.latency['byxt'])
+        return 200, payload
+    
+    def _spoc(self, name: str, payload: Dict[str, Any]):
+        self._count(f"spoc.{name}")
+        time.sleep(self.latency['spoc'])
+        return 200, payload
+    
+    def _spoc_homework_page(self, body: bytes):
+        params = spoc_decrypt(json.loads(body)['param'])
+        page_num = int(params.get('pageNum') or 1)
+        page_size = int(params.get('pageSize') or 20)
+        page = self.homeworks[(page_num - 1) * page_size:page_num * page_size]
+        return self._spoc('query_list', {'code': 200, 'data': spoc_encrypt({'list': page, 'total': len(self.homeworks)})})
+    
+    def _dashscope(self, body: bytes):
+        self._count('dashscope.generation')
+        time.sleep(self.latency['dashscope'])
+        request_data = json.loads(body or b'{}')
+        messages = request_data.get('input', {}).get('messages') or [{}]
+        prompt = messages[-1].get('content', '')
+        title = prompt.split('任务名称：', 1)[-1].split('\n', 1)[0] if '任务名称：' in prompt else '任务'
+        content = json.dumps(llm_entries(title), ensure_ascii=False)
+        return 200, {
+            'status_code': 200,
+            'request_id': f"bench-{time.monotonic_ns()}",
+            'code': '',
+            'message': '',
+            'output': {
+                'choices': [{'finish_reason': 'stop', 'message': {'role': 'assistant', 'content': content}}]
+            },
+            'usage': {'input_tokens': len(prompt), 'output_tokens': len(content), 'total_tokens': len(prompt) + len(content)}
+        }
@@ -0,0 +1,311 @@
+"""
+负载测试：模拟多个桌面端和手机端客户端，按前端（frontend/src）的实际调用方式访问本地或cpolar上的服务，
+统计每个接口的p50/p95/p99、错误率，以及服务进程的CPU和内存占用，用于估算服务整个宿舍或实验室所需的主机配置
+
+模拟的客户端行为:
+- 桌面端（App.vue）: 启动时加载当天条目、本月条目、任务和北航学号；每60秒POST /reminders/upcoming；
+  每5秒检查一次剪切板，内容变化时（按概率）POST /llm/parse/clipboard；不时切换日期查看当天条目
+- 手机端（MobileCalendar.vue / MobileTasks.vue）: 每次交互都重新加载，切换日期时依次请求当天条目、
+  getTasks(null)、本月条目和课程；切换任务完成状态后再次getTasks(null)
+
+用法: python benchmarks/loadtest.py --base-url http://127.0.0.1:5000 --desktop 20 --mobile 40 --duration 120
+      [--time-scale 0.1] [--clipboard-rate 0.02] [--server-pid 1234] [--output result.json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stats import summarize
+
+
+# 前端默认的提醒设置（store/index.js）
+DEFAULT_REMINDER_SETTINGS = {'course': 30, 'exam': [14, 60]}
+CLIPBOARD_SAMPLES = ['明天下午三点在新主楼开组会', '周五晚上7点到9点复习高数', '下周一上午10点交实验报告']
+
+
+class Recorder:
+    """线程安全地记录每个接口的耗时和错误"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+    
+    def record(self, endpoint: str, elapsed: float, ok: bool) -> None:
+        with self._lock:
+            self.latencies.setdefault(endpoint, []).append(elapsed)
+            if not ok:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+    
+    def report(self, elapsed: float) -> Dict[str, Dict]:
+        with self._lock:
+            return {
+                endpoint: summarize(latencies, elapsed, self.errors.get(endpoint, 0))
+                for endpoint, latencies in sorted(self.latencies.items())
+            }
+
+
+class SimulatedClient(threading.Thread):
+    """
+    一个模拟客户端，使用独立的HTTP会话（与浏览器一样复用连接）
+    :param base_url: 服务地址
+    :param recorder: 结果记录器
+    :param stop_event: 结束信号
+    :param time_scale: 时间缩放系数，0.1表示所有间隔缩短为原来的十分之一
+    """
+    
+    def __init__(self, name: str, base_url: str, recorder: Recorder, stop_event: threading.Event,
+                 time_scale: float = 1.0, seed: int = 0):
+        super().__init__(name=name, daemon=True)
+        self.base_url = base_url.rstrip('/')
+        self.recorder = recorder
+        self.stop_event = stop_event
+        self.time_scale = time_scale
+        self.rng = random.Random(seed)
+        self.session = requests.Session()
+        self.current_date = date.today()
+        self.task_ids: List[int] = []
+    
+    def request(self, method: str, path: str, endpoint: Optional[str] = None, **kwargs) -> Optional[requests.Response]:
+        """
+        发送请求并记录耗时
+        :param endpoint: 统计使用的接口名称（路径模板），默认为实际路径
+        """
+        endpoint = f"{method} {endpoint or path}"
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, f"{self.base_url}/api{path}", timeout=30, **kwargs)
+            ok = response.status_code < 500
+        except requests.exceptions.RequestException:
+            response, ok = None, False
+        self.recorder.record(endpoint, time.perf_counter() - started, ok)
+        return response
+    
+    def sleep(self, seconds: float) -> bool:
+        """按时间缩放等待，收到结束信号时返回False"""
+        return not self.stop_event.wait(seconds * self.time_scale)
+    
+    def load_entries_by_date(self, day: date) -> None:
+        self.request('GET', f"/entries/{day.isoformat()}", '/entries/<date>')
+    
+    def load_month(self, day: date) -> None:
+        month_start = day.replace(day=1)
+        month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        self.request('GET', '/entries/range', params={'start_date': month_start.isoformat(), 'end_date': month_end.isoformat()})
+    
+    def load_tasks(self) -> None:
+        # getTasks(null)：axios会省略值为null的参数；与前端一样不带结尾斜杠，包含308重定向的开销
+        response = self.request('GET', '/tasks')
+        if response is not None and response.ok:
+            try:
+                self.task_ids = [task['id'] for task in response.json().get('tasks', [])][:50]
+            except (ValueError, AttributeError, KeyError, TypeError):
+                pass
+
+
+class DesktopClient(SimulatedClient):
+    """桌面端：定时轮询提醒、检查剪切板，偶尔切换日期"""
+    
+    def __init__(self, *args, clipboard_rate: float = 0.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.clipboard_rate = clipboard_rate
+    
+    def run(self) -> None:
+        # 启动时加载
+        self.request('GET', '/auth/buaa_id')
+        self.load_entries_by_date(self.current_date)
+        self.load_month(self.current_date)
+        self.load_tasks()
+        self.fetch_reminders()
+        
+        # 错开各客户端的定时器
+        next_reminder = 60 * self.rng.random()
+        next_clipboard = 5 * self.rng.random()
+        next_navigation = 30 * self.rng.random()
+        elapsed = 0.0
+        while True:
+            wait = min(next_reminder, next_clipboard, next_navigation) - elapsed
+            if not self.sleep(max(wait, 0)):
+                return
+            elapsed = min(next_reminder, next_clipboard, next_navigation)
+            
+            if elapsed >= next_reminder:
+                self.fetch_reminders()
+                next_reminder += 60
+            if elapsed >= next_clipboard:
+                if self.rng.random() < self.clipboard_rate:
+                    self.request('POST', '/llm/parse/clipboard', json={'text': self.rng.choice(CLIPBOARD_SAMPLES)})
+                next_clipboard += 5
+            if elapsed >= next_navigation:
+                self.current_date += timedelta(days=self.rng.choice((-1, 1)))
+                self.load_entries_by_date(self.current_date)
+                next_navigation += self.rng.uniform(15, 45)
+    
+    def fetch_reminders(self) -> None:
+        self.request('POST', '/reminders/upcoming', json={'settings': DEFAULT_REMINDER_SETTINGS})
+
+
+class MobileClient(SimulatedClient):
+    """手机端：每次交互都重新请求当天条目、全部任务、本月条目和课程"""
+    
+    def __init__(self, *args, think_time: float = 8.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.think_time = think_time
+    
+    def run(self) -> None:
+        self.load_calendar()
+        while self.sleep(self.rng.expovariate(1 / self.think_time)):
+            action = self.rng.random()
+            if action < 0.5:
+                # 切换日期（MobileCalendar的watch(currentDate)）
+                self.current_date += timedelta(days=self.rng.choice((-1, 1)))
+                self.load_calendar()
+            elif action < 0.8:
+                # 切换到任务标签页（MobileTasks.loadData）
+                self.load_tasks()
+            elif self.task_ids:
+                # 切换任务完成状态后重新加载任务
+                task_id = self.rng.choice(self.task_ids)
+                action_name = self.rng.choice(('complete', 'uncomplete'))
+                self.request('PUT', f"/tasks/{task_id}/{action_name}", f"/tasks/<id>/{action_name}")
+                self.load_tasks()
+    
+    def load_calendar(self) -> None:
+        # MobileCalendar.loadData按顺序发出的请求
+        self.load_entries_by_date(self.current_date - timedelta(days=1))
+        self.load_tasks()
+        self.load_month(self.current_date)
+        self.request('GET', '/courses')
+
+
+class ProcessSampler(threading.Thread):
+    """
+    每秒采样一次服务进程的CPU占用和常驻内存（读取/proc，仅Linux）
+    :param pid: 服务进程ID
+    """
+    
+    def __init__(self, pid: int, stop_event: threading.Event, interval: float = 1.0):
+        super().__init__(name='process-sampler', daemon=True)
+        self.pid = pid
+        self.stop_event = stop_event
+        self.interval = interval
+        self.cpu_percent: List[float] = []
+        self.rss_mb: List[float] = []
+        self._clock_ticks = os.sysconf('SC_CLK_TCK')
+        self._page_size = os.sysconf('SC_PAGE_SIZE')
+    
+    def _read(self) -> Tuple[float, float]:
+        """返回 (累计CPU秒数, 常驻内存MB)"""
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        cpu_seconds = (int(fields[11]) + int(fields[12])) / self._clock_ticks
+        with open(f"/proc/{self.pid}/statm") as f:
+            rss_pages = int(f.read().split()[1])
+        return cpu_seconds, rss_pages * self._page_size / 1024 / 1024
+    
+    def run(self) -> None:
+        try:
+            last_cpu, _ = self._read()
+        except OSError:
+            return
+        last_time = time.monotonic()
+        while not self.stop_event.wait(self.interval):
+            try:
+                cpu, rss = self._read()
+            except OSError:
+                return
+            now = time.monotonic()
+            self.cpu_percent.append((cpu - last_cpu) / (now - last_time) * 100)
+            self.rss_mb.append(rss)
+            last_cpu, last_time = cpu, now
+    
+    def report(self) -> Dict[str, float]:
+        if not self.cpu_percent:
+            return {}
+        return {
+            'samples': len(self.cpu_percent),
+            'cpu_percent_mean': round(sum(self.cpu_percent) / len(self.cpu_percent), 1),
+            'cpu_percent_max': round(max(self.cpu_percent), 1),
+            'rss_mb_mean': round(sum(self.rss_mb) / len(self.rss_mb), 1),
+            'rss_mb_max': round(max(self.rss_mb), 1)
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='模拟多个桌面端和手机端客户端的负载测试')
+    parser.add_argument('--base-url', default='http://127.0.0.1:5000', help='服务地址（不含/api）')
+    parser.add_argument('--desktop', type=int, default=10, help='桌面端客户端数量')
+    parser.add_argument('--mobile', type=int, default=20, help='手机端客户端数量')
+    parser.add_argument('--duration', type=float, default=60, help='测试时长（秒）')
+    parser.add_argument('--time-scale', type=float, default=1.0, help='客户端定时器的时间缩放，0.1表示10倍速')
+    parser.add_argument('--think-time', type=float, default=8.0, help='手机端两次交互之间的平均间隔（秒，缩放前）')
+    parser.add_argument('--clipboard-rate', type=float, default=0.0, help='每次剪切板检查触发LLM解析的概率（会调用大模型）')
+    parser.add_argument('--server-pid', type=int, help='服务进程ID，用于采样CPU和内存')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    parser.add_argument('--output', help='结果JSON的保存路径，默认输出到标准输出')
+    args = parser.parse_args()
+    
+    recorder = Recorder()
+    stop_event = threading.Event()
+    clients: List[SimulatedClient] = []
+    for index in range(args.desktop):
+        clients.append(DesktopClient(f"desktop-{index}", args.base_url, recorder, stop_event,
+                                     time_scale=args.time_scale, seed=args.seed * 100003 + index,
+                                     clipboard_rate=args.clipboard_rate))
+    for index in range(args.mobile):
+        clients.append(MobileClient(f"mobile-{index}", args.base_url, recorder, stop_event,
+                                    time_scale=args.time_scale, seed=args.seed * 100003 + args.desktop + index,
+                                    think_time=args.think_time))
+    
+    sampler = ProcessSampler(args.server_pid, stop_event) if args.server_pid else None
+    if sampler is not None:
+        sampler.start()
+    
+    started = time.perf_counter()
+    for client in clients:
+        client.start()
+    stop_event.wait(args.duration)
+    stop_event.set()
+    for client in clients:
+        client.join(timeout=35)
+    elapsed = time.perf_counter() - started
+    
+    endpoints = recorder.report(elapsed)
+    total = sum(item['count'] for item in endpoints.values())
+    errors = sum(item['errors'] for item in endpoints.values())
+    report = {
+        'meta': {
+            'base_url': args.base_url,
+            'desktop_clients': args.desktop,
+            'mobile_clients': args.mobile,
+            'duration_s': round(elapsed, 1),
+            'time_scale': args.time_scale
+        },
+        'total': {
+            'requests': total,
+            'errors': errors,
+            'error_rate': round(errors / total, 4) if total else 0.0,
+            'throughput_per_s': round(total / elapsed, 2) if elapsed > 0 else 0.0
+        },
+        'endpoints': endpoints,
+        'server': sampler.report() if sampler is not None else None
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+"""基准测试结果统计：延迟百分位数和吞吐量"""
+import math
+from typing import Dict, List, Sequence
+
+
+def percentile(sorted_values: Sequence[float], percent: float) -> float:
+    """
+    最近秩法计算百分位数
+    :param sorted_values: 已排序的数值
+    :param percent: 百分位（0-100）
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies: List[float], elapsed: float, errors: int = 0) -> Dict[str, float]:
+    """
+    汇总一组请求的延迟
+    :param latencies: 每次请求的耗时（秒）
+    :param elapsed: 整个场景的墙钟时间（秒），用于计算吞吐量
+    :param errors: 失败的请求数
+    :return: 以毫秒为单位的百分位数、平均值和每秒请求数
+    """
+    values = sorted(latencies)
+    count = len(values)
+    return {
+        'count': count,
+        'errors': errors,
+        'error_rate': round(errors / count, 4) if count else 0.0,
+        'p50_ms': round(percentile(values, 50) * 1000, 2),
+        'p95_ms': round(percentile(values, 95) * 1000, 2),
+        'p99_ms': round(percentile(values, 99) * 1000, 2),
+        'mean_ms': round(sum(values) / count * 1000, 2) if count else 0.0,
+        'max_ms': round(values[-1] * 1000, 2) if count else 0.0,
+        'throughput_per_s': round(count / elapsed, 2) if elapsed > 0 else 0.0
+    }
@@ -29,6 +29,9 @@ class Config:
     
     # 数据库URI
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or f'sqlite:///{os.path.join(instance_dir, "app.db")}'
+    # 归档数据库：早已结束的日程条目和已过期的已完成任务移入该库，保持主库的entries表较小
+    ARCHIVE_DATABASE_URL = os.environ.get('ARCHIVE_DATABASE_URL') or f'sqlite:///{os.path.join(instance_dir, "archive.db")}'
+    SQLALCHEMY_BINDS = {'archive': ARCHIVE_DATABASE_URL}
     
     # 大语言模型API配置 - 直接从环境变量获取，支持从文件加载和系统环境变量
     LLM_API_KEY = os.environ.get('LLM_API_KEY')
@@ -37,12 +40,85 @@ class Config:
     # 提醒配置
     REMINDER_INTERVAL = 60  # 检查提醒的间隔时间（秒）
     
-    # 北航API配置
-    BUAA_API_BASE_URL = 'https://byxt.buaa.edu.cn/jwapp/sys'
+    # 北航API配置（可通过环境变量指向本地的模拟服务，用于基准测试）
+    BUAA_API_BASE_URL = os.environ.get('BUAA_API_BASE_URL') or 'https://byxt.buaa.edu.cn/jwapp/sys'
+    SPOC_BASE_URL = os.environ.get('SPOC_BASE_URL') or 'https://spoc.buaa.edu.cn'
+    
+    # 阿里云百炼（DashScope）API地址
+    DASHSCOPE_BASE_URL = os.environ.get('DASHSCOPE_BASE_URL') or 'https://dashscope.aliyuncs.com/api/v1'
+    
+    # 学期第一周周一的日期，可配置多个学期（逗号分隔，如 "2025-09-08,2026-02-23"）
+    # 未配置时按学期代码估算，用于课程按周次展开
+    SEMESTER_START_DATE = os.environ.get('SEMESTER_START_DATE')
+    # 学期课表同步时是否删除学期课表中已不存在的同步课程（默认关闭，只在结果中报告）：
+    # 学期课表接口的响应格式尚未用真实响应核对，解析不完整时不能据此删除课程
+    TERM_SYNC_REMOVE_STALE = (os.environ.get('TERM_SYNC_REMOVE_STALE') or 'false').lower() in ('1', 'true', 'yes')
+    
+    # 日志配置
+    LOG_LEVEL = os.environ.get('LOG_LEVEL') or 'INFO'
+    # 按模块设置日志级别（逗号分隔，如 "services.buaa_api=DEBUG,routes.llm=DEBUG"）
+    LOG_LEVELS = os.environ.get('LOG_LEVELS')
+    # 滚动日志文件目录，单个文件的最大字节数和保留的文件个数
+    LOG_DIR = os.environ.get('LOG_DIR') or os.path.join(instance_dir, 'logs')
+    LOG_MAX_BYTES = int(os.environ.get('LOG_MAX_BYTES') or 5 * 1024 * 1024)
+    LOG_BACKUP_COUNT = int(os.environ.get('LOG_BACKUP_COUNT') or 5)
+    
+    # 是否记录请求指标并在 /api/metrics 暴露（Prometheus文本格式，默认关闭）；
+    # 多用户模式下只有管理员可以访问该接口
+    METRICS_ENABLED = (os.environ.get('METRICS_ENABLED') or 'false').lower() in ('1', 'true', 'yes')
+    
+    # 查询检查（开发/性能分析用，默认关闭）：同一请求中同一形状的语句执行次数达到阈值时视为N+1查询，
+    # 超过耗时上限（毫秒）的查询记录其执行计划，结果写入日志和 X-Query-Report 响应头
+    QUERY_INSPECTOR_ENABLED = (os.environ.get('QUERY_INSPECTOR_ENABLED') or 'false').lower() in ('1', 'true', 'yes')
+    QUERY_REPEAT_THRESHOLD = int(os.environ.get('QUERY_REPEAT_THRESHOLD') or 5)
+    SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS') or 100)
+    
+    # 性能分析（默认关闭）：开启后请求可通过 ?__profile=1 或请求头 X-Profile: 1 在采样分析器下执行，
+    # 结果保存到PROFILE_DIR；并提供 /api/debug/profile?seconds=N 对所有线程采样
+    PROFILING_ENABLED = (os.environ.get('PROFILING_ENABLED') or 'false').lower() in ('1', 'true', 'yes')
+    PROFILE_DIR = os.environ.get('PROFILE_DIR') or os.path.join(instance_dir, 'profiles')
+    
+    # 响应压缩：超过COMPRESSION_MIN_SIZE字节的文本类响应按 Accept-Encoding 压缩（zstd/br需安装zstandard/brotli，否则使用gzip）
+    COMPRESSION_ENABLED = (os.environ.get('COMPRESSION_ENABLED') or 'true').lower() in ('1', 'true', 'yes')
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE') or 1024)
+    COMPRESSION_LEVEL = int(os.environ.get('COMPRESSION_LEVEL') or 6)
+    
+    # cpolar本地API地址（隧道监视器查询隧道地址），测试时可指向本地模拟接口
+    CPOLAR_API = os.environ.get('CPOLAR_API') or 'http://localhost:4040/api/tunnels'
+    
+    # 前端静态文件（/sound、/svg）的浏览器缓存时间（秒），/assets 下带哈希的文件始终永久缓存
+    STATIC_MAX_AGE = int(os.environ.get('STATIC_MAX_AGE') or 86400)
     
     # 大语言模型API配置
     LLM_API_KEY = os.environ.get('LLM_API_KEY')
     LLM_API_URL = os.environ.get('LLM_API_URL') or 'https://api.qwen.com/v1/chat/completions'
+    # 规则快速解析：简单输入（一个日期时间的日程或截止任务）的置信度不低于QUICK_PARSER_MIN_CONFIDENCE时直接返回，不调用大模型
+    QUICK_PARSER_ENABLED = (os.environ.get('QUICK_PARSER_ENABLED') or 'true').lower() in ('1', 'true', 'yes')
+    QUICK_PARSER_MIN_CONFIDENCE = float(os.environ.get('QUICK_PARSER_MIN_CONFIDENCE') or 0.8)
+    
+    # 后台维护任务调度器：过期任务清理间隔（秒）、专注记录保留天数（统计汇总永久保留）和清理间隔（秒）、
+    # 每天整理数据库的时刻（PRAGMA optimize，碎片较多时VACUUM）
+    SCHEDULER_ENABLED = (os.environ.get('SCHEDULER_ENABLED') or 'true').lower() in ('1', 'true', 'yes')
+    TASK_EXPIRY_INTERVAL = int(os.environ.get('TASK_EXPIRY_INTERVAL') or 60)
+    FOCUS_RETENTION_DAYS = int(os.environ.get('FOCUS_RETENTION_DAYS') or 30)
+    FOCUS_COMPACTION_INTERVAL = int(os.environ.get('FOCUS_COMPACTION_INTERVAL') or 6 * 3600)
+    DB_MAINTENANCE_AT = os.environ.get('DB_MAINTENANCE_AT') or '04:00'
+    # 历史归档（维护任务）：结束时间早于ARCHIVE_AFTER_WEEKS周的条目移入归档数据库，每ARCHIVE_INTERVAL秒执行一次
+    ARCHIVE_ENABLED = (os.environ.get('ARCHIVE_ENABLED') or 'true').lower() in ('1', 'true', 'yes')
+    ARCHIVE_AFTER_WEEKS = int(os.environ.get('ARCHIVE_AFTER_WEEKS') or 12)
+    ARCHIVE_INTERVAL = int(os.environ.get('ARCHIVE_INTERVAL') or 24 * 3600)
+    
+    # 多用户：开启后除登录接口外的API都需要登录令牌（Authorization: Bearer、X-Auth-Token 或 Cookie），
+    # 未开启时没有令牌的请求使用默认用户；令牌用SECRET_KEY签名，有效期AUTH_TOKEN_MAX_AGE秒；
+    # 默认用户是管理员，只有管理员可以修改API_KEY、cpolar authtoken等全局设置和查看 /api/metrics
+    MULTI_USER_ENABLED = (os.environ.get('MULTI_USER_ENABLED') or 'false').lower() in ('1', 'true', 'yes')
+    AUTH_TOKEN_MAX_AGE = int(os.environ.get('AUTH_TOKEN_MAX_AGE') or 30 * 24 * 3600)
+    # 按用户分库：开启后用户的数据保存在 USER_SHARD_DIR/<用户id>.db（用户表仍在主数据库），不同用户的写入互不阻塞；
+    # 同时最多保持USER_SHARD_MAX_ENGINES个分库连接，空闲超过USER_SHARD_IDLE_SECONDS秒的连接由维护任务关闭
+    USER_SHARDING_ENABLED = (os.environ.get('USER_SHARDING_ENABLED') or 'false').lower() in ('1', 'true', 'yes')
+    USER_SHARD_DIR = os.environ.get('USER_SHARD_DIR') or os.path.join(instance_dir, 'users')
+    USER_SHARD_MAX_ENGINES = int(os.environ.get('USER_SHARD_MAX_ENGINES') or 64)
+    USER_SHARD_IDLE_SECONDS = int(os.environ.get('USER_SHARD_IDLE_SECONDS') or 600)
     
     # 提醒配置
     REMINDER_INTERVAL = 60  # 检查提醒的间隔时间（秒）
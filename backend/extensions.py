@@ -1,4 +1,21 @@
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+
+
+class RoutingSession(Session):
+    """
+    支持按请求路由数据库的会话：设置了 bind_router 时，先由它根据被查询的表选择引擎（如按用户分库），
+    返回None时按 bind_key 选择
+    """
+    bind_router = None
+    
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and RoutingSession.bind_router is not None:
+            engine = RoutingSession.bind_router(mapper, clause)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
 
 # 初始化数据库
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
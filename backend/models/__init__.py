@@ -3,3 +3,6 @@ from .course import Course
 from .task import Task
 from .entry import Entry
 from .focus_record import FocusRecord
+from .sync_state import SyncState
+from .focus_rollup import FocusRollup
+from .archive import ArchivedEntry, ArchivedTask, ArchiveState
@@ -0,0 +1,81 @@
+from datetime import datetime
+from extensions import db
+from models.mixins import UserOwnedMixin
+
+class ArchivedEntry(UserOwnedMixin, db.Model):
+    """归档的日程条目 - 保存在独立的归档数据库中，保留原条目的id"""
+    __bind_key__ = 'archive'
+    __tablename__ = 'archived_entries'
+    
+    id = db.Column(db.Integer, primary_key=True)  # 与原entries表中的id相同
+    user_id = db.Column(db.Integer, nullable=True)  # 归档数据库中没有用户表，不设外键
+    title = db.Column(db.String(100), nullable=False)
+    description = db.Column(db.Text, nullable=True)
+    entry_type = db.Column(db.String(20), nullable=False)
+    start_time = db.Column(db.DateTime, nullable=False, index=True)
+    end_time = db.Column(db.DateTime, nullable=False)
+    color = db.Column(db.String(20), nullable=True, default="#4a90e2")
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_archived_entries_user_start', 'user_id', 'start_time'),
+    )
+    
+    def __repr__(self):
+        return f'<ArchivedEntry {self.title} ({self.entry_type})>'
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'title': self.title,
+            'description': self.description,
+            'entry_type': self.entry_type,
+            'start_time': self.start_time.isoformat(),
+            'end_time': self.end_time.isoformat(),
+            'color': self.color,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat()
+        }
+
+
+class ArchivedTask(UserOwnedMixin, db.Model):
+    """归档的已完成任务 - 截止时间过后从任务表移入归档数据库"""
+    __bind_key__ = 'archive'
+    __tablename__ = 'archived_tasks'
+    
+    id = db.Column(db.Integer, primary_key=True)  # 与原task表中的id相同
+    user_id = db.Column(db.Integer, nullable=True)
+    title = db.Column(db.String(100), nullable=False)
+    description = db.Column(db.Text, nullable=True)
+    task_type = db.Column(db.String(20), nullable=False)
+    deadline = db.Column(db.DateTime, nullable=False, index=True)
+    priority = db.Column(db.Integer, nullable=False, default=50)
+    urgency = db.Column(db.Float, nullable=False, default=50.0)
+    completed = db.Column(db.Boolean, default=True)
+    external_id = db.Column(db.String(64), nullable=True)
+    entry_id = db.Column(db.Integer, nullable=True)  # 关联的日程id（可能已归档）
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_archived_tasks_user_deadline', 'user_id', 'deadline'),
+    )
+    
+    def __repr__(self):
+        return f'<ArchivedTask {self.title}>'
+
+
+class ArchiveState(db.Model):
+    """归档水位 - 归档表中所有条目都早于该时间，查询范围早于水位时才需要读取归档"""
+    __bind_key__ = 'archive'
+    __tablename__ = 'archive_state'
+    
+    name = db.Column(db.String(50), primary_key=True)  # 如 "entries"
+    watermark = db.Column(db.DateTime, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ArchiveState {self.name} {self.watermark}>'
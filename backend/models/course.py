@@ -1,7 +1,8 @@
 from datetime import datetime
 from extensions import db
+from models.mixins import UserOwnedMixin
 
-class Course(db.Model):
+class Course(UserOwnedMixin, db.Model):
     """课程模型"""
     id = db.Column(db.Integer, primary_key=True)
     course_name = db.Column(db.String(100), nullable=False)
@@ -12,8 +13,15 @@ class Course(db.Model):
     day_of_week = db.Column(db.Integer, nullable=False)  # 1-7，周一到周日
     week_range = db.Column(db.String(50), nullable=False)  # 如 "1-16"
     date = db.Column(db.Date, nullable=True)  # 具体日期，用于保存未来7天的课程
+    source = db.Column(db.String(20), nullable=True)  # 来源：sync为从北航课表同步，为空时为手动添加（同步不会修改或删除）
+    skipped_weeks = db.Column(db.String(100), nullable=True)  # 用户删除或单独修改过的周次，如 "3,7"，同步学期课表时保留
+    semester_start = db.Column(db.Date, nullable=True)  # 所属学期第一周周一，周次范围只在该学期内展开；为空时按创建时间所在学期计算
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_course_user_date', 'user_id', 'date'),
+    )
+    
     def __repr__(self):
         return f'<Course {self.course_name}>'
@@ -1,7 +1,8 @@
 from datetime import datetime
 from extensions import db
+from models.mixins import UserOwnedMixin
 
-class Entry(db.Model):
+class Entry(UserOwnedMixin, db.Model):
     __tablename__ = 'entries'
     
     id = db.Column(db.Integer, primary_key=True)
@@ -14,6 +15,12 @@ class Entry(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_entries_user_start', 'user_id', 'start_time'),
+        # 不复用已删除（包括已移入归档）的条目id，否则新条目会与归档中的条目id冲突
+        {'sqlite_autoincrement': True},
+    )
+    
     def __repr__(self):
         return f'<Entry {self.title} ({self.entry_type})>'
     
@@ -1,7 +1,8 @@
 from datetime import datetime
 from extensions import db
+from models.mixins import UserOwnedMixin
 
-class FocusRecord(db.Model):
+class FocusRecord(UserOwnedMixin, db.Model):
     __tablename__ = 'focus_records'
     
     id = db.Column(db.Integer, primary_key=True)
@@ -11,6 +12,10 @@ class FocusRecord(db.Model):
     end_time = db.Column(db.DateTime, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_focus_records_user_start', 'user_id', 'start_time'),
+    )
+    
     def __repr__(self):
         return f'<FocusRecord {self.task_title} - {self.duration}s>'
     
@@ -0,0 +1,29 @@
+from datetime import datetime
+from extensions import db
+from models.mixins import UserOwnedMixin
+
+class FocusRollup(UserOwnedMixin, db.Model):
+    """专注统计汇总模型 - 每天每个任务的专注总时长，保存专注记录时增量更新，原始记录清理后仍保留"""
+    __tablename__ = 'focus_rollups'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)  # 专注开始的日期
+    task_title = db.Column(db.String(100), nullable=False)
+    total_seconds = db.Column(db.Integer, nullable=False, default=0)  # 专注总时长（秒）
+    session_count = db.Column(db.Integer, nullable=False, default=0)  # 专注次数
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'day', 'task_title', name='uq_focus_rollups_user_day_task'),
+    )
+    
+    def __repr__(self):
+        return f'<FocusRollup {self.day} {self.task_title} - {self.total_seconds}s>'
+    
+    def to_dict(self):
+        return {
+            'day': self.day.isoformat(),
+            'task_title': self.task_title,
+            'total_seconds': self.total_seconds,
+            'session_count': self.session_count
+        }
@@ -0,0 +1,9 @@
+from sqlalchemy.orm import declared_attr
+from extensions import db
+
+class UserOwnedMixin:
+    """按用户隔离的数据 - 查询自动附加当前用户的条件，新增的行自动归属当前用户（见 services/user_scope.py）"""
+    
+    @declared_attr
+    def user_id(cls):
+        return db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)  # 升级前的数据为空，启动时归属默认用户
@@ -0,0 +1,20 @@
+from datetime import datetime
+from extensions import db
+from models.mixins import UserOwnedMixin
+
+class SyncState(UserOwnedMixin, db.Model):
+    """同步状态模型 - 记录每个（接口, 日期）上次同步的响应内容指纹"""
+    __tablename__ = 'sync_states'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    endpoint = db.Column(db.String(50), nullable=False)  # 如 "teaching_schedule", "exams", "term_schedule"
+    sync_key = db.Column(db.String(50), nullable=False)  # 日期（YYYY-MM-DD）或学期代码
+    content_hash = db.Column(db.String(64), nullable=False)  # 响应内容的SHA-256
+    synced_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'endpoint', 'sync_key', name='uq_sync_states_user_endpoint_key'),
+    )
+    
+    def __repr__(self):
+        return f'<SyncState {self.endpoint} {self.sync_key}>'
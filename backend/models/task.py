@@ -1,8 +1,9 @@
 from datetime import datetime
 from extensions import db
 from models.entry import Entry
+from models.mixins import UserOwnedMixin
 
-class Task(db.Model):
+class Task(UserOwnedMixin, db.Model):
     """任务模型 - 仅表示截止日期（events）"""
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
@@ -12,11 +13,17 @@ class Task(db.Model):
     priority = db.Column(db.Integer, nullable=False, default=50)  # 0-100的整数，代表四象限视图中的纵坐标
     urgency = db.Column(db.Float, nullable=False, default=50.0)  # 紧急度，0-100的连续值，以y坐标形式存储
     completed = db.Column(db.Boolean, default=False)
+    external_id = db.Column(db.String(64), nullable=True, index=True)  # 外部系统ID，如SPOC作业ID，用于同步去重（每个用户内唯一）
     entry_id = db.Column(db.Integer, db.ForeignKey('entries.id'), nullable=True)  # 关联到日程表
     entry = db.relationship('Entry', backref=db.backref('tasks', lazy=True))  # 与日程的双向关联
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'external_id', name='uq_task_user_external_id'),
+        db.Index('ix_task_user_deadline', 'user_id', 'deadline'),
+    )
+    
     def __repr__(self):
         return f'<Task {self.title}>'
     
@@ -1,10 +1,109 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
+from werkzeug.security import check_password_hash, generate_password_hash
 from extensions import db
 from models.user import User
+from services.user_scope import user_scope, current_user_id, TOKEN_COOKIE, DEFAULT_TOKEN_MAX_AGE
 
 # 创建蓝图
 auth_bp = Blueprint('auth', __name__)
 
+# 密码哈希算法（结果不超过password_hash列的长度）
+PASSWORD_HASH_METHOD = 'pbkdf2:sha256'
+
+
+def _current_user():
+    """获取当前请求的用户（未开启多用户时为默认用户）"""
+    user_id = current_user_id()
+    return db.session.get(User, user_id) if user_id is not None else None
+
+
+def _token_response(user, status=200):
+    """返回登录令牌，同时写入Cookie供无法附加请求头的请求（如SSE）使用"""
+    token = user_scope.issue_token(user.id)
+    response = jsonify({
+        'token': token,
+        'user': {'id': user.id, 'username': user.username, 'buaa_id': user.buaa_id}
+    })
+    response.status_code = status
+    response.set_cookie(
+        TOKEN_COOKIE, token,
+        max_age=current_app.config.get('AUTH_TOKEN_MAX_AGE', DEFAULT_TOKEN_MAX_AGE),
+        httponly=True, samesite='Lax'
+    )
+    return response
+
+
+@auth_bp.route('/register', methods=['POST'])
+def register():
+    """注册用户并返回登录令牌"""
+    data = request.get_json() or {}
+    username = (data.get('username') or '').strip()
+    password = data.get('password') or ''
+    
+    if not username or not password:
+        return jsonify({'error': '用户名和密码不能为空'}), 400
+    if User.query.filter_by(username=username).first():
+        return jsonify({'error': '用户名已存在'}), 409
+    
+    user = User(username=username, password_hash=generate_password_hash(password, method=PASSWORD_HASH_METHOD))
+    db.session.add(user)
+    db.session.commit()
+    return _token_response(user, 201)
+
+
+@auth_bp.route('/login', methods=['POST'])
+def login():
+    """用户名密码登录，返回登录令牌"""
+    data = request.get_json() or {}
+    user = User.query.filter_by(username=(data.get('username') or '').strip()).first()
+    
+    # 没有设置密码的用户（如单机使用时的默认用户）不能远程登录，需要先在本机设置密码
+    if not user or not user.password_hash or not check_password_hash(user.password_hash, data.get('password') or ''):
+        return jsonify({'error': '用户名或密码错误'}), 401
+    return _token_response(user)
+
+
+@auth_bp.route('/logout', methods=['POST'])
+def logout():
+    """退出登录（清除Cookie，令牌本身在有效期内仍然有效）"""
+    response = jsonify({'message': '已退出登录'})
+    response.delete_cookie(TOKEN_COOKIE)
+    return response
+
+
+@auth_bp.route('/me', methods=['GET'])
+def get_current_user():
+    """获取当前用户信息"""
+    user = _current_user()
+    if not user:
+        return jsonify({'error': '用户不存在'}), 404
+    return jsonify({
+        'id': user.id,
+        'username': user.username,
+        'buaa_id': user.buaa_id,
+        'has_password': bool(user.password_hash),
+        'is_admin': user.id == user_scope.default_user_id()
+    }), 200
+
+
+@auth_bp.route('/password', methods=['POST'])
+def set_password():
+    """设置当前用户的密码（已有密码时需要提供原密码）"""
+    data = request.get_json() or {}
+    password = data.get('password') or ''
+    user = _current_user()
+    
+    if not user:
+        return jsonify({'error': '用户不存在'}), 404
+    if not password:
+        return jsonify({'error': '密码不能为空'}), 400
+    if user.password_hash and not check_password_hash(user.password_hash, data.get('old_password') or ''):
+        return jsonify({'error': '原密码错误'}), 403
+    
+    user.password_hash = generate_password_hash(password, method=PASSWORD_HASH_METHOD)
+    db.session.commit()
+    return jsonify({'message': '密码设置成功'}), 200
+
 
 @auth_bp.route('/buaa_id', methods=['POST'])
 def set_buaa_id():
@@ -12,31 +111,21 @@ def set_buaa_id():
     data = request.get_json()
     buaa_id = data.get('buaa_id')
     
-    # 对于独立程序，我们假设只有一个用户，或者创建一个默认用户
-    # 查找现有用户，如果没有则创建一个
-    user = User.query.first()
+    # 当前请求的用户（未开启多用户时为默认用户，启动时已创建）
+    user = _current_user()
+    if not user:
+        return jsonify({'error': '用户不存在'}), 404
     
-    if user:
-        # 更新现有用户的北航学号
-        user.buaa_id = buaa_id
-        db.session.commit()
-        return jsonify({'message': '北航学号更新成功'}), 200
-    else:
-        # 创建新用户
-        new_user = User(
-            username='default_user',  # 默认用户名
-            buaa_id=buaa_id
-        )
-        db.session.add(new_user)
-        db.session.commit()
-        return jsonify({'message': '北航学号设置成功'}), 201
+    # 更新当前用户的北航学号
+    user.buaa_id = buaa_id
+    db.session.commit()
+    return jsonify({'message': '北航学号更新成功'}), 200
 
 
 @auth_bp.route('/buaa_id', methods=['GET'])
 def get_buaa_id():
     """获取北航学号"""
-    # 对于独立程序，我们假设只有一个用户
-    user = User.query.first()
+    user = _current_user()
     
     if user:
         return jsonify({
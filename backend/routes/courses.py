@@ -1,11 +1,20 @@
+import logging
 import requests
 import time
-from datetime import datetime, timedelta
-from flask import Blueprint, request, jsonify
+from datetime import date, datetime, timedelta
+from flask import Blueprint, current_app, request, jsonify
+from sqlalchemy import or_
 from extensions import db
 from models.course import Course
+from models.entry import Entry
+from services.course_recurrence import course_recurrence_engine, get_semester_start
 from services.buaa_api import buaa_api_client, sso_login_handler, parse_course_data, NetworkError, AuthenticationError, DataError
 from services.session_manager import global_session_manager
+from services.user_scope import current_user_id
+from services.proxy_cache import course_schedule_proxy, cookie_identity, filter_response_headers
+from services.course_sync import sync_day_courses, sync_exam_data, fetch_term_timetable, sync_term_courses, COURSE_SOURCE_SYNC
+
+logger = logging.getLogger(__name__)
 
 # 创建蓝图
 courses_bp = Blueprint('courses', __name__)
@@ -28,7 +37,9 @@ def get_courses():
             'start_time': course.start_time.strftime('%H:%M'),
             'end_time': course.end_time.strftime('%H:%M'),
             'day_of_week': course.day_of_week,
-            'week_range': course.week_range
+            'week_range': course.week_range,
+            'skipped_weeks': course.skipped_weeks,
+            'semester_start': course.semester_start.isoformat() if course.semester_start else None
         }
         
         # 添加日期字段（如果存在）
@@ -52,7 +63,9 @@ def add_course():
         start_time=data['start_time'],
         end_time=data['end_time'],
         day_of_week=data['day_of_week'],
-        week_range=data['week_range']
+        week_range=data['week_range'],
+        # 周次范围属于当前学期
+        semester_start=get_semester_start(date.today())
     )
     
     db.session.add(new_course)
@@ -98,19 +111,96 @@ def delete_course(course_id):
     return jsonify({'message': '课程删除成功'}), 200
 
 
+def _find_occurrence(course_id, date_str):
+    """
+    查找课程某一天的上课
+    :return: (课程, 日期, 错误响应)，找到时错误响应为None
+    """
+    try:
+        day = datetime.strptime(date_str, '%Y-%m-%d').date()
+    except ValueError:
+        return None, None, (jsonify({'message': '日期格式错误，应为YYYY-MM-DD'}), 400)
+    course = db.session.get(Course, course_id)
+    if not course or not course_recurrence_engine.occurs_on(course, day):
+        return None, None, (jsonify({'message': '该日期没有这门课程'}), 404)
+    return course, day, None
+
+
+@courses_bp.route('/<int:course_id>/occurrences/<string:date>', methods=['PUT'])
+def update_course_occurrence(course_id, date):
+    """
+    修改某一天的课程（日历中的课程条目id为 course-<课程id>-<日期>）
+    该次课程改为保存为普通条目，周期课程跳过这一天，其它周不受影响
+    """
+    course, day, error = _find_occurrence(course_id, date)
+    if error:
+        return error
+    data = request.get_json() or {}
+    
+    def parse_datetime_local(date_str, default):
+        if not date_str:
+            return default
+        if len(date_str) == 16:  # 格式为 YYYY-MM-DDTHH:MM
+            date_str += ':00'
+        return datetime.fromisoformat(date_str).replace(tzinfo=None)
+    
+    try:
+        entry = Entry(
+            title=data.get('title') or course.course_name,
+            description=data.get('description') or f"教师: {course.teacher}\n教室: {course.classroom}",
+            entry_type=data.get('entry_type') or 'course',
+            start_time=parse_datetime_local(data.get('start_time'), datetime.combine(day, course.start_time)),
+            end_time=parse_datetime_local(data.get('end_time'), datetime.combine(day, course.end_time)),
+            color=data.get('color') or course_recurrence_engine.COURSE_COLOR
+        )
+    except ValueError:
+        return jsonify({'message': '时间格式错误'}), 400
+    
+    course_recurrence_engine.skip_occurrence(course, day)
+    db.session.add(entry)
+    db.session.commit()
+    return jsonify({'entry': entry.to_dict()}), 200
+
+
+@courses_bp.route('/<int:course_id>/occurrences/<string:date>', methods=['DELETE'])
+def delete_course_occurrence(course_id, date):
+    """删除某一天的课程（只删除这一次，其它周不受影响）"""
+    course, day, error = _find_occurrence(course_id, date)
+    if error:
+        return error
+    course_recurrence_engine.skip_occurrence(course, day)
+    db.session.commit()
+    return jsonify({'message': '已删除该次课程'}), 200
+
+
+def _session_owner():
+    """北航会话按当前用户区分，不同用户即使使用相同学号也不会共享已登录的会话"""
+    return str(current_user_id())
+
+
+def _owned_user_key(data):
+    """
+    从请求数据中取出属于当前用户的会话标识
+    :return: 会话标识，缺少参数或会话不属于当前用户时为None
+    """
+    user_key = (data or {}).get('user_key')
+    if user_key and global_session_manager.is_owned_by(user_key, _session_owner()):
+        return user_key
+    return None
+
+
 @courses_bp.route('/init_session', methods=['POST'])
 def init_session():
-    """初始化会话"""
+    """初始化当前用户的会话"""
     data = request.get_json()
-    user_id = data.get('user_id')
     buaa_id = data.get('buaa_id')
     
-    if not user_id or not buaa_id:
+    if not buaa_id:
         return jsonify({'message': '缺少必要参数'}), 400
     
     try:
         # 创建新会话
-        user_key = global_session_manager.create_session(user_id, buaa_id)
+        user_key = global_session_manager.create_session(_session_owner(), buaa_id)
         return jsonify({
             'message': '会话初始化成功',
             'user_key': user_key
@@ -123,10 +213,11 @@ def init_session():
 def check_login():
     """检查登录状态"""
     data = request.get_json()
-    user_key = data.get('user_key')
-    
-    if not user_key:
+    if not data.get('user_key'):
         return jsonify({'message': '缺少必要参数'}), 400
+    user_key = _owned_user_key(data)
+    if not user_key:
+        return jsonify({'message': '会话已过期或不存在'}), 404
     
     try:
         # 使用新的API客户端检查登录状态
@@ -144,14 +235,14 @@ def check_login():
 def process_login_callback():
     """处理登录回调"""
     data = request.get_json()
-    user_key = data.get('user_key')
     callback_url = data.get('callback_url')
     
-    if not user_key or not callback_url:
+    if not data.get('user_key') or not callback_url:
         return jsonify({'message': '缺少必要参数'}), 400
     
     try:
-        session = global_session_manager.get_session(user_key)
+        user_key = _owned_user_key(data)
+        session = global_session_manager.get_session(user_key) if user_key else None
         if not session:
             return jsonify({'message': '会话已过期或不存在'}), 401
         
@@ -170,9 +261,8 @@ def process_login_callback():
 
 @courses_bp.route('/fetch_course_schedule', methods=['GET'])
 def fetch_course_schedule():
-    """作为代理，直接将前端请求转发到北航API，保留浏览器的Cookie和请求头"""
-    from flask import Response
-    import requests
+    """作为代理，将前端请求转发到北航API，保留浏览器的Cookie和请求头；相同用户的相同请求短期内直接返回缓存"""
+    from flask import Response, stream_with_context
     
     # 获取前端的请求参数
     date = request.args.get('date', '2025-11-28')
@@ -199,26 +289,96 @@ def fetch_course_schedule():
         'Sec-Fetch-Site': frontend_headers.get('Sec-Fetch-Site', 'same-origin')
     }
     
+    # 缓存键包含Cookie身份，不同用户的课表互不共享
+    cache_key = (date, lxdm, cookie_identity(frontend_cookies))
+    
     try:
-        # 发送请求，使用前端的请求头和Cookie
-        response = requests.get(
-            api_url,
-            headers=headers_to_forward,
-            cookies=frontend_cookies,
-            allow_redirects=False,
-            timeout=10
-        )
-        
-        # 创建响应对象，将北航API的响应直接返回给前端
-        proxy_response = Response(
-            response.content,
-            status=response.status_code,
-            headers=dict(response.headers)
-        )
-        
-        return proxy_response
+        cached, upstream = course_schedule_proxy.fetch(cache_key, api_url, headers_to_forward, frontend_cookies)
     except Exception as e:
         return jsonify({'message': f'代理请求失败: {str(e)}'}), 500
+    
+    if cached is not None:
+        return Response(cached.body, status=cached.status, headers=cached.headers)
+    
+    # 不可缓存的响应（如登录重定向）以流的方式透传给前端，上游下发的Cookie只属于当前用户，一并透传
+    return Response(
+        stream_with_context(course_schedule_proxy.stream_body(upstream)),
+        status=upstream.status_code,
+        headers=filter_response_headers(upstream.raw.headers, keep_cookies=True)
+    )
+
+
+def _prepare_buaa_session(data):
+    """
+    创建北航会话，如果提供了密码则执行SSO登录
+    :param data: 请求数据，包含buaa_id和可选的password
+    :return: (user_key, 错误响应)，成功时错误响应为None
+    """
+    buaa_id = data.get('buaa_id')
+    password = data.get('password')
+    
+    if not buaa_id:
+        return None, (jsonify({"status": "error", "message": "缺少必要参数"}), 400)
+    
+    # 初始化当前用户的会话：其他用户已登录的同一学号的会话不会被复用，新会话需要提供密码登录
+    user_key = global_session_manager.create_session(_session_owner(), buaa_id)
+    session = global_session_manager.get_session(user_key)
+    
+    # 设置会话的Cookie为前端传递的Cookie
+    frontend_cookies = request.cookies.to_dict()
+    if frontend_cookies:
+        session.cookies.update(frontend_cookies)
+    
+    # 检查是否提供了密码，如果提供则执行登录
+    if password:
+        logger.info("使用提供的密码执行登录")
+        try:
+            # 执行SSO登录
+            cookies = sso_login_handler.perform_sso_login(session, buaa_id, password)
+            # 更新会话Cookie
+            session.cookies.update(cookies)
+            logger.info("登录成功，更新会话Cookie")
+        except AuthenticationError as e:
+            return None, (jsonify({"status": "error", "message": f"北航登录失败: {str(e)}"}), 401)
+        except NetworkError as e:
+            return None, (jsonify({"status": "error", "message": f"网络错误: {str(e)}"}), 503)
+        except Exception as e:
+            logger.exception("登录过程中发生未知错误: %s", e)
+            return None, (jsonify({"status": "error", "message": "登录过程中发生未知错误"}), 500)
+    
+    # 先检查登录状态
+    login_status, login_url = buaa_api_client.check_login_status(user_key)
+    if not login_status:
+        return None, (jsonify({"status": "error", "message": "需要登录"}), 401)
+    
+    return user_key, None
+
+
+def _sync_exam_data(user_key):
+    """
+    获取本学期考试信息并保存，考试响应与上次同步相同时跳过保存
+    :param user_key: 用户唯一标识
+    :return: (考试数量, 考试同步报告)
+    """
+    # 使用今天的日期计算学期代码
+    today_str = datetime.now().strftime('%Y-%m-%d')
+    term_code = buaa_api_client._calculate_term_code(today_str)
+    
+    try:
+        exam_result = buaa_api_client.fetch_exam_schedule(user_key, today_str)
+    except Exception as e:
+        logger.warning("获取考试信息失败: %s", e)
+        return 0, {'skipped': [], 'changed': [], 'new': []}
+    
+    # 检查考试信息获取结果
+    if exam_result.get('need_login', False) or 'data' not in exam_result:
+        return 0, {'skipped': [], 'changed': [], 'new': []}
+    
+    exam_data = exam_result['data']['exams']
+    logger.info("获取到的考试数量: %s", len(exam_data))
+    
+    exam_result = sync_exam_data(term_code, exam_data)
+    return exam_result['exam_count'], exam_result['exams']
 
 
 @courses_bp.route('/sync_buaa', methods=['POST'])
@@ -231,44 +391,12 @@ def sync_buaa_courses():
 def sync_buaa_courses_by_date(date=None):
     """同步北航课程表（按指定日期开始同步）"""
     try:
-        from models.entry import Entry
-        from datetime import datetime, timedelta
-        
         # 解析请求数据
         data = request.get_json() if request.is_json else {}
-        buaa_id = data.get('buaa_id')
-        password = data.get('password')
-        
-        if not buaa_id:
-            return jsonify({"status": "error", "message": "缺少必要参数"}), 400
-        
-        # 初始化会话，使用固定的user_id
-        user_key = global_session_manager.create_session('default_user', buaa_id)
-        session = global_session_manager.get_session(user_key)
         
-        # 设置会话的Cookie为前端传递的Cookie
-        frontend_cookies = request.cookies.to_dict()
-        if frontend_cookies:
-            session.cookies.update(frontend_cookies)
-        
-        # 检查是否提供了密码，如果提供则执行登录
-        if password:
-            print("使用提供的密码执行登录")
-            try:
-                # 执行SSO登录
-                cookies = sso_login_handler.perform_sso_login(session, buaa_id, password)
-                # 更新会话Cookie
-                session.cookies.update(cookies)
-                print("登录成功，更新会话Cookie")
-            except AuthenticationError as e:
-                return jsonify({"status": "error", "message": f"北航登录失败: {str(e)}"}), 401
-            except NetworkError as e:
-                return jsonify({"status": "error", "message": f"网络错误: {str(e)}"}), 503
-            except Exception as e:
-                print(f"登录过程中发生未知错误: {str(e)}")
-                import traceback
-                traceback.print_exc()
-                return jsonify({"status": "error", "message": "登录过程中发生未知错误"}), 500
+        user_key, error_response = _prepare_buaa_session(data)
+        if error_response:
+            return error_response
         
         # 确定起始日期
         if date:
@@ -281,239 +409,47 @@ def sync_buaa_courses_by_date(date=None):
             # 默认使用当前日期
             today = datetime.now()
         
-        # 一次性同步14天内的所有课程内容
-        all_courses = []
-        
-        # 先检查登录状态
-        login_status, login_url = buaa_api_client.check_login_status(user_key)
-        if not login_status:
-            return jsonify({"status": "error", "message": "需要登录"}), 401
+        # 一次性获取7天内的所有课程内容
+        sync_dates = [(today + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(7)]
+        day_data = {}
         
-        # 循环获取接下来14天的课程数据
-        for i in range(7):
-            # 计算当前日期
-            current_date = today + timedelta(days=i)
-            date_str = current_date.strftime('%Y-%m-%d')
-            
-            print(f"获取课程数据，日期: {date_str}")
+        # 循环获取接下来7天的课程数据
+        for date_str in sync_dates:
+            logger.info("获取课程数据，日期: %s", date_str)
             result = buaa_api_client.fetch_course_schedule(user_key, date_str)
             
             if result.get('need_login'):
-                print(f"需要重新登录")
+                logger.warning("需要重新登录")
                 return jsonify({"status": "error", "message": "需要登录"}), 401
             
             if result.get('error'):
-                print(f"获取日期 {date_str} 的课程数据失败: {result['error']}")
+                logger.warning("获取日期 %s 的课程数据失败: %s", date_str, result['error'])
                 # 继续尝试获取其他日期的课程数据，而不是直接返回错误
                 continue
             
             # 获取课程数据，注意：result['data']['data']才是课程列表
-            course_data = result.get('data', {}).get('data', [])
-            
-            # 构建API返回的数据格式，兼容parse_course_data函数
-            api_response = {
-                "datas": course_data,
-                "code": "0",
-                "msg": None
-            }
-            
-            # 解析课程数据，确保数据准确性
-            parsed_courses = parse_course_data(api_response, date_str)
-            print(f"日期 {date_str} 解析后的课程数据: {parsed_courses}")
-            all_courses.extend(parsed_courses)
+            day_data[date_str] = result.get('data', {}).get('data', [])
             
             # 等待一段时间，避免请求过于频繁
             time.sleep(0.2)
         
-        # 日志：总共获取到的课程数量
-        print(f"[DB SYNC] 总共获取到的课程数量: {len(all_courses)}")
-        
-        # 对课程数据进行去重
-        # 使用课程名称、教师、教室、开始时间、结束时间和星期几作为去重依据
-        unique_courses = []
-        seen_courses = set()
-        
-        for course in all_courses:
-            # 构建唯一标识，包含原始日期以区分不同日期的相同课程
-            course_key = f"{course['kcmc']}_{course['jsxm']}_{course['jxlh']}{course['jash']}_{course['kssj']}_{course['jssj']}_{course['xqj']}_{course.get('original_date', '')}"
-            
-            if course_key not in seen_courses:
-                seen_courses.add(course_key)
-                unique_courses.append(course)
-        
-        # 日志：去重后的课程数据
-        print(f"[DB SYNC] 去重后的课程数量: {len(unique_courses)}")
+        # 跳过未变化的日期，解析、去重后保存课程数据
+        course_result = sync_day_courses(day_data)
         
         # 调用一次考试信息API，只获取一次
-        exam_data = []
-        try:
-            # 使用今天的日期计算学期代码
-            today_str = datetime.now().strftime('%Y-%m-%d')
-            
-            # 调用fetch_exam_schedule函数获取考试信息
-            exam_result = buaa_api_client.fetch_exam_schedule(user_key, today_str)
-            
-            # 检查考试信息获取结果
-            if not exam_result.get('need_login', False) and 'data' in exam_result:
-                exam_data = exam_result['data']['exams']
-                # 日志：获取到的考试数据
-                print(f"[DB SYNC] 获取到的考试数量: {len(exam_data)}")
-        except Exception as e:
-            print(f"[DB SYNC] 获取考试信息失败: {str(e)}")
-        
-        # 保存课程数据
-        if unique_courses:
-            # 遍历解析后的课程数据并保存
-            course_add_count = 0
-            course_update_count = 0
-            entry_add_count = 0
-            entry_update_count = 0
-            
-            for course_item in unique_courses:
-                # 解析教室信息
-                classroom = f"{course_item['jxlh']}{course_item['jash']}"
-                
-                # 解析时间字符串为time对象
-                from datetime import time as time_obj
-                start_time_parts = course_item['kssj'].split(':')
-                end_time_parts = course_item['jssj'].split(':')
-                
-                start_time = time_obj(int(start_time_parts[0]), int(start_time_parts[1]))
-                end_time = time_obj(int(end_time_parts[0]), int(end_time_parts[1]))
-                
-                try:
-                    # 1. 处理Course表：增量更新
-                    # 查找是否已存在相同的课程
-                    existing_course = Course.query.filter(
-                        Course.course_name == course_item['kcmc'],
-                        Course.teacher == course_item['jsxm'],
-                        Course.classroom == classroom,
-                        Course.start_time == start_time,
-                        Course.end_time == end_time,
-                        Course.day_of_week == course_item['xqj']
-                    ).first()
-                    
-                    if existing_course:
-                        # 如果存在，更新现有课程
-                        existing_course.week_range = course_item['zcd']
-                        course_update_count += 1
-                    else:
-                        # 如果不存在，添加新课程
-                        new_course = Course(
-                            course_name=course_item['kcmc'],
-                            teacher=course_item['jsxm'],
-                            classroom=classroom,
-                            start_time=start_time,
-                            end_time=end_time,
-                            day_of_week=course_item['xqj'],
-                            week_range=course_item['zcd']
-                        )
-                        db.session.add(new_course)
-                        course_add_count += 1
-                    
-                    # 2. 处理Entry表：增量更新（如果有原始日期）
-                    if course_item.get('original_date'):
-                        try:
-                            # 构建完整的开始和结束时间
-                            start_time_str = f"{course_item['original_date']}T{course_item['kssj']}:00"
-                            end_time_str = f"{course_item['original_date']}T{course_item['jssj']}:00"
-                            start_datetime = datetime.fromisoformat(start_time_str)
-                            end_datetime = datetime.fromisoformat(end_time_str)
-                            # 查找是否已存在相同的条目
-                            existing_entry = Entry.query.filter(
-                                Entry.title == course_item['kcmc'],
-                                Entry.entry_type == 'course',
-                                Entry.start_time == start_datetime,
-                                Entry.end_time == end_datetime
-                            ).first()
-                            
-                            if existing_entry:
-                                # 如果存在，更新现有条目
-                                existing_entry.description = f"教师: {course_item['jsxm']}\n教室: {classroom}"
-                                existing_entry.color = '#4a90e2'
-                                entry_update_count += 1
-                            else:
-                                # 如果不存在，添加新条目
-                                new_entry = Entry(
-                                    title=course_item['kcmc'],
-                                    description=f"教师: {course_item['jsxm']}\n教室: {classroom}",
-                                    entry_type='course',
-                                    start_time=start_datetime,
-                                    end_time=end_datetime,
-                                    color='#4a90e2'
-                                )
-                                db.session.add(new_entry)
-                                entry_add_count += 1
-                        except ValueError as e:
-                            continue
-                except Exception as e:
-                    print(f"[DB SYNC] 保存课程数据失败: {str(e)}")
-                    continue
-            
-            # 日志：课程数据保存结果
-            print(f"[DB SYNC] 条目数据保存完成：新增 {entry_add_count} 条，更新 {entry_update_count} 条课程条目")
+        exam_count, exam_report = _sync_exam_data(user_key)
         
-        # 保存考试数据
-        if exam_data:
-            exam_add_count = 0
-            exam_update_count = 0
-            
-            # 遍历考试数据并保存为Entry
-            for exam_item in exam_data:
-                try:
-                    # 解析考试日期和时间
-                    exam_date_str = exam_item['examDate'].split(' ')[0]  # 提取日期部分
-                    
-                    # 构建完整的开始和结束时间
-                    start_time_str = f"{exam_date_str}T{exam_item['startTime']}:00"
-                    end_time_str = f"{exam_date_str}T{exam_item['endTime']}:00"
-                    start_datetime = datetime.fromisoformat(start_time_str)
-                    end_datetime = datetime.fromisoformat(end_time_str)
-                    
-                    # 查找是否已存在相同的考试条目
-                    existing_exam = Entry.query.filter(
-                        Entry.title == exam_item['courseName'],
-                        Entry.entry_type == 'exam',
-                        Entry.start_time == start_datetime,
-                        Entry.end_time == end_datetime
-                    ).first()
-                    
-                    if existing_exam:
-                        # 如果存在，更新现有考试条目
-                        existing_exam.description = f"考试地点: {exam_item['examPlace']}\n考试时间: {exam_item['examTimeDescription']}"
-                        existing_exam.color = '#ff4444'
-                        exam_update_count += 1
-                    else:
-                        # 如果不存在，添加新考试条目
-                        new_entry = Entry(
-                            title=exam_item['courseName'],
-                            description=f"考试地点: {exam_item['examPlace']}\n考试时间: {exam_item['examTimeDescription']}",
-                            entry_type='exam',
-                            start_time=start_datetime,
-                            end_time=end_datetime,
-                            color='#ff4444'
-                        )
-                        db.session.add(new_entry)
-                        exam_add_count += 1
-                except ValueError as e:
-                    print(f"[DB SYNC] 解析考试日期时间失败: {str(e)}")
-                    continue
-                except Exception as e:
-                    print(f"[DB SYNC] 保存考试数据失败: {str(e)}")
-                    continue
-            
-            # 日志：考试数据保存结果
-            print(f"[DB SYNC] 考试数据保存完成：新增 {exam_add_count} 条，更新 {exam_update_count} 条考试条目")
-        
-        # 提交事务
+        # 提交事务（同步状态与课程数据一起提交）
         db.session.commit()
         
         # 返回结果
         return jsonify({
             "status": "success",
             "message": "课程表和考试信息同步成功", 
-            "course_count": len(unique_courses),
-            "exam_count": len(exam_data)
+            "course_count": course_result['course_count'],
+            "exam_count": exam_count,
+            "days": course_result['days'],
+            "exams": exam_report
         }), 200
     
     except ValueError as e:
@@ -523,14 +459,65 @@ def sync_buaa_courses_by_date(date=None):
     except requests.RequestException as e:
         # 发生错误时回滚事务
         db.session.rollback()
-        print(f"网络错误: {str(e)}")
+        logger.warning("网络错误: %s", e)
         return jsonify({"status": "error", "message": f"网络错误: {str(e)}"}), 503
     except Exception as e:
         # 发生错误时回滚事务
         db.session.rollback()
-        print(f"同步课程表失败: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("同步课程表失败: %s", e)
+        return jsonify({"status": "error", "message": "服务器内部错误"}), 500
+
+
+@courses_bp.route('/sync_buaa_term', methods=['POST'])
+def sync_buaa_term():
+    """
+    一次性同步整个学期的北航课程表
+    
+    通过学期课表接口获取全学期排课和真实周次，与已保存的课程对比后增量更新；
+    只有学期课表中标记了调课/停课的日期才回退到按天查询
+    """
+    try:
+        data = request.get_json() if request.is_json else {}
+        
+        user_key, error_response = _prepare_buaa_session(data)
+        if error_response:
+            return error_response
+        
+        # 根据指定日期（默认今天）确定学期，获取学期课表和有调课/停课的日期的课表
+        reference_date = data.get('date') or datetime.now().strftime('%Y-%m-%d')
+        try:
+            timetable = fetch_term_timetable(user_key, reference_date)
+        except ValueError:
+            return jsonify({"status": "error", "message": "日期格式错误，应为YYYY-MM-DD"}), 400
+        
+        if timetable.get('need_login'):
+            return jsonify({"status": "error", "message": "需要登录"}), 401
+        if timetable.get('error'):
+            return jsonify({"status": "error", "message": f"{timetable['error']}，请使用按天同步"}), 502
+        
+        # 与已保存的课程对比（学期课表的解析未用真实响应核对前，默认不删除课程）
+        term_result = sync_term_courses(timetable, remove_stale=current_app.config.get('TERM_SYNC_REMOVE_STALE', False))
+        
+        # 考试信息同样按学期获取，只需一次请求
+        exam_count, exam_report = _sync_exam_data(user_key)
+        
+        db.session.commit()
+        
+        return jsonify({
+            "status": "success",
+            "message": "学期课表和考试信息同步成功",
+            **term_result,
+            "exam_count": exam_count,
+            "exams": exam_report
+        }), 200
+    
+    except requests.RequestException as e:
+        db.session.rollback()
+        logger.warning("网络错误: %s", e)
+        return jsonify({"status": "error", "message": f"网络错误: {str(e)}"}), 503
+    except Exception as e:
+        db.session.rollback()
+        logger.exception("同步学期课表失败: %s", e)
         return jsonify({"status": "error", "message": "服务器内部错误"}), 500
 
 
@@ -561,8 +548,12 @@ def save_courses():
                 parsed_courses = parse_course_data(actual_course_data, current_date)
                 
                 if parsed_courses:
-                    # 先删除所有课程数据
-                    Course.query.delete()
+                    # 先删除本学期（和升级前未记录学期）同步的课程数据，手动添加的课程和其它学期的课程保留
+                    semester_start = get_semester_start(date.today())
+                    Course.query.filter(
+                        Course.source == COURSE_SOURCE_SYNC,
+                        or_(Course.semester_start == semester_start, Course.semester_start.is_(None))
+                    ).delete(synchronize_session=False)
                     
                     # 遍历解析后的课程数据并保存
                     for course_item in parsed_courses:
@@ -585,7 +576,9 @@ def save_courses():
                             start_time=start_time,
                             end_time=end_time,
                             day_of_week=course_item['xqj'],
-                            week_range=course_item['zcd']
+                            week_range=course_item['zcd'],
+                            source=COURSE_SOURCE_SYNC,
+                            semester_start=semester_start
                         )
                         
                         # 保存到数据库
@@ -618,14 +611,13 @@ def save_courses():
 def destroy_session():
     """销毁会话"""
     data = request.get_json()
-    user_key = data.get('user_key')
-    
-    if not user_key:
+    if not data.get('user_key'):
         return jsonify({'message': '缺少必要参数'}), 400
     
     try:
-        # 销毁会话
-        success = global_session_manager.destroy_session(user_key)
+        # 销毁会话（只能销毁当前用户的会话）
+        user_key = _owned_user_key(data)
+        success = bool(user_key) and global_session_manager.destroy_session(user_key)
         if success:
             return jsonify({'message': '会话销毁成功'}), 200
         else:
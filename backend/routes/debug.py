@@ -0,0 +1,30 @@
+import time
+from flask import Blueprint, request, jsonify, Response
+from services.profiler import SamplingProfiler
+
+# 创建蓝图
+debug_bp = Blueprint('debug', __name__)
+
+# 单次采样的最长时间（秒）
+MAX_PROFILE_SECONDS = 60
+
+
+@debug_bp.route('/profile', methods=['GET'])
+def profile_all_threads():
+    """
+    对所有线程采样N秒，返回折叠栈或speedscope JSON
+    参数: seconds（默认5，最大60）、format（collapsed/speedscope）
+    """
+    try:
+        seconds = float(request.args.get('seconds', 5))
+    except ValueError:
+        return jsonify({'error': 'seconds必须是数字'}), 400
+    if seconds <= 0 or seconds > MAX_PROFILE_SECONDS:
+        return jsonify({'error': f'seconds必须在0到{MAX_PROFILE_SECONDS}之间'}), 400
+    
+    output_format = request.args.get('format', 'collapsed')
+    with SamplingProfiler() as profiler:
+        time.sleep(seconds)
+    
+    content, mimetype = profiler.render(output_format, f"{time.strftime('%Y%m%d-%H%M%S')}_all_threads")
+    return Response(content, mimetype=mimetype)
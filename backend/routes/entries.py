@@ -3,6 +3,8 @@ from models.entry import Entry
 from models.course import Course
 from datetime import datetime, timedelta, timezone
 from extensions import db
+from services.course_recurrence import course_recurrence_engine
+from services.archive import archive_service
 
 entries_bp = Blueprint('entries', __name__)
 
@@ -10,8 +12,8 @@ entries_bp = Blueprint('entries', __name__)
 def get_entries():
     """获取所有条目（包括课程、会议等）"""
     try:
-        # 获取所有条目
-        entries = Entry.query.all()
+        # 获取所有条目（包括归档）
+        entries = archive_service.query_entries()
         return jsonify({'entries': [entry.to_dict() for entry in entries]}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -60,7 +62,10 @@ def add_entry():
 def update_entry(entry_id):
     """更新条目"""
     try:
-        entry = Entry.query.get_or_404(entry_id)
+        # 原表中没有时查找归档的条目
+        entry = archive_service.find_entry(entry_id)
+        if entry is None:
+            return jsonify({'error': '条目不存在'}), 404
         data = request.get_json()
         
         # 处理datetime-local格式的字符串，添加秒和时区信息
@@ -89,6 +94,8 @@ def update_entry(entry_id):
         if 'color' in data:
             entry.color = data['color']
         
+        # 归档的条目被移到水位之后时移回原表，否则范围查询读不到它
+        entry = archive_service.restore_if_needed(entry)
         db.session.commit()
         
         return jsonify({'entry': entry.to_dict()}), 200
@@ -100,7 +107,9 @@ def update_entry(entry_id):
 def delete_entry(entry_id):
     """删除条目"""
     try:
-        entry = Entry.query.get_or_404(entry_id)
+        entry = archive_service.find_entry(entry_id)
+        if entry is None:
+            return jsonify({'error': '条目不存在'}), 404
         db.session.delete(entry)
         db.session.commit()
         return jsonify({'message': '条目已删除'}), 200
@@ -114,12 +123,14 @@ def get_course_entries():
     try:
         # 获取未来14天的课程
         today = datetime.utcnow().date()
+        end_date = today + timedelta(days=14)
         entries = Entry.query.filter(
             Entry.entry_type == 'course',
             Entry.start_time >= datetime.combine(today, datetime.min.time()),
-            Entry.start_time <= datetime.combine(today + timedelta(days=14), datetime.max.time())
+            Entry.start_time <= datetime.combine(end_date, datetime.max.time())
         ).all()
-        return jsonify({'entries': [entry.to_dict() for entry in entries]}), 200
+        # 合并按周次展开的课程实例
+        return jsonify({'entries': course_recurrence_engine.merge_entries(entries, today, end_date)}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -147,16 +158,14 @@ def get_entries_by_date_range(date):
         start_datetime = datetime.combine(start_date, datetime.min.time())
         end_datetime = datetime.combine(end_date, datetime.max.time())
         
-        # 查询指定日期范围内的所有条目
-        entries = Entry.query.filter(
-            Entry.start_time >= start_datetime,
-            Entry.start_time <= end_datetime
-        ).all()
+        # 查询指定日期范围内的所有条目（范围早于归档水位时包括归档）
+        entries = archive_service.query_entries(start_datetime, end_datetime)
         
         result = {
             'start_date': start_date.isoformat(),
             'end_date': end_date.isoformat(),
-            'entries': [entry.to_dict() for entry in entries]
+            # 合并按周次展开的课程实例
+            'entries': course_recurrence_engine.merge_entries(entries, start_date, end_date)
         }
         return jsonify(result), 200
     except Exception as e:
@@ -193,16 +202,14 @@ def get_entries_by_custom_date_range():
         start_datetime = datetime.combine(start_date, datetime.min.time())
         end_datetime = datetime.combine(end_date, datetime.max.time())
         
-        # 查询指定日期范围内的所有条目
-        entries = Entry.query.filter(
-            Entry.start_time >= start_datetime,
-            Entry.start_time <= end_datetime
-        ).all()
+        # 查询指定日期范围内的所有条目（范围早于归档水位时包括归档）
+        entries = archive_service.query_entries(start_datetime, end_datetime)
         
         result = {
             'start_date': start_date.isoformat(),
             'end_date': end_date.isoformat(),
-            'entries': [entry.to_dict() for entry in entries]
+            # 合并按周次展开的课程实例
+            'entries': course_recurrence_engine.merge_entries(entries, start_date, end_date)
         }
         return jsonify(result), 200
     except Exception as e:
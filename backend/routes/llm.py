@@ -1,10 +1,15 @@
-from flask import Blueprint, request, jsonify
+import logging
+from datetime import datetime
+from flask import Blueprint, current_app, request, jsonify
 from services.llm_parser import LLMParser
+from services.quick_parser import DEFAULT_MIN_CONFIDENCE, quick_parser
 import easyocr
 from PIL import Image
 import io
 import os
 
+logger = logging.getLogger(__name__)
+
 # 创建蓝图
 llm_bp = Blueprint('llm', __name__)
 
@@ -19,7 +24,7 @@ def get_easyocr_reader():
     global reader
     if reader is None:
         import sys
-        print("正在初始化OCR模型...")
+        logger.info("正在初始化OCR模型...")
         # 检查是否运行在PyInstaller打包的exe环境中
         if hasattr(sys, '_MEIPASS'):
             # 打包为exe时，使用本地model目录下的模型
@@ -28,10 +33,34 @@ def get_easyocr_reader():
         else:
             # 开发环境下，使用默认的用户目录下的模型
             reader = easyocr.Reader(['ch_sim', 'en'], gpu=False)
-        print("OCR模型初始化完成")
+        logger.info("OCR模型初始化完成")
     return reader
 
 
+def quick_parse(text, start_date=None):
+    """
+    先用规则解析简单输入，置信度足够时不调用大模型
+    :param text: 用户输入
+    :param start_date: 前端传入的当前日期（YYYY-MM-DD），作为相对日期的基准
+    :return: 与大模型格式相同的JSON字符串，置信度不足或未开启时返回None
+    """
+    if not current_app.config.get('QUICK_PARSER_ENABLED', True):
+        return None
+    now = datetime.now()
+    if start_date:
+        try:
+            now = datetime.combine(datetime.strptime(start_date, '%Y-%m-%d').date(), now.time())
+        except ValueError:
+            pass
+    
+    min_confidence = current_app.config.get('QUICK_PARSER_MIN_CONFIDENCE', DEFAULT_MIN_CONFIDENCE)
+    result = quick_parser.parse_confident(text, now, min_confidence)
+    if result is None:
+        return None
+    logger.debug("规则解析成功(%.2f): %s", result.confidence, result.to_json())
+    return result.to_json()
+
+
 @llm_bp.route('/parse/text', methods=['POST'])
 def parse_text():
     """解析文本内容"""
@@ -43,7 +72,10 @@ def parse_text():
     if not text:
         return jsonify({'message': '缺少文本内容'}), 400
     
-    result = llm_parser.parse_text(text, user_preferences, start_date)
+    result = quick_parse(text, start_date)
+    parser = 'rule' if result else 'llm'
+    if not result:
+        result = llm_parser.parse_text(text, user_preferences, start_date)
     
     if result:
         # 直接处理LLM返回的结果，创建条目和任务
@@ -53,8 +85,7 @@ def parse_text():
         try:
             # 解析LLM返回的JSON
             llm_data = json.loads(result)
-            # 仅保留LLM返回的JSON文本输出
-            print(json.dumps(llm_data, ensure_ascii=False, indent=2))
+            logger.debug("LLM返回数据: %s", json.dumps(llm_data, ensure_ascii=False))
             
             # 创建任务
             if llm_data.get('tasks'):
@@ -126,11 +157,10 @@ def parse_text():
                     db.session.add(new_entry)
                     db.session.commit()
             
-            return jsonify({'result': result, 'message': '解析成功，已创建条目和任务'}), 200
+            return jsonify({'result': result, 'parser': parser, 'message': '解析成功，已创建条目和任务'}), 200
         except Exception as e:
-            import traceback
-            traceback.print_exc()
-            return jsonify({'result': result, 'message': '解析成功，但创建条目和任务失败'}), 500
+            logger.exception("根据解析结果创建条目和任务失败: %s", e)
+            return jsonify({'result': result, 'parser': parser, 'message': '解析成功，但创建条目和任务失败'}), 500
     else:
         return jsonify({'message': '解析失败'}), 500
 
@@ -146,9 +176,13 @@ def parse_voice():
     if not voice_text:
         return jsonify({'message': '缺少语音转文字内容'}), 400
     
+    result = quick_parse(voice_text, start_date)
+    if result:
+        return jsonify({'result': result, 'parser': 'rule'}), 200
+    
     result = llm_parser.parse_voice(voice_text, user_preferences, start_date)
     if result:
-        return jsonify({'result': result}), 200
+        return jsonify({'result': result, 'parser': 'llm'}), 200
     else:
         return jsonify({'message': '解析失败'}), 500
 
@@ -157,23 +191,23 @@ def parse_voice():
 def parse_image():
     """解析图片OCR识别内容"""
     # 添加详细日志
-    print(f"接收到图片识别请求，请求方法: {request.method}")
-    print(f"请求文件: {request.files}")
-    print(f"请求表单: {request.form}")
-    print(f"请求头: {request.headers}")
+    logger.debug("接收到图片识别请求，请求方法: %s", request.method)
+    logger.debug("请求文件: %s", request.files)
+    logger.debug("请求表单: %s", request.form)
+    logger.debug("请求类型: %s, 长度: %s", request.content_type, request.content_length)
     
     # 检查是否是文件上传
     if 'image' in request.files:
         # 处理文件上传情况
         image = request.files['image']
-        print(f"获取到图片文件: {image.filename}")
+        logger.debug("获取到图片文件: %s", image.filename)
         try:
             # 读取图片文件
             img = Image.open(image)
-            print(f"成功打开图片，格式: {img.format}, 尺寸: {img.size}")
+            logger.debug("成功打开图片，格式: %s, 尺寸: %s", img.format, img.size)
             
             # 图像预处理：针对不同字体大小进行优化
-            print("开始图像预处理...")
+            logger.debug("开始图像预处理...")
             
             # 转换为RGB模式（如果不是的话）
             if img.mode != 'RGB':
@@ -208,10 +242,10 @@ def parse_image():
                 # 仅当缩放能显著减少计算量且不会过度影响小字体时才进行缩放
                 if max(width, height) - max(new_width, new_height) > 500:
                     processed_img = processed_img.resize((new_width, new_height), Image.Resampling.LANCZOS)  # 使用高质量插值
-                    print(f"超大图像，已缩放到: {new_width}x{new_height}")
+                    logger.debug("超大图像，已缩放到: %sx%s", new_width, new_height)
             
             # 使用easyocr进行OCR识别
-            print("开始OCR识别...")
+            logger.debug("开始OCR识别...")
             try:
                 # 保存图片到临时文件，因为easyocr需要文件路径
                 import tempfile
@@ -229,35 +263,31 @@ def parse_image():
                     low_text=0.3,  # 较低的低文本阈值，确保小字体被检测
                     link_threshold=0.7  # 适中的链接阈值，优化文本行合并
                 )
-                print(f"OCR识别结果: {results}")
+                logger.debug("OCR识别结果: %s", results)
                 
                 # 合并识别结果
                 ocr_text = ' '.join(results)
-                print(f"合并后的OCR识别结果: {ocr_text}")
+                logger.debug("合并后的OCR识别结果: %s", ocr_text)
                 
                 # 删除临时文件
                 os.unlink(temp_file_path)
             except Exception as e:
-                print(f"OCR识别失败: {str(e)}")
-                import traceback
-                traceback.print_exc()
+                logger.exception("OCR识别失败: %s", e)
                 ocr_text = f"OCR识别失败: {str(e)}"
-            print(f"最终OCR识别结果: {ocr_text}")
+            logger.debug("最终OCR识别结果: %s", ocr_text)
             
             if not ocr_text.strip():
                 ocr_text = "OCR识别结果为空"
             
             # 返回OCR识别的原始文本
             response_data = {'text': ocr_text}
-            print(f"返回响应: {response_data}")
+            logger.debug("返回响应: %s", response_data)
             return jsonify(response_data), 200
         except Exception as e:
-            print(f"OCR识别失败: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("OCR识别失败: %s", e)
             return jsonify({'message': f'图片识别失败: {str(e)}'}), 500
     else:
-        print("请求中没有图片文件")
+        logger.warning("请求中没有图片文件")
         # 处理JSON数据情况
         data = request.get_json()
         image_text = data.get('image_text')
@@ -283,9 +313,13 @@ def parse_clipboard():
     if not clipboard_text:
         return jsonify({'message': '缺少剪切板内容'}), 400
     
+    result = quick_parse(clipboard_text, start_date)
+    if result:
+        return jsonify({'result': result, 'parser': 'rule'}), 200
+    
     result = llm_parser.parse_clipboard(clipboard_text, user_preferences, start_date)
     if result:
-        return jsonify({'result': result}), 200
+        return jsonify({'result': result, 'parser': 'llm'}), 200
     else:
         return jsonify({'message': '解析失败'}), 500
 
@@ -310,8 +344,7 @@ def generate_entries_from_task():
         try:
             # 解析LLM返回的JSON
             llm_data = json.loads(result)
-            # 仅保留LLM返回的JSON文本输出
-            print(json.dumps(llm_data, ensure_ascii=False, indent=2))
+            logger.debug("LLM返回数据: %s", json.dumps(llm_data, ensure_ascii=False))
             
             created_entries = []
             
@@ -366,8 +399,7 @@ def generate_entries_from_task():
                 'created_entries': created_entries
             }), 200
         except Exception as e:
-            import traceback
-            traceback.print_exc()
+            logger.exception("根据LLM结果创建条目失败: %s", e)
             return jsonify({
                 'result': result,
                 'message': f'生成成功，但创建条目失败: {str(e)}'
@@ -0,0 +1,11 @@
+from flask import Blueprint, Response
+from services.metrics import metrics_recorder
+
+# 创建蓝图
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route('', methods=['GET'])
+def prometheus_metrics():
+    """以Prometheus文本格式返回请求延迟、数据库查询和外部服务耗时等指标"""
+    return Response(metrics_recorder.render_prometheus(), mimetype='text/plain; version=0.0.4; charset=utf-8')
@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from services.schedule_manager import ScheduleManager
+from services.focus_stats import focus_stats_service, GROUP_BY_OPTIONS
+from services.user_scope import current_user_id
 from models import FocusRecord, Entry
 from extensions import db
 
@@ -18,7 +20,7 @@ def check_conflict():
     :return: 冲突的事件列表
     """
     data = request.get_json()
-    user_id = data.get('user_id')
+    user_id = current_user_id() or data.get('user_id')  # 以登录用户为准
     new_event = data.get('event')
     
     if not user_id or not new_event:
@@ -38,7 +40,7 @@ def auto_schedule():
     :return: 推荐的开始时间和结束时间
     """
     data = request.get_json()
-    user_id = data.get('user_id')
+    user_id = current_user_id() or data.get('user_id')  # 以登录用户为准
     task_id = data.get('task_id')
     
     if not user_id or not task_id:
@@ -61,7 +63,7 @@ def find_available_slots():
     :return: 可用的时间段列表
     """
     data = request.get_json()
-    user_id = data.get('user_id')
+    user_id = current_user_id() or data.get('user_id')  # 以登录用户为准
     deadline = data.get('deadline')
     estimated_time = data.get('estimated_time')
     
@@ -92,40 +94,17 @@ def save_focus_record():
             end_time=datetime.fromisoformat(data.get('end_time'))
         )
         
-        # 保存到数据库
+        # 保存到数据库，并在同一事务中累加到专注统计汇总
         db.session.add(focus_record)
+        focus_stats_service.record(focus_record)
         db.session.commit()
         
-        # 自动清理30天前的专注记录
-        clean_old_focus_records()
-        
         return jsonify({'message': '专注记录保存成功', 'record': focus_record.to_dict()}), 201
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': f'保存专注记录失败: {str(e)}'}), 500
 
 
-def clean_old_focus_records():
-    """
-    清理30天前的专注记录
-    """
-    try:
-        # 计算30天前的日期
-        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        
-        # 删除30天前的专注记录
-        deleted_count = FocusRecord.query.filter(
-            FocusRecord.end_time < thirty_days_ago
-        ).delete()
-        
-        db.session.commit()
-        
-        print(f'已清理{deleted_count}条30天前的专注记录')
-    except Exception as e:
-        db.session.rollback()
-        print(f'清理专注记录失败: {str(e)}')
-
-
 @schedule_bp.route('/schedule_break', methods=['POST'])
 def schedule_break():
     """
@@ -171,3 +150,28 @@ def get_focus_history():
         return jsonify({'focus_history': history_data}), 200
     except Exception as e:
         return jsonify({'message': f'获取专注历史失败: {str(e)}'}), 500
+
+
+@schedule_bp.route('/focus_stats', methods=['GET'])
+def get_focus_stats():
+    """
+    获取专注统计（读取每日汇总，不受原始记录清理影响）
+    查询参数: from、to（YYYY-MM-DD，默认最近30天），group_by（day/week/task，默认day）
+    :return: 分组后的专注总时长和次数
+    """
+    group_by = request.args.get('group_by', 'day')
+    if group_by not in GROUP_BY_OPTIONS:
+        return jsonify({'message': f"group_by 只能是 {'/'.join(GROUP_BY_OPTIONS)}"}), 400
+    
+    try:
+        end = date.fromisoformat(request.args['to']) if request.args.get('to') else date.today()
+        start = date.fromisoformat(request.args['from']) if request.args.get('from') else end - timedelta(days=29)
+    except ValueError:
+        return jsonify({'message': '日期格式错误，应为YYYY-MM-DD'}), 400
+    if start > end:
+        return jsonify({'message': '开始日期不能晚于结束日期'}), 400
+    
+    try:
+        return jsonify(focus_stats_service.stats(start, end, group_by)), 200
+    except Exception as e:
+        return jsonify({'message': f'获取专注统计失败: {str(e)}'}), 500
@@ -0,0 +1,204 @@
+import logging
+from datetime import datetime, timedelta
+from flask import Blueprint, current_app, request, jsonify
+from extensions import db
+from services.buaa_api import buaa_api_client, spoc_api_client, sso_login_handler, AuthenticationError
+from services.session_manager import global_session_manager
+from services.course_sync import sync_day_courses, sync_exam_data, fetch_term_timetable, sync_term_courses
+from services.homework_sync import sync_homework_pages, schedule_homework_tasks
+from services.sync_orchestrator import SyncOrchestrator, stage_summary
+from services.user_scope import current_user_id
+
+logger = logging.getLogger(__name__)
+
+# 创建蓝图
+sync_bp = Blueprint('sync', __name__)
+
+# 学期课表无法识别时回退到按天获取的天数
+COURSE_FALLBACK_DAYS = 7
+
+
+def _login_stage(user_id, buaa_id, password, frontend_cookies):
+    """
+    创建当前用户的北航会话并登录；会话按用户区分，其他用户已登录的同一学号的会话不会被复用
+    requests.Session修改Cookie不是线程安全的，之后并发执行的阶段各自使用独立的会话：
+    课表阶段使用登录的会话，考试阶段使用其副本，SPOC阶段使用登录后的Cookie快照共享SSO登录状态
+    :return: 阶段函数，结果包含user_key、exam_key和sso_cookies
+    """
+    def run(_):
+        user_key = global_session_manager.create_session(str(user_id), buaa_id)
+        session = global_session_manager.get_session(user_key)
+        if frontend_cookies:
+            session.cookies.update(frontend_cookies)
+        
+        if password:
+            cookies = sso_login_handler.perform_sso_login(session, buaa_id, password)
+            session.cookies.update(cookies)
+        
+        login_status, _ = buaa_api_client.check_login_status(user_key)
+        if not login_status:
+            raise AuthenticationError('需要登录')
+        return {
+            'user_key': user_key,
+            'exam_key': global_session_manager.clone_session(user_key, 'exams'),
+            'sso_cookies': session.cookies.copy()
+        }
+    return run
+
+
+def _courses_stage(start_date):
+    """
+    获取学期课表（及有调课/停课的日期的课表）；学期课表为空或无法识别时回退到依次获取从起始日期开始7天的课程
+    同一会话上的请求依次发送
+    """
+    def run(inputs):
+        user_key = inputs['login']['user_key']
+        timetable = fetch_term_timetable(user_key, start_date.strftime('%Y-%m-%d'))
+        if timetable.get('need_login'):
+            raise AuthenticationError('需要登录')
+        if not timetable.get('error'):
+            return {'timetable': timetable}
+        
+        logger.warning("%s，回退到按天获取课程", timetable['error'])
+        day_data = {}
+        for date_str in [(start_date + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(COURSE_FALLBACK_DAYS)]:
+            result = buaa_api_client.fetch_course_schedule(user_key, date_str)
+            if result.get('need_login'):
+                raise AuthenticationError('需要登录')
+            if result.get('error'):
+                logger.warning("获取日期 %s 的课程数据失败: %s", date_str, result['error'])
+                continue
+            day_data[date_str] = result.get('data', {}).get('data', [])
+        return {'day_data': day_data}
+    return run
+
+
+def _exams_stage(reference_date):
+    """获取本学期考试信息"""
+    def run(inputs):
+        date_str = reference_date.strftime('%Y-%m-%d')
+        exam_result = buaa_api_client.fetch_exam_schedule(inputs['login']['exam_key'], date_str)
+        if exam_result.get('need_login'):
+            raise AuthenticationError('需要登录')
+        if 'data' not in exam_result:
+            raise ValueError(exam_result.get('error') or '获取考试信息失败')
+        return {
+            'term_code': buaa_api_client._calculate_term_code(date_str),
+            'exams': exam_result['data']['exams']
+        }
+    return run
+
+
+def _spoc_homeworks_stage(username, password):
+    """获取SPOC全部未完成作业，需要重新登录时共享北航会话的SSO登录状态"""
+    def run(inputs):
+        if not password:
+            raise AuthenticationError('同步SPOC作业需要提供密码')
+        return list(spoc_api_client.iter_all_homeworks(username, password, sso_cookies=inputs['login']['sso_cookies']))
+    return run
+
+
+def _in_transaction(func):
+    """保存阶段成功后单独提交，失败时回滚，不影响其他分支已保存的数据"""
+    def run(inputs):
+        try:
+            result = func(inputs)
+            db.session.commit()
+            return result
+        except Exception:
+            db.session.rollback()
+            raise
+    return run
+
+
+@_in_transaction
+def _reconcile_courses(inputs):
+    courses = inputs['courses']
+    if 'timetable' in courses:
+        return sync_term_courses(courses['timetable'],
+                                 remove_stale=current_app.config.get('TERM_SYNC_REMOVE_STALE', False))
+    return sync_day_courses(courses['day_data'])
+
+
+@_in_transaction
+def _reconcile_exams(inputs):
+    exam_data = inputs['exams']
+    return sync_exam_data(exam_data['term_code'], exam_data['exams'])
+
+
+@_in_transaction
+def _reconcile_homeworks(inputs):
+    sync_session = sync_homework_pages(inputs['spoc_homeworks'])
+    return {
+        'result': sync_session.result,
+        'pages': sync_session.page_timings,
+        'created_tasks': sync_session.created_tasks
+    }
+
+
+def _schedule_homeworks(inputs):
+    created_entries = schedule_homework_tasks(inputs['reconcile_homeworks']['created_tasks'])
+    return {'scheduled_count': len(created_entries)}
+
+
+@sync_bp.route('/all', methods=['POST'])
+def sync_all():
+    """
+    一次性同步课程表、考试和SPOC作业
+    
+    登录 → {学期课表, 考试, SPOC作业}并发获取（各自使用独立的会话）→ 分别对比保存 → （可选）LLM安排作业时间；
+    某个分支失败时其他分支照常完成，返回部分结果和每个阶段的耗时
+    """
+    data = request.get_json(silent=True) or {}
+    buaa_id = data.get('buaa_id')
+    password = data.get('password')
+    
+    if not buaa_id:
+        return jsonify({"status": "error", "message": "缺少必要参数"}), 400
+    
+    start_date = datetime.now()
+    if data.get('date'):
+        try:
+            start_date = datetime.strptime(data['date'], '%Y-%m-%d')
+        except ValueError:
+            return jsonify({"status": "error", "message": "日期格式错误，应为YYYY-MM-DD"}), 400
+    
+    orchestrator = SyncOrchestrator()
+    orchestrator.add_stage('login', _login_stage(current_user_id(), buaa_id, password, request.cookies.to_dict()),
+                           in_request_thread=True)
+    orchestrator.add_stage('courses', _courses_stage(start_date), depends=['login'])
+    orchestrator.add_stage('exams', _exams_stage(start_date), depends=['login'])
+    if data.get('include_spoc', True):
+        orchestrator.add_stage('spoc_homeworks', _spoc_homeworks_stage(buaa_id, password), depends=['login'])
+        orchestrator.add_stage('reconcile_homeworks', _reconcile_homeworks, depends=['spoc_homeworks'], in_request_thread=True)
+        if data.get('schedule'):
+            orchestrator.add_stage('schedule', _schedule_homeworks, depends=['reconcile_homeworks'], in_request_thread=True)
+    orchestrator.add_stage('reconcile_courses', _reconcile_courses, depends=['courses'], in_request_thread=True)
+    orchestrator.add_stage('reconcile_exams', _reconcile_exams, depends=['exams'], in_request_thread=True)
+    
+    results, stages = orchestrator.run()
+    summary = stage_summary(stages)
+    if results.get('login', {}).get('exam_key'):
+        global_session_manager.destroy_session(results['login']['exam_key'])
+    
+    if 'login' in summary['failed']:
+        return jsonify({
+            "status": "error",
+            "message": f"北航登录失败: {stages['login']['error']}",
+            "stages": stages
+        }), 401
+    
+    homework_result = results.get('reconcile_homeworks', {})
+    return jsonify({
+        "status": "partial" if summary['failed'] or summary['skipped'] else "success",
+        "message": "同步完成" if not summary['failed'] else f"部分同步失败: {', '.join(summary['failed'])}",
+        "courses": results.get('reconcile_courses'),
+        "exams": results.get('reconcile_exams'),
+        "homeworks": {
+            'result': homework_result['result'],
+            'pages': homework_result['pages']
+        } if homework_result else None,
+        "schedule": results.get('schedule'),
+        "stages": stages,
+        "summary": summary
+    }), 200
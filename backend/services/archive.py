@@ -0,0 +1,197 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func, insert, select, text
+
+from extensions import db
+from models.archive import ArchivedEntry, ArchivedTask, ArchiveState
+from models.entry import Entry
+from models.task import Task
+
+logger = logging.getLogger(__name__)
+
+# 默认把结束时间早于多少周的条目移入归档
+DEFAULT_ARCHIVE_AFTER_WEEKS = 12
+# 每批移动的行数
+BATCH_SIZE = 5000
+
+_ENTRY_COLUMNS = ('id', 'user_id', 'title', 'description', 'entry_type', 'start_time', 'end_time', 'color', 'created_at', 'updated_at')
+_TASK_COLUMNS = ('id', 'user_id', 'title', 'description', 'task_type', 'deadline', 'priority', 'urgency', 'completed',
+                 'external_id', 'entry_id', 'created_at', 'updated_at')
+
+
+class ArchiveService:
+    """
+    历史数据归档：把早已结束的日程条目和已过期的已完成任务移入独立的归档数据库（archive绑定），
+    保持entries表较小；查询范围早于归档水位时才同时读取归档
+    移动时先写入并提交归档，再删除原表中的行，中途失败最多产生重复行（查询时按id去重）
+    """
+    
+    def __init__(self):
+        self._watermark: Optional[datetime] = None
+        self._watermark_loaded = False
+        self._lock = threading.Lock()
+    
+    def watermark(self) -> Optional[datetime]:
+        """
+        获取归档水位（进程内缓存）
+        :return: 归档条目都早于该时间，尚未归档过时返回None
+        """
+        if not self._watermark_loaded:
+            state = db.session.get(ArchiveState, 'entries')
+            self._watermark = state.watermark if state else None
+            self._watermark_loaded = True
+        return self._watermark
+    
+    def reaches_archive(self, start: Optional[datetime]) -> bool:
+        """
+        查询范围是否可能包含归档的条目
+        :param start: 查询范围的开始时间，None表示不限
+        """
+        watermark = self.watermark()
+        return watermark is not None and (start is None or start < watermark)
+    
+    def query_entries(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[Any]:
+        """
+        按开始时间范围查询条目，范围早于归档水位时合并归档中的条目
+        :param start: 开始时间（含），None表示不限
+        :param end: 结束时间（含），None表示不限
+        :return: Entry 和 ArchivedEntry 对象列表（两者的属性和to_dict一致）
+        """
+        entries = self._filter_range(Entry.query, Entry, start, end).all()
+        if not self.reaches_archive(start):
+            return entries
+        
+        hot_ids = {entry.id for entry in entries}
+        archived = self._filter_range(ArchivedEntry.query, ArchivedEntry, start, end).all()
+        return entries + [entry for entry in archived if entry.id not in hot_ids]
+    
+    @staticmethod
+    def _filter_range(query, model, start, end):
+        if start is not None:
+            query = query.filter(model.start_time >= start)
+        if end is not None:
+            query = query.filter(model.start_time <= end)
+        return query
+    
+    def find_entry(self, entry_id: int) -> Optional[Any]:
+        """
+        按id查找条目，原表中没有时查找归档
+        :return: Entry 或 ArchivedEntry，不存在时返回None
+        """
+        entry = db.session.get(Entry, entry_id)
+        if entry is None and self.watermark() is not None:
+            entry = db.session.get(ArchivedEntry, entry_id)
+        return entry
+    
+    def restore_if_needed(self, entry: Any) -> Any:
+        """
+        归档的条目被修改为晚于水位的时间时，把它移回原表（保留id，由调用方提交事务）
+        :param entry: Entry 或 ArchivedEntry
+        :return: 条目当前所在的对象
+        """
+        if not isinstance(entry, ArchivedEntry) or entry.end_time < self.watermark():
+            return entry
+        restored = Entry(**{column: getattr(entry, column) for column in _ENTRY_COLUMNS})
+        db.session.delete(entry)
+        db.session.add(restored)
+        return restored
+    
+    def ensure_id_floor(self) -> None:
+        """
+        保证新条目的id大于所有归档条目的id：entries表使用AUTOINCREMENT，
+        这里把它的序列值提高到不小于归档中的最大id（升级前已经复用过的id和重建表后的序列值也随之修正）
+        """
+        archived_max = db.session.query(func.max(ArchivedEntry.id)).scalar()
+        if archived_max is None or db.engines[None].dialect.name != 'sqlite':
+            return
+        current = db.session.execute(text("SELECT seq FROM sqlite_sequence WHERE name = 'entries'")).scalar()
+        if current is None:
+            db.session.execute(text("INSERT INTO sqlite_sequence (name, seq) VALUES ('entries', :seq)"), {'seq': archived_max})
+        elif current < archived_max:
+            db.session.execute(text("UPDATE sqlite_sequence SET seq = :seq WHERE name = 'entries'"), {'seq': archived_max})
+        db.session.commit()
+    
+    def archive_entries(self, cutoff: datetime) -> int:
+        """
+        把结束时间早于cutoff的条目移入归档（被任务引用的条目保留在原表）
+        :param cutoff: 截止时间
+        :return: 移动的条目数
+        """
+        self.ensure_id_floor()
+        referenced = select(Task.entry_id).where(Task.entry_id.isnot(None))
+        candidates = Entry.query.filter(
+            Entry.end_time < cutoff,
+            Entry.id.notin_(referenced)
+        ).order_by(Entry.id)
+        
+        moved = 0
+        while True:
+            batch = candidates.limit(BATCH_SIZE).all()
+            if not batch:
+                break
+            now = datetime.utcnow()
+            rows = [dict({column: getattr(entry, column) for column in _ENTRY_COLUMNS}, archived_at=now) for entry in batch]
+            ids = [entry.id for entry in batch]
+            db.session.execute(insert(ArchivedEntry).prefix_with('OR REPLACE'), rows)
+            self._set_watermark(cutoff)
+            db.session.commit()
+            Entry.query.filter(Entry.id.in_(ids)).delete(synchronize_session=False)
+            db.session.commit()
+            moved += len(ids)
+        
+        # 没有可移动的条目时也推进水位
+        if not moved:
+            self._set_watermark(cutoff)
+            db.session.commit()
+        return moved
+    
+    def archive_tasks(self, now: Optional[datetime] = None) -> int:
+        """
+        把截止时间已过的已完成任务移入归档（否则会被过期任务清理直接删除）
+        :param now: 当前时间
+        :return: 移动的任务数
+        """
+        now = now or datetime.now()
+        tasks = Task.query.filter(Task.completed.is_(True), Task.deadline < now).all()
+        if not tasks:
+            return 0
+        archived_at = datetime.utcnow()
+        rows = [dict({column: getattr(task, column) for column in _TASK_COLUMNS}, archived_at=archived_at) for task in tasks]
+        db.session.execute(insert(ArchivedTask).prefix_with('OR REPLACE'), rows)
+        db.session.commit()
+        Task.query.filter(Task.id.in_([task.id for task in tasks])).delete(synchronize_session=False)
+        db.session.commit()
+        return len(tasks)
+    
+    def run(self, after_weeks: int = DEFAULT_ARCHIVE_AFTER_WEEKS, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        执行一次归档
+        :param after_weeks: 结束时间早于多少周的条目移入归档
+        :param now: 当前时间
+        :return: {entries, tasks} 移动的行数
+        """
+        now = now or datetime.now()
+        cutoff = (now - timedelta(weeks=after_weeks)).replace(hour=0, minute=0, second=0, microsecond=0)
+        with self._lock:
+            result = {'entries': self.archive_entries(cutoff), 'tasks': self.archive_tasks(now)}
+        if result['entries'] or result['tasks']:
+            logger.info("已归档%d个日程条目和%d个已完成任务（水位 %s）", result['entries'], result['tasks'], cutoff)
+        return result
+    
+    def _set_watermark(self, cutoff: datetime) -> None:
+        state = db.session.get(ArchiveState, 'entries')
+        if state is None:
+            db.session.add(ArchiveState(name='entries', watermark=cutoff))
+        elif cutoff > state.watermark:
+            state.watermark = cutoff
+        else:
+            cutoff = state.watermark
+        self._watermark = cutoff
+        self._watermark_loaded = True
+
+
+# 创建全局归档服务实例
+archive_service = ArchiveService()
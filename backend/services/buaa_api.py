@@ -1,9 +1,19 @@
 import requests
 import time
 import re
+import hashlib
+import logging
+import threading
+from datetime import datetime as _datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from config import Config
-from typing import Dict, Optional, Any, Tuple
+from typing import Dict, Optional, Any, Tuple, Iterator
 from .session_manager import global_session_manager
+from .spoc_codec import SPOCPayloadCodec
+from .metrics import metrics_recorder
+
+
+logger = logging.getLogger(__name__)
 
 
 class BUAAAPIError(Exception):
@@ -35,7 +45,7 @@ class SSOLoginHandler:
         self.sso_login_url = 'https://sso.buaa.edu.cn/login'
         # 修改正则表达式，去掉对type属性的限制，只匹配name="execution"的input元素
         self.execution_pattern = r'<input\s+[^>]*?name=[\'"]execution[\'"]*?[^>]*?value=[\'"](.*?)[\'"]'
-        self.target_api = 'https://byxt.buaa.edu.cn/jwapp/sys/homeapp/api/home/teachingSchedule/detail.do?rq=2025-12-01&lxdm=student'
+        self.target_api = f'{Config.BUAA_API_BASE_URL}/homeapp/api/home/teachingSchedule/detail.do?rq=2025-12-01&lxdm=student'
     
     def extract_execution(self, login_page_html: str) -> str:
         """
@@ -306,16 +316,16 @@ class BUAAAPIClient:
             })
             
             # 打印考试API请求URL
-            print(f"请求考试信息API: {api_url}")
+            logger.debug("请求考试信息API: %s", api_url)
             
             result = self.direct_api_call(session, api_url)
             
             # 打印考试API响应结果
-            print(f"考试API响应结果: {result}")
+            logger.debug("考试API响应结果: %s", result)
             
             if result['status'] == 'success':
                 # 打印获取到的考试数据
-                print(f"获取到的考试数据: {result['data']}")
+                logger.debug("获取到的考试数据: %s", result['data'])
                 return {
                     'need_login': False,
                     'data': {
@@ -423,6 +433,69 @@ class BUAAAPIClient:
             'cookies': session.cookies.get_dict()
         }
     
+    def fetch_term_schedule(self, user_key: str, term_code: str) -> Dict[str, Any]:
+        """
+        获取整个学期的课表（一次请求返回全学期的排课及周次）
+        :param user_key: 用户唯一标识
+        :param term_code: 学期代码，格式为{A}-{A+1}-1或{A}-{A+1}-2
+        :return: 学期课表数据
+        """
+        session = global_session_manager.get_session(user_key)
+        if not session:
+            return {
+                'need_login': True,
+                'message': '会话已过期或不存在'
+            }
+        
+        api_url = f"{self.api_base_url}/homeapp/api/home/student/getMyScheduleDetail.do"
+        
+        try:
+            # 设置必要的头信息
+            session.headers.update({
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/142.0.0.0 Safari/537.36',
+                'Referer': 'https://byxt.buaa.edu.cn/jwapp/sys/homeapp/home/index.html',
+                'X-Requested-With': 'XMLHttpRequest'
+            })
+            
+            response = session.post(
+                api_url,
+                data={'termCode': term_code, 'campusCode': '', 'type': 'term'},
+                allow_redirects=False,
+                timeout=15
+            )
+            term_result = self._handle_api_response(response)
+            
+            if term_result['status'] == 'success':
+                return {
+                    'need_login': False,
+                    'data': term_result['data']
+                }
+            elif term_result['status'] == 'need_login':
+                return {
+                    'need_login': True,
+                    'login_url': term_result['login_url']
+                }
+        except requests.exceptions.RequestException as e:
+            return {
+                'need_login': False,
+                'error': f'网络错误: {str(e)}'
+            }
+        except NetworkError as e:
+            return {
+                'need_login': False,
+                'error': f'网络错误: {str(e)}'
+            }
+        except DataError as e:
+            return {
+                'need_login': False,
+                'error': f'数据错误: {str(e)}'
+            }
+        
+        return {
+            'need_login': False,
+            'error': '未知错误'
+        }
+    
     def test_cookie_validity(self, session: requests.Session) -> bool:
         """
         测试Cookie是否真的有效
@@ -521,30 +594,24 @@ class SPOCAPIClient:
     """
     
     def __init__(self):
-        # 导入必要的加密模块
-        from Crypto.Cipher import AES
-        from Crypto.Util.Padding import pad, unpad
-        import base64
-        import json
-        
         # AES加密配置
         self.AES_KEY = b'inco12345678ocni'  # 16 bytes
         self.AES_IV = b'ocni12345678inco'   # 16 bytes
-        self.AES_MODE = AES.MODE_CBC
+        # 复用的载荷编解码器，缓存密钥扩展结果
+        self.codec = SPOCPayloadCodec(self.AES_KEY, self.AES_IV)
         
         # SPOC相关URL
-        self.spoc_base_url = 'https://spoc.buaa.edu.cn'
+        self.spoc_base_url = Config.SPOC_BASE_URL
         self.spoc_init_url = f'{self.spoc_base_url}/spocnewht/jxkj/queryJxkjData'
         self.spoc_query_one_url = f'{self.spoc_base_url}/spocnewht/inco/ht/queryOne'
         self.spoc_query_list_url = f'{self.spoc_base_url}/spocnewht/inco/ht/queryListByPage'
         self.spoc_login_check_url = f'{self.spoc_base_url}/spocnew/common/zycskzy'
         
-        # 保存导入的模块，方便后续方法使用
-        self.AES = AES
-        self.pad = pad
-        self.unpad = unpad
-        self.base64 = base64
-        self.json = json
+        # SPOC登录会话缓存，key为学号，value为已登录的会话、token、initData_props和sqlid
+        self.session_cache: Dict[str, Dict[str, Any]] = {}
+        # 会话缓存超时时间，默认30分钟
+        self.session_timeout = timedelta(minutes=30)
+        self._session_cache_lock = threading.Lock()
     
     def aes_encrypt(self, data_dict: Dict[str, Any]) -> str:
         """
@@ -552,67 +619,33 @@ class SPOCAPIClient:
         :param data_dict: 要加密的数据字典
         :return: 加密后的Base64字符串
         """
-        # 将字典转换为JSON字符串
-        data_str = self.json.dumps(data_dict, separators=(',', ':'), ensure_ascii=False)
-        
-        # 创建AES加密器
-        cipher = self.AES.new(self.AES_KEY, self.AES_MODE, self.AES_IV)
-        
-        # 加密并填充
-        encrypted_data = cipher.encrypt(self.pad(data_str.encode('utf-8'), self.AES.block_size, style='pkcs7'))
-        
-        # 转换为Base64字符串
-        return self.base64.b64encode(encrypted_data).decode('utf-8')
+        return self.codec.encrypt(data_dict)
     
     def aes_decrypt(self, base64_str: str) -> Dict[str, Any]:
         """
         AES-CBC解密Base64字符串，返回数据字典
         :param base64_str: 加密后的Base64字符串
-        :return: 解密后的数据字典
+        :return: 解密后的数据字典，解密失败时返回空字典
         """
-        # 处理空字符串情况
-        if not base64_str:
-            print("[LOG] 尝试解密空字符串，返回空字典")
-            return {}
-        
-        try:
-            # 解码Base64字符串
-            encrypted_data = self.base64.b64decode(base64_str)
-            
-            # 处理空的加密数据
-            if not encrypted_data:
-                print("[LOG] 尝试解密空的加密数据，返回空字典")
-                return {}
-            
-            # 创建AES解密器
-            cipher = self.AES.new(self.AES_KEY, self.AES_MODE, self.AES_IV)
-            
-            # 解密
-            decrypted_bytes = cipher.decrypt(encrypted_data)
-            
-            # 去除填充
-            try:
-                decrypted_data = self.unpad(decrypted_bytes, self.AES.block_size, style='pkcs7')
-            except ValueError as e:
-                print(f"[LOG] 去除填充失败，尝试直接使用解密数据: {str(e)}")
-                # 如果去除填充失败，尝试直接使用解密数据
-                decrypted_data = decrypted_bytes
-            
-            # 转换为JSON字典
-            return self.json.loads(decrypted_data.decode('utf-8'))
-        except Exception as e:
-            print(f"[LOG] AES解密失败: {str(e)}")
-            return {}
+        return self.codec.decrypt(base64_str)
     
-    def login_spoc(self, username: str, password: str) -> Dict[str, Any]:
+    def login_spoc(self, username: str, password: str, sso_cookies: Optional[Any] = None) -> Dict[str, Any]:
         """
         SSO登录SPOC系统，完全按照新的流程实现
         :param username: 北航学号
         :param password: 北航密码
+        :param sso_cookies: 已登录的北航会话Cookie（CookieJar），其中的SSO登录状态有效时无需再次提交密码
         :return: 登录结果，包含session和初始化参数
         """
         # 创建会话
         session = requests.Session()
+        metrics_recorder.instrument_session(session)
+        
+        # 共享其他北航系统已建立的SSO登录状态（只复制SSO域名下的Cookie）
+        if sso_cookies is not None:
+            for cookie in sso_cookies:
+                if 'sso.buaa.edu.cn' in (cookie.domain or ''):
+                    session.cookies.set_cookie(cookie)
         
         # 设置通用请求头
         session.headers.update({
@@ -625,69 +658,75 @@ class SPOCAPIClient:
         
         # 1. 检查是否已经登录
         try:
-            print("[LOG] 检查SPOC登录状态")
+            logger.debug("检查SPOC登录状态")
             login_check_response = session.get(self.spoc_login_check_url, timeout=10, allow_redirects=False)
             
             # 如果返回302，说明需要登录
             if login_check_response.status_code == 302 or login_check_response.status_code == 404:
-                print("[LOG] 需要执行SSO登录")
+                logger.info("需要执行SSO登录")
                 
                 # 2. 执行SSO登录
                 # 构造SSO登录URL - 使用正确的service URL（jxkj2）
                 sso_login_url = f"https://sso.buaa.edu.cn/login?service=https%3A%2F%2Fspoc.buaa.edu.cn%2Fspocnewht%2FcasLogin"
-                print(f"[LOG] 访问SSO登录URL: {sso_login_url}")
+                logger.debug("访问SSO登录URL: %s", sso_login_url)
                 
                 # 获取SSO登录页面
                 sso_page_response = session.get(sso_login_url, timeout=10)
-                sso_page_response.raise_for_status()
-                
-                # 提取execution参数
-                execution_pattern = r'<input\s+[^>]*?name=[\'\"]execution[\'\"]*?[^>]*?value=[\'\"]?([^\'\">\s]+)[\'\"]?'
-                execution_match = re.search(execution_pattern, sso_page_response.text, re.IGNORECASE | re.DOTALL)
-                
-                if not execution_match:
-                    print("[LOG] 无法提取execution参数，登录失败")
-                    raise AuthenticationError("无法提取SSO登录参数")
-                
-                execution = execution_match.group(1)
-                print(f"[LOG] 提取到execution参数: {execution}")
-                
-                # 提交登录表单，不允许重定向，以便获取包含ticket的302响应
-                login_data = {
-                    'username': username,
-                    'password': password,
-                    'execution': execution,
-                    '_eventId': 'submit',
-                    'geolocation': ''
-                }
                 
-                print(f"[LOG] 提交登录表单，用户: {username}")
-                
-                # 发送POST请求，允许自动重定向，简化流程
-                print(f"[LOG] 发送登录请求，允许自动重定向")
-                login_response = session.post(
-                    sso_login_url,
-                    data=login_data,
-                    headers={'Content-Type': 'application/x-www-form-urlencoded'},
-                    allow_redirects=True,
-                    timeout=30
-                )
+                if sso_page_response.url.startswith(self.spoc_base_url):
+                    # 共享的SSO登录状态（CASTGC）有效，SSO直接签发ticket并跳转回SPOC，无需提交密码
+                    logger.info("复用已有的SSO登录状态")
+                    login_response = sso_page_response
+                else:
+                    sso_page_response.raise_for_status()
+                    
+                    # 提取execution参数
+                    execution_pattern = r'<input\s+[^>]*?name=[\'\"]execution[\'\"]*?[^>]*?value=[\'\"]?([^\'\">\s]+)[\'\"]?'
+                    execution_match = re.search(execution_pattern, sso_page_response.text, re.IGNORECASE | re.DOTALL)
+                    
+                    if not execution_match:
+                        logger.warning("无法提取execution参数，登录失败")
+                        raise AuthenticationError("无法提取SSO登录参数")
+                    
+                    execution = execution_match.group(1)
+                    logger.debug("提取到execution参数: %s", execution)
+                    
+                    # 提交登录表单，不允许重定向，以便获取包含ticket的302响应
+                    login_data = {
+                        'username': username,
+                        'password': password,
+                        'execution': execution,
+                        '_eventId': 'submit',
+                        'geolocation': ''
+                    }
+                    
+                    logger.debug("提交登录表单，用户: %s", username)
+                    
+                    # 发送POST请求，允许自动重定向，简化流程
+                    logger.debug("发送登录请求，允许自动重定向")
+                    login_response = session.post(
+                        sso_login_url,
+                        data=login_data,
+                        headers={'Content-Type': 'application/x-www-form-urlencoded'},
+                        allow_redirects=True,
+                        timeout=30
+                    )
                 
-                print(f"[LOG] 登录请求完成，最终状态: {login_response.status_code}")
-                print(f"[LOG] 登录请求最终URL: {login_response.url}")
+                logger.debug("登录请求完成，最终状态: %s", login_response.status_code)
+                logger.debug("登录请求最终URL: %s", login_response.url)
                 
                 # 即使返回404，也继续处理，因为浏览器访问时会有后续重定向
-                print("[LOG] 登录请求完成，开始后续处理")
+                logger.debug("登录请求完成，开始后续处理")
                 # 打印当前session的cookies和headers，确保获取完整
-                print(f"[LOG] 当前session的cookies: {session.cookies.get_dict()}")
-                print(f"[LOG] 当前session的headers: {dict(session.headers)}")
+                logger.debug("当前session的cookies: %s", session.cookies.get_dict())
+                logger.debug("当前session的headers: %s", dict(session.headers))
                 
                 # 尝试从响应中提取token（无论状态码如何）
                 token_match = re.search(r'token\s*=\s*[\'"](Inco-[\w-]+)[\'"]', login_response.text)
                 if token_match:
                     final_token = token_match.group(1)
                     session.headers.update({'token': final_token})
-                    print(f"[LOG] 从响应中提取并设置Token: {final_token[:20]}...")
+                    logger.debug("从响应中提取并设置Token: %s...", final_token[:20])
                 
                 # 从最终URL中提取SPOC token和refreshToken（关键步骤）
                 import urllib.parse
@@ -703,10 +742,10 @@ class SPOCAPIClient:
                         'token': spoc_token,
                         'refreshToken': refresh_token
                     })
-                    print(f"[LOG] ✅ 从URL中提取并设置SPOC Token: {spoc_token[:20]}...")
-                    print(f"[LOG] ✅ 从URL中提取并设置refreshToken: {refresh_token[:20]}...")
+                    logger.debug("从URL中提取并设置SPOC Token: %s...", spoc_token[:20])
+                    logger.debug("从URL中提取并设置refreshToken: %s...", refresh_token[:20])
                 
-                print("[LOG] 开始手动追踪重定向链，捕获所有Cookie")
+                logger.debug("开始手动追踪重定向链，捕获所有Cookie")
                 
                 # 手动追踪重定向链，确保捕获所有Set-Cookie
                 current_url = login_response.url
@@ -714,7 +753,7 @@ class SPOCAPIClient:
                 redirect_count = 0
                 
                 while redirect_count < max_redirects:
-                    print(f"[LOG] 手动追踪重定向 #{redirect_count+1}: {current_url}")
+                    logger.debug("手动追踪重定向 #%s: %s", redirect_count+1, current_url)
                     
                     # 禁止自动重定向，手动处理
                     redirect_response = session.get(
@@ -723,60 +762,60 @@ class SPOCAPIClient:
                         timeout=15
                     )
                     
-                    print(f"[LOG] 重定向响应状态码: {redirect_response.status_code}")
+                    logger.debug("重定向响应状态码: %s", redirect_response.status_code)
                     
                     # 检查是否有Set-Cookie头部
                     if 'Set-Cookie' in redirect_response.headers:
-                        print(f"[LOG] ✅ 捕获到新的Cookie: {redirect_response.headers['Set-Cookie']}")
+                        logger.debug("捕获到新的Cookie: %s", redirect_response.headers['Set-Cookie'])
                     
                     # 检查状态码
                     if redirect_response.status_code == 200:
-                        print(f"[LOG] ✅ 到达最终页面，重定向链追踪完成")
+                        logger.debug("到达最终页面，重定向链追踪完成")
                         break
                     elif redirect_response.status_code in (301, 302, 307, 308):
                         # 获取下一个重定向URL
                         next_url = redirect_response.headers.get('Location')
                         if not next_url:
-                            print(f"[LOG] ❌ 重定向链中断，无Location头部")
+                            logger.debug("重定向链中断，无Location头部")
                             break
                         
-                        print(f"[LOG] -> 重定向到: {next_url}")
+                        logger.debug("-> 重定向到: %s", next_url)
                         current_url = next_url
                         redirect_count += 1
                     else:
-                        print(f"[LOG] ❌ 重定向链中断，未知状态码: {redirect_response.status_code}")
+                        logger.debug("重定向链中断，未知状态码: %s", redirect_response.status_code)
                         break
                 
                 if redirect_count >= max_redirects:
-                    print(f"[LOG] ⚠️  重定向次数超过上限({max_redirects})，可能陷入循环")
+                    logger.warning("重定向次数超过上限(%s)，可能陷入循环", max_redirects)
                 
-                print("[LOG] SSO登录流程完成，继续后续操作")
-                print(f"[LOG] 当前session的headers: {dict(session.headers)}")
-                print(f"[LOG] 当前session的完整cookies: {session.cookies.get_dict()}")
+                logger.debug("SSO登录流程完成，继续后续操作")
+                logger.debug("当前session的headers: %s", dict(session.headers))
+                logger.debug("当前session的完整cookies: %s", session.cookies.get_dict())
             else:
-                print("[LOG] 已经登录SPOC系统")
+                logger.debug("已经登录SPOC系统")
         except Exception as e:
-            print(f"[LOG] SSO登录流程异常: {str(e)}")
+            logger.warning("SSO登录流程异常: %s", e)
             raise AuthenticationError(f"SSO登录失败: {str(e)}")
         
         # 3. 获取初始化数据和initData_props
         try:
-            print(f"[LOG] 获取初始化数据: {self.spoc_init_url}")
+            logger.debug("获取初始化数据: %s", self.spoc_init_url)
             
             # 先获取一下SPOC首页，确保session有效
-            print(f"[LOG] 访问SPOC首页: {self.spoc_base_url}/spocnew/jxkj2")
+            logger.debug("访问SPOC首页: %s/spocnew/jxkj2", self.spoc_base_url)
             home_response = session.get(f"{self.spoc_base_url}/spocnew/jxkj2", timeout=10, allow_redirects=True)
-            print(f"[LOG] SPOC首页响应状态: {home_response.status_code}")
-            print(f"[LOG] SPOC首页最终URL: {home_response.url}")
+            logger.debug("SPOC首页响应状态: %s", home_response.status_code)
+            logger.debug("SPOC首页最终URL: %s", home_response.url)
             
             # 获取当前session的cookies
-            print(f"[LOG] 当前session的cookies: {session.cookies.get_dict()}")
+            logger.debug("当前session的cookies: %s", session.cookies.get_dict())
             
             # 获取当前session的headers
-            print(f"[LOG] 当前session的headers: {dict(session.headers)}")
+            logger.debug("当前session的headers: %s", dict(session.headers))
             
             # 尝试获取初始化数据
-            print(f"[LOG] 发送初始化数据请求")
+            logger.debug("发送初始化数据请求")
             init_response = session.get(
                 self.spoc_init_url,
                 headers={
@@ -786,17 +825,17 @@ class SPOCAPIClient:
                 timeout=15
             )
             
-            print(f"[LOG] 初始化数据请求状态码: {init_response.status_code}")
-            print(f"[LOG] 初始化数据请求响应头: {dict(init_response.headers)}")
-            print(f"[LOG] 初始化数据请求响应内容: {init_response.text}")
+            logger.debug("初始化数据请求状态码: %s", init_response.status_code)
+            logger.debug("初始化数据请求响应头: %s", dict(init_response.headers))
+            logger.debug("初始化数据请求响应内容: %s", init_response.text)
             
             init_response.raise_for_status()
             
             try:
                 init_data = init_response.json()
-                print(f"[LOG] 初始化数据响应: {init_data}")
+                logger.debug("初始化数据响应: %s", init_data)
             except ValueError as json_error:
-                print(f"[LOG] 解析初始化数据JSON失败: {str(json_error)}")
+                logger.warning("解析初始化数据JSON失败: %s", json_error)
                 # 如果无法解析JSON，使用默认的initData_props
                 import time
                 init_data_props = f"{int(time.time()*1000)}d{time.time()}"
@@ -811,35 +850,33 @@ class SPOCAPIClient:
             if 'token' in init_data.get('content', {}):
                 token = init_data['content']['token']
                 session.headers.update({'token': token})
-                print(f"[LOG] 从响应中提取到token: {token}")
+                logger.debug("从响应中提取到token: %s", token)
             
             # 提取initData_props
             tzlj = init_data.get('content', {}).get('zy', [{}])[0].get('tzlj', '')
-            print(f"[LOG] tzlj字段: {tzlj}")
+            logger.debug("tzlj字段: %s", tzlj)
             
             if 'initData_props=' in tzlj:
                 init_data_props = tzlj.split('initData_props=')[1]
-                print(f"[LOG] 提取到initData_props: {init_data_props}")
+                logger.debug("提取到initData_props: %s", init_data_props)
             else:
                 # 如果无法提取initData_props，尝试使用当前时间戳作为默认值
                 import time
                 init_data_props = f"{int(time.time()*1000)}d{time.time()}"
-                print(f"[LOG] 无法从tzlj中提取initData_props，使用默认值: {init_data_props}")
-                
+                logger.warning("无法从tzlj中提取initData_props，使用默认值: %s", init_data_props)
+            
             # 构造完整的Referer - 使用正确的/jxkj2路径
             referer = f'{self.spoc_base_url}/spocnew/jxkj2?initData_props={init_data_props}'
-            print(f"[LOG] 构造Referer: {referer}")
+            logger.debug("构造Referer: %s", referer)
             
             return {
                 'session': session,
                 'init_data_props': init_data_props,
                 'referer': referer
             }
-            
+        
         except Exception as e:
-            print(f"[LOG] 获取初始化数据失败: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("获取初始化数据失败: %s", e)
             # 如果获取初始化数据失败，尝试使用默认的initData_props继续执行
             import time
             init_data_props = f"{int(time.time()*1000)}d{time.time()}"
@@ -869,7 +906,7 @@ class SPOCAPIClient:
             encrypted_param = self.aes_encrypt(query_one_payload)
             
             # 发送请求
-            print(f"[LOG] 发送queryOne请求: {self.spoc_query_one_url}")
+            logger.debug("发送queryOne请求: %s", self.spoc_query_one_url)
             # 合并session.headers和请求特定headers
             request_headers = dict(session.headers)
             request_headers.update({
@@ -877,8 +914,8 @@ class SPOCAPIClient:
                 'Content-Type': 'application/json',
                 'x-requested-with': 'XMLHttpRequest',
             })
-            print(f"[LOG] queryOne请求headers: {request_headers}")
-            print(f"[LOG] queryOne请求cookies: {session.cookies.get_dict()}")
+            logger.debug("queryOne请求headers: %s", request_headers)
+            logger.debug("queryOne请求cookies: %s", session.cookies.get_dict())
             response = session.post(
                 self.spoc_query_one_url,
                 json={"param": encrypted_param},
@@ -889,94 +926,265 @@ class SPOCAPIClient:
             response.raise_for_status()
             response_data = response.json()
             
-            print(f"[LOG] queryOne响应: {response_data}")
+            logger.debug("queryOne响应: %s", response_data)
             
             # 检查响应数据
             data_field = response_data.get('data', '')
             if not data_field:
-                print(f"[LOG] queryOne响应的data字段为空: {data_field}")
+                logger.debug("queryOne响应的data字段为空: %s", data_field)
                 raise ValueError("queryOne响应的data字段为空")
             
             # 解密响应数据
             decrypted_data = self.aes_decrypt(data_field)
-            print(f"[LOG] 解密后queryOne数据: {decrypted_data}")
+            logger.debug("解密后queryOne数据: %s", decrypted_data)
             
             # 提取sqlid
             sqlid = decrypted_data.get('sqlId', '')
-            print(f"[LOG] 提取到sqlid: {sqlid}")
+            logger.debug("提取到sqlid: %s", sqlid)
             
             if not sqlid:
                 # 如果无法从响应中提取sqlid，尝试使用默认值
-                print(f"[LOG] 无法从queryOne响应中提取sqlid，使用默认值")
+                logger.warning("无法从queryOne响应中提取sqlid，使用默认值")
                 # 默认的sqlid，可能需要根据实际情况调整
                 return "402881b27e800d3d017e812d3345001d"
             
             return sqlid
-            
+        
         except ValueError as e:
-            print(f"[LOG] 获取sqlid失败: {str(e)}")
+            logger.warning("获取sqlid失败: %s", e)
             # 如果获取sqlid失败，尝试使用默认值
             return "402881b27e800d3d017e812d3345001d"
         except Exception as e:
-            print(f"[LOG] 获取sqlid失败: {str(e)}")
+            logger.warning("获取sqlid失败: %s", e)
             raise NetworkError(f"获取SPOC sqlid失败: {str(e)}")
     
+    def _homework_page_payload(self, sqlid: str, page_num: int, page_size: int) -> Dict[str, Any]:
+        """构造queryListByPage请求payload"""
+        return {
+            "sqlid": sqlid,
+            "pageNum": page_num,
+            "pageSize": page_size,
+            "xnxq": None,
+            "kcid": None,
+            "tjzt": "1",  # 1表示未完成
+            "bt": None,
+            "yzwz": None
+        }
+    
+    def _query_homework_page(self, session: requests.Session, sqlid: str, referer: str, page_num: int,
+                             page_size: int) -> Dict[str, Any]:
+        """
+        获取一页作业列表，每页使用独立加密的payload
+        :param session: 已登录的requests会话对象
+        :param sqlid: 动态获取的sqlid
+        :param referer: Referer头部
+        :param page_num: 页码（从1开始）
+        :param page_size: 每页数量
+        :return: 包含page、list、total、elapsed（秒）的字典
+        """
+        encrypted_param = self.aes_encrypt(self._homework_page_payload(sqlid, page_num, page_size))
+        
+        # 合并session.headers和请求特定headers
+        request_headers = dict(session.headers)
+        request_headers.update({
+            'Referer': referer,
+            'Content-Type': 'application/json',
+            'x-requested-with': 'XMLHttpRequest',
+        })
+        
+        start_time = time.perf_counter()
+        response = session.post(
+            self.spoc_query_list_url,
+            json={"param": encrypted_param},
+            headers=request_headers,
+            timeout=10
+        )
+        response.raise_for_status()
+        
+        # 解密响应数据
+        decrypted_data = self.aes_decrypt(response.json().get('data', ''))
+        elapsed = time.perf_counter() - start_time
+        
+        homework_list = decrypted_data.get('list') or []
+        logger.debug("queryListByPage第%s页: %s条作业，耗时%.0fms", page_num, len(homework_list), elapsed * 1000)
+        
+        try:
+            total = int(decrypted_data.get('total') or 0)
+        except (TypeError, ValueError):
+            total = 0
+        
+        return {
+            'page': page_num,
+            'list': homework_list,
+            'total': total,
+            'elapsed': elapsed
+        }
+    
+    def iter_homework_pages(self, session: requests.Session, sqlid: str, referer: str,
+                            page_size: int = 20, max_workers: int = 4) -> Iterator[Dict[str, Any]]:
+        """
+        分页获取全部作业：先请求第一页得到total，再并发请求剩余页，按完成顺序逐页返回
+        :param session: 已登录的requests会话对象
+        :param sqlid: 动态获取的sqlid
+        :param referer: Referer头部
+        :param page_size: 每页数量
+        :param max_workers: 并发请求的最大线程数
+        :return: 逐页产出包含page、list、total、elapsed的字典
+        """
+        try:
+            first_page = self._query_homework_page(session, sqlid, referer, 1, page_size)
+        except Exception as e:
+            logger.warning("获取作业列表失败: %s", e)
+            raise NetworkError(f"获取SPOC作业列表失败: {str(e)}")
+        yield first_page
+        
+        total = first_page['total']
+        page_count = (total + page_size - 1) // page_size
+        # 第一页已经包含全部作业，或服务端没有返回total
+        if page_count <= 1 or len(first_page['list']) < page_size:
+            return
+        
+        logger.info("作业共%s条，并发获取剩余%s页", total, page_count - 1)
+        with ThreadPoolExecutor(max_workers=min(max_workers, page_count - 1)) as executor:
+            futures = {
+                executor.submit(self._query_homework_page, session, sqlid, referer, page_num, page_size): page_num
+                for page_num in range(2, page_count + 1)
+            }
+            for future in as_completed(futures):
+                try:
+                    yield future.result()
+                except Exception as e:
+                    for pending in futures:
+                        pending.cancel()
+                    logger.warning("获取作业列表第%s页失败: %s", futures[future], e)
+                    raise NetworkError(f"获取SPOC作业列表第{futures[future]}页失败: {str(e)}")
+    
     def get_homework_list(self, session: requests.Session, sqlid: str, referer: str) -> Dict[str, Any]:
         """
-        获取作业列表
+        获取全部作业列表（合并所有分页）
         :param session: requests会话对象
         :param sqlid: 动态获取的sqlid
         :param referer: Referer头部
-        :return: 作业列表数据
+        :return: 作业列表数据，包含total、list和每页耗时pages
+        """
+        pages = list(self.iter_homework_pages(session, sqlid, referer))
+        return merge_homework_pages(pages)
+    
+    def _password_digest(self, username: str, password: str) -> str:
+        """计算密码摘要，缓存中不保存明文密码，密码变化时缓存失效"""
+        return hashlib.sha256(f"{username}:{password}".encode('utf-8')).hexdigest()
+    
+    def is_spoc_session_valid(self, session: requests.Session) -> bool:
+        """
+        用登录检查接口快速判断缓存的会话是否仍然有效（一次不跟随重定向的请求）
+        :param session: 已登录的requests会话对象
+        :return: 会话是否有效
         """
         try:
-            # 构造queryListByPage请求payload
-            query_list_payload = {
-                "sqlid": sqlid,
-                "pageNum": 1,
-                "pageSize": 20,
-                "xnxq": None,
-                "kcid": None,
-                "tjzt": "1",  # 1表示未完成
-                "bt": None,
-                "yzwz": None
-            }
-            
-            # 加密payload
-            encrypted_param = self.aes_encrypt(query_list_payload)
-            
-            # 发送请求
-            print(f"[LOG] 发送queryListByPage请求: {self.spoc_query_list_url}")
-            # 合并session.headers和请求特定headers
-            request_headers = dict(session.headers)
-            request_headers.update({
-                'Referer': referer,
-                'Content-Type': 'application/json',
-                'x-requested-with': 'XMLHttpRequest',
-            })
-            print(f"[LOG] queryListByPage请求headers: {request_headers}")
-            print(f"[LOG] queryListByPage请求cookies: {session.cookies.get_dict()}")
-            response = session.post(
-                self.spoc_query_list_url,
-                json={"param": encrypted_param},
-                headers=request_headers,
-                timeout=10
-            )
-            
-            response.raise_for_status()
-            response_data = response.json()
-            
-            print(f"[LOG] queryListByPage响应: {response_data}")
-            
-            # 解密响应数据
-            decrypted_data = self.aes_decrypt(response_data.get('data', ''))
-            print(f"[LOG] 解密后作业数据: {decrypted_data}")
+            response = session.get(self.spoc_login_check_url, timeout=10, allow_redirects=False)
+        except requests.exceptions.RequestException as e:
+            logger.warning("SPOC会话检查失败: %s", e)
+            return False
+        # 与login_spoc一致：302或404说明需要重新登录
+        return response.status_code not in (302, 401, 403, 404)
+    
+    def get_spoc_context(self, username: str, password: str, force_login: bool = False,
+                         sso_cookies: Optional[Any] = None) -> Dict[str, Any]:
+        """
+        获取已登录的SPOC上下文，优先复用缓存的会话，只有会话失效时才重新登录
+        :param username: 北航学号
+        :param password: 北航密码
+        :param force_login: 是否忽略缓存强制重新登录
+        :param sso_cookies: 已登录的北航会话Cookie，重新登录时共享其中的SSO登录状态
+        :return: 包含session、init_data_props、referer、sqlid和reused（是否复用缓存）的字典
+        """
+        password_digest = self._password_digest(username, password)
+        
+        if not force_login:
+            with self._session_cache_lock:
+                cached = self.session_cache.get(username)
+            if (cached
+                    and cached['password_digest'] == password_digest
+                    and _datetime.now() - cached['last_used'] <= self.session_timeout
+                    and self.is_spoc_session_valid(cached['session'])):
+                cached['last_used'] = _datetime.now()
+                logger.info("复用已缓存的SPOC会话: %s", username)
+                return dict(cached, reused=True)
+        
+        # 缓存不存在、已过期或会话失效，重新登录
+        self.invalidate_spoc_session(username)
+        login_result = self.login_spoc(username, password, sso_cookies=sso_cookies)
+        session = login_result['session']
+        sqlid = self.get_sqlid(session, login_result['init_data_props'], login_result['referer'])
+        
+        context = {
+            'session': session,
+            'token': session.headers.get('token'),
+            'init_data_props': login_result['init_data_props'],
+            'referer': login_result['referer'],
+            'sqlid': sqlid,
+            'password_digest': password_digest,
+            'created_at': _datetime.now(),
+            'last_used': _datetime.now()
+        }
+        with self._session_cache_lock:
+            self.session_cache[username] = context
+        return dict(context, reused=False)
+    
+    def invalidate_spoc_session(self, username: str) -> bool:
+        """
+        清除缓存的SPOC会话
+        :param username: 北航学号
+        :return: 是否存在并清除了缓存
+        """
+        with self._session_cache_lock:
+            return self.session_cache.pop(username, None) is not None
+    
+    def clear_expired_spoc_sessions(self) -> int:
+        """
+        清理过期的SPOC会话缓存
+        :return: 清理的会话数量
+        """
+        now = _datetime.now()
+        with self._session_cache_lock:
+            expired = [username for username, context in self.session_cache.items()
+                       if now - context['last_used'] > self.session_timeout]
+            for username in expired:
+                del self.session_cache[username]
+        return len(expired)
+    
+    def iter_all_homeworks(self, username: str, password: str, sso_cookies: Optional[Any] = None) -> Iterator[Dict[str, Any]]:
+        """
+        完整的作业获取流程，逐页返回作业，调用方可以边获取边处理
+        会话有效时复用缓存的登录状态和sqlid，只需会话检查和作业列表两次请求
+        :param username: 北航学号
+        :param password: 北航密码
+        :param sso_cookies: 已登录的北航会话Cookie，需要登录时共享其中的SSO登录状态
+        :return: 逐页产出包含page、list、total、elapsed的字典
+        """
+        try:
+            # 1. 获取已登录的会话（优先复用缓存）
+            context = self.get_spoc_context(username, password, sso_cookies=sso_cookies)
+            pages = self.iter_homework_pages(context['session'], context['sqlid'], context['referer'])
             
-            return decrypted_data
+            # 2. 第一页失败且使用的是缓存会话时，可能是token在检查后失效，重新登录一次
+            try:
+                first_page = next(pages)
+            except NetworkError:
+                if not context['reused']:
+                    raise
+                logger.warning("缓存的SPOC会话获取作业失败，重新登录")
+                context = self.get_spoc_context(username, password, force_login=True, sso_cookies=sso_cookies)
+                pages = self.iter_homework_pages(context['session'], context['sqlid'], context['referer'])
+                first_page = next(pages)
             
+            # 3. 分页获取作业列表
+            yield first_page
+            yield from pages
+        
         except Exception as e:
-            print(f"[LOG] 获取作业列表失败: {str(e)}")
-            raise NetworkError(f"获取SPOC作业列表失败: {str(e)}")
+            logger.warning("完整作业获取流程失败: %s", e)
+            raise BUAAAPIError(f"获取SPOC作业失败: {str(e)}")
     
     def fetch_all_homeworks(self, username: str, password: str) -> Dict[str, Any]:
         """
@@ -985,33 +1193,35 @@ class SPOCAPIClient:
         :param password: 北航密码
         :return: 完整的作业列表
         """
-        try:
-            # 1. 登录并获取初始化参数
-            login_result = self.login_spoc(username, password)
-            session = login_result['session']
-            init_data_props = login_result['init_data_props']
-            referer = login_result['referer']
-            
-            # 2. 获取sqlid
-            sqlid = self.get_sqlid(session, init_data_props, referer)
-            
-            # 3. 获取作业列表
-            homework_data = self.get_homework_list(session, sqlid, referer)
-            
-            print(f"[LOG] 作业获取成功，共{homework_data.get('total', 0)}条作业")
-            
-            return homework_data
-            
-        except Exception as e:
-            print(f"[LOG] 完整作业获取流程失败: {str(e)}")
-            raise BUAAAPIError(f"获取SPOC作业失败: {str(e)}")
+        homework_data = merge_homework_pages(self.iter_all_homeworks(username, password))
+        logger.info("作业获取成功，共%s条作业", homework_data['total'])
+        return homework_data
 
 
-def parse_course_data(course_data, date=None):
+def merge_homework_pages(pages) -> Dict[str, Any]:
+    """
+    按页码顺序合并分页获取的作业
+    :param pages: iter_homework_pages产出的分页结果
+    :return: 包含total、list和每页耗时pages的作业数据
+    """
+    pages = sorted(pages, key=lambda page: page['page'])
+    homework_list = []
+    for page in pages:
+        homework_list.extend(page['list'])
+    
+    return {
+        'total': max([page['total'] for page in pages] + [len(homework_list)]),
+        'list': homework_list,
+        'pages': [{'page': page['page'], 'count': len(page['list']), 'elapsed_ms': round(page['elapsed'] * 1000, 1)} for page in pages]
+    }
+
+
+def parse_course_data(course_data, date=None, week_range=None):
     """
     解析课程数据，确保数据准确性
     :param course_data: 原始课程数据
     :param date: 查询日期，用于计算星期几
+    :param week_range: 新格式数据的周次范围，不传时使用查询日期所在的教学周
     :return: 解析后的课程数据列表
     """
     parsed_courses = []
@@ -1028,6 +1238,18 @@ def parse_course_data(course_data, date=None):
         except ValueError:
             day_of_week = 1  # 日期格式错误，默认周一
     
+    # 新格式中没有周次信息：按天查询时只能确定查询日期所在的教学周
+    day_week_range = week_range
+    day_week_range_exact = bool(week_range)
+    if not day_week_range and date:
+        try:
+            from datetime import datetime
+            from .course_recurrence import get_week_number
+            week = get_week_number(datetime.strptime(date, '%Y-%m-%d').date())
+            day_week_range = str(week) if week > 0 else None
+        except ValueError:
+            day_week_range = None
+    
     # 处理新的数据格式，直接从datas字段获取数据
     if isinstance(course_data, dict):
         # 检查是否是新的数据格式（直接包含datas字段）
@@ -1085,11 +1307,12 @@ def parse_course_data(course_data, date=None):
                 'kcmc': course_name,
                 'jsxm': teacher,  # 提取或默认教师信息
                 'jxlh': classroom.split('楼')[0] + '楼' if '楼' in classroom else classroom,  # 提取教学楼
-                'jash': classroom.split('楼')[-1] if '楼' in classroom else classroom,  # 提取教室号
+                'jash': classroom.split('楼')[-1] if '楼' in classroom else '',  # 提取教室号（无教学楼时教室号已包含在jxlh中）
                 'kssj': start_time_str,
                 'jssj': end_time_str,
                 'xqj': day_of_week,  # 使用传入的日期计算星期几
-                'zcd': '1-16',  # 新格式中没有周次信息，默认1-16周
+                'zcd': day_week_range or '1-16',  # 无法确定周次时默认1-16周
+                'zcd_exact': day_week_range_exact,  # 周次是否为完整的学期周次（按天查询时仅为当天所在周）
                 'original_date': date  # 保存原始日期，用于去重
             }
             
@@ -1127,6 +1350,7 @@ def parse_course_data(course_data, date=None):
                 'jssj': course_item['jssj'],
                 'xqj': day_of_week,
                 'zcd': week_range.strip(),
+                'zcd_exact': True,
                 'original_date': date  # 保存原始日期，用于去重
             }
             
@@ -1134,6 +1358,120 @@ def parse_course_data(course_data, date=None):
     
     return parsed_courses
 
+# 北航节次时间表（节次 -> (开始时间, 结束时间)）
+BUAA_SECTION_TIMES = {
+    1: ('08:00', '08:45'),
+    2: ('08:50', '09:35'),
+    3: ('09:50', '10:35'),
+    4: ('10:40', '11:25'),
+    5: ('11:30', '12:15'),
+    6: ('14:00', '14:45'),
+    7: ('14:50', '15:35'),
+    8: ('15:50', '16:35'),
+    9: ('16:40', '17:25'),
+    10: ('17:30', '18:15'),
+    11: ('19:00', '19:45'),
+    12: ('19:50', '20:35'),
+    13: ('20:40', '21:25'),
+    14: ('21:30', '22:15')
+}
+
+
+def parse_term_schedule_data(term_data):
+    """
+    解析学期课表数据
+    :param term_data: 学期课表接口返回的datas字段
+    :return: (解析后的课程数据列表, 有调课/停课的日期集合)
+    """
+    from .course_recurrence import parse_week_range, format_week_range
+    
+    parsed_courses = []
+    adjusted_dates = set()
+    
+    if isinstance(term_data, dict):
+        raw_courses = term_data.get('arrangedList') or term_data.get('courses') or []
+        # 调课、停课记录，只需要其中涉及的日期
+        for key in ('adjustList', 'tkList', 'adjustedList', 'changeList'):
+            for adjust_item in term_data.get(key) or []:
+                if not isinstance(adjust_item, dict):
+                    continue
+                for date_key in ('oldDate', 'newDate', 'adjustDate', 'date', 'rq', 'ytkrq', 'tkhrq'):
+                    value = adjust_item.get(date_key)
+                    if value and re.match(r'\d{4}-\d{2}-\d{2}', str(value)):
+                        adjusted_dates.add(str(value)[:10])
+    elif isinstance(term_data, list):
+        raw_courses = term_data
+    else:
+        return parsed_courses, adjusted_dates
+    
+    for course_item in raw_courses:
+        if not isinstance(course_item, dict):
+            continue
+        
+        course_name = (course_item.get('courseName') or course_item.get('kcmc') or '').strip()
+        if not course_name:
+            continue
+        
+        # 解析星期几
+        try:
+            day_of_week = int(course_item.get('dayOfWeek') or course_item.get('xqj') or 0)
+        except (TypeError, ValueError):
+            continue
+        if day_of_week < 1 or day_of_week > 7:
+            continue
+        
+        # 解析上课时间：优先使用具体时间，否则根据节次换算
+        start_time_str = course_item.get('beginTime') or course_item.get('kssj')
+        end_time_str = course_item.get('endTime') or course_item.get('jssj')
+        if not start_time_str or not end_time_str:
+            try:
+                begin_section = int(course_item.get('beginSection') or 0)
+                end_section = int(course_item.get('endSection') or begin_section)
+            except (TypeError, ValueError):
+                continue
+            if begin_section not in BUAA_SECTION_TIMES or end_section not in BUAA_SECTION_TIMES:
+                continue
+            start_time_str = BUAA_SECTION_TIMES[begin_section][0]
+            end_time_str = BUAA_SECTION_TIMES[end_section][1]
+        start_time_str = str(start_time_str)[:5]
+        end_time_str = str(end_time_str)[:5]
+        
+        # 解析周次和教师，格式如 "1-8周/张三,9-16周(双)/李四"
+        weeks = set()
+        teachers = []
+        weeks_and_teachers = course_item.get('weeksAndTeachers') or ''
+        for group in re.split(r'[,，;；](?=\s*\d)', weeks_and_teachers):
+            if not group.strip():
+                continue
+            week_part, _, teacher_part = group.partition('/')
+            weeks |= parse_week_range(week_part)
+            for teacher in re.split(r'[,，、/]', teacher_part):
+                teacher = re.sub(r'\[.*?\]', '', teacher).strip()
+                if teacher and teacher not in teachers:
+                    teachers.append(teacher)
+        if not weeks:
+            weeks = parse_week_range(course_item.get('weeks') or course_item.get('zcd') or '')
+        if not weeks:
+            continue
+        
+        teacher = course_item.get('teacherName') or course_item.get('jsxm') or '、'.join(teachers) or '未知'
+        classroom = (course_item.get('placeName') or course_item.get('classroom') or '').strip()
+        
+        parsed_courses.append({
+            'kcmc': course_name,
+            'jsxm': teacher.strip(),
+            'jxlh': classroom.split('楼')[0] + '楼' if '楼' in classroom else classroom,
+            'jash': classroom.split('楼')[-1] if '楼' in classroom else '',
+            'kssj': start_time_str,
+            'jssj': end_time_str,
+            'xqj': day_of_week,
+            'zcd': format_week_range(weeks),
+            'zcd_exact': True,
+            'original_date': None
+        })
+    
+    return parsed_courses, adjusted_dates
+
 def parse_exam_data(exam_data):
     """
     解析考试数据
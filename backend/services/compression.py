@@ -0,0 +1,159 @@
+import zlib
+from typing import Callable, Iterable, Iterator, List, Optional
+
+try:
+    import brotli
+except ImportError:  # 可选依赖
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # 可选依赖
+    zstandard = None
+
+
+# 默认只压缩超过该大小（字节）的响应，更小的响应压缩后往往反而变大
+DEFAULT_MIN_SIZE = 1024
+# 默认压缩等级（gzip 1-9），接口响应是动态生成的，取速度与压缩率的折中
+DEFAULT_LEVEL = 6
+
+# 可压缩的MIME类型（图片、音频、视频、压缩包等本身已压缩，直接跳过）
+COMPRESSIBLE_MIMETYPES = {
+    'application/json', 'application/javascript', 'application/xml', 'image/svg+xml',
+}
+
+# 不压缩的状态码：无响应体或部分内容
+_SKIP_STATUS = {204, 206, 304}
+
+# 不压缩的文本类型：SSE事件流需要逐条即时送达，经压缩器后浏览器和代理可能缓冲事件
+_SKIP_MIMETYPES = {'text/event-stream'}
+
+
+class _StreamCompressor:
+    """
+    流式压缩器的统一接口：compress(chunk) 返回已产生的输出，sync() 输出目前为止的全部数据
+    （流式响应每块都同步输出，SSE等事件不会滞留在压缩缓冲区中），flush() 结束压缩
+    """
+    
+    def __init__(self, compress: Callable[[bytes], bytes], sync: Callable[[], bytes], flush: Callable[[], bytes]):
+        self.compress = compress
+        self.sync = sync
+        self.flush = flush
+
+
+def _gzip_compressor(level: int) -> _StreamCompressor:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31 输出gzip格式
+    return _StreamCompressor(compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush)
+
+
+def _brotli_compressor(level: int) -> _StreamCompressor:
+    # brotli的等级为0-11，动态内容使用较低等级（与gzip 6的耗时相近）
+    compressor = brotli.Compressor(quality=min(max(level - 2, 0), 11))
+    return _StreamCompressor(compressor.process, compressor.flush, compressor.finish)
+
+
+def _zstd_compressor(level: int) -> _StreamCompressor:
+    compressor = zstandard.ZstdCompressor(level=level).compressobj()
+    return _StreamCompressor(
+        compressor.compress,
+        lambda: compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK),
+        compressor.flush
+    )
+
+
+def available_encodings() -> List[str]:
+    """按服务端偏好排序的可用编码（客户端权重相同时优先选前面的）"""
+    encodings = []
+    if zstandard is not None:
+        encodings.append('zstd')
+    if brotli is not None:
+        encodings.append('br')
+    encodings.append('gzip')
+    return encodings
+
+
+_COMPRESSORS = {
+    'gzip': _gzip_compressor,
+    'br': _brotli_compressor,
+    'zstd': _zstd_compressor,
+}
+
+
+def compress(data: bytes, encoding: str, level: int = DEFAULT_LEVEL) -> bytes:
+    """
+    一次性压缩
+    :param data: 原始数据
+    :param encoding: gzip / br / zstd
+    :param level: 压缩等级
+    :return: 压缩后的数据
+    """
+    compressor = _COMPRESSORS[encoding](level)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _compress_stream(chunks: Iterable[bytes], encoding: str, level: int) -> Iterator[bytes]:
+    compressor = _COMPRESSORS[encoding](level)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            output = compressor.compress(chunk) + compressor.sync()
+            if output:
+                yield output
+        yield compressor.flush()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+def is_compressible(mimetype: Optional[str]) -> bool:
+    if not mimetype or mimetype in _SKIP_MIMETYPES:
+        return False
+    return mimetype.startswith('text/') or mimetype in COMPRESSIBLE_MIMETYPES or mimetype.endswith('+json')
+
+
+def init_compression(app) -> None:
+    """
+    注册响应压缩钩子：根据 Accept-Encoding 协商 zstd/br/gzip（zstd和br需安装对应模块），
+    超过 COMPRESSION_MIN_SIZE 的文本类响应整体压缩，流式响应逐块压缩；
+    已设置 Content-Encoding 的响应（如静态文件缓存）和 send_file 直接发送的文件不做处理；
+    带ETag的响应压缩后改用按编码区分的ETag，并按新ETag重新做条件请求判断，使 If-None-Match 能返回304
+    :param app: Flask应用
+    """
+    from flask import request
+    
+    min_size = app.config.get('COMPRESSION_MIN_SIZE', DEFAULT_MIN_SIZE)
+    level = app.config.get('COMPRESSION_LEVEL', DEFAULT_LEVEL)
+    encodings = available_encodings()
+    
+    @app.after_request
+    def _compress_response(response):
+        if response.status_code < 200 or response.status_code in _SKIP_STATUS:
+            return response
+        if response.direct_passthrough or 'Content-Encoding' in response.headers:
+            return response
+        if not is_compressible(response.mimetype):
+            return response
+        
+        response.vary.add('Accept-Encoding')
+        encoding = request.accept_encodings.best_match(encodings)
+        if encoding is None:
+            return response
+        
+        if response.is_streamed:
+            response.response = _compress_stream(response.response, encoding, level)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < min_size:
+                return response
+            response.set_data(compress(data, encoding, level))
+        
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag:
+            # 视图中的 make_conditional 比较的是压缩前的ETag，客户端缓存的是压缩后的ETag，需重新判断
+            response.set_etag(f"{etag}-{encoding}", weak)
+            response.make_conditional(request)
+        return response
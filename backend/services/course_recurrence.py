@@ -0,0 +1,324 @@
+import re
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from config import Config
+
+
+# 单个学期允许的最大周次，用于过滤明显错误的周次数据
+MAX_WEEK = 30
+
+# 周次片段，如 "1-16"、"3"、"1-15单"、"2-16(双)"
+_WEEK_TOKEN_PATTERN = re.compile(r'(\d+)\s*(?:[-~～至]\s*(\d+))?\s*周?\s*[\(（]?\s*([单双])?')
+_WEEK_SEPARATORS = re.compile(r'[,，、;；\s]+')
+
+
+@lru_cache(maxsize=1024)
+def parse_week_range(week_range: str) -> FrozenSet[int]:
+    """
+    解析周次范围字符串
+    :param week_range: 周次范围，支持 "1-16"、"1-8,10-16"、"1-15单"、"2-16周(双)"、"3,5,7" 等格式
+    :return: 周次集合
+    """
+    if not week_range:
+        return frozenset()
+    
+    text = str(week_range).replace('第', '')
+    weeks = set()
+    for token in _WEEK_SEPARATORS.split(text):
+        if not token:
+            continue
+        match = _WEEK_TOKEN_PATTERN.search(token)
+        if not match:
+            continue
+        
+        first = int(match.group(1))
+        last = int(match.group(2)) if match.group(2) else first
+        if first > last:
+            first, last = last, first
+        
+        parity = match.group(3)
+        for week in range(max(first, 1), min(last, MAX_WEEK) + 1):
+            if parity == '单' and week % 2 == 0:
+                continue
+            if parity == '双' and week % 2 == 1:
+                continue
+            weeks.add(week)
+    
+    return frozenset(weeks)
+
+
+def format_week_range(weeks: Iterable[int]) -> str:
+    """
+    将周次集合格式化为紧凑的周次范围字符串
+    :param weeks: 周次集合
+    :return: 周次范围字符串，如 "1-8,10-16"
+    """
+    sorted_weeks = sorted(set(weeks))
+    if not sorted_weeks:
+        return ''
+    
+    parts = []
+    run_start = prev = sorted_weeks[0]
+    for week in sorted_weeks[1:]:
+        if week == prev + 1:
+            prev = week
+            continue
+        parts.append(f"{run_start}-{prev}" if run_start != prev else str(run_start))
+        run_start = prev = week
+    parts.append(f"{run_start}-{prev}" if run_start != prev else str(run_start))
+    
+    return ','.join(parts)
+
+
+def course_weeks(course: Any) -> FrozenSet[int]:
+    """
+    课程实际上课的周次：周次范围去掉用户跳过的周次
+    :param course: 课程对象
+    :return: 周次集合
+    """
+    weeks = parse_week_range(course.week_range)
+    if course.skipped_weeks:
+        weeks -= parse_week_range(course.skipped_weeks)
+    return weeks
+
+
+@lru_cache(maxsize=1)
+def _configured_semester_starts() -> Tuple[date, ...]:
+    """解析配置中的学期起始日期列表"""
+    starts = []
+    for item in (Config.SEMESTER_START_DATE or '').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            starts.append(datetime.strptime(item, '%Y-%m-%d').date())
+        except ValueError:
+            continue
+    return tuple(sorted(starts))
+
+
+@lru_cache(maxsize=64)
+def get_semester_start(reference: date) -> date:
+    """
+    获取参考日期所在学期的第一周周一
+    :param reference: 参考日期
+    :return: 学期第一周周一的日期
+    """
+    configured = _configured_semester_starts()
+    if configured:
+        candidates = [start for start in configured if start <= reference]
+        return candidates[-1] if candidates else configured[0]
+    
+    # 未配置时按学期代码估算：秋季学期从9月第一个周一开始，春季学期从2月最后一个周一开始
+    year = reference.year
+    if reference.month >= 8:
+        anchor = date(year, 9, 1)
+        return anchor + timedelta(days=(7 - anchor.weekday()) % 7)
+    if reference.month <= 2 and reference < _last_monday_of_february(year):
+        anchor = date(year - 1, 9, 1)
+        return anchor + timedelta(days=(7 - anchor.weekday()) % 7)
+    return _last_monday_of_february(year)
+
+
+def _last_monday_of_february(year: int) -> date:
+    """获取指定年份2月的最后一个周一"""
+    last_day = date(year, 3, 1) - timedelta(days=1)
+    return last_day - timedelta(days=last_day.weekday())
+
+
+def get_week_number(day: date) -> int:
+    """
+    计算日期所在的教学周
+    :param day: 日期
+    :return: 教学周（从1开始，学期开始前为0或负数）
+    """
+    semester_start = get_semester_start(day)
+    return (day - semester_start).days // 7 + 1
+
+
+def course_semester_start(course: Any) -> date:
+    """
+    课程所属学期第一周周一
+    同步和新建的课程保存了所属学期；升级前保存的课程按课程日期或创建时间所在的学期计算
+    :param course: 课程对象
+    :return: 学期第一周周一的日期
+    """
+    if course.semester_start:
+        return course.semester_start
+    if course.date:
+        return get_semester_start(course.date)
+    created_at = course.created_at or datetime.now()
+    return get_semester_start(created_at.date())
+
+
+def course_week_number(course: Any, day: date) -> int:
+    """
+    计算日期在课程所属学期中的教学周，课程的周次范围只对应所属学期，不会延续到之后的学期
+    :param course: 课程对象
+    :param day: 日期
+    :return: 教学周（所属学期开始前为0或负数，之后的学期超出周次范围）
+    """
+    return (day - course_semester_start(course)).days // 7 + 1
+
+
+@lru_cache(maxsize=256)
+def _window_calendar(start: date, end: date) -> Tuple[Tuple[date, int], ...]:
+    """
+    一次性计算时间窗口内每一天的（日期, 星期几）
+    :param start: 开始日期（包含）
+    :param end: 结束日期（包含）
+    :return: 日期表
+    """
+    calendar = []
+    day = start
+    while day <= end:
+        calendar.append((day, day.isoweekday()))
+        day += timedelta(days=1)
+    return tuple(calendar)
+
+
+class CourseRecurrenceEngine:
+    """
+    课程循环展开引擎，根据课程的星期几和周次范围按需生成课程实例，
+    替代为每个上课日期单独保存Entry记录；周次按课程所属学期计算，只在该学期内展开
+    """
+    
+    COURSE_COLOR = '#4a90e2'
+    
+    def expand(self, courses: Iterable[Any], start: date, end: date) -> List[Dict[str, Any]]:
+        """
+        展开时间窗口内的所有课程实例
+        :param courses: 课程对象列表
+        :param start: 开始日期（包含）
+        :param end: 结束日期（包含）
+        :return: 课程实例列表，包含course、date、week、start_time、end_time
+        """
+        if end < start:
+            return []
+        
+        # 按星期几分组，避免对每一天遍历全部课程
+        courses_by_weekday: Dict[int, List[Any]] = {}
+        dated_courses = []
+        for course in courses:
+            if course.date:
+                dated_courses.append(course)
+            else:
+                courses_by_weekday.setdefault(course.day_of_week, []).append(course)
+        
+        occurrences = []
+        for day, weekday in _window_calendar(start, end):
+            for course in courses_by_weekday.get(weekday, ()):
+                week = course_week_number(course, day)
+                if week in course_weeks(course):
+                    occurrences.append(self._build_occurrence(course, day, week))
+        
+        # 指定具体日期的课程只在该日期出现
+        for course in dated_courses:
+            if start <= course.date <= end:
+                occurrences.append(self._build_occurrence(course, course.date, course_week_number(course, course.date)))
+        
+        occurrences.sort(key=lambda item: item['start_time'])
+        return occurrences
+    
+    def _build_occurrence(self, course: Any, day: date, week: int) -> Dict[str, Any]:
+        """构建单个课程实例"""
+        return {
+            'course': course,
+            'date': day,
+            'week': week,
+            'start_time': datetime.combine(day, course.start_time),
+            'end_time': datetime.combine(day, course.end_time)
+        }
+    
+    def to_entry_dict(self, occurrence: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        将课程实例转换为与Entry.to_dict一致的格式
+        :param occurrence: 课程实例
+        :return: 条目字典，virtual字段标记为虚拟条目
+        """
+        course = occurrence['course']
+        return {
+            'id': f"course-{course.id}-{occurrence['date'].isoformat()}",
+            'title': course.course_name,
+            'description': f"教师: {course.teacher}\n教室: {course.classroom}",
+            'entry_type': 'course',
+            'start_time': occurrence['start_time'].isoformat(),
+            'end_time': occurrence['end_time'].isoformat(),
+            'color': self.COURSE_COLOR,
+            'created_at': course.created_at.isoformat() if course.created_at else None,
+            'updated_at': course.updated_at.isoformat() if course.updated_at else None,
+            'virtual': True,
+            'course_id': course.id,
+            'week': occurrence['week']
+        }
+    
+    def occurs_on(self, course: Any, day: date) -> bool:
+        """
+        课程是否在某一天上课
+        :param course: 课程对象
+        :param day: 日期
+        """
+        if course.date:
+            return course.date == day
+        return day.isoweekday() == course.day_of_week and course_week_number(course, day) in course_weeks(course)
+    
+    def skip_occurrence(self, course: Any, day: date) -> bool:
+        """
+        跳过课程某一天的上课（用户删除或单独修改该次课程），由调用方提交事务
+        指定日期的课程直接删除；周期课程把该周加入skipped_weeks，同步学期课表更新周次范围时仍然保留
+        :param course: 课程对象
+        :param day: 日期
+        :return: 课程在该日期没有上课时返回False
+        """
+        from extensions import db
+        
+        if not self.occurs_on(course, day):
+            return False
+        if course.date:
+            db.session.delete(course)
+        else:
+            skipped = parse_week_range(course.skipped_weeks or '') | {course_week_number(course, day)}
+            course.skipped_weeks = format_week_range(skipped)
+        return True
+    
+    def virtual_entries(self, start: date, end: date, stored_entries: Optional[Iterable[Any]] = None) -> List[Dict[str, Any]]:
+        """
+        生成时间窗口内的虚拟课程条目，跳过已作为Entry保存的相同课程
+        :param start: 开始日期（包含）
+        :param end: 结束日期（包含）
+        :param stored_entries: 已保存的条目，用于去重
+        :return: 虚拟条目字典列表
+        """
+        from models.course import Course
+        
+        stored_keys = set()
+        for entry in stored_entries or ():
+            if entry.entry_type == 'course':
+                stored_keys.add((entry.title, entry.start_time, entry.end_time))
+        
+        result = []
+        for occurrence in self.expand(Course.query.all(), start, end):
+            key = (occurrence['course'].course_name, occurrence['start_time'], occurrence['end_time'])
+            if key in stored_keys:
+                continue
+            result.append(self.to_entry_dict(occurrence))
+        return result
+    
+    def merge_entries(self, stored_entries: List[Any], start: date, end: date) -> List[Dict[str, Any]]:
+        """
+        合并已保存的条目和虚拟课程条目，按开始时间排序
+        :param stored_entries: 已保存的Entry对象列表
+        :param start: 开始日期（包含）
+        :param end: 结束日期（包含）
+        :return: 条目字典列表
+        """
+        merged = [entry.to_dict() for entry in stored_entries]
+        merged.extend(self.virtual_entries(start, end, stored_entries))
+        merged.sort(key=lambda item: item['start_time'])
+        return merged
+
+
+# 创建全局课程展开引擎实例
+course_recurrence_engine = CourseRecurrenceEngine()
@@ -0,0 +1,529 @@
+import hashlib
+import json
+import logging
+from datetime import date, datetime, time as time_obj
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from extensions import db
+from models.course import Course
+from models.entry import Entry
+from models.sync_state import SyncState
+from services.course_recurrence import (
+    parse_week_range, format_week_range, get_semester_start, course_semester_start, course_week_number
+)
+from services.buaa_api import buaa_api_client, parse_course_data, parse_term_schedule_data
+
+logger = logging.getLogger(__name__)
+
+# 从北航课表同步的课程的来源标记，同步只修改和删除带有该标记的课程
+COURSE_SOURCE_SYNC = 'sync'
+
+
+def content_fingerprint(payload: Any) -> str:
+    """
+    计算接口响应内容的指纹，键顺序不同的相同内容得到相同指纹
+    :param payload: 响应中的数据部分
+    :return: SHA-256十六进制字符串
+    """
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class SyncTracker:
+    """
+    增量同步跟踪器：一次性加载指定接口的同步状态，判断每个日期的响应是否与上次同步相同
+    状态更新与课程数据在同一事务中提交
+    """
+    
+    def __init__(self, endpoint: str, keys: Iterable[str]):
+        self.endpoint = endpoint
+        keys = list(keys)
+        self.states = {
+            state.sync_key: state
+            for state in SyncState.query.filter(SyncState.endpoint == endpoint, SyncState.sync_key.in_(keys)).all()
+        } if keys else {}
+        self.report = {'skipped': [], 'changed': [], 'new': []}
+    
+    def check(self, key: str, payload: Any) -> Optional[str]:
+        """
+        比较响应指纹并记录结果
+        :param key: 日期或学期代码
+        :param payload: 响应数据
+        :return: 内容变化时返回新指纹，与上次同步相同时返回None
+        """
+        fingerprint = content_fingerprint(payload)
+        state = self.states.get(key)
+        if state is None:
+            self.report['new'].append(key)
+        elif state.content_hash == fingerprint:
+            self.report['skipped'].append(key)
+            return None
+        else:
+            self.report['changed'].append(key)
+        return fingerprint
+    
+    def record(self, key: str, fingerprint: str) -> None:
+        """保存日期的最新指纹（在调用方提交事务后生效）"""
+        state = self.states.get(key)
+        if state is None:
+            state = SyncState(endpoint=self.endpoint, sync_key=key, content_hash=fingerprint)
+            db.session.add(state)
+            self.states[key] = state
+        else:
+            state.content_hash = fingerprint
+
+
+def _parse_time(time_str: str) -> time_obj:
+    """将 HH:MM 字符串解析为time对象"""
+    hour, minute = time_str.split(':')[:2]
+    return time_obj(int(hour), int(minute))
+
+
+def course_identity(course_item: Dict[str, Any]) -> Tuple[str, str, str, time_obj, time_obj, int]:
+    """
+    课程唯一标识：课程名称、教师、教室、开始时间、结束时间和星期几
+    :param course_item: parse_course_data/parse_term_schedule_data解析后的课程数据
+    :return: 课程唯一标识
+    """
+    return (
+        course_item['kcmc'],
+        course_item['jsxm'],
+        f"{course_item['jxlh']}{course_item['jash']}",
+        _parse_time(course_item['kssj']),
+        _parse_time(course_item['jssj']),
+        int(course_item['xqj'])
+    )
+
+
+def _stored_identity(course: Course) -> Tuple[str, str, str, time_obj, time_obj, int]:
+    """已保存课程的唯一标识"""
+    return (course.course_name, course.teacher, course.classroom, course.start_time, course.end_time, course.day_of_week)
+
+
+def _slot(identity: Tuple) -> Tuple[str, time_obj, time_obj, int]:
+    """课程名称和上课时间（不含教师和教室，按天查询的数据中二者的格式与学期课表不一致）"""
+    return identity[0], identity[3], identity[4], identity[5]
+
+
+def _item_semester_start(course_item: Dict[str, Any]) -> date:
+    """按天查询的课程数据所属学期：查询日期所在的学期，没有日期时为今天所在的学期"""
+    try:
+        day = datetime.strptime(course_item['original_date'], '%Y-%m-%d').date()
+    except (KeyError, TypeError, ValueError):
+        day = date.today()
+    return get_semester_start(day)
+
+
+def upsert_day_courses(parsed_courses: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    按天同步时增量更新课程表
+    按天查询得到的周次只包含查询日期所在的教学周，因此与已保存的周次合并而不是覆盖；
+    课程按查询日期所在的学期保存，不同学期的相同课程是不同的记录
+    :param parsed_courses: 解析后的课程数据列表
+    :return: 新增和更新的课程数量
+    """
+    # 一次性加载所有周期课程，避免逐条查询
+    stored = {
+        (course_semester_start(course), _stored_identity(course)): course
+        for course in Course.query.filter(Course.date.is_(None)).all()
+    }
+    
+    add_count = 0
+    update_count = 0
+    for course_item in parsed_courses:
+        try:
+            identity = course_identity(course_item)
+        except (KeyError, ValueError):
+            continue
+        
+        semester_start = _item_semester_start(course_item)
+        existing_course = stored.get((semester_start, identity))
+        if existing_course:
+            existing_course.source = COURSE_SOURCE_SYNC
+            existing_course.semester_start = semester_start
+            if course_item.get('zcd_exact', True):
+                existing_course.week_range = course_item['zcd']
+            else:
+                merged_weeks = parse_week_range(existing_course.week_range) | parse_week_range(course_item['zcd'])
+                existing_course.week_range = format_week_range(merged_weeks)
+            update_count += 1
+        else:
+            new_course = Course(
+                course_name=identity[0],
+                teacher=identity[1],
+                classroom=identity[2],
+                start_time=identity[3],
+                end_time=identity[4],
+                day_of_week=identity[5],
+                week_range=course_item['zcd'],
+                source=COURSE_SOURCE_SYNC,
+                semester_start=semester_start
+            )
+            db.session.add(new_course)
+            stored[(semester_start, identity)] = new_course
+            add_count += 1
+    
+    return {'added': add_count, 'updated': update_count}
+
+
+def reconcile_term_courses(parsed_courses: Iterable[Dict[str, Any]], semester_start: date,
+                           remove_stale: bool = False) -> Dict[str, int]:
+    """
+    用学期课表对比该学期已保存的周期课程：新增缺少的课程，更新周次变化的课程，
+    学期课表中已不存在的同步课程只在remove_stale为True时删除，否则保留并计入stale
+    手动添加的课程保持不变；与学期课表相同的旧课程（升级前保存的）标记为同步的课程；
+    其它学期的课程不参与对比
+    :param parsed_courses: parse_term_schedule_data解析后的课程数据列表
+    :param semester_start: 学期第一周周一
+    :param remove_stale: 是否删除学期课表中已不存在的同步课程
+    :return: 新增、更新、未变化、删除和保留的过期课程数量
+    """
+    stored = {
+        _stored_identity(course): course
+        for course in Course.query.filter(Course.date.is_(None)).all()
+        if course_semester_start(course) == semester_start
+    }
+    
+    # 同一时间段的课程可能被拆成多条记录（如不同教师分段授课），先合并周次
+    term_weeks: Dict[Tuple, set] = {}
+    for course_item in parsed_courses:
+        try:
+            identity = course_identity(course_item)
+        except (KeyError, ValueError):
+            continue
+        term_weeks.setdefault(identity, set()).update(parse_week_range(course_item['zcd']))
+    
+    result = {'added': 0, 'updated': 0, 'unchanged': 0, 'removed': 0, 'stale': 0}
+    missing = {}
+    for identity, weeks in term_weeks.items():
+        existing_course = stored.pop(identity, None)
+        if existing_course is None:
+            missing[identity] = weeks
+            continue
+        existing_course.source = COURSE_SOURCE_SYNC
+        existing_course.semester_start = semester_start
+        if parse_week_range(existing_course.week_range) != frozenset(weeks):
+            existing_course.week_range = format_week_range(weeks)
+            result['updated'] += 1
+        else:
+            result['unchanged'] += 1
+    
+    # 教师、教室格式不同的同一门同步课程（如按天同步保存的）按课程名称和上课时间匹配，
+    # 更新而不是删除后重新添加，保留用户跳过的周次
+    synced_by_slot: Dict[Tuple, List[Course]] = {}
+    for course in stored.values():
+        if course.source == COURSE_SOURCE_SYNC:
+            synced_by_slot.setdefault(_slot(_stored_identity(course)), []).append(course)
+    for identity, weeks in missing.items():
+        candidates = synced_by_slot.get(_slot(identity))
+        if candidates:
+            course = candidates.pop()
+            del stored[_stored_identity(course)]
+            course.teacher, course.classroom = identity[1], identity[2]
+            course.week_range = format_week_range(weeks)
+            result['updated'] += 1
+            continue
+        db.session.add(Course(
+            course_name=identity[0],
+            teacher=identity[1],
+            classroom=identity[2],
+            start_time=identity[3],
+            end_time=identity[4],
+            day_of_week=identity[5],
+            week_range=format_week_range(weeks),
+            source=COURSE_SOURCE_SYNC,
+            semester_start=semester_start
+        ))
+        result['added'] += 1
+    
+    # 剩余的同步课程不在学期课表中
+    for stale_course in stored.values():
+        if stale_course.source != COURSE_SOURCE_SYNC:
+            continue
+        if not remove_stale:
+            logger.info("同步课程 %s 不在学期课表中，保留", stale_course.course_name)
+            result['stale'] += 1
+            continue
+        db.session.delete(stale_course)
+        result['removed'] += 1
+    
+    return result
+
+
+def apply_day_adjustments(date_str: str, parsed_courses: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    按某一天的实际课表修正学期课表（调课、停课）
+    该日期缺少的同步课程从周次中移除该周；多出的课程作为指定日期的课程保存（手动添加的课程不受影响）
+    按天查询的数据中教师、教室格式与学期课表不一致，因此只按课程名称和上课时间比对
+    :param date_str: 日期，格式为YYYY-MM-DD
+    :param parsed_courses: 该日期按天查询解析后的课程数据列表
+    :return: 移除的周次数量和新增的调课数量
+    """
+    day = datetime.strptime(date_str, '%Y-%m-%d').date()
+    semester_start = get_semester_start(day)
+    week = (day - semester_start).days // 7 + 1
+    weekday = day.isoweekday()
+    
+    actual = {}
+    for course_item in parsed_courses:
+        try:
+            identity = course_identity(course_item)
+        except (KeyError, ValueError):
+            continue
+        actual[(identity[0], identity[3], identity[4])] = identity
+    
+    result = {'cancelled': 0, 'extra': 0}
+    
+    # 周期课程中本应在该日上课但实际没有的，移除该周
+    expected = set()
+    for course in Course.query.filter(Course.date.is_(None), Course.day_of_week == weekday,
+                                      Course.source == COURSE_SOURCE_SYNC).all():
+        weeks = parse_week_range(course.week_range)
+        if course_week_number(course, day) != week or week not in weeks:
+            continue
+        slot = (course.course_name, course.start_time, course.end_time)
+        if slot in actual:
+            expected.add(slot)
+        else:
+            course.week_range = format_week_range(weeks - {week})
+            result['cancelled'] += 1
+    
+    # 重新生成该日期的调课记录
+    Course.query.filter(Course.date == day, Course.source == COURSE_SOURCE_SYNC).delete(synchronize_session=False)
+    for slot, identity in actual.items():
+        if slot in expected:
+            continue
+        db.session.add(Course(
+            course_name=identity[0],
+            teacher=identity[1],
+            classroom=identity[2],
+            start_time=identity[3],
+            end_time=identity[4],
+            day_of_week=weekday,
+            week_range=str(week),
+            date=day,
+            source=COURSE_SOURCE_SYNC,
+            semester_start=semester_start
+        ))
+        result['extra'] += 1
+    
+    return result
+
+
+def save_exam_entries(exam_data: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    将考试数据保存为Entry
+    :param exam_data: 考试接口返回的考试列表
+    :return: 新增和更新的考试数量
+    """
+    add_count = 0
+    update_count = 0
+    
+    for exam_item in exam_data:
+        try:
+            # 解析考试日期和时间
+            exam_date_str = exam_item['examDate'].split(' ')[0]  # 提取日期部分
+            
+            # 构建完整的开始和结束时间
+            start_datetime = datetime.fromisoformat(f"{exam_date_str}T{exam_item['startTime']}:00")
+            end_datetime = datetime.fromisoformat(f"{exam_date_str}T{exam_item['endTime']}:00")
+            description = f"考试地点: {exam_item['examPlace']}\n考试时间: {exam_item['examTimeDescription']}"
+            
+            # 查找是否已存在相同的考试条目
+            existing_exam = Entry.query.filter(
+                Entry.title == exam_item['courseName'],
+                Entry.entry_type == 'exam',
+                Entry.start_time == start_datetime,
+                Entry.end_time == end_datetime
+            ).first()
+            
+            if existing_exam:
+                # 如果存在，更新现有考试条目
+                existing_exam.description = description
+                existing_exam.color = '#ff4444'
+                update_count += 1
+            else:
+                # 如果不存在，添加新考试条目
+                db.session.add(Entry(
+                    title=exam_item['courseName'],
+                    description=description,
+                    entry_type='exam',
+                    start_time=start_datetime,
+                    end_time=end_datetime,
+                    color='#ff4444'
+                ))
+                add_count += 1
+        except ValueError as e:
+            logger.warning("解析考试日期时间失败: %s", e)
+            continue
+        except Exception as e:
+            logger.warning("保存考试数据失败: %s", e)
+            continue
+    
+    return {'added': add_count, 'updated': update_count}
+
+
+def sync_day_courses(day_data: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    同步按天获取的课程数据：跳过与上次同步相同的日期，解析、去重后增量更新课程表（调用方负责提交事务）
+    :param day_data: 日期到该日课程接口返回的课程列表的映射
+    :return: 课程数量、新增和更新数量以及每个日期的同步报告
+    """
+    # 一次性加载这些日期上次同步的内容指纹
+    day_tracker = SyncTracker('teaching_schedule', list(day_data))
+    
+    all_courses = []
+    for date_str, course_data in day_data.items():
+        # 响应内容与上次同步相同，跳过解析和数据库对比
+        fingerprint = day_tracker.check(date_str, course_data)
+        if fingerprint is None:
+            logger.info("日期 %s 的课程数据未变化，跳过", date_str)
+            continue
+        day_tracker.record(date_str, fingerprint)
+        
+        # 构建API返回的数据格式，兼容parse_course_data函数
+        parsed_courses = parse_course_data({"datas": course_data, "code": "0", "msg": None}, date_str)
+        logger.info("日期 %s 解析后的课程数据: %s", date_str, parsed_courses)
+        all_courses.extend(parsed_courses)
+    
+    # 日志：总共获取到的课程数量
+    logger.info("总共获取到的课程数量: %s", len(all_courses))
+    
+    # 对课程数据进行去重
+    # 使用课程名称、教师、教室、开始时间、结束时间和星期几作为去重依据
+    unique_courses = []
+    seen_courses = set()
+    for course in all_courses:
+        # 构建唯一标识，包含原始日期以区分不同日期的相同课程
+        course_key = f"{course['kcmc']}_{course['jsxm']}_{course['jxlh']}{course['jash']}_{course['kssj']}_{course['jssj']}_{course['xqj']}_{course.get('original_date', '')}"
+        if course_key not in seen_courses:
+            seen_courses.add(course_key)
+            unique_courses.append(course)
+    
+    # 日志：去重后的课程数据
+    logger.info("去重后的课程数量: %s", len(unique_courses))
+    
+    # 保存课程数据：课程实例由课程展开引擎按周次动态生成，不再为每个上课日期单独保存Entry
+    course_result = {'added': 0, 'updated': 0}
+    if unique_courses:
+        course_result = upsert_day_courses(unique_courses)
+        logger.info("课程数据保存完成：新增 %s 门，更新 %s 门课程", course_result['added'], course_result['updated'])
+    
+    return {
+        'course_count': len(unique_courses),
+        'added': course_result['added'],
+        'updated': course_result['updated'],
+        'days': day_tracker.report
+    }
+
+
+def fetch_term_timetable(user_key: str, reference_date: str) -> Dict[str, Any]:
+    """
+    获取学期课表，并按天获取其中有调课/停课的日期的实际课表（只发送网络请求，不访问数据库）
+    各请求依次使用同一个会话，调用方不能在其他线程中同时使用该会话
+    :param user_key: 用户唯一标识
+    :param reference_date: 参考日期，格式为YYYY-MM-DD，用于确定学期
+    :return: need_login和error；成功时包含term_code、semester_start、term_data、term_courses、adjusted_dates和day_data
+    :raises ValueError: 日期格式错误
+    """
+    term_code = buaa_api_client._calculate_term_code(reference_date)
+    semester_start = get_semester_start(datetime.strptime(reference_date, '%Y-%m-%d').date())
+    
+    logger.info("获取学期课表，学期: %s", term_code)
+    term_result = buaa_api_client.fetch_term_schedule(user_key, term_code)
+    if term_result.get('need_login'):
+        return {'need_login': True}
+    if term_result.get('error'):
+        return {'need_login': False, 'error': f"获取学期课表失败: {term_result['error']}"}
+    
+    term_courses, adjusted_dates = parse_term_schedule_data(term_result.get('data'))
+    if not term_courses:
+        return {'need_login': False, 'error': '学期课表为空或格式无法识别'}
+    
+    # 只对有调课/停课的日期回退到按天查询
+    day_data = {}
+    for date_str in sorted(adjusted_dates):
+        day_result = buaa_api_client.fetch_course_schedule(user_key, date_str)
+        if day_result.get('need_login'):
+            return {'need_login': True}
+        if day_result.get('error'):
+            logger.warning("获取日期 %s 的课程数据失败: %s", date_str, day_result['error'])
+            continue
+        day_data[date_str] = day_result.get('data', {}).get('data', [])
+    
+    return {
+        'need_login': False,
+        'term_code': term_code,
+        'semester_start': semester_start,
+        'term_data': term_result.get('data'),
+        'term_courses': term_courses,
+        'adjusted_dates': sorted(adjusted_dates),
+        'day_data': day_data
+    }
+
+
+def sync_term_courses(timetable: Dict[str, Any], remove_stale: bool = False) -> Dict[str, Any]:
+    """
+    保存学期课表：与上次同步相同时跳过对比，否则与该学期已保存的课程对比，
+    再按有调课/停课的日期的实际课表修正（调用方负责提交事务）
+    :param timetable: fetch_term_timetable成功时的返回值
+    :param remove_stale: 是否删除学期课表中已不存在的同步课程
+    :return: 课程数量、对比结果、调课修正结果和学期、日期的同步报告
+    """
+    term_code = timetable['term_code']
+    term_courses = timetable['term_courses']
+    
+    # 学期课表与上次同步相同时跳过对比
+    term_tracker = SyncTracker('term_schedule', [term_code])
+    term_fingerprint = term_tracker.check(term_code, timetable['term_data'])
+    if term_fingerprint is None:
+        course_result = {'added': 0, 'updated': 0, 'unchanged': len(term_courses), 'removed': 0, 'stale': 0}
+    else:
+        course_result = reconcile_term_courses(term_courses, timetable['semester_start'], remove_stale=remove_stale)
+        term_tracker.record(term_code, term_fingerprint)
+    logger.info("学期课表对比完成：%s", course_result)
+    
+    adjustment_result = {'cancelled': 0, 'extra': 0}
+    day_tracker = SyncTracker('teaching_schedule', list(timetable['day_data']))
+    for date_str, course_data in sorted(timetable['day_data'].items()):
+        day_fingerprint = day_tracker.check(date_str, course_data)
+        # 学期课表重新对比后会覆盖之前的调课修正，此时即使当天数据未变化也需要重新应用
+        if day_fingerprint is None and term_fingerprint is None:
+            continue
+        
+        parsed_courses = parse_course_data({"datas": course_data}, date_str)
+        day_adjustment = apply_day_adjustments(date_str, parsed_courses)
+        adjustment_result['cancelled'] += day_adjustment['cancelled']
+        adjustment_result['extra'] += day_adjustment['extra']
+        if day_fingerprint is not None:
+            day_tracker.record(date_str, day_fingerprint)
+    
+    return {
+        'term_code': term_code,
+        'course_count': len(term_courses),
+        'courses': course_result,
+        'term': term_tracker.report,
+        'adjusted_dates': timetable['adjusted_dates'],
+        'adjustments': adjustment_result,
+        'days': day_tracker.report
+    }
+
+
+def sync_exam_data(term_code: str, exam_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    保存本学期考试信息，考试响应与上次同步相同时跳过保存（调用方负责提交事务）
+    :param term_code: 学期代码
+    :param exam_data: 考试接口返回的考试列表
+    :return: 考试数量和同步报告
+    """
+    tracker = SyncTracker('exams', [term_code])
+    fingerprint = tracker.check(term_code, exam_data)
+    if fingerprint is None:
+        logger.info("考试数据与上次同步相同，跳过保存")
+        return {'exam_count': len(exam_data), 'exams': tracker.report}
+    
+    if exam_data:
+        exam_save_result = save_exam_entries(exam_data)
+        logger.info("考试数据保存完成：新增 %s 条，更新 %s 条考试条目", exam_save_result['added'], exam_save_result['updated'])
+    tracker.record(term_code, fingerprint)
+    return {'exam_count': len(exam_data), 'exams': tracker.report}
@@ -0,0 +1,145 @@
+import logging
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert
+
+from extensions import db
+from models.focus_record import FocusRecord
+from models.focus_rollup import FocusRollup
+from services.user_scope import current_user_id
+
+logger = logging.getLogger(__name__)
+
+# 专注统计支持的分组方式
+GROUP_BY_OPTIONS = ('day', 'week', 'task')
+# 原始专注记录的保留天数（汇总数据不受影响）
+DEFAULT_RETENTION_DAYS = 30
+
+
+class FocusStatsService:
+    """
+    专注统计：按（日期, 任务）维护汇总表，保存专注记录时在同一事务中增量累加，
+    统计查询只读汇总表，原始记录由维护任务调度器定期清理（compact）
+    """
+    
+    def record(self, focus_record: FocusRecord) -> None:
+        """
+        把一条专注记录累加到汇总表（由调用方提交事务）
+        :param focus_record: 新的专注记录
+        """
+        statement = insert(FocusRollup).values(
+            user_id=focus_record.user_id or current_user_id(),
+            day=focus_record.start_time.date(),
+            task_title=focus_record.task_title,
+            total_seconds=focus_record.duration,
+            session_count=1,
+            updated_at=datetime.utcnow()
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=['user_id', 'day', 'task_title'],
+            set_={
+                'total_seconds': FocusRollup.total_seconds + statement.excluded.total_seconds,
+                'session_count': FocusRollup.session_count + 1,
+                'updated_at': statement.excluded.updated_at
+            }
+        )
+        db.session.execute(statement)
+    
+    def backfill(self) -> int:
+        """
+        汇总表为空而存在原始记录时（升级后首次启动），用现有记录一次性生成汇总
+        :return: 生成的汇总行数
+        """
+        if db.session.query(FocusRollup.id).first() is not None:
+            return 0
+        if db.session.query(FocusRecord.id).first() is None:
+            return 0
+        
+        rows = db.session.query(
+            FocusRecord.user_id,
+            func.date(FocusRecord.start_time),
+            FocusRecord.task_title,
+            func.sum(FocusRecord.duration),
+            func.count(FocusRecord.id)
+        ).group_by(FocusRecord.user_id, func.date(FocusRecord.start_time), FocusRecord.task_title).all()
+        now = datetime.utcnow()
+        db.session.execute(FocusRollup.__table__.insert(), [
+            {
+                'user_id': user_id,
+                'day': date.fromisoformat(day),
+                'task_title': task_title,
+                'total_seconds': int(total_seconds or 0),
+                'session_count': session_count,
+                'updated_at': now
+            }
+            for user_id, day, task_title, total_seconds, session_count in rows
+        ])
+        db.session.commit()
+        logger.info("已根据%d组专注记录生成汇总", len(rows))
+        return len(rows)
+    
+    def stats(self, start: date, end: date, group_by: str = 'day') -> Dict[str, Any]:
+        """
+        查询 [start, end] 内的专注统计
+        :param start: 开始日期（含）
+        :param end: 结束日期（含）
+        :param group_by: day / week（周一开始） / task
+        :return: {group_by, from, to, stats: [{key, total_seconds, session_count}], total_seconds, session_count}
+        """
+        if group_by not in GROUP_BY_OPTIONS:
+            raise ValueError(f"不支持的分组方式: {group_by}")
+        
+        key_column = FocusRollup.task_title if group_by == 'task' else FocusRollup.day
+        rows = db.session.query(
+            key_column,
+            func.sum(FocusRollup.total_seconds),
+            func.sum(FocusRollup.session_count)
+        ).filter(
+            FocusRollup.day >= start,
+            FocusRollup.day <= end
+        ).group_by(key_column).order_by(key_column).all()
+        
+        groups: Dict[str, Dict[str, Any]] = {}
+        for key, total_seconds, session_count in rows:
+            if group_by == 'week':
+                key = key - timedelta(days=key.weekday())
+            if isinstance(key, date):
+                key = key.isoformat()
+            group = groups.setdefault(key, {'key': key, 'total_seconds': 0, 'session_count': 0})
+            group['total_seconds'] += int(total_seconds or 0)
+            group['session_count'] += int(session_count or 0)
+        
+        stats: List[Dict[str, Any]] = list(groups.values())
+        if group_by == 'task':
+            stats.sort(key=lambda group: -group['total_seconds'])
+        
+        return {
+            'group_by': group_by,
+            'from': start.isoformat(),
+            'to': end.isoformat(),
+            'stats': stats,
+            'total_seconds': sum(group['total_seconds'] for group in stats),
+            'session_count': sum(group['session_count'] for group in stats)
+        }
+    
+    def compact(self, retention_days: int = DEFAULT_RETENTION_DAYS, now: Optional[datetime] = None) -> int:
+        """
+        删除超过保留天数的原始专注记录（单条DELETE语句），汇总数据保留
+        :param retention_days: 保留天数
+        :param now: 当前时间，默认为UTC当前时间
+        :return: 删除的记录数
+        """
+        cutoff = (now or datetime.utcnow()) - timedelta(days=retention_days)
+        deleted_count = FocusRecord.query.filter(
+            FocusRecord.end_time < cutoff
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        if deleted_count:
+            logger.info("已清理%d条%d天前的专注记录", deleted_count, retention_days)
+        return deleted_count
+
+
+# 创建全局专注统计服务实例
+focus_stats_service = FocusStatsService()
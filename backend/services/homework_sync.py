@@ -0,0 +1,202 @@
+import hashlib
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from extensions import db
+from models.entry import Entry
+from models.task import Task
+
+logger = logging.getLogger(__name__)
+
+
+# 外部ID前缀，区分不同来源的任务
+SPOC_ID_PREFIX = 'spoc:'
+
+
+def homework_title(homework: Dict[str, Any]) -> str:
+    """作业对应任务的标题：课程名称+作业名称"""
+    return f"{homework.get('kcmc', '')}+{homework.get('zymc', '')}"[:100]
+
+
+def homework_external_id(homework: Dict[str, Any]) -> str:
+    """
+    获取作业的外部ID
+    优先使用SPOC返回的作业ID；缺少ID时使用课程名称和作业名称的哈希，保证同一作业每次同步得到相同的ID
+    :param homework: SPOC作业数据
+    :return: 外部ID，如 "spoc:8a8a..."
+    """
+    homework_id = homework.get('zyid') or homework.get('id')
+    if homework_id:
+        return f"{SPOC_ID_PREFIX}{homework_id}"
+    digest = hashlib.sha1(homework_title(homework).encode('utf-8')).hexdigest()
+    return f"{SPOC_ID_PREFIX}t{digest}"
+
+
+def parse_homework_deadline(deadline_str: Optional[str]) -> Optional[datetime]:
+    """
+    解析作业截止时间
+    :param deadline_str: 截止时间字符串，格式为 "YYYY-MM-DD HH:MM:SS" 或 "YYYY-MM-DD"
+    :return: 截止时间，无法解析时返回None
+    """
+    if not deadline_str:
+        return None
+    for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(deadline_str, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+class HomeworkSyncSession:
+    """
+    一次SPOC作业同步：开始时一次性加载已同步的作业，逐页合并新作业和变化的截止时间，
+    结束时把本次未出现的作业标记为已完成（SPOC只返回未完成的作业）
+    """
+    
+    def __init__(self):
+        # 已同步的作业任务，按外部ID索引
+        self.existing: Dict[str, Task] = {
+            task.external_id: task
+            for task in Task.query.filter(Task.external_id.like(f"{SPOC_ID_PREFIX}%")).all()
+        }
+        # 旧版本按标题同步、没有外部ID的作业任务，首次出现时补上外部ID而不是重复创建
+        self.legacy: Dict[str, Task] = {
+            task.title: task
+            for task in Task.query.filter(Task.external_id.is_(None), Task.task_type == 'homework').all()
+        }
+        self.seen = set()
+        self.created_tasks: List[Task] = []
+        self.page_timings: List[Dict[str, Any]] = []
+        self.result = {'total': 0, 'created': 0, 'updated': 0, 'unchanged': 0, 'completed': 0, 'skipped': 0}
+    
+    def add_page(self, homework_list: Iterable[Dict[str, Any]]) -> None:
+        """
+        合并一页作业数据
+        :param homework_list: SPOC作业数据列表
+        """
+        new_tasks = []
+        for homework in homework_list:
+            self.result['total'] += 1
+            external_id = homework_external_id(homework)
+            if external_id in self.seen:
+                continue
+            self.seen.add(external_id)
+            
+            deadline = parse_homework_deadline(homework.get('zyjzsj'))
+            title = homework_title(homework)
+            
+            task = self.existing.get(external_id) or self.legacy.pop(title, None)
+            if task is not None:
+                task.external_id = external_id
+                if deadline is not None and task.deadline != deadline:
+                    task.deadline = deadline
+                    self.result['updated'] += 1
+                else:
+                    self.result['unchanged'] += 1
+                self.existing[external_id] = task
+                continue
+            
+            # 任务的截止时间为必填字段，无法解析截止时间的作业跳过
+            if deadline is None:
+                self.result['skipped'] += 1
+                continue
+            
+            new_tasks.append(Task(
+                title=title,
+                description=homework.get('zyxq', ''),
+                task_type='homework',
+                deadline=deadline,
+                external_id=external_id
+            ))
+        
+        if new_tasks:
+            db.session.add_all(new_tasks)
+            self.created_tasks.extend(new_tasks)
+            self.result['created'] += len(new_tasks)
+    
+    def finish(self) -> Dict[str, int]:
+        """
+        标记本次同步中未出现的作业为已完成
+        :return: 同步结果统计
+        """
+        for external_id, task in self.existing.items():
+            if external_id not in self.seen and not task.completed:
+                task.completed = True
+                self.result['completed'] += 1
+        return self.result
+
+
+def sync_homework_pages(pages: Iterable[Dict[str, Any]]) -> HomeworkSyncSession:
+    """
+    把分页获取的SPOC作业同步为任务（调用方负责提交事务）
+    :param pages: iter_all_homeworks产出的分页结果
+    :return: 同步会话，包含result统计、created_tasks和每页耗时page_timings
+    """
+    sync_session = HomeworkSyncSession()
+    for page in pages:
+        sync_session.add_page(page['list'])
+        sync_session.page_timings.append({
+            'page': page['page'],
+            'count': len(page['list']),
+            'elapsed_ms': round(page['elapsed'] * 1000, 1)
+        })
+    sync_session.page_timings.sort(key=lambda item: item['page'])
+    sync_session.finish()
+    return sync_session
+
+
+def schedule_homework_tasks(tasks: Iterable[Task]) -> List[Entry]:
+    """
+    调用LLM为作业任务安排学习时间，每个任务生成的日程条目单独提交
+    :param tasks: 需要安排时间的任务
+    :return: 创建的日程条目
+    """
+    from services.llm_parser import LLMParser
+    llm_parser = LLMParser()
+    
+    created_entries = []
+    
+    # 为每个新创建的任务调用LLM生成日程安排
+    for task in tasks:
+        try:
+            # 准备任务数据
+            task_data = {
+                'title': task.title,
+                'description': task.description,
+                'task_type': 'homework',
+                'deadline': task.deadline.isoformat() if task.deadline else '',
+                'priority': task.priority
+            }
+            
+            # 调用LLM生成日程安排
+            llm_result = llm_parser.generate_entries_from_task(task_data)
+            if not llm_result:
+                continue
+            
+            # 解析LLM返回的JSON
+            llm_data = json.loads(llm_result)
+            
+            # 创建条目
+            for entry in llm_data.get('entries') or []:
+                new_entry = Entry(
+                    title=entry['title'],
+                    description=entry.get('description', ''),
+                    entry_type=entry.get('entry_type', 'study'),
+                    start_time=datetime.fromisoformat(entry['start_time'].replace(' ', 'T')),
+                    end_time=datetime.fromisoformat(entry['end_time'].replace(' ', 'T')),
+                    color=entry.get('color', '#4a90e2')
+                )
+                
+                db.session.add(new_entry)
+                db.session.commit()
+                
+                created_entries.append(new_entry)
+        except Exception as e:
+            db.session.rollback()
+            logger.warning("为任务 %s 生成日程安排失败: %s", task.title, e)
+            continue
+    
+    return created_entries
@@ -4,11 +4,12 @@ import requests
 from dashscope import Generation
 import dashscope
 from config import Config
+from services.metrics import metrics_recorder
 
 class LLMParser:
     def __init__(self):
         # 初始化阿里云百炼大模型配置
-        dashscope.base_http_api_url = 'https://dashscope.aliyuncs.com/api/v1'
+        dashscope.base_http_api_url = Config.DASHSCOPE_BASE_URL
     
     def _get_api_key(self):
         """获取API_KEY - 每次调用时重新获取，确保能获取到最新的环境变量和配置"""
@@ -116,13 +117,14 @@ class LLMParser:
             
             # 调用大语言模型API
             messages = [{"role": "user", "content": prompt}]
-            response = Generation.call(
-                api_key=api_key,
-                model="qwen-plus-2025-12-01",
-                messages=messages,
-                result_format="message",
-                enable_thinking=True,
-            )
+            with metrics_recorder.track_outbound('dashscope'):
+                response = Generation.call(
+                    api_key=api_key,
+                    model="qwen-plus-2025-12-01",
+                    messages=messages,
+                    result_format="message",
+                    enable_thinking=True,
+                )
             
             # 解析响应
             if response.status_code == 200:
@@ -205,13 +207,14 @@ class LLMParser:
             
             # 调用大语言模型API
             messages = [{"role": "user", "content": prompt}]
-            response = Generation.call(
-                api_key=api_key,
-                model="qwen-plus-2025-12-01",
-                messages=messages,
-                result_format="message",
-                enable_thinking=True,
-            )
+            with metrics_recorder.track_outbound('dashscope'):
+                response = Generation.call(
+                    api_key=api_key,
+                    model="qwen-plus-2025-12-01",
+                    messages=messages,
+                    result_format="message",
+                    enable_thinking=True,
+                )
             
             # 解析响应
             if response.status_code == 200:
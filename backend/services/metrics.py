@@ -0,0 +1,310 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+
+# 延迟直方图的桶上界（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# 每个请求数据库查询次数的桶上界
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+# 外部服务域名 -> 指标标签，按顺序匹配后缀
+OUTBOUND_TARGETS = (
+    ('spoc.buaa.edu.cn', 'spoc'),
+    ('buaa.edu.cn', 'buaa'),
+    ('dashscope.aliyuncs.com', 'dashscope'),
+    ('cpolar.com', 'cpolar'),
+)
+
+
+def outbound_target(url: str) -> str:
+    """
+    根据URL判断外部服务
+    :param url: 请求URL
+    :return: 指标标签，如 "buaa"、"spoc"、"dashscope"，无法识别时为 "other"
+    """
+    host = urlsplit(url).hostname or ''
+    for suffix, target in OUTBOUND_TARGETS:
+        if host == suffix or host.endswith('.' + suffix):
+            return target
+    return 'other'
+
+
+class Histogram:
+    """
+    固定桶直方图：记录时只做一次二分查找和几次加法，导出时再计算累计计数
+    """
+    
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        # 最后一个位置对应 +Inf 桶
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, value: float) -> None:
+        """记录一个观测值（调用方持有锁）"""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+    
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """按Prometheus格式返回 (le, 累计计数) 列表"""
+        result = []
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            result.append((_format_value(bound), total))
+        result.append(('+Inf', total + self.counts[-1]))
+        return result
+
+
+class _RequestState(threading.local):
+    """当前线程正在处理的请求的统计"""
+    active = False
+    started = 0.0
+    db_queries = 0
+    db_time = 0.0
+    outbound_time = 0.0
+
+
+class MetricsRecorder:
+    """
+    进程内指标记录器：
+    - 每个蓝图/路由的请求延迟直方图和状态码计数
+    - 每个请求的数据库查询次数和耗时（SQLAlchemy事件）
+    - 访问北航、SPOC、DashScope等外部服务的耗时
+    所有指标共用一把锁，记录时只更新内存中的计数
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = _RequestState()
+        self.request_latency: Dict[Tuple[str, str, str], Histogram] = {}
+        self.request_db_queries: Dict[Tuple[str, str, str], Histogram] = {}
+        self.request_db_time: Dict[Tuple[str, str, str], Histogram] = {}
+        self.request_outbound_time: Dict[Tuple[str, str, str], Histogram] = {}
+        self.responses: Dict[Tuple[str, str, str, str], int] = {}
+        self.outbound_latency: Dict[str, Histogram] = {}
+        self.outbound_responses: Dict[Tuple[str, str], int] = {}
+        self.db_queries_total = 0
+        self.db_time_total = 0.0
+    
+    def start_request(self) -> None:
+        """开始记录当前线程的请求"""
+        state = self._state
+        state.active = True
+        state.started = time.perf_counter()
+        state.db_queries = 0
+        state.db_time = 0.0
+        state.outbound_time = 0.0
+    
+    def finish_request(self, blueprint: str, route: str, method: str, status: int) -> None:
+        """
+        结束当前线程的请求并记录指标
+        :param blueprint: 蓝图名称
+        :param route: 路由规则，如 "/api/courses/<date>"
+        :param method: 请求方法
+        :param status: 响应状态码
+        """
+        state = self._state
+        if not state.active:
+            return
+        state.active = False
+        elapsed = time.perf_counter() - state.started
+        key = (blueprint, route, method)
+        status_key = (blueprint, route, method, str(status))
+        
+        with self._lock:
+            histogram = self.request_latency.get(key)
+            if histogram is None:
+                histogram = self.request_latency[key] = Histogram(LATENCY_BUCKETS)
+                self.request_db_queries[key] = Histogram(QUERY_COUNT_BUCKETS)
+                self.request_db_time[key] = Histogram(LATENCY_BUCKETS)
+                self.request_outbound_time[key] = Histogram(LATENCY_BUCKETS)
+            histogram.observe(elapsed)
+            self.request_db_queries[key].observe(state.db_queries)
+            self.request_db_time[key].observe(state.db_time)
+            self.request_outbound_time[key].observe(state.outbound_time)
+            self.responses[status_key] = self.responses.get(status_key, 0) + 1
+    
+    def record_query(self, elapsed: float) -> None:
+        """记录一次数据库查询，计入当前线程的请求"""
+        state = self._state
+        if state.active:
+            state.db_queries += 1
+            state.db_time += elapsed
+        with self._lock:
+            self.db_queries_total += 1
+            self.db_time_total += elapsed
+    
+    def record_outbound(self, target: str, elapsed: float, status: Optional[int] = None) -> None:
+        """
+        记录一次外部服务请求，计入当前线程的请求
+        :param target: 外部服务标签
+        :param elapsed: 耗时（秒）
+        :param status: 响应状态码，请求失败时为None
+        """
+        state = self._state
+        if state.active:
+            state.outbound_time += elapsed
+        status_key = (target, str(status) if status is not None else 'error')
+        with self._lock:
+            histogram = self.outbound_latency.get(target)
+            if histogram is None:
+                histogram = self.outbound_latency[target] = Histogram(LATENCY_BUCKETS)
+            histogram.observe(elapsed)
+            self.outbound_responses[status_key] = self.outbound_responses.get(status_key, 0) + 1
+    
+    @contextmanager
+    def track_outbound(self, target: str) -> Iterator[None]:
+        """
+        统计不经过requests会话的外部调用（如DashScope SDK）
+        :param target: 外部服务标签
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.record_outbound(target, time.perf_counter() - started)
+            raise
+        self.record_outbound(target, time.perf_counter() - started, 200)
+    
+    def _response_hook(self, response, *args, **kwargs):
+        """requests响应钩子，elapsed为发送请求到解析完响应头的时间"""
+        self.record_outbound(outbound_target(response.url), response.elapsed.total_seconds(), response.status_code)
+        return response
+    
+    def instrument_session(self, session):
+        """
+        为requests会话添加外部请求计时
+        :param session: requests会话
+        :return: 同一个会话
+        """
+        if self._response_hook not in session.hooks['response']:
+            session.hooks['response'].append(self._response_hook)
+        return session
+    
+    def reset(self) -> None:
+        """清空所有指标"""
+        with self._lock:
+            self.request_latency.clear()
+            self.request_db_queries.clear()
+            self.request_db_time.clear()
+            self.request_outbound_time.clear()
+            self.responses.clear()
+            self.outbound_latency.clear()
+            self.outbound_responses.clear()
+            self.db_queries_total = 0
+            self.db_time_total = 0.0
+    
+    def render_prometheus(self) -> str:
+        """
+        以Prometheus文本格式导出所有指标
+        :return: text/plain; version=0.0.4 格式的文本
+        """
+        lines: List[str] = []
+        with self._lock:
+            _render_histograms(lines, 'http_request_duration_seconds', '请求处理耗时',
+                               ('blueprint', 'route', 'method'), self.request_latency)
+            _render_counter(lines, 'http_responses_total', '按状态码统计的响应数',
+                            ('blueprint', 'route', 'method', 'status'), self.responses)
+            _render_histograms(lines, 'http_request_db_queries', '每个请求的数据库查询次数',
+                               ('blueprint', 'route', 'method'), self.request_db_queries)
+            _render_histograms(lines, 'http_request_db_seconds', '每个请求的数据库查询耗时',
+                               ('blueprint', 'route', 'method'), self.request_db_time)
+            _render_histograms(lines, 'http_request_outbound_seconds', '每个请求访问外部服务的耗时',
+                               ('blueprint', 'route', 'method'), self.request_outbound_time)
+            _render_histograms(lines, 'outbound_request_duration_seconds', '访问外部服务的耗时',
+                               ('target',), {(target,): h for target, h in self.outbound_latency.items()})
+            _render_counter(lines, 'outbound_responses_total', '按状态码统计的外部服务响应数',
+                            ('target', 'status'), self.outbound_responses)
+            lines.append('# HELP db_queries_total 数据库查询总数')
+            lines.append('# TYPE db_queries_total counter')
+            lines.append(f'db_queries_total {self.db_queries_total}')
+            lines.append('# HELP db_query_seconds_total 数据库查询总耗时')
+            lines.append('# TYPE db_query_seconds_total counter')
+            lines.append(f'db_query_seconds_total {_format_value(self.db_time_total)}')
+        return '\n'.join(lines) + '\n'
+
+
+def _format_value(value: float) -> str:
+    """格式化数值，整数不带小数点"""
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    parts = [f'{name}="{_escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _render_histograms(lines: List[str], name: str, help_text: str, label_names: Sequence[str],
+                       histograms: Dict[Tuple, Histogram]) -> None:
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} histogram')
+    for label_values, histogram in sorted(histograms.items()):
+        for le, count in histogram.cumulative():
+            bucket_label = 'le="' + le + '"'
+            lines.append(f'{name}_bucket{_labels(label_names, label_values, bucket_label)} {count}')
+        lines.append(f'{name}_sum{_labels(label_names, label_values)} {_format_value(histogram.sum)}')
+        lines.append(f'{name}_count{_labels(label_names, label_values)} {histogram.count}')
+
+
+def _render_counter(lines: List[str], name: str, help_text: str, label_names: Sequence[str],
+                    counters: Dict[Tuple, int]) -> None:
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} counter')
+    for label_values, value in sorted(counters.items()):
+        lines.append(f'{name}{_labels(label_names, label_values)} {value}')
+
+
+def init_metrics(app, engine_class=None) -> None:
+    """
+    在Flask应用上注册请求钩子和SQLAlchemy查询计时事件
+    :param app: Flask应用
+    :param engine_class: 监听查询事件的Engine类，默认为sqlalchemy.engine.Engine（所有引擎）
+    """
+    from flask import request
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    
+    engine_class = engine_class or Engine
+    
+    @app.before_request
+    def _start_request_metrics():
+        metrics_recorder.start_request()
+    
+    @app.after_request
+    def _finish_request_metrics(response):
+        rule = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        metrics_recorder.finish_request(request.blueprint or '', rule, request.method, response.status_code)
+        return response
+    
+    if not event.contains(engine_class, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine_class, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine_class, 'after_cursor_execute', _after_cursor_execute)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('metrics_query_start')
+    if starts:
+        metrics_recorder.record_query(time.perf_counter() - starts.pop())
+
+
+# 创建全局指标记录器实例
+metrics_recorder = MetricsRecorder()
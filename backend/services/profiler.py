@@ -0,0 +1,181 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# 默认采样间隔（秒）
+DEFAULT_INTERVAL = 0.005
+# 单次采样的最大栈深度
+MAX_STACK_DEPTH = 128
+
+Frame = Tuple[str, str, int]
+
+
+def _frame_stack(frame) -> Tuple[Frame, ...]:
+    """把帧链转换为从最外层到最内层的 (函数名, 文件名, 首行号) 元组"""
+    stack = []
+    while frame is not None and len(stack) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+class SamplingProfiler:
+    """
+    采样分析器：后台线程按固定间隔读取目标线程的调用栈并计数，
+    只在采样时短暂持有GIL，对被分析的代码几乎没有侵入
+    :param thread_ids: 只采样这些线程，为None时采样除自身外的所有线程
+    :param interval: 采样间隔（秒）
+    """
+    
+    def __init__(self, thread_ids: Optional[Iterable[int]] = None, interval: float = DEFAULT_INTERVAL):
+        self.thread_ids = set(thread_ids) if thread_ids is not None else None
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self.thread_names: Dict[int, str] = {}
+        self.started_at = 0.0
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self) -> 'SamplingProfiler':
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self) -> 'SamplingProfiler':
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.elapsed = time.perf_counter() - self.started_at
+        return self
+    
+    def __enter__(self) -> 'SamplingProfiler':
+        return self.start()
+    
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+    
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if self.thread_ids is not None and thread_id not in self.thread_ids:
+                    continue
+                self.thread_names.setdefault(thread_id, names.get(thread_id, str(thread_id)))
+                self.samples[(thread_id, _frame_stack(frame))] += 1
+    
+    def collapsed(self) -> str:
+        """
+        导出为折叠栈格式（flamegraph.pl / speedscope 均可导入）
+        每行为 "线程;最外层函数;...;最内层函数 采样次数"
+        """
+        lines = []
+        for (thread_id, stack), count in sorted(self.samples.items(), key=lambda item: -item[1]):
+            frames = [self.thread_names.get(thread_id, str(thread_id))]
+            frames.extend(f"{name} ({os.path.basename(filename)}:{line})" for name, filename, line in stack)
+            lines.append(f"{';'.join(frame.replace(';', ':') for frame in frames)} {count}")
+        return '\n'.join(lines) + '\n'
+    
+    def speedscope(self, name: str = 'profile') -> Dict:
+        """
+        导出为speedscope的JSON格式，每个线程一个sampled profile
+        :param name: 分析结果名称
+        """
+        frames: List[Dict] = []
+        frame_index: Dict[Frame, int] = {}
+        per_thread: Dict[int, Tuple[List[List[int]], List[float]]] = {}
+        
+        for (thread_id, stack), count in self.samples.items():
+            indexes = []
+            for frame in stack:
+                if frame not in frame_index:
+                    frame_index[frame] = len(frames)
+                    frames.append({'name': frame[0], 'file': frame[1], 'line': frame[2]})
+                indexes.append(frame_index[frame])
+            samples, weights = per_thread.setdefault(thread_id, ([], []))
+            samples.append(indexes)
+            weights.append(count * self.interval * 1000)
+        
+        profiles = []
+        for thread_id, (samples, weights) in per_thread.items():
+            profiles.append({
+                'type': 'sampled',
+                'name': self.thread_names.get(thread_id, str(thread_id)),
+                'unit': 'milliseconds',
+                'startValue': 0,
+                'endValue': sum(weights),
+                'samples': samples,
+                'weights': weights
+            })
+        
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': name,
+            'activeProfileIndex': 0,
+            'exporter': 'intelligent-calendar sampling profiler',
+            'shared': {'frames': frames},
+            'profiles': profiles
+        }
+    
+    def render(self, output_format: str, name: str = 'profile') -> Tuple[str, str]:
+        """
+        按格式导出
+        :param output_format: collapsed 或 speedscope
+        :param name: 分析结果名称
+        :return: (内容, MIME类型)
+        """
+        if output_format == 'speedscope':
+            return json.dumps(self.speedscope(name), ensure_ascii=False), 'application/json'
+        return self.collapsed(), 'text/plain; charset=utf-8'
+
+
+def init_profiling(app) -> None:
+    """
+    注册按请求的分析钩子：请求带 ?__profile=1 或请求头 X-Profile: 1 时在采样分析器下执行，
+    结果保存到 PROFILE_DIR，文件路径通过响应头 X-Profile-File 返回
+    格式由 ?__profile_format=speedscope 或请求头 X-Profile-Format 指定，默认折叠栈
+    :param app: Flask应用
+    """
+    from flask import g, request
+    
+    profile_dir = app.config.get('PROFILE_DIR') or os.path.join(app.instance_path, 'profiles')
+    interval = app.config.get('PROFILE_INTERVAL', DEFAULT_INTERVAL)
+    
+    @app.before_request
+    def _start_request_profile():
+        if request.args.get('__profile') != '1' and request.headers.get('X-Profile') != '1':
+            return
+        g.request_profiler = SamplingProfiler([threading.get_ident()], interval).start()
+    
+    @app.after_request
+    def _finish_request_profile(response):
+        profiler = g.pop('request_profiler', None)
+        if profiler is None:
+            return response
+        profiler.stop()
+        
+        output_format = request.args.get('__profile_format') or request.headers.get('X-Profile-Format') or 'collapsed'
+        endpoint = (request.endpoint or 'unmatched').replace('.', '_')
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}_{endpoint}"
+        content, _ = profiler.render(output_format, name)
+        
+        os.makedirs(profile_dir, exist_ok=True)
+        extension = 'speedscope.json' if output_format == 'speedscope' else 'collapsed.txt'
+        path = os.path.join(profile_dir, f"{name}.{extension}")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        
+        response.headers['X-Profile-File'] = path
+        response.headers['X-Profile-Samples'] = str(sum(profiler.samples.values()))
+        return response
@@ -0,0 +1,207 @@
+import hashlib
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from services.metrics import metrics_recorder
+
+
+# 逐跳头部（RFC 7230 6.1）以及代理重新生成或不应透传的头部
+HOP_BY_HOP_HEADERS = frozenset({
+    'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization',
+    'te', 'trailers', 'transfer-encoding', 'upgrade'
+})
+# requests会自动解压响应体，Content-Length/Content-Encoding与返回给前端的内容不再一致
+_STRIPPED_RESPONSE_HEADERS = HOP_BY_HOP_HEADERS | {'content-length', 'content-encoding'}
+# Set-Cookie属于某个用户的会话，不能随缓存共享；透传的响应（如登录重定向）需要保留
+_SESSION_RESPONSE_HEADERS = frozenset({'set-cookie'})
+
+
+def filter_response_headers(headers: Any, keep_cookies: bool = False) -> List[Tuple[str, str]]:
+    """
+    过滤上游响应头，去掉逐跳头部和Connection中声明的头部
+    :param headers: 上游响应头；保留Cookie时应传入 response.raw.headers，多个Set-Cookie不会被合并成一行
+    :param keep_cookies: 是否保留Set-Cookie，只有不经过缓存直接透传的响应才保留
+    :return: 可以返回给前端的响应头列表
+    """
+    stripped = _STRIPPED_RESPONSE_HEADERS if keep_cookies else _STRIPPED_RESPONSE_HEADERS | _SESSION_RESPONSE_HEADERS
+    connection_tokens = {
+        token.strip().lower()
+        for token in headers.get('Connection', '').split(',')
+        if token.strip()
+    }
+    return [
+        (name, value)
+        for name, value in headers.items()
+        if name.lower() not in stripped and name.lower() not in connection_tokens
+    ]
+
+
+def cookie_identity(cookies: Dict[str, str]) -> str:
+    """
+    计算Cookie的身份标识，不同用户（不同会话Cookie）的缓存互不共享
+    :param cookies: 前端Cookie
+    :return: SHA-256十六进制字符串
+    """
+    canonical = '; '.join(f"{name}={cookies[name]}" for name in sorted(cookies))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class CachedResponse:
+    """缓存的上游响应"""
+    
+    def __init__(self, status: int, headers: List[Tuple[str, str]], body: bytes, ttl: float):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.expires_at = time.monotonic() + ttl
+    
+    def is_fresh(self) -> bool:
+        return time.monotonic() < self.expires_at
+
+
+class _InFlight:
+    """正在进行的上游请求，相同请求的其他线程等待其结果"""
+    
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Optional[CachedResponse] = None
+
+
+class CachingProxy:
+    """
+    带短期缓存的反向代理：
+    - 按（日期, lxdm, Cookie身份）缓存成功的响应
+    - 并发的相同请求只向上游发送一次
+    - 使用连接池复用与上游的连接
+    - 不可缓存的响应（重定向、错误等）以流的方式透传，透传时保留上游的Set-Cookie
+    """
+    
+    def __init__(self, ttl: float = 60, max_entries: int = 256, max_body_size: int = 2 * 1024 * 1024,
+                 timeout: float = 10, pool_size: int = 10):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_body_size = max_body_size
+        self.timeout = timeout
+        self._cache: Dict[Tuple, CachedResponse] = {}
+        self._in_flight: Dict[Tuple, _InFlight] = {}
+        self._lock = threading.Lock()
+        
+        # 上游连接池，所有代理请求共享；Cookie只随每个请求传入，会话的Cookie罐拒绝保存上游的Set-Cookie，
+        # 否则一个用户的登录Cookie会被转发给之后所有用户的请求
+        self.session = requests.Session()
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        metrics_recorder.instrument_session(self.session)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+    
+    def fetch(self, key: Tuple, url: str, headers: Dict[str, str], cookies: Dict[str, str]) -> Tuple[Optional[CachedResponse], Optional[requests.Response]]:
+        """
+        获取上游响应
+        :param key: 缓存键
+        :param url: 上游URL
+        :param headers: 转发的请求头
+        :param cookies: 转发的Cookie
+        :return: (缓存响应, 流式上游响应)，二者只有一个不为None；流式响应需要调用方关闭
+        """
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached.is_fresh():
+                return cached, None
+            
+            in_flight = self._in_flight.get(key)
+            is_leader = in_flight is None
+            if is_leader:
+                in_flight = _InFlight()
+                self._in_flight[key] = in_flight
+        
+        if not is_leader:
+            # 等待正在进行的相同请求；其结果不可缓存时自行请求上游
+            in_flight.event.wait(self.timeout)
+            if in_flight.result is not None:
+                return in_flight.result, None
+            return None, self._request(url, headers, cookies)
+        
+        try:
+            upstream = self._request(url, headers, cookies)
+            if not self._is_cacheable(upstream):
+                return None, upstream
+            
+            try:
+                body = upstream.content
+            finally:
+                upstream.close()
+            result = CachedResponse(upstream.status_code, filter_response_headers(upstream.headers), body, self.ttl)
+            in_flight.result = result
+            self._store(key, result)
+            return result, None
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            in_flight.event.set()
+    
+    def _request(self, url: str, headers: Dict[str, str], cookies: Dict[str, str]) -> requests.Response:
+        """通过连接池向上游发送流式请求"""
+        return self.session.get(
+            url,
+            headers=headers,
+            cookies=cookies,
+            allow_redirects=False,
+            timeout=self.timeout,
+            stream=True
+        )
+    
+    def _is_cacheable(self, response: requests.Response) -> bool:
+        """只缓存成功且大小有限的响应；重定向通常意味着登录失效，不能缓存"""
+        if response.status_code != 200:
+            return False
+        if 'set-cookie' in {name.lower() for name in response.headers}:
+            return False
+        content_length = response.headers.get('Content-Length')
+        if content_length and content_length.isdigit() and int(content_length) > self.max_body_size:
+            return False
+        return True
+    
+    def _store(self, key: Tuple, result: CachedResponse) -> None:
+        """保存缓存，超过容量时先清理过期项，再淘汰最早过期的项"""
+        with self._lock:
+            self._cache[key] = result
+            if len(self._cache) <= self.max_entries:
+                return
+            for stale_key in [k for k, v in self._cache.items() if not v.is_fresh()]:
+                del self._cache[stale_key]
+            while len(self._cache) > self.max_entries:
+                oldest_key = min(self._cache, key=lambda k: self._cache[k].expires_at)
+                del self._cache[oldest_key]
+    
+    def invalidate(self, cookies: Optional[Dict[str, str]] = None) -> None:
+        """
+        清除缓存
+        :param cookies: 只清除该Cookie身份的缓存，为None时清除全部
+        """
+        with self._lock:
+            if cookies is None:
+                self._cache.clear()
+                return
+            identity = cookie_identity(cookies)
+            for key in [k for k in self._cache if k[-1] == identity]:
+                del self._cache[key]
+    
+    @staticmethod
+    def stream_body(response: requests.Response, chunk_size: int = 8192) -> Iterator[bytes]:
+        """逐块读取上游响应体，读取完毕后把连接归还连接池"""
+        try:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                if chunk:
+                    yield chunk
+        finally:
+            response.close()
+
+
+# 创建全局课程表代理实例
+course_schedule_proxy = CachingProxy()
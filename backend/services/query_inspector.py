@@ -0,0 +1,182 @@
+import logging
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def statement_fingerprint(statement: str) -> str:
+    """
+    计算SQL语句的形状：去掉字面量、合并IN列表和空白，参数不同的同一条查询得到相同的指纹
+    :param statement: SQL语句
+    :return: 归一化后的语句
+    """
+    fingerprint = _STRING_LITERAL.sub('?', statement)
+    fingerprint = _NUMBER_LITERAL.sub('?', fingerprint)
+    fingerprint = _IN_LIST.sub('(?)', fingerprint)
+    return _WHITESPACE.sub(' ', fingerprint).strip()
+
+
+class _RequestQueries(threading.local):
+    """当前线程正在处理的请求中执行的查询"""
+    active = False
+    statements: Dict[str, Dict[str, Any]] = {}
+    slow: List[Dict[str, Any]] = []
+    count = 0
+    elapsed = 0.0
+
+
+class QueryInspector:
+    """
+    开发/性能分析模式下的查询检查器：
+    - 按请求统计每种语句形状的执行次数，超过阈值的视为循环中的重复查询（N+1）
+    - 记录超过耗时上限的慢查询及其 EXPLAIN QUERY PLAN
+    - 请求结束时输出一行日志，并在响应头 X-Query-Report 中返回摘要
+    """
+    
+    def __init__(self, repeat_threshold: int = 5, slow_query_ms: float = 100):
+        self.repeat_threshold = repeat_threshold
+        self.slow_query_ms = slow_query_ms
+        self._state = _RequestQueries()
+    
+    def init_app(self, app) -> None:
+        """
+        在Flask应用上注册请求钩子和查询事件
+        :param app: Flask应用
+        """
+        from flask import request
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+        
+        self.repeat_threshold = app.config.get('QUERY_REPEAT_THRESHOLD', self.repeat_threshold)
+        self.slow_query_ms = app.config.get('SLOW_QUERY_MS', self.slow_query_ms)
+        
+        @app.before_request
+        def _start_query_inspection():
+            self.start_request()
+        
+        @app.after_request
+        def _finish_query_inspection(response):
+            report = self.finish_request()
+            if report is not None:
+                response.headers['X-Query-Report'] = self.format_header(report)
+                self.log_report(f"{request.method} {request.path}", report)
+            return response
+        
+        if not event.contains(Engine, 'before_cursor_execute', self._before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+    
+    def start_request(self) -> None:
+        """开始记录当前线程的查询"""
+        state = self._state
+        state.active = True
+        state.statements = {}
+        state.slow = []
+        state.count = 0
+        state.elapsed = 0.0
+    
+    def finish_request(self) -> Optional[Dict[str, Any]]:
+        """
+        结束当前线程的记录
+        :return: 查询报告，当前线程没有在记录时返回None
+        """
+        state = self._state
+        if not state.active:
+            return None
+        state.active = False
+        repeated = sorted(
+            (
+                {'statement': fingerprint, 'count': stats['count'], 'elapsed_ms': round(stats['elapsed'] * 1000, 2)}
+                for fingerprint, stats in state.statements.items()
+                if stats['count'] >= self.repeat_threshold
+            ),
+            key=lambda item: item['count'],
+            reverse=True
+        )
+        return {
+            'queries': state.count,
+            'elapsed_ms': round(state.elapsed * 1000, 2),
+            'distinct': len(state.statements),
+            'repeated': repeated,
+            'slow': state.slow
+        }
+    
+    @staticmethod
+    def format_header(report: Dict[str, Any]) -> str:
+        """报告摘要，如 "queries=23; time=4.1ms; distinct=3; repeated=1; slow=0" """
+        return (f"queries={report['queries']}; time={report['elapsed_ms']}ms; distinct={report['distinct']}; "
+                f"repeated={len(report['repeated'])}; slow={len(report['slow'])}")
+    
+    def log_report(self, label: str, report: Dict[str, Any]) -> None:
+        """有重复查询或慢查询时输出警告，否则输出调试日志"""
+        if not report['repeated'] and not report['slow']:
+            logger.debug("%s %s", label, self.format_header(report))
+            return
+        
+        lines = [f"{label} {self.format_header(report)}"]
+        for item in report['repeated']:
+            lines.append(f"  重复查询 x{item['count']} ({item['elapsed_ms']}ms): {item['statement']}")
+        for item in report['slow']:
+            lines.append(f"  慢查询 {item['elapsed_ms']}ms: {item['statement']}")
+            for plan_row in item.get('plan') or []:
+                lines.append(f"    {plan_row}")
+        logger.warning('\n'.join(lines))
+    
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self._state.active:
+            conn.info.setdefault('query_inspector_start', []).append(time.perf_counter())
+    
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        state = self._state
+        starts = conn.info.get('query_inspector_start')
+        if not state.active or not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        
+        fingerprint = statement_fingerprint(statement)
+        stats = state.statements.get(fingerprint)
+        if stats is None:
+            stats = state.statements[fingerprint] = {'count': 0, 'elapsed': 0.0}
+        stats['count'] += 1
+        stats['elapsed'] += elapsed
+        state.count += 1
+        state.elapsed += elapsed
+        
+        if elapsed * 1000 >= self.slow_query_ms:
+            state.slow.append({
+                'statement': fingerprint,
+                'elapsed_ms': round(elapsed * 1000, 2),
+                'plan': self._explain(conn, statement, parameters, executemany)
+            })
+    
+    @staticmethod
+    def _explain(conn, statement: str, parameters: Any, executemany: bool) -> List[str]:
+        """
+        在同一个连接上执行 EXPLAIN QUERY PLAN（仅SQLite的SELECT语句）
+        直接使用DBAPI游标，避免再次触发查询事件
+        """
+        if conn.dialect.name != 'sqlite' or executemany or not statement.lstrip().upper().startswith('SELECT'):
+            return []
+        try:
+            cursor = conn.connection.dbapi_connection.cursor()
+            try:
+                cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ())
+                return [row[-1] for row in cursor.fetchall()]
+            finally:
+                cursor.close()
+        except Exception as e:
+            logger.debug("获取查询计划失败: %s", e)
+            return []
+
+
+# 创建全局查询检查器实例
+query_inspector = QueryInspector()
@@ -0,0 +1,435 @@
+import json
+import logging
+import re
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 置信度不低于该值时直接使用规则解析结果，不调用大模型
+DEFAULT_MIN_CONFIDENCE = 0.8
+# 没有结束时间和时长时的默认日程时长（分钟）
+DEFAULT_DURATION_MINUTES = 60
+DEFAULT_EXAM_MINUTES = 120
+# 任务没有给出时长时的预计完成时长（分钟）
+DEFAULT_TASK_MINUTES = 60
+
+_CN_DIGITS = {'零': 0, '一': 1, '二': 2, '两': 2, '三': 3, '四': 4, '五': 5, '六': 6, '七': 7, '八': 8, '九': 9}
+_WEEKDAYS = {'一': 0, '二': 1, '三': 2, '四': 3, '五': 4, '六': 5, '日': 6, '天': 6, '末': 5,
+             '1': 0, '2': 1, '3': 2, '4': 3, '5': 4, '6': 5, '7': 6}
+
+_NUM = r'(?:\d{1,2}|[零一二两三四五六七八九十]{1,3})'
+_RELATIVE_DAYS = {'今天': 0, '今日': 0, '今晚': 0, '今早': 0, '明天': 1, '明日': 1, '明晚': 1, '明早': 1,
+                  '后天': 2, '大后天': 3}
+# 相对日期中隐含的时段
+_DAY_PERIODS = {'今晚': '晚上', '明晚': '晚上', '今早': '早上', '明早': '早上'}
+
+_DATE_PATTERNS = [
+    ('ymd', re.compile(r'(\d{4})[-/.年](\d{1,2})[-/.月](\d{1,2})[日号]?')),
+    ('md', re.compile(rf'({_NUM})月({_NUM})[日号]')),
+    ('md_slash', re.compile(r'(?<![\d:：])(\d{1,2})/(\d{1,2})(?![\d/])')),
+    ('relative', re.compile('|'.join(sorted(_RELATIVE_DAYS, key=len, reverse=True)))),
+    ('weekday', re.compile(r'(这|本|下下|下)?个?(?:周|星期|礼拜)([一二三四五六日天末1-7])')),
+    ('days_later', re.compile(rf'({_NUM})天(?:后|以后|之后)')),
+]
+_PERIOD_PATTERN = re.compile(r'凌晨|早上|早晨|上午|中午|下午|傍晚|晚上|夜里|夜间')
+_TIME_PATTERNS = [
+    ('clock', re.compile(r'(?<!\d)(\d{1,2})[:：](\d{2})(?!\d)')),
+    ('hour', re.compile(rf'({_NUM})[点时](?:(半)|(一刻)|(三刻)|(\d{{1,2}})分?|([零一二两三四五六七八九十]{{1,3}})分)?')),
+]
+_RANGE_CONNECTORS = ('到', '至', '-', '—', '~', '～')
+_DURATION_PATTERNS = [
+    re.compile(r'(\d+(?:\.\d+)?|[零一二两三四五六七八九十]{1,3})个?(半)?(?:小时|钟头)'),
+    re.compile(r'半个?(?:小时|钟头)'),
+    re.compile(rf'({_NUM}|\d{{1,3}})分钟'),
+]
+_DEADLINE_PATTERN = re.compile(r'截止(?:日期|时间)?|之前|以前|ddl|DDL|due', re.IGNORECASE)
+_MULTI_EVENT_PATTERN = re.compile(r'[；;\n]|然后|另外|还有|以及')
+_RECURRING_PATTERN = re.compile(r'每(?:天|日|晚|早|周|星期|礼拜|个?月)')
+# 取消、修改和否定已有安排的输入不是新建日程，必须交给大模型
+_NOT_CREATE_PATTERN = re.compile(r'取消|删除|删掉|撤销|改到|改成|改为|改期|调整到|推迟|延期|延后|提前到|挪到|换到|不|没')
+# 时长前面的引导词（“持续两小时”“共1小时”），与时长一起从标题中去掉
+_DURATION_PREFIX_PATTERN = re.compile(r'[，,、\s]*(?:持续|时长|为期|一共|总共|共|大约|大概|约)?[为是:：]?\s*$')
+_EMPTY_BRACKETS_PATTERN = re.compile(r'[（(【\[]\s*[）)】\]]')
+
+_ENTRY_TYPES = [
+    ('exam', ('考试', '期中考', '期末考', '测验', '小测')),
+    ('lecture', ('讲座', '报告会', '宣讲', '论坛')),
+    ('course', ('上课', '课程', '实验课', '课')),
+    ('sports', ('跑步', '健身', '打球', '篮球', '足球', '羽毛球', '游泳', '锻炼', '体育')),
+    ('study', ('自习', '复习', '预习', '学习', '背单词', '刷题')),
+    ('meeting', ('组会', '例会', '开会', '会议', '见面', '面试', '答辩', '会')),
+]
+_LEADING_FILLERS = ('记得', '提醒我', '需要', '我要', '我得', '要', '得', '我', '在', '去', '有个', '有一个', '一个', '有')
+_TRAILING_FILLERS = '。.!！~～的了吧哦呢'
+_PUNCTUATION = ' \t,，、。:：'
+
+
+def _cn_to_int(text: str) -> int:
+    """解析阿拉伯数字或不超过99的中文数字"""
+    if text.isdigit():
+        return int(text)
+    if '十' in text:
+        tens, _, ones = text.partition('十')
+        return (_CN_DIGITS.get(tens, 1) if tens else 1) * 10 + (_CN_DIGITS.get(ones, 0) if ones else 0)
+    value = 0
+    for char in text:
+        value = value * 10 + _CN_DIGITS[char]
+    return value
+
+
+class QuickParseResult:
+    """
+    规则解析结果，格式与大模型返回的JSON相同
+    :param tasks: [{name, deadline, estimated_time}]
+    :param entries: [{title, start_time, end_time, entry_type}]
+    :param confidence: 0-1的置信度
+    :param reasons: 降低置信度的原因，便于调试和统计
+    """
+    
+    def __init__(self, tasks: List[Dict[str, Any]], entries: List[Dict[str, Any]], confidence: float,
+                 reasons: List[str]):
+        self.tasks = tasks
+        self.entries = entries
+        self.confidence = confidence
+        self.reasons = reasons
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {'tasks': self.tasks, 'entries': self.entries}
+    
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False)
+    
+    def __repr__(self):
+        return f'<QuickParseResult {self.confidence:.2f} {self.to_dict()}>'
+
+
+class QuickParser:
+    """
+    简单日程输入的规则解析器：识别一个日期（今天/明天/后天、周X/下周X、X月X日）、时段（上午/下午/晚上）、
+    时刻（HH:MM、X点半）、时间范围、时长和“截止/之前”，生成一条日程或一个任务，并给出置信度；
+    包含多件事、时间不明确或剩余文字过长的输入置信度较低，应交给大模型解析
+    """
+    
+    def parse(self, text: str, now: Optional[datetime] = None) -> Optional[QuickParseResult]:
+        """
+        解析文本
+        :param text: 用户输入
+        :param now: 相对日期的基准时间，默认为当前时间
+        :return: 解析结果，没有识别到时间时返回None
+        """
+        now = now or datetime.now()
+        text = (text or '').strip()
+        if not text:
+            return None
+        
+        reasons = []
+        confidence = 1.0
+        masked = list(text)
+        
+        def mask(match: re.Match) -> None:
+            for index in range(match.start(), match.end()):
+                masked[index] = '\x00'
+        
+        def penalize(amount: float, reason: str) -> None:
+            nonlocal confidence
+            confidence -= amount
+            reasons.append(reason)
+        
+        if _MULTI_EVENT_PATTERN.search(text):
+            penalize(0.6, '可能包含多件事')
+        if _RECURRING_PATTERN.search(text):
+            penalize(0.6, '重复日程')
+        if _NOT_CREATE_PATTERN.search(text):
+            penalize(1.0, '取消、修改或否定已有安排')
+        if len(text) > 40:
+            penalize(0.4, '文本较长')
+        
+        # 日期（只支持一个）
+        dates = []
+        for kind, pattern in _DATE_PATTERNS:
+            for match in pattern.finditer(''.join(masked)):
+                dates.append((kind, match))
+                mask(match)
+        if len(dates) > 1:
+            penalize(0.6, '包含多个日期')
+        day, day_period = self._resolve_date(dates[0] if dates else None, now, penalize)
+        
+        # 时段和时刻
+        periods = []
+        for match in _PERIOD_PATTERN.finditer(''.join(masked)):
+            periods.append(match)
+            mask(match)
+        times = []
+        for kind, pattern in _TIME_PATTERNS:
+            for match in pattern.finditer(''.join(masked)):
+                times.append((match.start(), kind, match))
+                mask(match)
+        times.sort(key=lambda item: item[0])
+        if len(periods) > 2 or len(times) > 2:
+            penalize(0.6, '包含多个时间')
+        
+        # 两个时刻之间只有连接词（和时段）时是时间范围
+        is_range = False
+        if len(times) == 2:
+            gap_start, gap_end = times[0][2].end(), times[1][2].start()
+            is_range = _PERIOD_PATTERN.sub('', text[gap_start:gap_end]).strip() in _RANGE_CONNECTORS
+            if is_range:
+                masked[gap_start:gap_end] = '\x00' * (gap_end - gap_start)
+        
+        # 时长
+        duration = None
+        for pattern in _DURATION_PATTERNS:
+            match = pattern.search(''.join(masked))
+            if match:
+                duration = self._duration_minutes(match)
+                mask(match)
+                prefix = _DURATION_PREFIX_PATTERN.search(''.join(masked[:match.start()]))
+                masked[prefix.start():match.start()] = '\x00' * (match.start() - prefix.start())
+                break
+        
+        # 截止（“截止/之前”或紧跟在日期时间后的“前”）
+        is_deadline = False
+        for match in _DEADLINE_PATTERN.finditer(''.join(masked)):
+            is_deadline = True
+            mask(match)
+        for index, char in enumerate(masked):
+            if char == '前' and index > 0 and masked[index - 1] == '\x00':
+                is_deadline = True
+                masked[index] = '\x00'
+        
+        if day is None and not times:
+            return None
+        
+        title = self._clean_title(''.join(char for char in masked if char != '\x00'))
+        if not title:
+            return None
+        if len(title) > 20:
+            penalize(0.3, '标题过长')
+        if any(char in title for char in '，,、；;'):
+            penalize(0.3, '标题中有多个短语')
+        
+        entry_type = self._entry_type(title)
+        period_of = lambda match: self._period_before(match, periods, text) or day_period
+        start = None
+        end = None
+        if times:
+            first_match = times[0][2]
+            start = self._resolve_time(day, now, times[0][1], first_match, period_of(first_match), penalize)
+            if len(times) > 1:
+                second_period = self._period_before(times[1][2], periods, text) or period_of(first_match)
+                end = self._resolve_time(start.replace(hour=0, minute=0), now, times[1][1], times[1][2],
+                                         second_period, penalize, explicit_day=True)
+                if not is_range:
+                    penalize(0.4, '两个时间之间不是范围')
+                if end <= start:
+                    if end + timedelta(hours=12) > start and end.hour < 12:
+                        end += timedelta(hours=12)
+                    else:
+                        penalize(0.5, '结束时间早于开始时间')
+        elif day is not None:
+            period = periods[0].group(0) if periods else day_period
+            if is_deadline:
+                start = day.replace(hour=23, minute=59)
+                if period:
+                    penalize(0.3, '截止时间只有时段')
+            else:
+                start = day.replace(hour=self._default_hour(period))
+                penalize(0.5 if period else 0.6, '没有具体时刻')
+        
+        if is_deadline:
+            task = {
+                'name': title,
+                'deadline': start.strftime('%Y-%m-%d %H:%M'),
+                'estimated_time': duration or DEFAULT_TASK_MINUTES
+            }
+            return QuickParseResult([task], [], round(max(confidence, 0.0), 2), reasons)
+        
+        if end is None:
+            if duration:
+                end = start + timedelta(minutes=duration)
+            else:
+                end = start + timedelta(minutes=DEFAULT_EXAM_MINUTES if entry_type == 'exam' else DEFAULT_DURATION_MINUTES)
+                penalize(0.05, '使用默认时长')
+        entry = {
+            'title': title,
+            'start_time': start.strftime('%Y-%m-%d %H:%M'),
+            'end_time': end.strftime('%Y-%m-%d %H:%M'),
+            'entry_type': entry_type
+        }
+        return QuickParseResult([], [entry], round(max(confidence, 0.0), 2), reasons)
+    
+    def parse_confident(self, text: str, now: Optional[datetime] = None,
+                        min_confidence: float = DEFAULT_MIN_CONFIDENCE) -> Optional[QuickParseResult]:
+        """
+        解析文本并按置信度取舍（接口和基准测试共用的唯一阈值判断）
+        :param text: 用户输入
+        :param now: 相对日期的基准时间，默认为当前时间
+        :param min_confidence: 最低置信度
+        :return: 解析结果，没有识别到时间或置信度低于 min_confidence 时返回None（应交给大模型）
+        """
+        result = self.parse(text, now)
+        if result is None:
+            return None
+        if result.confidence < min_confidence:
+            logger.debug("规则解析置信度不足(%.2f: %s)，交给大模型", result.confidence, '、'.join(result.reasons))
+            return None
+        return result
+    
+    @staticmethod
+    def _resolve_date(date_match: Optional[Tuple[str, re.Match]], now: datetime,
+                      penalize) -> Tuple[Optional[datetime], Optional[str]]:
+        """
+        :return: (当天零点, 日期中隐含的时段)，没有日期时返回 (None, None)
+        """
+        if date_match is None:
+            return None, None
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        kind, match = date_match
+        
+        if kind == 'relative':
+            word = match.group(0)
+            return today + timedelta(days=_RELATIVE_DAYS[word]), _DAY_PERIODS.get(word)
+        if kind == 'days_later':
+            return today + timedelta(days=_cn_to_int(match.group(1))), None
+        if kind == 'weekday':
+            prefix, weekday_char = match.group(1), match.group(2)
+            if weekday_char == '末':
+                penalize(0.2, '周末不确定是哪一天')
+            monday = today - timedelta(days=today.weekday())
+            target = _WEEKDAYS[weekday_char]
+            if prefix == '下':
+                return monday + timedelta(weeks=1, days=target), None
+            if prefix == '下下':
+                return monday + timedelta(weeks=2, days=target), None
+            day = monday + timedelta(days=target)
+            if day < today:
+                if prefix:
+                    penalize(0.3, '本周的这一天已经过去')
+                else:
+                    # “周一”在周三说出时通常指下周一
+                    day += timedelta(weeks=1)
+                    penalize(0.1, '周X已过，按下周计算')
+            return day, None
+        
+        if kind == 'ymd':
+            year, month, day_of_month = (int(group) for group in match.groups())
+        else:
+            year = today.year
+            month, day_of_month = _cn_to_int(match.group(1)), _cn_to_int(match.group(2))
+            if kind == 'md_slash':
+                penalize(0.1, '斜杠日期可能有歧义')
+        try:
+            day = today.replace(year=year, month=month, day=day_of_month)
+        except ValueError:
+            penalize(1.0, '日期无效')
+            return today, None
+        if kind != 'ymd' and day < today - timedelta(days=60):
+            day = day.replace(year=year + 1)
+        return day, None
+    
+    @staticmethod
+    def _period_before(time_match: re.Match, periods: List[re.Match], text: str) -> Optional[str]:
+        """紧挨在时刻前面（中间只有空白或日期）的时段"""
+        for period in reversed(periods):
+            if period.end() <= time_match.start():
+                gap = text[period.end():time_match.start()]
+                if len(gap.strip()) <= 1:
+                    return period.group(0)
+        return None
+    
+    @staticmethod
+    def _resolve_time(day: Optional[datetime], now: datetime, kind: str, match: re.Match, period: Optional[str],
+                      penalize, explicit_day: bool = False) -> datetime:
+        if kind == 'clock':
+            hour, minute = int(match.group(1)), int(match.group(2))
+        else:
+            hour = _cn_to_int(match.group(1))
+            if match.group(2):
+                minute = 30
+            elif match.group(3):
+                minute = 15
+            elif match.group(4):
+                minute = 45
+            elif match.group(5) or match.group(6):
+                minute = _cn_to_int(match.group(5) or match.group(6))
+            else:
+                minute = 0
+        if hour > 24 or minute > 59:
+            penalize(1.0, '时刻无效')
+            hour, minute = min(hour, 23), min(minute, 59)
+        
+        add_day = False
+        if period in ('中午',):
+            if hour < 11:
+                hour += 12
+        elif period in ('下午', '傍晚', '晚上', '夜里', '夜间'):
+            if hour < 12:
+                hour += 12
+            elif hour == 12 and period != '下午':
+                hour, add_day = 0, True
+                penalize(0.2, '晚上12点')
+        elif period is None and hour <= 12 and not explicit_day:
+            if 1 <= hour <= 6:
+                hour += 12
+                penalize(0.15, '没有时段，按下午计算')
+            elif kind == 'hour':
+                penalize(0.05, '没有时段')
+        if hour == 24:
+            hour, add_day = 0, True
+        
+        date_given = day is not None
+        base = day if date_given else now.replace(hour=0, minute=0, second=0, microsecond=0)
+        result = base.replace(hour=hour, minute=minute) + timedelta(days=1 if add_day else 0)
+        if not date_given:
+            penalize(0.1, '没有日期，按今天计算')
+            if result < now:
+                result += timedelta(days=1)
+                penalize(0.2, '时间已过，按明天计算')
+        return result
+    
+    @staticmethod
+    def _duration_minutes(match: re.Match) -> int:
+        text = match.group(0)
+        if text.startswith('半'):
+            return 30
+        if text.endswith('分钟'):
+            return _cn_to_int(match.group(1))
+        number = match.group(1)
+        hours = float(number) if re.match(r'^\d', number) else _cn_to_int(number)
+        if match.group(2):
+            hours += 0.5
+        return int(round(hours * 60))
+    
+    @staticmethod
+    def _default_hour(period: Optional[str]) -> int:
+        return {'凌晨': 6, '早上': 8, '早晨': 8, '上午': 9, '中午': 12, '下午': 14, '傍晚': 18,
+                '晚上': 19, '夜里': 21, '夜间': 21}.get(period, 9)
+    
+    @staticmethod
+    def _entry_type(title: str) -> str:
+        for entry_type, keywords in _ENTRY_TYPES:
+            if any(keyword in title for keyword in keywords):
+                return entry_type
+        return 'other'
+    
+    @staticmethod
+    def _clean_title(title: str) -> str:
+        title = _EMPTY_BRACKETS_PATTERN.sub('', title).strip(_PUNCTUATION)
+        changed = True
+        while changed and title:
+            changed = False
+            for filler in _LEADING_FILLERS:
+                if title.startswith(filler) and len(title) > len(filler):
+                    title = title[len(filler):].lstrip(_PUNCTUATION)
+                    changed = True
+                    break
+            stripped = title.rstrip(_TRAILING_FILLERS + _PUNCTUATION)
+            if stripped != title and stripped:
+                title = stripped
+                changed = True
+        return title
+
+
+# 创建全局规则解析器实例
+quick_parser = QuickParser()
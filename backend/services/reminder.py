@@ -1,6 +1,8 @@
 from datetime import datetime, timedelta
+from types import SimpleNamespace
 from models.entry import Entry
 from models.task import Task
+from services.course_recurrence import course_recurrence_engine
 
 class ReminderService:
     """提醒服务，用于获取即将到来的事件和任务"""
@@ -47,6 +49,20 @@ class ReminderService:
             Entry.entry_type != 'exam'
         ).all()
         
+        # 合并按周次展开的课程实例（课程不再为每个上课日期单独保存Entry）
+        for virtual_entry in course_recurrence_engine.virtual_entries(now.date(), non_exam_future_time.date(), non_exam_entries):
+            start_time = datetime.fromisoformat(virtual_entry['start_time'])
+            if now <= start_time <= non_exam_future_time:
+                non_exam_entries.append(SimpleNamespace(
+                    id=virtual_entry['id'],
+                    title=virtual_entry['title'],
+                    entry_type=virtual_entry['entry_type'],
+                    start_time=start_time,
+                    end_time=datetime.fromisoformat(virtual_entry['end_time']),
+                    description=virtual_entry['description'],
+                    color=virtual_entry['color']
+                ))
+        
         # 计算考试entries的最大查询时间范围
         exam_max_minutes = 0
         if 'exam' in reminder_settings:
@@ -0,0 +1,267 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 碎片（空闲页）占比超过该值时才执行VACUUM
+VACUUM_FREELIST_RATIO = 0.2
+
+
+class Job:
+    """
+    一个定时任务
+    :param name: 任务名称
+    :param func: 任务函数（在应用上下文中执行），返回值会记录为最近一次结果
+    :param interval: 执行间隔（秒），与at二选一
+    :param at: 每天的执行时刻，如 "04:00"
+    :param run_at_start: 为True时启动后立即执行一次（仅对interval任务有效）
+    """
+    
+    def __init__(self, name: str, func: Callable[[], Any], interval: Optional[float] = None,
+                 at: Optional[str] = None, run_at_start: bool = False):
+        if (interval is None) == (at is None):
+            raise ValueError('interval 和 at 必须且只能指定一个')
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.at = datetime.strptime(at, '%H:%M').time() if at else None
+        self.run_at_start = run_at_start
+        self.next_run: Optional[datetime] = None
+        self.last_run: Optional[datetime] = None
+        self.last_duration: Optional[float] = None
+        self.last_result: Any = None
+        self.last_error: Optional[str] = None
+    
+    def schedule_next(self, now: datetime, first: bool = False) -> None:
+        """计算下一次执行时间"""
+        if self.interval is not None:
+            self.next_run = now if first and self.run_at_start else now + timedelta(seconds=self.interval)
+            return
+        next_run = datetime.combine(now.date(), self.at)
+        if next_run <= now:
+            next_run += timedelta(days=1)
+        self.next_run = next_run
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'interval': self.interval,
+            'at': self.at.strftime('%H:%M') if self.at else None,
+            'next_run': self.next_run.isoformat() if self.next_run else None,
+            'last_run': self.last_run.isoformat() if self.last_run else None,
+            'last_duration': round(self.last_duration, 3) if self.last_duration is not None else None,
+            'last_result': self.last_result,
+            'last_error': self.last_error
+        }
+
+
+class _FileLock:
+    """跨进程的非阻塞文件锁，进程退出时由操作系统自动释放"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+    
+    def acquire(self) -> bool:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        lock_file = open(self.path, 'a+')
+        try:
+            if os.name == 'nt':
+                import msvcrt
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(str(os.getpid()))
+        lock_file.flush()
+        self._file = lock_file
+        return True
+
+
+class MaintenanceScheduler:
+    """
+    进程内的定时任务调度器：一个后台线程按时间执行已注册的维护任务
+    多个进程（如调试模式的重载器、重复启动的程序）共用同一个数据库时，只有取得文件锁的进程执行任务
+    """
+    
+    def __init__(self):
+        self.jobs: List[Job] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._file_lock: Optional[_FileLock] = None
+        self._app = None
+    
+    def add_job(self, name: str, func: Callable[[], Any], interval: Optional[float] = None,
+                at: Optional[str] = None, run_at_start: bool = False) -> Job:
+        """
+        注册定时任务（同名任务会被替换）
+        :return: 任务对象
+        """
+        job = Job(name, func, interval, at, run_at_start)
+        with self._lock:
+            self.jobs = [existing for existing in self.jobs if existing.name != name]
+            self.jobs.append(job)
+            if self._thread is not None:
+                job.schedule_next(datetime.now(), first=True)
+        self._wake.set()
+        return job
+    
+    def start(self, app, lock_path: Optional[str] = None) -> bool:
+        """
+        启动调度线程
+        :param app: Flask应用，任务在其应用上下文中执行
+        :param lock_path: 文件锁路径，默认为 instance/scheduler.lock
+        :return: 是否由本进程执行任务
+        """
+        with self._lock:
+            if self._thread is not None:
+                return True
+            self._file_lock = _FileLock(lock_path or os.path.join(app.instance_path, 'scheduler.lock'))
+            if not self._file_lock.acquire():
+                logger.info("其它进程正在执行维护任务，本进程不启动调度器")
+                return False
+            self._app = app
+            now = datetime.now()
+            for job in self.jobs:
+                job.schedule_next(now, first=True)
+            self._thread = threading.Thread(target=self._run, name='maintenance-scheduler', daemon=True)
+            self._thread.start()
+        logger.info("维护任务调度器已启动: %s", ', '.join(job.name for job in self.jobs))
+        return True
+    
+    def run_job(self, job: Job) -> Any:
+        """
+        立即在应用上下文中执行任务并记录结果
+        :param job: 任务
+        :return: 任务返回值，失败时为None
+        """
+        started = time.perf_counter()
+        job.last_run = datetime.now()
+        try:
+            with self._app.app_context():
+                job.last_result = job.func()
+            job.last_error = None
+            logger.debug("维护任务 %s 完成: %s", job.name, job.last_result)
+        except Exception as e:
+            job.last_result = None
+            job.last_error = str(e)
+            logger.exception("维护任务 %s 失败", job.name)
+        job.last_duration = time.perf_counter() - started
+        return job.last_result
+    
+    def status(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [job.to_dict() for job in self.jobs]
+    
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                jobs = list(self.jobs)
+            now = datetime.now()
+            for job in jobs:
+                if job.next_run is not None and job.next_run <= now:
+                    self.run_job(job)
+                    job.schedule_next(datetime.now())
+            
+            pending = [job.next_run for job in jobs if job.next_run is not None]
+            wait = (min(pending) - datetime.now()).total_seconds() if pending else 3600
+            if self._wake.wait(max(wait, 0.1)):
+                self._wake.clear()
+
+
+def purge_expired_tasks(archive_completed: bool = False) -> int:
+    """
+    删除截止时间已过的任务（单条DELETE语句）
+    :param archive_completed: 为True时先把其中已完成的任务移入归档数据库
+    :return: 删除的任务数
+    """
+    from extensions import db
+    from models.task import Task
+    
+    if archive_completed:
+        from services.archive import archive_service
+        archive_service.archive_tasks()
+    
+    deleted_count = Task.query.filter(Task.deadline < datetime.now()).delete(synchronize_session=False)
+    db.session.commit()
+    if deleted_count:
+        logger.info("已清理%d个过期任务", deleted_count)
+    return deleted_count
+
+
+def optimize_database() -> Dict[str, Any]:
+    """
+    整理SQLite数据库：更新查询规划器统计信息，空闲页占比较高时执行VACUUM回收空间
+    :return: {page_count, freelist_count, vacuumed}
+    """
+    from extensions import db
+    
+    engine = db.engine
+    if engine.dialect.name != 'sqlite':
+        return {'vacuumed': False}
+    
+    # VACUUM不能在事务中执行，使用自动提交连接
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        connection.exec_driver_sql('PRAGMA optimize')
+        page_count = connection.exec_driver_sql('PRAGMA page_count').scalar() or 0
+        freelist_count = connection.exec_driver_sql('PRAGMA freelist_count').scalar() or 0
+        vacuumed = page_count > 0 and freelist_count / page_count > VACUUM_FREELIST_RATIO
+        if vacuumed:
+            connection.exec_driver_sql('VACUUM')
+            logger.info("数据库已整理，回收%d个空闲页", freelist_count)
+    return {'page_count': page_count, 'freelist_count': freelist_count, 'vacuumed': vacuumed}
+
+
+def register_maintenance_jobs(scheduler: MaintenanceScheduler, config) -> None:
+    """
+    注册默认的维护任务
+    开启按用户分库时，过期任务清理和专注记录清理还会依次在每个分库中执行
+    :param scheduler: 调度器
+    :param config: 应用配置
+    """
+    from services.focus_stats import focus_stats_service
+    
+    archive_enabled = bool(config.get('ARCHIVE_ENABLED'))
+    purge = lambda: purge_expired_tasks(archive_enabled)
+    compact = lambda: focus_stats_service.compact(config.get('FOCUS_RETENTION_DAYS', 30))
+    if config.get('USER_SHARDING_ENABLED'):
+        from services.user_shards import user_shards
+        # 各分库的id相互独立，归档数据库按id保存，因此分库中的任务不归档
+        purge = _with_shards(purge, lambda: purge_expired_tasks(False))
+        compact = _with_shards(compact, compact)
+        scheduler.add_job('evict_idle_shards', user_shards.evict_idle,
+                          interval=max(config.get('USER_SHARD_IDLE_SECONDS', 600) / 4, 1))
+    
+    scheduler.add_job('purge_expired_tasks', purge,
+                      interval=config.get('TASK_EXPIRY_INTERVAL', 60), run_at_start=True)
+    scheduler.add_job('compact_focus_records', compact,
+                      interval=config.get('FOCUS_COMPACTION_INTERVAL', 6 * 3600), run_at_start=True)
+    scheduler.add_job('optimize_database', optimize_database, at=config.get('DB_MAINTENANCE_AT', '04:00'))
+    if archive_enabled:
+        from services.archive import archive_service
+        scheduler.add_job('archive_history',
+                          lambda: archive_service.run(config.get('ARCHIVE_AFTER_WEEKS', 12)),
+                          interval=config.get('ARCHIVE_INTERVAL', 24 * 3600), run_at_start=True)
+
+
+def _with_shards(main_func: Callable[[], int], shard_func: Callable[[], int]) -> Callable[[], int]:
+    """先在主数据库执行，再依次在每个用户分库中执行，返回处理行数的合计"""
+    def run() -> int:
+        from services.user_shards import user_shards
+        return main_func() + sum(user_shards.for_each_shard(shard_func).values())
+    return run
+
+
+# 创建全局维护任务调度器实例
+maintenance_scheduler = MaintenanceScheduler()
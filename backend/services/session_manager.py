@@ -4,6 +4,8 @@ import hashlib
 from datetime import datetime, timedelta
 from typing import Dict, Optional, Any
 
+from services.metrics import metrics_recorder
+
 
 class SessionManager:
     """
@@ -49,6 +51,7 @@ class SessionManager:
         # 创建新的requests会话
         session = requests.Session()
         session.headers.update(self.default_headers)
+        metrics_recorder.instrument_session(session)
         
         # 存储会话信息
         self.sessions[user_key] = {
@@ -62,6 +65,45 @@ class SessionManager:
         
         return user_key
     
+    def clone_session(self, user_key: str, purpose: str) -> Optional[str]:
+        """
+        复制会话（请求头和Cookie的副本）供另一个线程单独使用：requests.Session修改Cookie不是线程安全的，
+        并发请求同一系统的各个线程不能共享一个会话；复制需要在没有其他线程使用原会话时进行
+        :param user_key: 原会话的用户唯一标识
+        :param purpose: 副本用途，用于生成副本的用户标识
+        :return: 副本的用户唯一标识，原会话不存在或已过期时返回None
+        """
+        session = self.get_session(user_key)
+        if session is None:
+            return None
+        
+        source_info = self.sessions[user_key]
+        clone_key = hashlib.md5(f"{user_key}_{purpose}".encode()).hexdigest()
+        clone = requests.Session()
+        clone.headers.update(session.headers)
+        clone.cookies.update(session.cookies.copy())
+        metrics_recorder.instrument_session(clone)
+        
+        self.sessions[clone_key] = {
+            'session': clone,
+            'created_at': datetime.now(),
+            'last_used': datetime.now(),
+            'status': 'active',
+            'user_id': source_info['user_id'],
+            'buaa_id': source_info['buaa_id']
+        }
+        return clone_key
+    
+    def is_owned_by(self, user_key: str, user_id: str) -> bool:
+        """
+        会话是否属于指定用户，按用户标识访问会话的接口需要先检查，避免使用其他用户已登录的会话
+        :param user_key: 用户唯一标识
+        :param user_id: 用户ID
+        :return: 会话存在且属于该用户时返回True
+        """
+        session_info = self.sessions.get(user_key)
+        return session_info is not None and session_info['user_id'] == user_id
+    
     def get_session(self, user_key: str) -> Optional[requests.Session]:
         """
         获取会话对象
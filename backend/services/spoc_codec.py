@@ -0,0 +1,85 @@
+import base64
+import binascii
+import json
+import logging
+from typing import Any, Dict
+
+from Crypto.Cipher import AES
+from Crypto.Util.Padding import pad, unpad
+
+
+logger = logging.getLogger(__name__)
+
+BLOCK_SIZE = AES.block_size
+
+
+class SPOCPayloadCodec:
+    """
+    SPOC接口的AES-CBC载荷编解码器
+    CBC密码对象有状态（记录上一块密文），不能跨消息复用，加解密时每条消息创建一个；
+    解密后直接从字节解析JSON，不再先解码为字符串
+    """
+    
+    def __init__(self, key: bytes, iv: bytes):
+        if len(iv) != BLOCK_SIZE:
+            raise ValueError('IV长度必须为16字节')
+        self.key = key
+        self.iv = iv
+    
+    def encrypt_bytes(self, plaintext: bytes) -> bytes:
+        """PKCS7填充后AES-CBC加密"""
+        cipher = AES.new(self.key, AES.MODE_CBC, self.iv)
+        return cipher.encrypt(pad(plaintext, BLOCK_SIZE, style='pkcs7'))
+    
+    def decrypt_bytes(self, ciphertext: bytes) -> bytes:
+        """
+        AES-CBC解密并去除PKCS7填充
+        :param ciphertext: 密文，长度必须是16的倍数
+        :return: 明文；填充无效时返回未去除填充的明文
+        """
+        if len(ciphertext) % BLOCK_SIZE:
+            raise ValueError('密文长度不是16字节的整数倍')
+        
+        plaintext = AES.new(self.key, AES.MODE_CBC, self.iv).decrypt(ciphertext)
+        
+        try:
+            return unpad(plaintext, BLOCK_SIZE, style='pkcs7')
+        except ValueError as e:
+            logger.debug("去除填充失败，直接使用解密数据: %s", e)
+            return plaintext
+    
+    def encrypt(self, data: Any) -> str:
+        """
+        把数据序列化为紧凑JSON后加密，返回Base64字符串
+        :param data: 要加密的数据
+        :return: 加密后的Base64字符串
+        """
+        data_bytes = json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("加密SPOC载荷: %s", data_bytes.decode('utf-8'))
+        return base64.b64encode(self.encrypt_bytes(data_bytes)).decode('ascii')
+    
+    def decrypt(self, base64_str: str) -> Dict[str, Any]:
+        """
+        解密Base64字符串并直接从字节解析JSON
+        :param base64_str: 加密后的Base64字符串
+        :return: 解密后的数据字典，解密失败时返回空字典
+        """
+        if not base64_str:
+            logger.debug("尝试解密空字符串，返回空字典")
+            return {}
+        
+        try:
+            ciphertext = base64.b64decode(base64_str)
+            if not ciphertext:
+                logger.debug("尝试解密空的加密数据，返回空字典")
+                return {}
+            plaintext = self.decrypt_bytes(ciphertext)
+            result = json.loads(plaintext)
+        except (binascii.Error, ValueError) as e:
+            logger.warning("SPOC载荷解密失败: %s", e)
+            return {}
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("解密SPOC载荷: %s", plaintext.decode('utf-8', errors='replace'))
+        return result
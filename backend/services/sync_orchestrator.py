@@ -0,0 +1,153 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SyncStage:
+    """
+    同步流程中的一个阶段
+    :param name: 阶段名称
+    :param func: 阶段函数，参数为已完成的依赖阶段结果字典（阶段名称 -> 结果）
+    :param depends: 依赖的阶段名称
+    :param in_request_thread: 是否在调用run的线程中执行（需要数据库会话的对比、保存阶段）；否则在线程池中并发执行
+    :param allow_partial: 依赖阶段失败时是否仍然执行（只传入成功的依赖结果）
+    """
+    
+    def __init__(self, name: str, func: Callable[[Dict[str, Any]], Any], depends: Iterable[str] = (),
+                 in_request_thread: bool = False, allow_partial: bool = False):
+        self.name = name
+        self.func = func
+        self.depends = tuple(depends)
+        self.in_request_thread = in_request_thread
+        self.allow_partial = allow_partial
+
+
+class SyncOrchestrator:
+    """
+    按依赖关系（有向无环图）执行同步阶段：
+    依赖都完成的网络请求阶段在线程池中并发执行，对比、保存阶段在调用线程中执行；
+    某个阶段失败时，依赖它的阶段被跳过，其他分支照常执行并返回部分结果
+    """
+    
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max_workers
+        self.stages: Dict[str, SyncStage] = {}
+    
+    def add_stage(self, name: str, func: Callable[[Dict[str, Any]], Any], depends: Iterable[str] = (),
+                  in_request_thread: bool = False, allow_partial: bool = False) -> 'SyncOrchestrator':
+        """
+        添加阶段
+        :return: 编排器本身，便于链式调用
+        """
+        if name in self.stages:
+            raise ValueError(f"重复的同步阶段: {name}")
+        self.stages[name] = SyncStage(name, func, depends, in_request_thread, allow_partial)
+        return self
+    
+    def _validate(self) -> None:
+        """检查依赖是否存在且没有环"""
+        for stage in self.stages.values():
+            for dependency in stage.depends:
+                if dependency not in self.stages:
+                    raise ValueError(f"同步阶段 {stage.name} 依赖不存在的阶段 {dependency}")
+        
+        visiting, visited = set(), set()
+        
+        def visit(name: str) -> None:
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"同步阶段存在循环依赖: {name}")
+            visiting.add(name)
+            for dependency in self.stages[name].depends:
+                visit(dependency)
+            visiting.discard(name)
+            visited.add(name)
+        
+        for name in self.stages:
+            visit(name)
+    
+    def run(self) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+        """
+        执行所有阶段
+        :return: (成功阶段的结果, 阶段报告)，阶段报告为 阶段名称 -> {status: success/failed/skipped, started_ms, elapsed_ms, error}
+        """
+        self._validate()
+        report: Dict[str, Dict[str, Any]] = {}
+        results: Dict[str, Any] = {}
+        pending = dict(self.stages)
+        running = {}
+        run_started = time.perf_counter()
+        
+        def finish(name: str, started: float, result: Any = None, error: Optional[BaseException] = None) -> None:
+            elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+            offset_ms = round((started - run_started) * 1000, 1)
+            if error is None:
+                results[name] = result
+                report[name] = {'status': 'success', 'started_ms': offset_ms, 'elapsed_ms': elapsed_ms}
+            else:
+                logger.warning("阶段 %s 失败: %s", name, error)
+                report[name] = {'status': 'failed', 'started_ms': offset_ms, 'elapsed_ms': elapsed_ms, 'error': str(error)}
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                progressed = False
+                for name, stage in list(pending.items()):
+                    states = [report.get(dependency, {}).get('status') for dependency in stage.depends]
+                    if any(state is None for state in states):
+                        continue
+                    
+                    del pending[name]
+                    progressed = True
+                    failed = [dependency for dependency, state in zip(stage.depends, states) if state != 'success']
+                    if failed and (not stage.allow_partial or len(failed) == len(stage.depends)):
+                        report[name] = {'status': 'skipped', 'elapsed_ms': 0, 'error': f"依赖阶段未完成: {', '.join(failed)}"}
+                        continue
+                    
+                    inputs = {dependency: results[dependency] for dependency in stage.depends if dependency in results}
+                    started = time.perf_counter()
+                    if stage.in_request_thread:
+                        try:
+                            finish(name, started, result=stage.func(inputs))
+                        except Exception as e:
+                            finish(name, started, error=e)
+                    else:
+                        running[executor.submit(stage.func, inputs)] = (name, started)
+                
+                if progressed:
+                    # 在调用线程中完成的阶段可能解锁了新的阶段
+                    continue
+                
+                if not running:
+                    break
+                
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, started = running.pop(future)
+                    try:
+                        finish(name, started, result=future.result())
+                    except Exception as e:
+                        finish(name, started, error=e)
+        
+        return results, report
+
+
+def stage_summary(report: Dict[str, Dict[str, Any]]) -> Dict[str, List[str]]:
+    """
+    按状态汇总阶段名称
+    :param report: SyncOrchestrator.run返回的阶段报告
+    :return: {succeeded: [...], failed: [...], skipped: [...]}
+    """
+    summary = {'succeeded': [], 'failed': [], 'skipped': []}
+    for name, stage_report in report.items():
+        status = stage_report.get('status')
+        if status == 'success':
+            summary['succeeded'].append(name)
+        elif status == 'failed':
+            summary['failed'].append(name)
+        elif status == 'skipped':
+            summary['skipped'].append(name)
+    return summary
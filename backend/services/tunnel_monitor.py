@@ -0,0 +1,203 @@
+import json
+import logging
+import queue
+import re
+import threading
+import time
+from typing import Callable, List, Optional
+
+import requests
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# 隧道出现之前的首次重试间隔和最大重试间隔（秒），每次失败间隔翻倍
+FAST_INTERVAL = 1.0
+MAX_BACKOFF = 30.0
+# 隧道可用之后的检查间隔（秒）
+STABLE_INTERVAL = 300.0
+# 隧道进程存活检查的间隔（秒），发现进程退出时立即进入快速重试
+PROCESS_CHECK_INTERVAL = 5.0
+
+_CPOLAR_URL_PATTERN = re.compile(r'http://[a-zA-Z0-9.-]+\.cpolar\.io')
+
+
+def parse_tunnel_url(response: requests.Response) -> Optional[str]:
+    """
+    从cpolar本地API的响应中解析HTTP隧道地址
+    :param response: /api/tunnels 的响应
+    :return: 隧道地址，没有HTTP隧道时返回None
+    """
+    try:
+        tunnels_data = response.json()
+    except (json.JSONDecodeError, ValueError):
+        # JSON解析失败，尝试从HTML中提取URL
+        match = _CPOLAR_URL_PATTERN.search(response.text)
+        return match.group(0) if match else None
+    
+    # 处理不同的响应格式：{"tunnels": [...]} 或直接返回隧道列表
+    tunnels = []
+    if isinstance(tunnels_data, dict):
+        tunnels = tunnels_data.get('tunnels') or []
+    elif isinstance(tunnels_data, list):
+        tunnels = tunnels_data
+    
+    for tunnel in tunnels:
+        if isinstance(tunnel, dict):
+            proto = (tunnel.get('proto') or '').lower()
+            url = tunnel.get('url') or tunnel.get('public_url') or ''
+            if proto == 'http' and url:
+                return url
+    return None
+
+
+class TunnelMonitor:
+    """
+    cpolar隧道地址监视器
+    隧道出现之前以1秒起、每次翻倍（最多30秒）的间隔重试，找到之后每5分钟检查一次；
+    隧道进程重启（notify_restart）、进程退出或隧道消失时回到快速重试；
+    地址变化时通知订阅者（二维码缓存、SSE客户端）
+    :param api_url: cpolar本地API地址，测试时可指向本地模拟接口
+    """
+    
+    def __init__(self, api_url: Optional[str] = None, fast_interval: float = FAST_INTERVAL,
+                 max_backoff: float = MAX_BACKOFF, stable_interval: float = STABLE_INTERVAL):
+        self.api_url = api_url or Config.CPOLAR_API
+        self.fast_interval = fast_interval
+        self.max_backoff = max_backoff
+        self.stable_interval = stable_interval
+        self.current_url: Optional[str] = None
+        self._subscribers: List[Callable[[Optional[str]], None]] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._process = None
+    
+    def start(self) -> 'TunnelMonitor':
+        """启动后台监视线程（重复调用无副作用）"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name='tunnel-monitor', daemon=True)
+                self._thread.start()
+        return self
+    
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+    
+    def subscribe(self, callback: Callable[[Optional[str]], None]) -> Callable[[Optional[str]], None]:
+        """
+        订阅地址变化，回调参数为新地址（隧道消失时为None）
+        :return: 回调本身，便于之后取消订阅
+        """
+        with self._lock:
+            if callback not in self._subscribers:
+                self._subscribers.append(callback)
+        return callback
+    
+    def unsubscribe(self, callback: Callable[[Optional[str]], None]) -> None:
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+    
+    def open_stream(self) -> 'queue.Queue':
+        """
+        为一个SSE客户端创建事件队列，地址变化时放入新地址；用完后调用 close_stream
+        """
+        events: queue.Queue = queue.Queue(maxsize=16)
+        
+        def publish(url):
+            try:
+                events.put_nowait(url)
+            except queue.Full:
+                pass
+        
+        events.callback = self.subscribe(publish)
+        return events
+    
+    def close_stream(self, events: 'queue.Queue') -> None:
+        self.unsubscribe(events.callback)
+    
+    def notify_restart(self, process=None) -> None:
+        """
+        隧道进程已（重新）启动：清除旧地址并立即进入快速重试
+        :param process: 新的cpolar进程（subprocess.Popen），用于检测进程退出
+        """
+        if process is not None:
+            self._process = process
+        self._set_url(None)
+        self._wake.set()
+    
+    def refresh(self) -> Optional[str]:
+        """
+        立即查询一次隧道地址
+        :return: 当前隧道地址
+        """
+        try:
+            response = requests.get(self.api_url, timeout=5)
+            url = parse_tunnel_url(response) if response.status_code == 200 else None
+        except requests.exceptions.ConnectionError:
+            logger.debug("无法连接到cpolar API，可能服务未启动")
+            url = None
+        except requests.exceptions.RequestException as e:
+            logger.warning("查询cpolar隧道失败: %s", e)
+            url = None
+        self._set_url(url)
+        return url
+    
+    def _set_url(self, url: Optional[str]) -> None:
+        with self._lock:
+            if url == self.current_url:
+                return
+            self.current_url = url
+            subscribers = list(self._subscribers)
+        if url:
+            logger.info("cpolar隧道地址已更新: %s", url)
+        else:
+            logger.info("cpolar隧道不可用，进入快速重试")
+        for callback in subscribers:
+            try:
+                callback(url)
+            except Exception:
+                logger.exception("通知隧道地址变化失败")
+    
+    def _process_exited(self) -> bool:
+        process = self._process
+        return process is not None and process.poll() is not None
+    
+    def _run(self) -> None:
+        backoff = self.fast_interval
+        while not self._stop.is_set():
+            url = self.refresh()
+            if url:
+                backoff = self.fast_interval
+                wait = self.stable_interval
+            else:
+                wait = backoff
+                backoff = min(backoff * 2, self.max_backoff)
+            
+            # 等待期间按较短间隔检查隧道进程；被唤醒（进程重启）时立即重新查询
+            deadline = time.monotonic() + wait
+            while not self._stop.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                if self._wake.wait(min(remaining, PROCESS_CHECK_INTERVAL)):
+                    self._wake.clear()
+                    backoff = self.fast_interval
+                    break
+                if url and self._process_exited():
+                    logger.warning("cpolar进程已退出")
+                    self._process = None
+                    self._set_url(None)
+                    backoff = self.fast_interval
+                    break
+
+
+# 创建全局隧道监视器实例
+tunnel_monitor = TunnelMonitor()
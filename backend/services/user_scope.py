@@ -0,0 +1,180 @@
+import logging
+from typing import Optional
+
+from flask import current_app, g, has_app_context, jsonify, request
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session, with_loader_criteria
+
+from extensions import db
+from models.mixins import UserOwnedMixin
+from models.user import User
+
+logger = logging.getLogger(__name__)
+
+# 登录令牌的Cookie名称（EventSource、图片等无法附加请求头的请求使用Cookie）
+TOKEN_COOKIE = 'auth_token'
+# 令牌的签名盐值
+TOKEN_SALT = 'user-token'
+# 默认的令牌有效期（秒）
+DEFAULT_TOKEN_MAX_AGE = 30 * 24 * 3600
+# 多用户模式下无需登录即可访问的接口
+PUBLIC_ENDPOINTS = {'auth.login', 'auth.register', 'mobile_info', 'mobile_qr_code', 'mobile_events'}
+# 多用户模式下只有默认用户（管理员）可以访问的接口：修改整个服务的配置或查看进程级信息
+ADMIN_ENDPOINTS = {'settings.save_api_key', 'set_cpolar_authtoken', 'debug.profile_all_threads',
+                   'metrics.prometheus_metrics'}
+
+
+def current_user_id() -> Optional[int]:
+    """
+    当前请求的用户id
+    :return: 用户id，不在请求中（如后台维护任务）时返回None，此时查询不按用户过滤
+    """
+    if not has_app_context():
+        return None
+    return g.get('current_user_id')
+
+
+def _apply_user_criteria(execute_state) -> None:
+    """ORM查询执行前附加 user_id = 当前用户 的条件（包括关联查询中的别名和批量UPDATE/DELETE）"""
+    if execute_state.is_column_load or execute_state.is_relationship_load:
+        return
+    if not (execute_state.is_select or execute_state.is_update or execute_state.is_delete):
+        return
+    user_id = current_user_id()
+    if user_id is None:
+        return
+    execute_state.statement = execute_state.statement.options(
+        with_loader_criteria(UserOwnedMixin, lambda cls: cls.user_id == user_id, include_aliases=True)
+    )
+
+
+def _assign_owner(session, flush_context, instances) -> None:
+    """新增的行没有指定 user_id 时归属当前用户"""
+    user_id = current_user_id()
+    if user_id is None:
+        return
+    for instance in session.new:
+        if isinstance(instance, UserOwnedMixin) and instance.user_id is None:
+            instance.user_id = user_id
+
+
+class UserScope:
+    """
+    多用户数据隔离：请求开始时根据登录令牌确定当前用户，
+    之后该请求中的所有ORM查询自动附加当前用户的条件，新增的数据自动归属当前用户
+    未开启多用户模式时，没有令牌的请求使用默认用户（单机使用的行为不变）；
+    开启时默认用户是管理员，只有管理员可以访问 ADMIN_ENDPOINTS 中的全局设置和进程信息接口
+    """
+    
+    def __init__(self):
+        self._default_user_id: Optional[int] = None
+    
+    def init_app(self, app) -> None:
+        """
+        注册查询过滤和请求钩子，并把升级前没有归属的数据归属默认用户
+        :param app: Flask应用
+        """
+        if not event.contains(Session, 'do_orm_execute', _apply_user_criteria):
+            event.listen(Session, 'do_orm_execute', _apply_user_criteria)
+            event.listen(Session, 'before_flush', _assign_owner)
+        
+        if app.config.get('MULTI_USER_ENABLED') and app.config.get('SECRET_KEY') == 'dev-secret-key':
+            logger.warning("多用户模式使用了默认的SECRET_KEY，登录令牌可被伪造，请通过环境变量设置")
+        
+        with app.app_context():
+            self._default_user_id = None
+            self.claim_unowned_rows(self.default_user_id())
+        
+        app.before_request(self._resolve_user)
+    
+    def serializer(self) -> URLSafeTimedSerializer:
+        return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt=TOKEN_SALT)
+    
+    def issue_token(self, user_id: int) -> str:
+        """
+        签发登录令牌
+        :param user_id: 用户id
+        :return: 签名后的令牌
+        """
+        return self.serializer().dumps({'uid': user_id})
+    
+    def verify_token(self, token: str) -> Optional[int]:
+        """
+        校验登录令牌
+        :return: 用户id，令牌无效、过期或用户已删除时返回None
+        """
+        max_age = current_app.config.get('AUTH_TOKEN_MAX_AGE', DEFAULT_TOKEN_MAX_AGE)
+        try:
+            data = self.serializer().loads(token, max_age=max_age)
+        except SignatureExpired:
+            logger.debug("登录令牌已过期")
+            return None
+        except BadSignature:
+            logger.debug("登录令牌无效")
+            return None
+        user_id = data.get('uid') if isinstance(data, dict) else None
+        if user_id is None or db.session.get(User, user_id) is None:
+            logger.debug("登录令牌对应的用户不存在")
+            return None
+        return user_id
+    
+    def default_user_id(self) -> int:
+        """
+        单机使用时的默认用户（最早创建的用户，没有用户时创建 default_user）
+        :return: 用户id
+        """
+        if self._default_user_id is None:
+            user = User.query.order_by(User.id).first()
+            if user is None:
+                user = User(username='default_user')
+                db.session.add(user)
+                db.session.commit()
+            self._default_user_id = user.id
+        return self._default_user_id
+    
+    def claim_unowned_rows(self, user_id: int) -> int:
+        """
+        把 user_id 为空的数据（升级前创建的）归属指定用户
+        :return: 更新的行数
+        """
+        claimed = 0
+        for mapper in db.Model.registry.mappers:
+            model = mapper.class_
+            if not issubclass(model, UserOwnedMixin):
+                continue
+            result = db.session.execute(update(model).where(model.user_id.is_(None)).values(user_id=user_id))
+            claimed += result.rowcount or 0
+        db.session.commit()
+        if claimed:
+            logger.info("已把%d行升级前的数据归属用户 %d", claimed, user_id)
+        return claimed
+    
+    def _request_token(self) -> Optional[str]:
+        authorization = request.headers.get('Authorization', '')
+        if authorization.startswith('Bearer '):
+            return authorization[len('Bearer '):].strip()
+        return request.headers.get('X-Auth-Token') or request.cookies.get(TOKEN_COOKIE)
+    
+    def _resolve_user(self):
+        if not request.path.startswith('/api/'):
+            return None
+        
+        token = self._request_token()
+        user_id = self.verify_token(token) if token else None
+        
+        if user_id is None:
+            if current_app.config.get('MULTI_USER_ENABLED'):
+                if request.method == 'OPTIONS' or request.endpoint in PUBLIC_ENDPOINTS:
+                    return None
+                return jsonify({'error': '未登录或登录已过期'}), 401
+            user_id = self.default_user_id()
+        elif (current_app.config.get('MULTI_USER_ENABLED') and request.endpoint in ADMIN_ENDPOINTS
+              and user_id != self.default_user_id()):
+            return jsonify({'error': '只有管理员可以访问该接口'}), 403
+        g.current_user_id = user_id
+        return None
+
+
+# 创建全局用户隔离实例
+user_scope = UserScope()
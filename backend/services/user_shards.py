@@ -0,0 +1,252 @@
+import logging
+import os
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+import sqlalchemy as sa
+from flask import current_app, g
+from sqlalchemy.engine import make_url
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from extensions import RoutingSession, db
+from models.mixins import UserOwnedMixin
+from services.user_scope import current_user_id
+from utils.schema import upgrade_table
+
+logger = logging.getLogger(__name__)
+
+# 同时保持打开的分库引擎数量上限
+DEFAULT_MAX_ENGINES = 64
+# 分库引擎空闲多久（秒）后关闭
+DEFAULT_IDLE_SECONDS = 600
+
+_SHARD_FILE_PATTERN = re.compile(r'^(\d+)\.db$')
+
+
+def shard_tables() -> List[sa.Table]:
+    """保存在用户分库中的表：主数据库中属于用户的表（按外键依赖排序），用户表和归档表不分库"""
+    owned = {
+        mapper.local_table.name for mapper in db.Model.registry.mappers
+        if issubclass(mapper.class_, UserOwnedMixin) and mapper.local_table.metadata is db.metadata
+    }
+    return [table for table in db.metadata.sorted_tables if table.name in owned]
+
+
+def schema_version(tables: List[sa.Table]) -> int:
+    """
+    分库结构的版本号：表和索引DDL的校验和，保存在分库的 PRAGMA user_version 中，
+    打开分库时版本号一致则跳过迁移
+    """
+    dialect = sa.create_engine('sqlite://').dialect
+    ddl = []
+    for table in tables:
+        ddl.append(str(CreateTable(table).compile(dialect=dialect)))
+        ddl.extend(str(CreateIndex(index).compile(dialect=dialect)) for index in sorted(table.indexes, key=lambda index: index.name))
+    return zlib.crc32('\n'.join(ddl).encode('utf-8')) & 0x7fffffff
+
+
+class UserShardRouter:
+    """
+    按用户分库：请求中的当前用户确定后，属于用户的表的查询和写入路由到 instance/users/<用户id>.db
+    打开的引擎保存在LRU中，超过上限时关闭最久未使用的，空闲过久的由维护任务关闭（evict_idle）；
+    打开分库时按结构版本号自动迁移，新建分库时从主数据库迁入该用户已有的数据
+    """
+    
+    def __init__(self, shard_dir: Optional[str] = None, max_engines: int = DEFAULT_MAX_ENGINES,
+                 idle_seconds: float = DEFAULT_IDLE_SECONDS):
+        self.shard_dir = shard_dir
+        self.max_engines = max_engines
+        self.idle_seconds = idle_seconds
+        self._engines: 'OrderedDict[int, List[Any]]' = OrderedDict()  # 用户id -> [引擎, 最近使用时间]
+        self._lock = threading.RLock()
+        self._table_names = frozenset()
+        self._tables: List[sa.Table] = []
+        self._version: Optional[int] = None
+    
+    def init_app(self, app) -> Dict[int, List[str]]:
+        """
+        启用分库路由，并迁移所有已存在的分库
+        :param app: Flask应用
+        :return: {用户id: 结构变更列表}
+        """
+        self.shard_dir = self.shard_dir or app.config.get('USER_SHARD_DIR') or os.path.join(app.instance_path, 'users')
+        self.max_engines = app.config.get('USER_SHARD_MAX_ENGINES', self.max_engines)
+        self.idle_seconds = app.config.get('USER_SHARD_IDLE_SECONDS', self.idle_seconds)
+        os.makedirs(self.shard_dir, exist_ok=True)
+        self._tables = shard_tables()
+        self._table_names = frozenset(table.name for table in self._tables)
+        self._version = schema_version(self._tables)
+        RoutingSession.bind_router = self.route
+        return self.migrate_all()
+    
+    def shard_path(self, user_id: int) -> str:
+        return os.path.join(self.shard_dir, f"{int(user_id)}.db")
+    
+    def shard_user_ids(self) -> List[int]:
+        """已存在分库的用户id"""
+        if not self.shard_dir or not os.path.isdir(self.shard_dir):
+            return []
+        matches = (_SHARD_FILE_PATTERN.match(name) for name in os.listdir(self.shard_dir))
+        return sorted(int(match.group(1)) for match in matches if match)
+    
+    def route(self, mapper, clause) -> Optional[sa.engine.Engine]:
+        """
+        RoutingSession 的路由函数
+        :return: 当前用户的分库引擎，不在请求中或不是分库的表时返回None
+        """
+        user_id = current_user_id()
+        if user_id is None:
+            return None
+        if mapper is not None:
+            table = sa.inspect(mapper).local_table
+        else:
+            table = getattr(clause, 'table', None)
+        if table is None or getattr(table, 'name', None) not in self._table_names:
+            return None
+        return self.engine(user_id)
+    
+    def engine(self, user_id: int) -> sa.engine.Engine:
+        """
+        获取用户的分库引擎（不存在时创建分库）
+        :param user_id: 用户id
+        """
+        with self._lock:
+            cached = self._engines.get(user_id)
+            if cached is not None:
+                cached[1] = time.monotonic()
+                self._engines.move_to_end(user_id)
+                return cached[0]
+            
+            engine = self._open(user_id)
+            self._engines[user_id] = [engine, time.monotonic()]
+            while len(self._engines) > self.max_engines:
+                _, (evicted, _) = self._engines.popitem(last=False)
+                evicted.dispose()
+            return engine
+    
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """
+        关闭空闲超过 idle_seconds 的分库引擎
+        :return: 关闭的引擎数
+        """
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            idle = [user_id for user_id, (_, last_used) in self._engines.items() if now - last_used > self.idle_seconds]
+            for user_id in idle:
+                self._engines.pop(user_id)[0].dispose()
+        return len(idle)
+    
+    def close_all(self) -> None:
+        with self._lock:
+            while self._engines:
+                self._engines.popitem()[1][0].dispose()
+    
+    def migrate(self, engine: sa.engine.Engine) -> List[str]:
+        """
+        把一个分库迁移到当前的结构（结构版本号一致时跳过）
+        :param engine: 分库引擎
+        :return: 结构变更列表
+        """
+        with engine.connect() as connection:
+            if connection.exec_driver_sql('PRAGMA user_version').scalar() == self._version:
+                return []
+        
+        changes = []
+        for table in self._tables:
+            changes.extend(upgrade_table(engine, table))
+        db.metadata.create_all(bind=engine, tables=self._tables)
+        with engine.begin() as connection:
+            connection.exec_driver_sql(f'PRAGMA user_version = {self._version}')
+        return changes
+    
+    def migrate_all(self) -> Dict[int, List[str]]:
+        """
+        迁移所有已存在的分库（部署新版本后启动时执行）
+        :return: {用户id: 结构变更列表}，只包含有变更的分库
+        """
+        results = {}
+        for user_id in self.shard_user_ids():
+            with self._lock:
+                cached = self._engines.get(user_id)
+            engine = cached[0] if cached else sa.create_engine(f"sqlite:///{self.shard_path(user_id)}")
+            try:
+                changes = self.migrate(engine)
+            finally:
+                if not cached:
+                    engine.dispose()
+            if changes:
+                results[user_id] = changes
+        if results:
+            logger.info("已迁移%d个用户分库", len(results))
+        return results
+    
+    def for_each_shard(self, func: Callable[[], Any]) -> Dict[int, Any]:
+        """
+        依次以每个分库的用户身份执行func（在新的应用上下文中，查询路由到该用户的分库），用于维护任务
+        :return: {用户id: func的返回值}
+        """
+        app = current_app._get_current_object()
+        results = {}
+        for user_id in self.shard_user_ids():
+            with app.app_context():
+                g.current_user_id = user_id
+                results[user_id] = func()
+        return results
+    
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'shard_dir': self.shard_dir,
+                'open_engines': len(self._engines),
+                'max_engines': self.max_engines,
+                'idle_seconds': self.idle_seconds,
+                'schema_version': self._version
+            }
+    
+    def _open(self, user_id: int) -> sa.engine.Engine:
+        path = self.shard_path(user_id)
+        is_new = not os.path.exists(path)
+        engine = sa.create_engine(f"sqlite:///{path}")
+        self.migrate(engine)
+        if is_new:
+            self._import_rows(engine, user_id)
+        return engine
+    
+    def _import_rows(self, engine: sa.engine.Engine, user_id: int) -> int:
+        """新建分库时把主数据库中该用户的数据移入分库（先写入分库，再从主数据库删除）"""
+        main_engine = db.engines[None]
+        main_path = make_url(str(main_engine.url)).database
+        if main_engine.dialect.name != 'sqlite' or not main_path or not os.path.exists(main_path):
+            return 0
+        
+        imported = 0
+        with engine.connect() as connection:
+            connection.exec_driver_sql('ATTACH DATABASE ? AS main_db', (main_path,))
+            connection.commit()
+            try:
+                for table in self._tables:
+                    columns = ', '.join(f'"{column.name}"' for column in table.columns)
+                    result = connection.exec_driver_sql(
+                        f'INSERT INTO "{table.name}" ({columns}) SELECT {columns} FROM main_db."{table.name}" WHERE user_id = ?',
+                        (user_id,)
+                    )
+                    imported += result.rowcount or 0
+                connection.commit()
+            finally:
+                connection.rollback()
+                connection.exec_driver_sql('DETACH DATABASE main_db')
+        
+        if imported:
+            with main_engine.begin() as connection:
+                for table in reversed(self._tables):
+                    connection.execute(table.delete().where(table.c.user_id == user_id))
+            logger.info("已把用户 %d 的%d行数据移入分库", user_id, imported)
+        return imported
+
+
+# 创建全局用户分库路由实例
+user_shards = UserShardRouter()
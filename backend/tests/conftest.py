@@ -0,0 +1,29 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+
+from config import Config
+from extensions import db
+import models  # noqa: F401  注册所有模型
+
+
+@pytest.fixture
+def app():
+    """使用内存数据库（主数据库和归档数据库）的应用，测试函数在应用上下文中运行"""
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config.update(
+        TESTING=True,
+        SQLALCHEMY_DATABASE_URI='sqlite://',
+        SQLALCHEMY_BINDS={'archive': 'sqlite://'}
+    )
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+
+from extensions import db
+from models.archive import ArchivedEntry
+from models.entry import Entry
+from services.archive import ArchiveService
+from utils.schema import upgrade_schema
+
+NOW = datetime(2026, 10, 19, 10, 0)
+
+
+def add_entry(title, start):
+    entry = Entry(title=title, entry_type='study', start_time=start, end_time=start + timedelta(hours=1))
+    db.session.add(entry)
+    db.session.commit()
+    return entry
+
+
+def test_new_entry_does_not_reuse_archived_id_after_max_row_deleted(app):
+    old_ids = {add_entry(f'old{i}', NOW - timedelta(weeks=20, days=i)).id for i in range(3)}
+    latest = add_entry('latest', NOW)
+    latest_id = latest.id
+    service = ArchiveService()
+    
+    assert service.archive_entries(NOW - timedelta(weeks=12)) == 3
+    archived_ids = {entry.id for entry in ArchivedEntry.query.all()}
+    assert archived_ids == old_ids
+    
+    db.session.delete(latest)
+    db.session.commit()
+    assert Entry.query.count() == 0
+    
+    new_entry = add_entry('new', NOW)
+    assert new_entry.id > max(archived_ids | {latest_id})
+    # 归档的条目仍能查到，且没有被新条目覆盖
+    titles = {entry.title for entry in service.query_entries(NOW - timedelta(weeks=30), NOW + timedelta(days=1))}
+    assert titles == {'old0', 'old1', 'old2', 'new'}
+
+
+def test_archive_moves_every_old_entry_and_keeps_ids_unique(app):
+    for i in range(3):
+        add_entry(f'old{i}', NOW - timedelta(weeks=20, days=i))
+    service = ArchiveService()
+    
+    assert service.archive_entries(NOW - timedelta(weeks=12)) == 3
+    assert Entry.query.count() == 0
+    new_entry = add_entry('new', NOW)
+    assert db.session.get(ArchivedEntry, new_entry.id) is None
+
+
+def test_legacy_entries_table_is_upgraded_and_id_floor_restored(app):
+    engine = db.engines[None]
+    with engine.begin() as connection:
+        sql = connection.exec_driver_sql("SELECT sql FROM sqlite_master WHERE name = 'entries'").scalar()
+        connection.exec_driver_sql('DROP TABLE entries')
+        connection.exec_driver_sql(sql.replace('AUTOINCREMENT', ''))
+    add_entry('hot', NOW)
+    # 升级前复用id时已经移入归档的条目（id大于原表的最大id）
+    db.session.add(ArchivedEntry(id=50, title='archived', entry_type='study', start_time=NOW - timedelta(weeks=20),
+                                 end_time=NOW - timedelta(weeks=20) + timedelta(hours=1)))
+    db.session.commit()
+    
+    assert 'entries(重建)' in upgrade_schema(db)
+    ArchiveService().ensure_id_floor()
+    
+    assert [entry.title for entry in Entry.query.all()] == ['hot']
+    assert add_entry('new', NOW).id > 50
@@ -0,0 +1,47 @@
+from flask import Response, request
+
+from services.compression import init_compression, is_compressible
+
+
+SVG = '<svg xmlns="http://www.w3.org/2000/svg">' + '<rect width="1" height="1"/>' * 100 + '</svg>'
+
+
+def make_client(app):
+    app.config['COMPRESSION_MIN_SIZE'] = 0
+    
+    @app.route('/qr.svg')
+    def qr_svg():
+        response = app.response_class(SVG, mimetype='image/svg+xml')
+        response.set_etag('qr-v1')
+        return response.make_conditional(request)
+    
+    @app.route('/events')
+    def events():
+        return Response(iter(['data: 1\n\n', 'data: 2\n\n']), mimetype='text/event-stream')
+    
+    init_compression(app)
+    return app.test_client()
+
+
+def test_conditional_get_of_compressed_response_returns_304(app):
+    client = make_client(app)
+    first = client.get('/qr.svg', headers={'Accept-Encoding': 'gzip'})
+    assert first.status_code == 200
+    assert first.headers['Content-Encoding'] == 'gzip'
+    assert first.headers['ETag'] == '"qr-v1-gzip"'
+    
+    second = client.get('/qr.svg', headers={'Accept-Encoding': 'gzip', 'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 304
+    assert second.data == b''
+    # 未压缩的表示仍按原ETag判断
+    plain = client.get('/qr.svg', headers={'Accept-Encoding': 'identity', 'If-None-Match': '"qr-v1"'})
+    assert plain.status_code == 304
+
+
+def test_event_stream_is_not_compressed(app):
+    client = make_client(app)
+    response = client.get('/events', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.data == b'data: 1\n\ndata: 2\n\n'
+    assert not is_compressible('text/event-stream')
+    assert is_compressible('text/html')
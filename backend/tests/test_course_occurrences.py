@@ -0,0 +1,80 @@
+from datetime import date, datetime, time
+
+import pytest
+
+from extensions import db
+from models.course import Course
+from models.entry import Entry
+from routes.courses import courses_bp
+from routes.entries import entries_bp
+from services.course_recurrence import course_recurrence_engine, format_week_range, get_semester_start, get_week_number
+
+MONDAY = date(2026, 10, 19)
+
+
+@pytest.fixture
+def client(app):
+    app.register_blueprint(courses_bp, url_prefix='/api/courses')
+    app.register_blueprint(entries_bp, url_prefix='/api/entries')
+    return app.test_client()
+
+
+@pytest.fixture
+def course(app):
+    week = get_week_number(MONDAY)
+    course = Course(course_name='高等数学', teacher='张老师', classroom='主M101', start_time=time(8, 0),
+                    end_time=time(9, 35), day_of_week=1, week_range=format_week_range(range(week - 1, week + 2)),
+                    semester_start=get_semester_start(MONDAY))
+    db.session.add(course)
+    db.session.commit()
+    return course
+
+
+def week_entries(client):
+    response = client.get('/api/entries/range', query_string={'start_date': '2026-10-12', 'end_date': '2026-11-01'})
+    return response.get_json()['entries']
+
+
+def test_delete_occurrence_skips_only_that_day(client, course):
+    virtual_ids = {entry['id'] for entry in week_entries(client) if entry.get('virtual')}
+    assert f'course-{course.id}-2026-10-19' in virtual_ids
+    
+    assert client.delete(f'/api/courses/{course.id}/occurrences/2026-10-19').status_code == 200
+    
+    dates = sorted(entry['start_time'][:10] for entry in week_entries(client))
+    assert dates == ['2026-10-12', '2026-10-26']
+    assert client.delete(f'/api/courses/{course.id}/occurrences/2026-10-19').status_code == 404
+
+
+def test_update_occurrence_saves_it_as_an_entry(client, course):
+    response = client.put(f'/api/courses/{course.id}/occurrences/2026-10-19', json={
+        'title': '高等数学（调课）', 'start_time': '2026-10-19T10:00', 'end_time': '2026-10-19T11:35'
+    })
+    assert response.status_code == 200
+    entry_id = response.get_json()['entry']['id']
+    
+    entries = {entry['start_time']: entry for entry in week_entries(client)}
+    assert '2026-10-19T08:00:00' not in entries
+    assert entries['2026-10-19T10:00:00']['id'] == entry_id
+    assert entries['2026-10-26T08:00:00']['virtual']
+    # 修改后的这一次可以按普通条目继续修改
+    assert client.put(f'/api/entries/{entry_id}', json={'title': '改'}).status_code == 200
+    assert db.session.get(Entry, entry_id).title == '改'
+
+
+def test_occurrence_on_a_day_without_class_is_not_found(client, course):
+    assert client.delete(f'/api/courses/{course.id}/occurrences/2026-10-20').status_code == 404
+    assert client.delete(f'/api/courses/{course.id}/occurrences/2026-1-x').status_code == 400
+
+
+def test_course_expands_only_inside_its_own_term(app):
+    course = Course(course_name='高等数学', teacher='张老师', classroom='主M101', start_time=time(8, 0),
+                    end_time=time(9, 35), day_of_week=1, week_range='1-16', semester_start=get_semester_start(MONDAY))
+    db.session.add(course)
+    db.session.commit()
+    
+    assert course_recurrence_engine.occurs_on(course, MONDAY)
+    # 之后学期的同一周次不再出现
+    for later_monday in (date(2027, 3, 1), date(2028, 10, 2)):
+        assert not course_recurrence_engine.occurs_on(course, later_monday)
+        assert course_recurrence_engine.expand([course], later_monday, later_monday) == []
@@ -0,0 +1,113 @@
+import json
+import os
+from datetime import date, datetime, time
+
+from extensions import db
+from models.course import Course
+from services.buaa_api import parse_term_schedule_data
+from services.course_recurrence import get_semester_start
+from services.course_sync import COURSE_SOURCE_SYNC, reconcile_term_courses
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+TERM_START = get_semester_start(date(2026, 10, 19))
+NEXT_TERM_START = get_semester_start(date(2027, 4, 1))
+
+
+def term_item(name, teacher='张老师', building='主', room='M101', start='08:00', end='09:35', weekday=1, weeks='1-16'):
+    return {'kcmc': name, 'jsxm': teacher, 'jxlh': building, 'jash': room, 'kssj': start, 'jssj': end,
+            'xqj': weekday, 'zcd': weeks}
+
+
+def add_course(name, teacher='张老师', classroom='主M101', weekday=1, weeks='1-16', source=None, **fields):
+    fields.setdefault('semester_start', TERM_START)
+    course = Course(course_name=name, teacher=teacher, classroom=classroom, start_time=time(8, 0), end_time=time(9, 35),
+                    day_of_week=weekday, week_range=weeks, source=source, **fields)
+    db.session.add(course)
+    db.session.commit()
+    return course
+
+
+def test_manual_courses_are_kept(app):
+    manual = add_course('读书会', teacher='自己', classroom='宿舍', weekday=3)
+    stale = add_course('已退课', weekday=2, source=COURSE_SOURCE_SYNC)
+    stale_id = stale.id
+    
+    result = reconcile_term_courses([term_item('高等数学')], TERM_START, remove_stale=True)
+    db.session.commit()
+    
+    assert result == {'added': 1, 'updated': 0, 'unchanged': 0, 'removed': 1, 'stale': 0}
+    assert db.session.get(Course, manual.id) is not None
+    assert db.session.get(Course, stale_id) is None
+
+
+def test_legacy_course_matching_the_timetable_is_adopted(app):
+    # 升级前保存的课程没有记录学期，按创建时间所在的学期对比
+    legacy = add_course('高等数学', semester_start=None, created_at=datetime(2026, 10, 1))
+    
+    result = reconcile_term_courses([term_item('高等数学', weeks='1-8')], TERM_START)
+    db.session.commit()
+    
+    assert result['updated'] == 1 and result['added'] == 0
+    assert legacy.source == COURSE_SOURCE_SYNC
+    assert legacy.semester_start == TERM_START
+    assert legacy.week_range == '1-8'
+
+
+def test_courses_of_other_terms_are_not_reconciled(app):
+    previous = add_course('高等数学', source=COURSE_SOURCE_SYNC)
+    
+    result = reconcile_term_courses([term_item('线性代数')], NEXT_TERM_START)
+    db.session.commit()
+    
+    assert result == {'added': 1, 'updated': 0, 'unchanged': 0, 'removed': 0, 'stale': 0}
+    assert db.session.get(Course, previous.id) is not None
+    assert Course.query.filter_by(course_name='线性代数').one().semester_start == NEXT_TERM_START
+
+
+def test_synced_course_with_different_text_format_is_updated_in_place(app):
+    day_synced = add_course('高等数学', teacher='张老师 ', classroom='主楼M101', source=COURSE_SOURCE_SYNC,
+                            skipped_weeks='5')
+    
+    result = reconcile_term_courses([term_item('高等数学')], TERM_START)
+    db.session.commit()
+    
+    assert result == {'added': 0, 'updated': 1, 'unchanged': 0, 'removed': 0, 'stale': 0}
+    assert Course.query.count() == 1
+    assert (day_synced.teacher, day_synced.classroom, day_synced.skipped_weeks) == ('张老师', '主M101', '5')
+
+
+def load_term_fixture():
+    """
+    学期课表接口响应（datas字段）的固定样例
+    该样例按解析器目前假定的字段名构造，不是录制的真实响应；拿到真实响应后应替换此文件并据此调整解析器，
+    在此之前 TERM_SYNC_REMOVE_STALE 保持关闭，同步不会据此删除课程
+    """
+    with open(os.path.join(FIXTURES_DIR, 'term_schedule_assumed.json'), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_parse_term_schedule_fixture():
+    courses, adjusted_dates = parse_term_schedule_data(load_term_fixture())
+    
+    assert [(course['kcmc'], course['jsxm'], course['jxlh'], course['jash'], course['kssj'], course['jssj'],
+             course['xqj'], course['zcd']) for course in courses] == [
+        ('高等数学（上）', '张三、李四', '主楼', 'M101', '08:00', '09:35', 1, '1-8,10,12,14,16'),
+        ('大学物理', '王五', '新主楼', 'F201', '14:00', '15:35', 3, '1,3,5,7,9,11,13,15')
+    ]
+    assert adjusted_dates == {'2026-10-19', '2026-10-24', '2026-11-04'}
+
+
+def test_stale_courses_are_kept_unless_removal_is_enabled(app):
+    stale = add_course('已退课', weekday=2, source=COURSE_SOURCE_SYNC)
+    courses, _ = parse_term_schedule_data(load_term_fixture())
+    
+    result = reconcile_term_courses(courses, TERM_START)
+    db.session.commit()
+    assert result == {'added': 2, 'updated': 0, 'unchanged': 0, 'removed': 0, 'stale': 1}
+    assert db.session.get(Course, stale.id) is not None
+    
+    result = reconcile_term_courses(courses, TERM_START, remove_stale=True)
+    db.session.commit()
+    assert result == {'added': 0, 'updated': 0, 'unchanged': 2, 'removed': 1, 'stale': 0}
+    assert Course.query.filter_by(course_name='已退课').first() is None
@@ -0,0 +1,105 @@
+from datetime import datetime
+
+import pytest
+from flask import g
+
+from extensions import db
+from models.focus_record import FocusRecord
+from models.focus_rollup import FocusRollup
+from routes.schedule import schedule_bp
+from services.focus_stats import focus_stats_service
+from services.user_scope import user_scope
+
+
+@pytest.fixture
+def client(app):
+    app.register_blueprint(schedule_bp, url_prefix='/api/schedule')
+    user_scope.init_app(app)
+    return app.test_client()
+
+
+def save_focus(client, task_title, start, minutes):
+    start_time = datetime.fromisoformat(start)
+    response = client.post('/api/schedule/save_focus_record', json={
+        'task_title': task_title,
+        'duration': minutes * 60,
+        'start_time': start_time.isoformat(),
+        'end_time': start_time.replace(minute=start_time.minute + minutes).isoformat()
+    })
+    assert response.status_code == 201
+
+
+def rollups():
+    return {(row.user_id, row.day.isoformat(), row.task_title): (row.total_seconds, row.session_count)
+            for row in FocusRollup.query.all()}
+
+
+def test_record_accumulates_per_user_day_and_task(client):
+    save_focus(client, '数据结构', '2026-10-19T08:00', 25)
+    save_focus(client, '数据结构', '2026-10-19T09:00', 30)
+    save_focus(client, '英语', '2026-10-19T10:00', 10)
+    save_focus(client, '数据结构', '2026-10-20T08:00', 20)
+    
+    user_id = user_scope.default_user_id()
+    assert rollups() == {
+        (user_id, '2026-10-19', '数据结构'): (55 * 60, 2),
+        (user_id, '2026-10-19', '英语'): (10 * 60, 1),
+        (user_id, '2026-10-20', '数据结构'): (20 * 60, 1),
+    }
+    
+    # 汇总与专注记录在同一事务中，回滚后都不保存
+    g.current_user_id = user_id
+    record = FocusRecord(task_title='英语', duration=600, start_time=datetime(2026, 10, 19, 11),
+                         end_time=datetime(2026, 10, 19, 11, 10))
+    db.session.add(record)
+    focus_stats_service.record(record)
+    db.session.rollback()
+    assert FocusRecord.query.count() == 4
+    assert rollups()[(user_id, '2026-10-19', '英语')] == (10 * 60, 1)
+
+
+def test_backfill_runs_only_once(client):
+    user_id = user_scope.default_user_id()
+    for hour in (8, 9):
+        db.session.add(FocusRecord(user_id=user_id, task_title='数据结构', duration=1500,
+                                   start_time=datetime(2026, 10, 19, hour), end_time=datetime(2026, 10, 19, hour, 25)))
+    db.session.commit()
+    
+    assert focus_stats_service.backfill() == 1
+    assert rollups() == {(user_id, '2026-10-19', '数据结构'): (3000, 2)}
+    # 已有汇总时不再重复生成
+    assert focus_stats_service.backfill() == 0
+    assert rollups() == {(user_id, '2026-10-19', '数据结构'): (3000, 2)}
+
+
+def test_compact_keeps_rollups(client):
+    save_focus(client, '数据结构', '2026-09-01T08:00', 25)
+    save_focus(client, '数据结构', '2026-10-19T08:00', 30)
+    
+    assert focus_stats_service.compact(30, now=datetime(2026, 10, 20)) == 1
+    assert [record.start_time.date().isoformat() for record in FocusRecord.query.all()] == ['2026-10-19']
+    body = client.get('/api/schedule/focus_stats?from=2026-09-01&to=2026-10-19&group_by=task').get_json()
+    assert body['stats'] == [{'key': '数据结构', 'total_seconds': 55 * 60, 'session_count': 2}]
+
+
+def test_focus_stats_grouping_and_validation(client):
+    save_focus(client, '数据结构', '2026-10-19T08:00', 25)  # 周一
+    save_focus(client, '英语', '2026-10-21T08:00', 40)
+    save_focus(client, '数据结构', '2026-10-26T08:00', 10)  # 下一周
+    query = '/api/schedule/focus_stats?from=2026-10-19&to=2026-10-31'
+    
+    by_day = client.get(f'{query}&group_by=day').get_json()
+    assert [group['key'] for group in by_day['stats']] == ['2026-10-19', '2026-10-21', '2026-10-26']
+    assert by_day['total_seconds'] == 75 * 60 and by_day['session_count'] == 3
+    
+    by_week = client.get(f'{query}&group_by=week').get_json()
+    assert [(group['key'], group['total_seconds']) for group in by_week['stats']] == [
+        ('2026-10-19', 65 * 60), ('2026-10-26', 10 * 60)
+    ]
+    
+    by_task = client.get(f'{query}&group_by=task').get_json()
+    assert [(group['key'], group['session_count']) for group in by_task['stats']] == [('英语', 1), ('数据结构', 2)]
+    
+    assert client.get('/api/schedule/focus_stats?from=2026-13-01').status_code == 400
+    assert client.get('/api/schedule/focus_stats?from=2026-10-20&to=2026-10-19').status_code == 400
+    assert client.get('/api/schedule/focus_stats?group_by=month').status_code == 400
@@ -0,0 +1,84 @@
+from datetime import datetime
+
+from extensions import db
+from models.task import Task
+from services.homework_sync import SPOC_ID_PREFIX, homework_external_id, sync_homework_pages
+
+
+def homework(homework_id, name, deadline='2026-10-30 23:59:00', course='数据结构'):
+    return {'zyid': homework_id, 'kcmc': course, 'zymc': name, 'zyjzsj': deadline, 'zyxq': ''}
+
+
+def pages(*page_lists):
+    return [{'page': index + 1, 'list': items, 'elapsed': 0.01} for index, items in enumerate(page_lists)]
+
+
+def sync(*page_lists):
+    result = sync_homework_pages(pages(*page_lists)).result
+    db.session.commit()
+    return result
+
+
+def snapshot():
+    return sorted((task.external_id, task.title, task.deadline, task.completed) for task in Task.query.all())
+
+
+HOMEWORKS = [
+    [homework('1', '作业一'), homework('2', '作业二')],
+    [homework('3', '作业三'), homework('2', '作业二')],  # 翻页时同一作业可能重复出现
+]
+
+
+def test_resync_of_the_same_pages_changes_nothing(app):
+    first = sync(*HOMEWORKS)
+    assert first['created'] == 3
+    before = snapshot()
+    
+    second = sync(*HOMEWORKS)
+    
+    assert second == {'total': 4, 'created': 0, 'updated': 0, 'unchanged': 3, 'completed': 0, 'skipped': 0}
+    assert snapshot() == before
+
+
+def test_missing_homework_is_completed_and_changed_deadline_updated(app):
+    sync(*HOMEWORKS)
+    
+    result = sync([homework('1', '作业一', deadline='2026-11-02 23:59:00'), homework('2', '作业二')])
+    
+    assert (result['updated'], result['unchanged'], result['completed'], result['created']) == (1, 1, 1, 0)
+    tasks = {task.external_id: task for task in Task.query.all()}
+    assert tasks[f'{SPOC_ID_PREFIX}1'].deadline == datetime(2026, 11, 2, 23, 59)
+    assert tasks[f'{SPOC_ID_PREFIX}3'].completed
+    assert not tasks[f'{SPOC_ID_PREFIX}2'].completed
+    # 已完成的作业不会在之后的同步中重复计数
+    assert sync([homework('1', '作业一', deadline='2026-11-02 23:59:00'), homework('2', '作业二')])['completed'] == 0
+
+
+def test_legacy_task_synced_by_title_is_adopted(app):
+    legacy = Task(title='数据结构+作业一', task_type='homework', deadline=datetime(2026, 10, 30, 23, 59))
+    db.session.add(legacy)
+    db.session.commit()
+    
+    result = sync([homework('1', '作业一')])
+    
+    assert (result['created'], result['unchanged']) == (0, 1)
+    assert Task.query.count() == 1
+    assert legacy.external_id == f'{SPOC_ID_PREFIX}1'
+
+
+def test_homework_without_id_gets_a_stable_external_id(app):
+    item = homework(None, '实验报告')
+    assert homework_external_id(item) == homework_external_id(dict(item))
+    
+    sync([item])
+    result = sync([item])
+    
+    assert (result['created'], result['unchanged']) == (0, 1)
+    assert Task.query.count() == 1
+
+
+def test_homework_without_deadline_is_skipped(app):
+    result = sync([homework('9', '无截止时间', deadline='')])
+    
+    assert result['skipped'] == 1
+    assert Task.query.count() == 0
@@ -0,0 +1,68 @@
+import io
+
+import pytest
+import requests
+from requests.structures import CaseInsensitiveDict
+from urllib3 import HTTPHeaderDict, HTTPResponse
+
+from routes.courses import courses_bp
+from services.proxy_cache import course_schedule_proxy, filter_response_headers
+
+
+def upstream_response(status, headers, body=b'{}'):
+    """构造与 stream=True 请求相同的上游响应"""
+    raw_headers = HTTPHeaderDict()
+    for name, value in headers:
+        raw_headers.add(name, value)
+    response = requests.Response()
+    response.status_code = status
+    response.raw = HTTPResponse(body=io.BytesIO(body), headers=raw_headers, status=status, preload_content=False)
+    response.headers = CaseInsensitiveDict(raw_headers)
+    return response
+
+
+@pytest.fixture
+def client(app, monkeypatch):
+    app.register_blueprint(courses_bp, url_prefix='/api/courses')
+    upstream_calls = []
+    
+    def fake_request(url, headers, cookies):
+        upstream_calls.append(url)
+        return responses.pop(0)
+    
+    responses = []
+    monkeypatch.setattr(course_schedule_proxy, '_request', fake_request)
+    course_schedule_proxy.invalidate()
+    yield app.test_client(), responses, upstream_calls
+    course_schedule_proxy.invalidate()
+
+
+def test_pass_through_response_keeps_set_cookie(client):
+    client, responses, _ = client
+    responses.append(upstream_response(302, [
+        ('Location', 'https://sso.buaa.edu.cn/login'),
+        ('Set-Cookie', 'JSESSIONID=abc; Path=/; Expires=Wed, 21 Oct 2026 07:28:00 GMT'),
+        ('Set-Cookie', 'route=1; Path=/'),
+        ('Connection', 'keep-alive'),
+        ('Keep-Alive', 'timeout=5'),
+    ]))
+    
+    response = client.get('/api/courses/fetch_course_schedule?date=2026-10-19')
+    assert response.status_code == 302
+    assert response.headers.getlist('Set-Cookie') == [
+        'JSESSIONID=abc; Path=/; Expires=Wed, 21 Oct 2026 07:28:00 GMT', 'route=1; Path=/'
+    ]
+    assert 'Keep-Alive' not in response.headers
+
+
+def test_cached_response_never_carries_set_cookie(client):
+    client, responses, upstream_calls = client
+    responses.append(upstream_response(200, [('Content-Type', 'application/json')], b'{"datas": []}'))
+    
+    first = client.get('/api/courses/fetch_course_schedule?date=2026-10-20', headers={'Cookie': 'GS_SESSIONID=u1'})
+    second = client.get('/api/courses/fetch_course_schedule?date=2026-10-20', headers={'Cookie': 'GS_SESSIONID=u1'})
+    assert first.get_json() == second.get_json() == {'datas': []}
+    assert len(upstream_calls) == 1
+    
+    headers = [('Content-Type', 'application/json'), ('Set-Cookie', 'a=1'), ('Connection', 'close')]
+    assert filter_response_headers(HTTPHeaderDict(headers)) == [('Content-Type', 'application/json')]
@@ -0,0 +1,20 @@
+from datetime import datetime
+
+from services.quick_parser import DEFAULT_MIN_CONFIDENCE, QuickParser
+
+NOW = datetime(2026, 10, 19, 10, 0)
+
+
+def test_parse_confident_applies_the_threshold():
+    parser = QuickParser()
+    result = parser.parse('明天下午3点在主M101开组会', NOW)
+    assert result.confidence >= DEFAULT_MIN_CONFIDENCE
+    assert parser.parse_confident('明天下午3点在主M101开组会', NOW).to_dict() == result.to_dict()
+    # 阈值由调用方传入（接口使用 QUICK_PARSER_MIN_CONFIDENCE）
+    assert parser.parse_confident('明天下午3点在主M101开组会', NOW, min_confidence=result.confidence + 0.01) is None
+
+
+def test_unparsable_or_ambiguous_text_falls_through():
+    parser = QuickParser()
+    assert parser.parse_confident('', NOW) is None
+    assert parser.parse_confident('帮我安排一下这周的复习计划', NOW) is None
@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from extensions import db
+from models.archive import ArchivedTask
+from models.task import Task
+from models.user import User
+from services.scheduler import Job, MaintenanceScheduler, purge_expired_tasks, register_maintenance_jobs
+from services.user_scope import current_user_id, user_scope
+
+
+@pytest.fixture
+def scheduler(app, tmp_path):
+    """已启动的调度器（不注册立即执行的任务），测试结束后释放文件锁"""
+    scheduler = MaintenanceScheduler()
+    assert scheduler.start(app, lock_path=str(tmp_path / 'scheduler.lock'))
+    yield scheduler
+    scheduler._file_lock._file.close()
+
+
+def add_task(title, deadline, user_id=None, completed=False):
+    task = Task(title=title, task_type='homework', deadline=deadline, completed=completed, user_id=user_id)
+    db.session.add(task)
+    db.session.commit()
+    return task.id
+
+
+def test_interval_and_daily_jobs_are_scheduled():
+    now = datetime(2026, 10, 19, 10, 0)
+    job = Job('interval', lambda: None, interval=60)
+    job.schedule_next(now, first=True)
+    assert job.next_run == now + timedelta(seconds=60)
+    job = Job('at_start', lambda: None, interval=60, run_at_start=True)
+    job.schedule_next(now, first=True)
+    assert job.next_run == now
+    
+    # 当天的时刻已过时顺延到第二天
+    job = Job('daily', lambda: None, at='04:00')
+    job.schedule_next(now)
+    assert job.next_run == datetime(2026, 10, 20, 4, 0)
+    job.schedule_next(datetime(2026, 10, 20, 3, 59))
+    assert job.next_run == datetime(2026, 10, 20, 4, 0)
+    
+    with pytest.raises(ValueError):
+        Job('both', lambda: None, interval=60, at='04:00')
+    
+    scheduler = MaintenanceScheduler()
+    register_maintenance_jobs(scheduler, {'ARCHIVE_ENABLED': True, 'TASK_EXPIRY_INTERVAL': 30})
+    jobs = {job['name']: job for job in scheduler.status()}
+    assert set(jobs) == {'purge_expired_tasks', 'compact_focus_records', 'optimize_database', 'archive_history'}
+    assert jobs['purge_expired_tasks']['interval'] == 30
+    assert jobs['optimize_database']['at'] == '04:00'
+
+
+def test_only_one_scheduler_holds_the_file_lock(app, scheduler, tmp_path):
+    other = MaintenanceScheduler()
+    assert not other.start(app, lock_path=str(tmp_path / 'scheduler.lock'))
+    assert other._thread is None
+    # 同一个调度器重复启动不受影响
+    assert scheduler.start(app, lock_path=str(tmp_path / 'scheduler.lock'))
+
+
+def test_purge_archives_completed_tasks_first(app):
+    now = datetime.now()
+    done = add_task('已完成', now - timedelta(days=1), completed=True)
+    add_task('未完成', now - timedelta(days=1))
+    future = add_task('未到期', now + timedelta(days=1))
+    
+    assert purge_expired_tasks(archive_completed=True) == 1
+    assert [task.id for task in Task.query.all()] == [future]
+    assert [task.id for task in ArchivedTask.query.all()] == [done]
+    
+    add_task('已完成2', now - timedelta(days=1), completed=True)
+    assert purge_expired_tasks(archive_completed=False) == 1
+    assert ArchivedTask.query.count() == 1
+
+
+def test_jobs_run_outside_requests_and_touch_every_users_rows(app, scheduler):
+    user_scope.init_app(app)
+    alice, bob = User(username='alice'), User(username='bob')
+    db.session.add_all([alice, bob])
+    db.session.commit()
+    now = datetime.now()
+    add_task('alice过期', now - timedelta(days=1), user_id=alice.id)
+    add_task('bob过期', now - timedelta(days=1), user_id=bob.id)
+    kept = add_task('bob未到期', now + timedelta(days=1), user_id=bob.id)
+    
+    # 任务在调度器的应用上下文中执行，不属于任何请求，因此没有当前用户，查询和删除不按用户过滤
+    job = scheduler.add_job('purge', lambda: (current_user_id(), purge_expired_tasks()), interval=3600)
+    assert scheduler.run_job(job) == (None, 2)
+    assert [task.id for task in Task.query.all()] == [kept]
@@ -0,0 +1,31 @@
+import base64
+
+from Crypto.Cipher import AES
+from Crypto.Util.Padding import pad
+
+from services.spoc_codec import SPOCPayloadCodec
+
+
+AES_KEY = b'inco12345678ocni'
+AES_IV = b'ocni12345678inco'
+
+
+def test_round_trip_matches_standard_cbc():
+    codec = SPOCPayloadCodec(AES_KEY, AES_IV)
+    payload = {'total': 2, 'list': [{'zymc': '第1次作业'}, {'zymc': '第2次作业' * 200}]}
+    encrypted = codec.encrypt(payload)
+    
+    plaintext = AES.new(AES_KEY, AES.MODE_CBC, AES_IV).decrypt(base64.b64decode(encrypted))
+    assert plaintext.startswith(b'{"total":2')
+    assert codec.decrypt(encrypted) == payload
+
+
+def test_invalid_payloads_decrypt_to_empty_dict():
+    codec = SPOCPayloadCodec(AES_KEY, AES_IV)
+    assert codec.decrypt('') == {}
+    assert codec.decrypt('not base64!') == {}
+    # 长度不是16的整数倍
+    assert codec.decrypt(base64.b64encode(b'x' * 15).decode('ascii')) == {}
+    # 解密结果不是JSON
+    cipher = AES.new(AES_KEY, AES.MODE_CBC, AES_IV)
+    assert codec.decrypt(base64.b64encode(cipher.encrypt(pad(b'plain', 16))).decode('ascii')) == {}
@@ -0,0 +1,68 @@
+import json
+import os
+import threading
+
+import pytest
+
+from models.course import Course
+from routes.sync import sync_bp
+from services.buaa_api import buaa_api_client
+from services.session_manager import global_session_manager
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+@pytest.fixture
+def client(app):
+    app.register_blueprint(sync_bp, url_prefix='/api/sync')
+    yield app.test_client()
+    global_session_manager.sessions.clear()
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """模拟北航接口，记录每个接口使用的会话"""
+    with open(os.path.join(FIXTURES_DIR, 'term_schedule_assumed.json'), encoding='utf-8') as f:
+        term_data = json.load(f)
+    calls = {'term': [], 'day': [], 'exams': []}
+    lock = threading.Lock()
+    
+    def record(name, user_key):
+        with lock:
+            calls[name].append((user_key, id(global_session_manager.get_session(user_key))))
+    
+    def fetch_term_schedule(user_key, term_code):
+        record('term', user_key)
+        return {'need_login': False, 'data': term_data}
+    
+    def fetch_course_schedule(user_key, date_str):
+        record('day', user_key)
+        return {'need_login': False, 'data': {'data': []}}
+    
+    def fetch_exam_schedule(user_key, date_str):
+        record('exams', user_key)
+        return {'need_login': False, 'data': {'exams': []}}
+    
+    monkeypatch.setattr(buaa_api_client, 'check_login_status', lambda user_key: (True, None))
+    monkeypatch.setattr(buaa_api_client, 'fetch_term_schedule', fetch_term_schedule)
+    monkeypatch.setattr(buaa_api_client, 'fetch_course_schedule', fetch_course_schedule)
+    monkeypatch.setattr(buaa_api_client, 'fetch_exam_schedule', fetch_exam_schedule)
+    return calls
+
+
+def test_sync_all_uses_term_timetable_and_separate_sessions(client, upstream):
+    response = client.post('/api/sync/all', json={'buaa_id': '20230001', 'date': '2026-10-19', 'include_spoc': False})
+    body = response.get_json()
+    
+    assert response.status_code == 200 and body['status'] == 'success'
+    assert body['courses']['courses']['added'] == 2
+    assert Course.query.count() == 2
+    # 只按天获取有调课/停课的日期
+    assert len(upstream['day']) == 3
+    
+    # 课表阶段依次使用登录的会话，考试阶段使用会话副本，同步结束后副本被销毁
+    (course_key, course_session), = set(upstream['term'] + upstream['day'])
+    (exam_key, exam_session), = upstream['exams']
+    assert exam_key != course_key and exam_session != course_session
+    assert global_session_manager.get_session(exam_key) is None
+    assert global_session_manager.get_session(course_key) is not None
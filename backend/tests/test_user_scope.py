@@ -0,0 +1,126 @@
+from datetime import datetime
+
+import pytest
+from flask import g
+
+from extensions import db
+from models.entry import Entry
+from models.user import User
+from routes.auth import auth_bp
+from routes.courses import courses_bp
+from routes.entries import entries_bp
+from routes.settings import settings_bp
+from services.buaa_api import buaa_api_client
+from services.session_manager import global_session_manager
+from services.user_scope import user_scope
+
+
+@pytest.fixture
+def client(app):
+    app.config['MULTI_USER_ENABLED'] = True
+    app.register_blueprint(auth_bp, url_prefix='/api/auth')
+    app.register_blueprint(courses_bp, url_prefix='/api/courses')
+    app.register_blueprint(entries_bp, url_prefix='/api/entries')
+    app.register_blueprint(settings_bp, url_prefix='/api/settings')
+    user_scope.init_app(app)
+    return app.test_client()
+
+
+def without_user():
+    """测试客户端的请求复用测试的应用上下文，断言前清除请求设置的当前用户，查询不按用户过滤"""
+    g.pop('current_user_id', None)
+
+
+def add_entry(client, headers, title):
+    response = client.post('/api/entries/', json={
+        'title': title, 'entry_type': 'other', 'start_time': '2026-10-19T08:00', 'end_time': '2026-10-19T09:00'
+    }, headers=headers)
+    assert response.status_code == 201
+    return response.get_json()['entry']['id']
+
+
+def register(client, username):
+    response = client.post('/api/auth/register', json={'username': username, 'password': 'secret'})
+    assert response.status_code == 201
+    body = response.get_json()
+    return body['user']['id'], {'Authorization': f"Bearer {body['token']}"}
+
+
+def test_buaa_session_is_not_shared_between_users(client, monkeypatch):
+    # 已登录的会话中有登录Cookie
+    monkeypatch.setattr(buaa_api_client, 'check_login_status',
+                        lambda user_key: (global_session_manager.get_session(user_key).cookies.get('CASTGC') == 'a', None))
+    alice_id, _ = register(client, 'alice')
+    _, bob_headers = register(client, 'bob')
+    alice_key = global_session_manager.create_session(str(alice_id), '20230001')
+    global_session_manager.get_session(alice_key).cookies.set('CASTGC', 'a')
+    
+    try:
+        # 其他用户只提供学号不能复用已登录的会话
+        response = client.post('/api/courses/sync_buaa_term', json={'buaa_id': '20230001'}, headers=bob_headers)
+        assert response.status_code == 401
+        assert client.post('/api/courses/check_login', json={'user_key': alice_key}, headers=bob_headers).status_code == 404
+        assert client.post('/api/courses/destroy_session', json={'user_key': alice_key}, headers=bob_headers).status_code == 404
+        assert global_session_manager.get_session(alice_key) is not None
+    finally:
+        global_session_manager.sessions.clear()
+
+
+def test_users_cannot_see_each_others_rows(client):
+    alice_id, alice_headers = register(client, 'alice')
+    bob_id, bob_headers = register(client, 'bob')
+    alice_entry = add_entry(client, alice_headers, 'alice的日程')
+    bob_entry = add_entry(client, bob_headers, 'bob的日程')
+    
+    titles = [entry['title'] for entry in client.get('/api/entries/', headers=bob_headers).get_json()['entries']]
+    assert titles == ['bob的日程']
+    assert client.put(f'/api/entries/{alice_entry}', json={'title': '改'}, headers=bob_headers).status_code == 404
+    assert client.delete(f'/api/entries/{alice_entry}', headers=bob_headers).status_code == 404
+    
+    # 新增的行归属创建它的用户
+    without_user()
+    assert db.session.get(Entry, alice_entry).title == 'alice的日程'
+    assert {entry.id: entry.user_id for entry in Entry.query.all()} == {alice_entry: alice_id, bob_entry: bob_id}
+
+
+def test_unowned_rows_are_claimed(client):
+    without_user()
+    legacy = Entry(title='升级前的日程', entry_type='other', start_time=datetime(2026, 10, 19, 8),
+                   end_time=datetime(2026, 10, 19, 9))
+    db.session.add(legacy)
+    db.session.commit()
+    assert legacy.user_id is None
+    
+    default_user_id = user_scope.default_user_id()
+    assert user_scope.claim_unowned_rows(default_user_id) >= 1
+    db.session.refresh(legacy)
+    assert legacy.user_id == default_user_id
+
+
+def test_login_is_required_except_public_endpoints(client):
+    assert client.get('/api/entries/').status_code == 401
+    # 登录接口无需令牌，密码错误与未登录区分
+    response = client.post('/api/auth/login', json={'username': 'nobody', 'password': 'x'})
+    assert response.status_code == 401
+    assert response.get_json()['error'] == '用户名或密码错误'
+    assert client.get('/api/entries/', headers={'Authorization': 'Bearer forged'}).status_code == 401
+
+
+def test_token_of_deleted_user_is_rejected(client):
+    alice_id, alice_headers = register(client, 'alice')
+    assert client.get('/api/entries/', headers=alice_headers).status_code == 200
+    
+    without_user()
+    db.session.delete(db.session.get(User, alice_id))
+    db.session.commit()
+    assert client.get('/api/entries/', headers=alice_headers).status_code == 401
+
+
+def test_admin_endpoints_are_forbidden_for_other_users(client):
+    _, bob_headers = register(client, 'bob')
+    admin_headers = {'Authorization': f"Bearer {user_scope.issue_token(user_scope.default_user_id())}"}
+    
+    response = client.post('/api/settings/api_key', json={}, headers=bob_headers)
+    assert response.status_code == 403
+    # 管理员可以访问（缺少参数时由接口本身返回400）
+    assert client.post('/api/settings/api_key', json={}, headers=admin_headers).status_code == 400
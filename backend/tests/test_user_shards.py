@@ -0,0 +1,113 @@
+import time
+from datetime import datetime
+
+import pytest
+import sqlalchemy as sa
+from flask import Flask, g
+
+from config import Config
+from extensions import RoutingSession, db
+from models.entry import Entry
+from services.user_shards import UserShardRouter
+
+
+@pytest.fixture
+def router(tmp_path):
+    """使用临时实例目录（主数据库为文件）并启用分库路由的应用"""
+    app = Flask(__name__, instance_path=str(tmp_path))
+    app.config.from_object(Config)
+    app.config.update(
+        TESTING=True,
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'main.db'}",
+        SQLALCHEMY_BINDS={'archive': f"sqlite:///{tmp_path / 'archive.db'}"},
+        USER_SHARD_DIR=str(tmp_path / 'users')
+    )
+    db.init_app(app)
+    router = UserShardRouter()
+    with app.app_context():
+        db.create_all()
+        router.init_app(app)
+        yield router
+        db.session.remove()
+        RoutingSession.bind_router = None
+        router.close_all()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def add_entry(title, user_id=None):
+    db.session.add(Entry(title=title, entry_type='study', user_id=user_id,
+                         start_time=datetime(2026, 10, 19, 8), end_time=datetime(2026, 10, 19, 9)))
+    db.session.commit()
+
+
+def titles(engine):
+    with engine.connect() as connection:
+        return sorted(connection.exec_driver_sql('SELECT title FROM entries').scalars())
+
+
+def as_user(user_id):
+    db.session.remove()
+    if user_id is None:
+        g.pop('current_user_id', None)
+    else:
+        g.current_user_id = user_id
+
+
+def test_rows_are_routed_to_the_current_users_shard(router):
+    as_user(1)
+    add_entry('用户1的日程')
+    as_user(2)
+    add_entry('用户2的日程')
+    assert [entry.title for entry in Entry.query.all()] == ['用户2的日程']
+    
+    assert titles(router.engine(1)) == ['用户1的日程']
+    assert titles(router.engine(2)) == ['用户2的日程']
+    assert titles(db.engines[None]) == []
+    assert router.shard_user_ids() == [1, 2]
+    # 不在请求中（没有当前用户）时使用主数据库
+    as_user(None)
+    assert Entry.query.all() == []
+
+
+def test_existing_rows_move_out_of_the_main_database(router):
+    as_user(None)
+    add_entry('升级前1', user_id=1)
+    add_entry('升级前2', user_id=2)
+    
+    as_user(1)
+    assert [entry.title for entry in Entry.query.all()] == ['升级前1']
+    assert titles(db.engines[None]) == ['升级前2']
+
+
+def test_migrate_is_skipped_when_user_version_matches(router, tmp_path):
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'shard.db'}")
+    db.metadata.create_all(bind=engine, tables=router._tables)
+    with engine.begin() as connection:
+        connection.exec_driver_sql('ALTER TABLE entries DROP COLUMN color')
+    
+    assert 'entries.color' in router.migrate(engine)
+    assert router.migrate(engine) == []
+    # 版本号一致时不检查表结构
+    with engine.begin() as connection:
+        connection.exec_driver_sql('ALTER TABLE entries DROP COLUMN color')
+    assert router.migrate(engine) == []
+    with engine.begin() as connection:
+        connection.exec_driver_sql('PRAGMA user_version = 0')
+    assert router.migrate(engine) == ['entries.color']
+    engine.dispose()
+
+
+def test_engines_are_evicted_by_lru_and_idle_time(router):
+    router.max_engines = 2
+    first = router.engine(1)
+    second = router.engine(2)
+    assert router.engine(1) is first
+    router.engine(3)  # 超过上限，关闭最久未使用的2
+    assert router.status()['open_engines'] == 2
+    assert router.engine(1) is first
+    assert router.engine(2) is not second
+    
+    assert router.evict_idle(now=time.monotonic() + router.idle_seconds + 1) == 2
+    assert router.status()['open_engines'] == 0
+    assert router.engine(1) is not first
@@ -0,0 +1,128 @@
+import atexit
+import logging
+import os
+import queue
+import re
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, Optional
+
+
+# 默认较安静的模块：这些模块在每次请求中都会输出大量调试日志（完整响应、加解密载荷等）
+DEFAULT_MODULE_LEVELS = {
+    'services.buaa_api': 'WARNING',
+    'services.spoc_codec': 'WARNING',
+    'urllib3': 'WARNING',
+}
+
+LOG_FORMAT = '%(asctime)s %(levelname)s [%(threadName)s] %(name)s: %(message)s'
+
+# 需要脱敏的内容：Cookie和Authorization请求头、会话Cookie、登录令牌和密码
+_REDACT_PATTERNS = [
+    # Cookie / Set-Cookie 头部整体脱敏
+    (re.compile(r"(?i)((?:set-)?cookie['\"]?\s*[:=]\s*['\"]?)[^'\"\n]+"), r'\1***'),
+    # Authorization 头部整体脱敏，以及其他位置出现的 Bearer 令牌
+    (re.compile(r"(?i)(authorization['\"]?\s*[:=]\s*['\"]?)[^'\"\n]+"), r'\1***'),
+    (re.compile(r"(?i)\b(bearer\s+)[\w.~+/=-]+"), r'\1***'),
+    # 会话Cookie和令牌的值，如 CASTGC=xxx、'JSESSIONID': 'xxx'、token=xxx、X-Auth-Token: xxx、auth_token=xxx
+    (re.compile(r"(?i)\b((?:CASTGC|JSESSIONID|MOD_AUTH_CAS|_WEU|GS_SESSIONID|[\w-]*token)['\"]?\s*[:=]\s*['\"]?)[^'\";,&\s}]+"), r'\1***'),
+    # 密码字段，如 password=xxx、"password": "xxx"
+    (re.compile(r"(?i)\b((?:password|passwd|pwd)['\"]?\s*[:=]\s*['\"]?)[^'\";,&\s}]+"), r'\1***'),
+]
+
+_listener: Optional[QueueListener] = None
+
+
+def redact(text: str) -> str:
+    """
+    对日志文本脱敏
+    :param text: 原始文本
+    :return: 脱敏后的文本
+    """
+    for pattern, replacement in _REDACT_PATTERNS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+class RedactingFilter(logging.Filter):
+    """在写出日志前对消息脱敏，运行在后台写日志线程中，不占用请求线程的时间"""
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        message = record.getMessage()
+        redacted = redact(message)
+        if redacted != message:
+            record.msg = redacted
+            record.args = None
+        if record.exc_text:
+            record.exc_text = redact(record.exc_text)
+        return True
+
+
+def parse_module_levels(value: Optional[str]) -> Dict[str, str]:
+    """
+    解析按模块配置的日志级别
+    :param value: 形如 "services.buaa_api=DEBUG,routes.llm=INFO" 的字符串
+    :return: 模块名称 -> 级别名称
+    """
+    levels = {}
+    for item in (value or '').split(','):
+        if '=' not in item:
+            continue
+        name, level = item.split('=', 1)
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging(config) -> None:
+    """
+    配置应用日志：请求线程只把日志记录放入队列，由后台线程格式化、脱敏并写到控制台和滚动日志文件
+    重复调用时不会重复添加处理器
+    :param config: Flask配置（app.config）
+    """
+    global _listener
+    
+    root = logging.getLogger()
+    root.setLevel(config.get('LOG_LEVEL', 'INFO').upper())
+    
+    module_levels = dict(DEFAULT_MODULE_LEVELS)
+    module_levels.update(parse_module_levels(config.get('LOG_LEVELS')))
+    for name, level in module_levels.items():
+        logging.getLogger(name).setLevel(level)
+    
+    if _listener is not None:
+        return
+    
+    formatter = logging.Formatter(LOG_FORMAT)
+    redacting_filter = RedactingFilter()
+    
+    console_handler = logging.StreamHandler()
+    handlers = [console_handler]
+    
+    log_dir = config.get('LOG_DIR')
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+        handlers.append(RotatingFileHandler(
+            os.path.join(log_dir, 'app.log'),
+            maxBytes=config.get('LOG_MAX_BYTES', 5 * 1024 * 1024),
+            backupCount=config.get('LOG_BACKUP_COUNT', 5),
+            encoding='utf-8'
+        ))
+    
+    for handler in handlers:
+        handler.setFormatter(formatter)
+        handler.addFilter(redacting_filter)
+    
+    log_queue = queue.Queue(-1)
+    root.addHandler(QueueHandler(log_queue))
+    
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """停止后台写日志线程，写出队列中剩余的日志"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -1,87 +1,45 @@
 import qrcode
+import qrcode.image.svg
 import os
+import hashlib
 from PIL import Image
 from io import BytesIO
 import base64
 import socket
 import time
 import threading
-import requests
-import json
 
 class QRCodeGenerator:
     """
     二维码生成器，用于生成手机访问地址的二维码
     """
-    # 类变量存储当前的cpolar域名
+    # 类变量存储当前的cpolar域名（由隧道监视器更新）
     current_cpolar_url = None
-    # 刷新间隔（秒）
-    REFRESH_INTERVAL = 300  # 5分钟刷新一次
-    # cpolar本地API地址
-    CPOLAR_API = "http://localhost:4040/api/tunnels"
+    # 本机IP的缓存时间（秒），探测IP需要创建UDP套接字，而IP很少变化
+    LOCAL_IP_TTL = 30
+    # 二维码缓存的最大条目数（按访问地址缓存）
+    QR_CACHE_SIZE = 16
+    
+    _local_ip_cache = (None, 0.0)
+    _qr_png_cache = {}
+    _qr_svg_cache = {}
+    # 最近一次的手机访问信息及其对应的地址
+    _info_cache = (None, None)
+    _cache_lock = threading.Lock()
     
     @classmethod
     def start_cpolar_refresh(cls):
         """
-        启动cpolar域名自动刷新线程
+        启动cpolar隧道监视器，隧道地址变化时更新 current_cpolar_url
         """
-        def refresh_cpolar_url():
-            # 线程启动后，先等待15秒，给cpolar服务足够的启动时间
-            wait_time = 15
-            print(f"[QRCode] cpolar域名刷新线程已启动，等待{wait_time}秒后开始首次刷新...")
-            time.sleep(wait_time)
-            
-            while True:
-                try:
-                    # 尝试获取cpolar隧道信息
-                    print(f"[QRCode] 正在刷新cpolar域名...")
-                    response = requests.get(cls.CPOLAR_API, timeout=5)
-                    
-                    if response.status_code == 200:
-                        try:
-                            # 尝试解析JSON响应
-                            tunnels_data = response.json()
-                            
-                            # 处理不同的响应格式
-                            tunnels = []
-                            if isinstance(tunnels_data, dict):
-                                # 格式1: {"tunnels": [...], ...}
-                                if 'tunnels' in tunnels_data:
-                                    tunnels = tunnels_data['tunnels']
-                            elif isinstance(tunnels_data, list):
-                                # 格式2: 直接返回隧道列表
-                                tunnels = tunnels_data
-                            
-                            # 查找HTTP隧道
-                            for tunnel in tunnels:
-                                if isinstance(tunnel, dict):
-                                    proto = tunnel.get('proto', '').lower()
-                                    url = tunnel.get('url', '')
-                                    if proto == 'http' and url:
-                                        # 找到HTTP隧道，更新cpolar域名
-                                        cls.current_cpolar_url = url
-                                        print(f"[QRCode] 已更新cpolar域名: {cls.current_cpolar_url}")
-                                        break
-                        except json.JSONDecodeError:
-                            # JSON解析失败，尝试从HTML中提取URL
-                            import re
-                            url_pattern = r'http://[a-zA-Z0-9.-]+\.cpolar\.io'
-                            match = re.search(url_pattern, response.text)
-                            if match:
-                                url = match.group(0)
-                                cls.current_cpolar_url = url
-                                print(f"[QRCode] 已从HTML中提取cpolar域名: {cls.current_cpolar_url}")
-                except requests.exceptions.ConnectionError:
-                    print(f"[QRCode] 无法连接到cpolar API，可能服务未启动")
-                except Exception as e:
-                    print(f"[QRCode] 刷新cpolar域名失败: {str(e)}")
-                
-                # 等待指定间隔后再次刷新
-                time.sleep(cls.REFRESH_INTERVAL)
+        from services.tunnel_monitor import tunnel_monitor
         
-        # 启动刷新线程
-        thread = threading.Thread(target=refresh_cpolar_url, daemon=True)
-        thread.start()
+        tunnel_monitor.subscribe(cls._update_cpolar_url)
+        tunnel_monitor.start()
+    
+    @classmethod
+    def _update_cpolar_url(cls, url):
+        cls.current_cpolar_url = url
     
     @staticmethod
     def get_local_ip():
@@ -98,49 +56,118 @@ class QRCodeGenerator:
             print(f"获取本地IP地址失败: {e}")
             return '127.0.0.1'
     
+    @classmethod
+    def get_cached_local_ip(cls):
+        """
+        获取本机IP，LOCAL_IP_TTL秒内复用上次的结果
+        """
+        local_ip, resolved_at = cls._local_ip_cache
+        now = time.monotonic()
+        if local_ip is None or now - resolved_at > cls.LOCAL_IP_TTL:
+            local_ip = cls.get_local_ip()
+            cls._local_ip_cache = (local_ip, now)
+        return local_ip
+    
+    @staticmethod
+    def _make_qr(url, image_factory=None):
+        qr = qrcode.QRCode(
+            version=1,
+            error_correction=qrcode.constants.ERROR_CORRECT_L,
+            box_size=10,
+            border=4,
+            image_factory=image_factory,
+        )
+        qr.add_data(url)
+        qr.make(fit=True)
+        return qr.make_image(fill_color="black", back_color="white")
+    
+    @classmethod
+    def _cached(cls, cache, url, build):
+        """从按地址缓存的字典中取值，不存在时生成并写入"""
+        data = cache.get(url)
+        if data is None:
+            data = build()
+            with cls._cache_lock:
+                if len(cache) >= cls.QR_CACHE_SIZE:
+                    cache.clear()
+                cache[url] = data
+        return data
+    
+    @classmethod
+    def get_qr_png(cls, url):
+        """
+        获取地址对应的二维码PNG（按地址缓存）
+        :return: PNG字节
+        """
+        def build():
+            buffer = BytesIO()
+            cls._make_qr(url).save(buffer, format="PNG")
+            return buffer.getvalue()
+        
+        return cls._cached(cls._qr_png_cache, url, build)
+    
+    @classmethod
+    def get_qr_svg(cls, url):
+        """
+        获取地址对应的二维码SVG（按地址缓存）
+        :return: SVG字节
+        """
+        def build():
+            buffer = BytesIO()
+            cls._make_qr(url, qrcode.image.svg.SvgPathImage).save(buffer)
+            return buffer.getvalue()
+        
+        return cls._cached(cls._qr_svg_cache, url, build)
+    
     @staticmethod
-    def generate_qr_code(url):
+    def qr_etag(url):
+        """
+        二维码的ETag，只取决于编码的地址
+        """
+        return hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+    
+    @classmethod
+    def generate_qr_code(cls, url):
         """
         生成二维码图片
         """
         try:
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=10,
-                border=4,
-            )
-            qr.add_data(url)
-            qr.make(fit=True)
-            
-            img = qr.make_image(fill_color="black", back_color="white")
-            
-            buffer = BytesIO()
-            img.save(buffer, format="PNG")
-            img_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-            
+            img_base64 = base64.b64encode(cls.get_qr_png(url)).decode('utf-8')
             return f"data:image/png;base64,{img_base64}"
         except Exception as e:
             print(f"生成二维码失败: {e}")
             return None
     
+    @classmethod
+    def get_mobile_url(cls, port=5000):
+        """
+        获取当前的手机访问地址，有cpolar域名时优先使用
+        :return: (手机访问地址, 局域网访问地址, 本机IP)
+        """
+        local_ip = cls.get_cached_local_ip()
+        local_mobile_url = f"http://{local_ip}:{port}/mobile"
+        if cls.current_cpolar_url:
+            return f"{cls.current_cpolar_url}/mobile", local_mobile_url, local_ip
+        return local_mobile_url, local_mobile_url, local_ip
+    
     @classmethod
     def get_mobile_access_info(cls, port=5000):
         """
         获取手机访问信息，包括IP地址和二维码
+        结果按访问地址缓存，只有本机IP或cpolar域名变化时才重新生成
         """
-        local_ip = cls.get_local_ip()
+        mobile_url, local_mobile_url, local_ip = cls.get_mobile_url(port)
+        cache_key = (mobile_url, local_mobile_url, cls.current_cpolar_url)
+        cached_key, cached_info = cls._info_cache
+        if cached_key == cache_key:
+            return cached_info
         
-        # 生成访问地址
-        local_mobile_url = f"http://{local_ip}:{port}/mobile"
-        mobile_url = local_mobile_url
         cpolar_url = None
         cpolar_status = "unavailable"
         
         # 如果有cpolar域名，优先使用
         if cls.current_cpolar_url:
             cpolar_url = cls.current_cpolar_url
-            mobile_url = f"{cpolar_url}/mobile"
             cpolar_status = "available"
         
         # 生成故障排查信息
@@ -162,8 +189,9 @@ class QRCodeGenerator:
         
         # 生成二维码
         qr_code = cls.generate_qr_code(mobile_url)
+        qr_version = cls.qr_etag(mobile_url)
         
-        return {
+        info = {
             'local_ip': local_ip,
             'port': port,
             'mobile_url': mobile_url,
@@ -171,8 +199,12 @@ class QRCodeGenerator:
             'cpolar_url': cpolar_url,
             'cpolar_status': cpolar_status,
             'qr_code': qr_code,
+            'qr_code_url': f"/api/mobile/qr.png?v={qr_version}",
+            'qr_code_svg_url': f"/api/mobile/qr.svg?v={qr_version}",
             'troubleshooting': troubleshooting
         }
+        cls._info_cache = (cache_key, info)
+        return info
     
     @classmethod
     def restart_cpolar_service(cls):
@@ -203,7 +235,7 @@ class QRCodeGenerator:
                     subprocess.run(['pkill', '-f', 'cpolar'], capture_output=True, text=True)
                 
                 # 重新启动cpolar服务
-                subprocess.Popen(
+                process = subprocess.Popen(
                     [cpolar_path, 'http', '5000'],
                     stdout=None,
                     stderr=None,
@@ -214,8 +246,9 @@ class QRCodeGenerator:
                 
                 print(f"[QRCode] 已重启cpolar服务")
                 
-                # 清除当前cpolar域名，触发重新获取
-                cls.current_cpolar_url = None
+                # 清除当前cpolar域名，隧道监视器立即开始快速重试
+                from services.tunnel_monitor import tunnel_monitor
+                tunnel_monitor.notify_restart(process)
             else:
                 print(f"[QRCode] 未找到cpolar可执行文件: {cpolar_path}")
         except Exception as e:
@@ -226,45 +259,6 @@ class QRCodeGenerator:
         """
         立即刷新一次cpolar域名
         """
-        try:
-            # 尝试获取cpolar隧道信息
-            response = requests.get(cls.CPOLAR_API, timeout=5)
-            
-            if response.status_code == 200:
-                try:
-                    # 尝试解析JSON响应
-                    tunnels_data = response.json()
-                    
-                    # 处理不同的响应格式
-                    tunnels = []
-                    if isinstance(tunnels_data, dict):
-                        # 格式1: {"tunnels": [...], ...}
-                        if 'tunnels' in tunnels_data:
-                            tunnels = tunnels_data['tunnels']
-                    elif isinstance(tunnels_data, list):
-                        # 格式2: 直接返回隧道列表
-                        tunnels = tunnels_data
-                    
-                    # 查找HTTP隧道
-                    for tunnel in tunnels:
-                        if isinstance(tunnel, dict):
-                            proto = tunnel.get('proto', '').lower()
-                            url = tunnel.get('url', '')
-                            if proto == 'http' and url:
-                                # 找到HTTP隧道，更新cpolar域名
-                                cls.current_cpolar_url = url
-                                print(f"[QRCode] 已更新cpolar域名: {cls.current_cpolar_url}")
-                                break
-                except json.JSONDecodeError:
-                    # JSON解析失败，尝试从HTML中提取URL
-                    import re
-                    url_pattern = r'http://[a-zA-Z0-9.-]+\.cpolar\.io'
-                    match = re.search(url_pattern, response.text)
-                    if match:
-                        url = match.group(0)
-                        cls.current_cpolar_url = url
-                        print(f"[QRCode] 已从HTML中提取cpolar域名: {cls.current_cpolar_url}")
-        except requests.exceptions.ConnectionError:
-            print(f"[QRCode] 无法连接到cpolar API，可能服务未启动")
-        except Exception as e:
-            print(f"[QRCode] 刷新cpolar域名失败: {str(e)}")
\ No newline at end of file
+        from services.tunnel_monitor import tunnel_monitor
+        
+        tunnel_monitor.refresh()
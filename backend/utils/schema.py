@@ -0,0 +1,105 @@
+import logging
+
+from sqlalchemy import UniqueConstraint, inspect, text
+
+
+logger = logging.getLogger(__name__)
+
+
+def upgrade_schema(db):
+    """
+    为已存在的数据库补充模型中新增的列和索引
+    db.create_all()只会创建缺少的表，不会修改已有的表，因此新增的可空列和索引需要在这里补齐
+    唯一约束或AUTOINCREMENT发生变化的表（SQLite不支持修改）按新结构重建并复制数据
+    :param db: SQLAlchemy实例
+    :return: 新增的列和索引名称列表
+    """
+    changes = []
+    for bind_key, metadata in db.metadatas.items():
+        engine = db.engines[bind_key]
+        for table in metadata.sorted_tables:
+            changes.extend(upgrade_table(engine, table))
+    
+    if changes:
+        logger.info("数据库结构已升级: %s", ', '.join(changes))
+    return changes
+
+
+def upgrade_table(engine, table):
+    """
+    为一个已存在的表补充缺少的列和索引，唯一约束或AUTOINCREMENT变化时重建（表不存在时不做任何修改）
+    :param engine: 表所在数据库的引擎
+    :param table: 模型中的表定义
+    :return: 新增的列和索引名称列表
+    """
+    inspector = inspect(engine)
+    if not inspector.has_table(table.name):
+        return []
+    changes = []
+    
+    # 补充缺少的列（SQLite只支持添加可空或有默认值的列）
+    existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+    for column in table.columns:
+        if column.name in existing_columns:
+            continue
+        column_type = column.type.compile(dialect=engine.dialect)
+        with engine.begin() as connection:
+            connection.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'))
+        changes.append(f"{table.name}.{column.name}")
+    
+    if engine.dialect.name == 'sqlite' and (_unique_constraints_changed(engine, table) or _autoincrement_missing(engine, table)):
+        _rebuild_table(engine, inspector, table)
+        changes.append(f"{table.name}(重建)")
+        return changes
+    
+    # 补充缺少的索引
+    existing_indexes = {index['name'] for index in inspect(engine).get_indexes(table.name)}
+    for index in table.indexes:
+        if index.name in existing_indexes:
+            continue
+        index.create(bind=engine, checkfirst=True)
+        changes.append(index.name)
+    return changes
+
+
+def _unique_constraints_changed(engine, table):
+    expected = {
+        tuple(column.name for column in constraint.columns)
+        for constraint in table.constraints if isinstance(constraint, UniqueConstraint)
+    }
+    expected |= {(column.name,) for column in table.columns if column.unique}
+    # 通过PRAGMA读取，包括列定义中的UNIQUE（origin为u的索引即唯一约束）
+    existing = set()
+    with engine.connect() as connection:
+        for index in connection.exec_driver_sql(f'PRAGMA index_list("{table.name}")').mappings():
+            if index['origin'] == 'u':
+                columns = connection.exec_driver_sql(f'PRAGMA index_info("{index["name"]}")').mappings()
+                existing.add(tuple(column['name'] for column in sorted(columns, key=lambda column: column['seqno'])))
+    return expected != existing
+
+
+def _autoincrement_missing(engine, table):
+    """模型声明了 sqlite_autoincrement 而已有的表没有（只在建表语句中，需要重建）"""
+    if not table.dialect_options['sqlite'].get('autoincrement'):
+        return False
+    with engine.connect() as connection:
+        sql = connection.exec_driver_sql(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table.name,)
+        ).scalar()
+    return 'AUTOINCREMENT' not in (sql or '').upper()
+
+
+def _rebuild_table(engine, inspector, table):
+    """按模型重新创建表并复制共有列的数据（旧表的索引随旧表删除，新表的索引由create创建）"""
+    columns = ', '.join(f'"{column.name}"' for column in table.columns)
+    old_name = f"_{table.name}_old"
+    with engine.begin() as connection:
+        # 不让其它表的外键跟随改名指向旧表
+        connection.exec_driver_sql('PRAGMA legacy_alter_table = ON')
+        for index in inspector.get_indexes(table.name):
+            connection.exec_driver_sql(f'DROP INDEX IF EXISTS "{index["name"]}"')
+        connection.exec_driver_sql(f'ALTER TABLE "{table.name}" RENAME TO "{old_name}"')
+        table.create(bind=connection)
+        connection.exec_driver_sql(f'INSERT INTO "{table.name}" ({columns}) SELECT {columns} FROM "{old_name}"')
+        connection.exec_driver_sql(f'DROP TABLE "{old_name}"')
+        connection.exec_driver_sql('PRAGMA legacy_alter_table = OFF')
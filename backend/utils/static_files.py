@@ -0,0 +1,204 @@
+import gzip
+import logging
+import mimetypes
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+from flask import abort, current_app, request, send_file
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # brotli为可选依赖，未安装时只提供gzip
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# 值得压缩的文本类文件（音频、图片等本身已压缩，直接发送并支持Range）
+COMPRESSIBLE_EXTENSIONS = {'.html', '.js', '.mjs', '.css', '.svg', '.json', '.map', '.txt', '.xml'}
+# 小于该大小的文件压缩收益不大
+MIN_COMPRESS_SIZE = 1024
+# 超过该大小的文件不放入内存
+MAX_CACHED_SIZE = 8 * 1024 * 1024
+# 带内容哈希的构建产物（/assets）可永久缓存
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# index.html 每次都向服务器确认（ETag未变时返回304）
+NO_CACHE_CONTROL = 'no-cache'
+
+# 编码名称 -> 构建时预压缩文件的后缀
+ENCODING_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+
+def _compress(data: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _available_encodings():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+class _CachedFile:
+    """一个文件在内存中的原始内容及各压缩版本"""
+    
+    def __init__(self, path: str, mtime: float, size: int, variants: Dict[str, bytes]):
+        self.path = path
+        self.mtime = mtime
+        self.size = size
+        self.variants = variants
+        self.etag = f"{int(mtime * 1000):x}-{size:x}"
+        self.mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+
+class StaticFileCache:
+    """
+    前端静态文件缓存：文本类文件连同gzip/brotli压缩版本保存在内存中，文件修改时间变化时重新加载；
+    其它文件（mp3、图片）交给send_file，支持ETag和Range请求
+    优先使用构建时生成的 .br/.gz 文件（见 precompress），否则在首次访问或预热时压缩
+    """
+    
+    def __init__(self):
+        self._files: Dict[str, _CachedFile] = {}
+        self._lock = threading.Lock()
+    
+    def _load(self, path: str, stat: os.stat_result) -> _CachedFile:
+        with open(path, 'rb') as f:
+            data = f.read()
+        variants = {'identity': data}
+        if len(data) >= MIN_COMPRESS_SIZE:
+            for encoding in _available_encodings():
+                precompressed = path + ENCODING_SUFFIXES[encoding]
+                try:
+                    if os.stat(precompressed).st_mtime >= stat.st_mtime:
+                        with open(precompressed, 'rb') as f:
+                            variants[encoding] = f.read()
+                        continue
+                except OSError:
+                    pass
+                variants[encoding] = _compress(data, encoding)
+        return _CachedFile(path, stat.st_mtime, stat.st_size, variants)
+    
+    def get(self, path: str) -> Optional[_CachedFile]:
+        """
+        获取缓存的文件，不存在时返回None，文件已修改时重新加载
+        :param path: 文件绝对路径
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        cached = self._files.get(path)
+        if cached is not None and cached.mtime == stat.st_mtime and cached.size == stat.st_size:
+            return cached
+        cached = self._load(path, stat)
+        with self._lock:
+            self._files[path] = cached
+        return cached
+    
+    def warm(self, directory: str) -> int:
+        """
+        预先加载并压缩目录下的文本类文件
+        :param directory: 目录
+        :return: 加载的文件数
+        """
+        count = 0
+        for root, _, filenames in os.walk(directory):
+            for filename in filenames:
+                path = os.path.join(root, filename)
+                if self._cacheable(path):
+                    self.get(path)
+                    count += 1
+        logger.info("已预加载 %d 个静态文件: %s", count, directory)
+        return count
+    
+    @staticmethod
+    def _cacheable(path: str) -> bool:
+        if os.path.splitext(path)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+            return False
+        try:
+            return os.path.getsize(path) <= MAX_CACHED_SIZE
+        except OSError:
+            return False
+    
+    def serve_file(self, path: str, cache_control: str):
+        """
+        发送文件，根据 Accept-Encoding 选择压缩版本
+        :param path: 文件绝对路径
+        :param cache_control: Cache-Control 响应头
+        """
+        if not self._cacheable(path):
+            if not os.path.isfile(path):
+                abort(404)
+            # send_file 在 conditional=True 时处理 If-None-Match 和 Range（音频拖动进度）
+            response = send_file(path, conditional=True)
+            response.headers['Cache-Control'] = cache_control
+            return response
+        
+        cached = self.get(path)
+        if cached is None:
+            abort(404)
+        
+        encoding = 'identity'
+        for candidate in _available_encodings():
+            if candidate in cached.variants and request.accept_encodings[candidate]:
+                encoding = candidate
+                break
+        
+        response = current_app.response_class(cached.variants[encoding], mimetype=cached.mimetype)
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+            response.set_etag(f"{cached.etag}-{encoding}")
+        else:
+            response.set_etag(cached.etag)
+        response.vary.add('Accept-Encoding')
+        response.headers['Cache-Control'] = cache_control
+        return response.make_conditional(request)
+    
+    def serve(self, directory: str, filename: str, cache_control: str):
+        """
+        发送目录下的文件（防止路径穿越）
+        :param directory: 目录
+        :param filename: 相对路径
+        :param cache_control: Cache-Control 响应头
+        """
+        path = safe_join(directory, filename)
+        if path is None:
+            abort(404)
+        return self.serve_file(path, cache_control)
+
+
+def precompress(directory: str) -> Tuple[int, int]:
+    """
+    构建后在产物旁生成 .gz（以及安装了brotli时的 .br）文件，启动时直接读取，无需现场压缩
+    :param directory: 前端构建目录，如 frontend/dist
+    :return: (处理的文件数, 生成的压缩文件数)
+    """
+    files = written = 0
+    for root, _, filenames in os.walk(directory):
+        for filename in filenames:
+            path = os.path.join(root, filename)
+            if os.path.splitext(filename)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+                continue
+            with open(path, 'rb') as f:
+                data = f.read()
+            if len(data) < MIN_COMPRESS_SIZE:
+                continue
+            files += 1
+            for encoding in _available_encodings():
+                with open(path + ENCODING_SUFFIXES[encoding], 'wb') as f:
+                    f.write(_compress(data, encoding))
+                written += 1
+    return files, written
+
+
+# 全局静态文件缓存实例
+static_file_cache = StaticFileCache()
+
+
+if __name__ == '__main__':
+    import sys
+    
+    target = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(__file__), '..', '..', 'frontend', 'dist')
+    print('已预压缩 %d 个文件，生成 %d 个压缩文件' % precompress(target))
@@ -7,10 +7,28 @@ const api = axios.create({
   withCredentials: true
 })
 
+// 多用户模式的登录令牌（登录接口同时写入Cookie，SSE等无法附加请求头的请求使用Cookie）
+const TOKEN_KEY = 'authToken'
+const AUTH_FORM_URLS = ['/auth/login', '/auth/register']
+
+export const getAuthToken = () => localStorage.getItem(TOKEN_KEY)
+
+export const setAuthToken = (token) => {
+  if (token) {
+    localStorage.setItem(TOKEN_KEY, token)
+  } else {
+    localStorage.removeItem(TOKEN_KEY)
+  }
+}
+
 // 请求拦截器
 api.interceptors.request.use(
   config => {
-    // 这里可以添加认证token
+    // 附加登录令牌
+    const token = getAuthToken()
+    if (token) {
+      config.headers.Authorization = `Bearer ${token}`
+    }
     return config
   },
   error => {
@@ -24,12 +42,27 @@ api.interceptors.response.use(
     return response.data
   },
   error => {
+    // 多用户模式下未登录或令牌过期：清除令牌并通知页面显示登录框
+    // （北航登录失效的401响应使用message字段，登录接口本身的401是密码错误，都不需要重新登录）
+    const url = error.config?.url || ''
+    if (error.response?.status === 401 && error.response.data?.error && !AUTH_FORM_URLS.includes(url)) {
+      setAuthToken(null)
+      window.dispatchEvent(new CustomEvent('auth-required'))
+    }
     return Promise.reject(error)
   }
 )
 
 // 认证相关API
 export const authAPI = {
+  // 登录（多用户模式），返回令牌和用户信息
+  login: (data) => api.post('/auth/login', data),
+  // 注册（多用户模式），返回令牌和用户信息
+  register: (data) => api.post('/auth/register', data),
+  // 退出登录
+  logout: () => api.post('/auth/logout'),
+  // 获取当前用户信息
+  getCurrentUser: (signal) => api.get('/auth/me', { signal }),
   // 设置北航学号
   setBuaaId: (data, signal) => api.post('/auth/buaa_id', data, { signal }),
   // 获取北航学号
@@ -60,6 +93,10 @@ export const coursesAPI = {
   updateCourse: (id, data) => api.put(`/courses/${id}`, data),
   // 删除课程
   deleteCourse: (id) => api.delete(`/courses/${id}`),
+  // 修改某一天的课程（保存为普通条目，该周不再显示课程）
+  updateCourseOccurrence: (courseId, date, data) => api.put(`/courses/${courseId}/occurrences/${date}`, data),
+  // 删除某一天的课程（只删除这一次）
+  deleteCourseOccurrence: (courseId, date) => api.delete(`/courses/${courseId}/occurrences/${date}`),
   // 同步北航课程表（使用当前日期）
   syncBuaaCourses: (data) => api.post('/courses/sync_buaa', data),
   // 按指定日期同步北航课程表
@@ -113,7 +150,9 @@ export const scheduleAPI = {
   // 保存专注记录
   saveFocusRecord: (data) => api.post('/schedule/save_focus_record', data),
   // 获取专注历史记录
-  getFocusHistory: () => api.get('/schedule/get_focus_history')
+  getFocusHistory: () => api.get('/schedule/get_focus_history'),
+  // 获取专注统计（groupBy: day/week/task）
+  getFocusStats: (from, to, groupBy = 'day') => api.get('/schedule/focus_stats', { params: { from, to, group_by: groupBy } })
 }
 
 // API_KEY相关API